@@ -0,0 +1,75 @@
+# ----------------------------------------------------------------------
+# bench_ast.py
+#
+# Size and build time of the AST: node count, bytes per node (the nodes
+# themselves plus the field lists they own), the bytes of the distinct
+# identifier objects (shared atoms.Atom objects) the nodes refer to, and
+# parse time for the TA example scaled
+# up to the given number of lines.
+#
+#   python bench/bench_ast.py [lines ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import atoms
+import gen
+import node
+import syntax_analyzer
+
+
+def tree_bytes(root):
+    """Return (node count, bytes held by the nodes and their field lists)."""
+    count = 0
+    size = 0
+    seen = set()
+    for n in node.walk(root):
+        if id(n) in seen:
+            continue
+        seen.add(id(n))
+        count += 1
+        size += sys.getsizeof(n)
+        for name in n.__slots__:
+            value = getattr(n, name)
+            if isinstance(value, list):
+                size += sys.getsizeof(value)
+    return count, size
+
+
+def name_bytes(root):
+    """Return (identifier references, bytes of the distinct identifiers)."""
+    refs = 0
+    seen = {}
+    for n in node.walk(root):
+        for name in ('name', 'declname'):
+            value = getattr(n, name, None)
+            if isinstance(value, (str, atoms.Atom)):
+                refs += 1
+                seen[id(value)] = sys.getsizeof(value)
+    return refs, sum(seen.values())
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    syntax_analyzer.get_parser()
+
+    print("%8s %10s %10s %10s %10s %10s %12s" % (
+        "lines", "nodes", "B/node", "names", "name B", "parse", "nodes/s"))
+    for count in sizes:
+        data = gen.lines(count)
+        start = time.perf_counter()
+        ast = syntax_analyzer.parse(data)
+        elapsed = time.perf_counter() - start
+        nodes, size = tree_bytes(ast)
+        refs, names = name_bytes(ast)
+        print("%8d %10d %10.1f %10d %10d %9.2fs %12.0f" % (
+            data.count("\n"), nodes, size / float(nodes), refs, names, elapsed,
+            nodes / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ----------------------------------------------------------------------
+# bench_cfg.py
+#
+# Control-flow graph construction (blocks, edges, reverse postorder and
+# dominators) and dominance frontiers over the three-address code of
+# generated programs of the given number of lines, then of one function
+# with loops nested deeper and deeper.  The time per instruction should
+# stay flat as the code grows.
+#
+#   python bench/bench_cfg.py [lines ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import cfg
+import gen
+import semantic_analyzer
+import syntax_analyzer
+import tac
+
+
+def program(data):
+    ast = syntax_analyzer.parse(data)
+    assert semantic_analyzer.analyze(ast).errors == 0
+    return tac.generate(ast)
+
+
+def nested(depth):
+    """A function of depth nested for loops, each with an if and a break."""
+    lines = ['int f(int n)', '{', '  int s;', '  int %s;' % ', '.join('i%d' % d for d in range(depth)),
+             '  s = 0;']
+    for d in range(depth):
+        lines.append('  for (i%d = 0; i%d < n; i%d++) {' % (d, d, d))
+        lines.append('    if (s > %d) break;' % (d * 100))
+    lines.append('  s = s + 1;')
+    lines.extend(['  }'] * depth)
+    lines.extend(['  return s;', '}'])
+    return '\n'.join(lines) + '\n'
+
+
+def timed(prog):
+    start = time.perf_counter()
+    graphs = cfg.build(prog)
+    built = time.perf_counter()
+    for graph in graphs.values():
+        graph.frontiers()
+    done = time.perf_counter()
+    blocks = sum(len(graph) for graph in graphs.values())
+    return blocks, built - start, done - built
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    syntax_analyzer.get_parser()
+
+    print("%8s %10s %8s %10s %10s %10s" % ("lines", "quads", "blocks", "cfg", "frontiers", "ns/quad"))
+    for count in sizes:
+        prog = program(gen.lines(count))
+        n = prog.instructions()
+        blocks, build, df = timed(prog)
+        print("%8d %10d %8d %9.3fs %9.3fs %10.0f" % (
+            count, n, blocks, build, df, (build + df) / n * 1e9))
+
+    print()
+    print("%8s %10s %8s %10s %10s %10s" % ("depth", "quads", "blocks", "cfg", "frontiers", "loops"))
+    for depth in (10, 50, 100):
+        prog = program(nested(depth))
+        blocks, build, df = timed(prog)
+        loops = len(cfg.CFG(prog.functions[next(reversed(prog.functions))]).loops())
+        print("%8d %10d %8d %9.4fs %9.4fs %10d" % (
+            depth, prog.instructions(), blocks, build, df, loops))
+
+
+if __name__ == "__main__":
+    main()
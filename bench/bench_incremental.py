@@ -0,0 +1,54 @@
+# ----------------------------------------------------------------------
+# bench_incremental.py
+#
+# Reparse cost of an edit inside one function body: a full parse of the
+# buffer against incremental.Document.edit(), for an edit that keeps the
+# line count and one that inserts a line (which also shifts the line
+# numbers of every later declaration when the AST is next requested).
+#
+#   python bench/bench_incremental.py [lines]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import incremental
+import syntax_analyzer
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    source = gen.lines(count)
+    syntax_analyzer.get_parser()
+
+    full = timed(lambda: syntax_analyzer.parse(source))
+    doc = incremental.Document(source)
+    print("%d lines, %d declarations" % (source.count("\n"), len(doc.entries)))
+    print("%-28s %9.3f s" % ("full parse", full))
+
+    # Edit a statement in the middle function.
+    at = doc.source.index("total = 0;", len(doc.source) // 2)
+    edit = timed(lambda: doc.edit(at + 8, at + 9, "1"))
+    print("%-28s %9.3f s  (%d reparsed)" % ("edit in place", edit, doc.reparsed))
+
+    edit = timed(lambda: doc.edit(at, at, "total = 2;\n  "))
+    print("%-28s %9.3f s  (%d reparsed)" % ("insert a line", edit, doc.reparsed))
+    print("%-28s %9.3f s" % ("ast() after the insert", timed(doc.ast)))
+
+    edited = doc.source.replace("total = 2;", "total = 3;")
+    print("%-28s %9.3f s  (%d reparsed)" % (
+        "update() with a new buffer", timed(lambda: doc.update(edited)), doc.reparsed))
+
+
+if __name__ == "__main__":
+    main()
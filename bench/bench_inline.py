@@ -0,0 +1,76 @@
+# ----------------------------------------------------------------------
+# bench_inline.py
+#
+# The inliner (src/inline.py) on the TA's example and on generated
+# programs: each is optimized by src/opt.py without and with inlining,
+# and run in the interpreter.  Reports the call sites inlined, the calls
+# executed, and the time of the run (best of three) both ways; then, for
+# one program, the same for a range of CostModel thresholds.  growth is
+# the instructions the optimized code gains by inlining.  The output
+# of each program is checked to be the same both ways.
+#
+#   python bench/bench_inline.py [mix functions ...]
+# ----------------------------------------------------------------------
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import inline
+import interp
+import opt
+import syntax_analyzer
+from bench_opt import compile
+
+THRESHOLDS = (-24, -8, 0, 16, 64)
+
+
+def run(program, repeat=3):
+    """(value, output, calls executed, best time) of running program."""
+    best = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        start = time.perf_counter()
+        machine = interp.Interpreter(program, out)
+        value = machine.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return value, out.getvalue(), machine.calls, best
+
+
+def measure(data, model=None, inlining=True):
+    program = compile(data)
+    stats = opt.optimize(program, inlining=inlining, model=model)
+    return (stats["inlined"], program.instructions()) + run(program)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 50]
+    syntax_analyzer.get_parser()
+    inputs = [("example", gen.example())]
+    inputs += [("calls %d" % n, gen.calls(n)) for n in sizes]
+
+    print("%-10s %8s %8s %10s %10s %9s %9s %8s" % (
+        "program", "inlined", "growth", "calls", "inlined", "run", "inlined", "speedup"))
+    for name, data in inputs:
+        _, static, value, out, calls, elapsed = measure(data, inlining=False)
+        inlined, static2, value2, out2, calls2, elapsed2 = measure(data)
+        assert (value, out) == (value2, out2), name
+        print("%-10s %8d %8d %10d %10d %8.3fs %8.3fs %7.2fx" % (
+            name, inlined, static2 - static, calls, calls2, elapsed, elapsed2, elapsed / elapsed2))
+
+    name, data = inputs[-1]
+    print("\n%s, by CostModel threshold" % name)
+    print("%10s %8s %8s %10s %9s" % ("threshold", "inlined", "static", "calls", "run"))
+    for threshold in THRESHOLDS:
+        inlined, static, value2, out2, calls, elapsed = measure(data, inline.CostModel(threshold))
+        assert (value, out) == (value2, out2), threshold
+        print("%10d %8d %8d %10d %8.3fs" % (threshold, inlined, static, calls, elapsed))
+
+
+if __name__ == "__main__":
+    main()
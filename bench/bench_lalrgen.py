@@ -0,0 +1,94 @@
+# ----------------------------------------------------------------------
+# bench_lalrgen.py
+#
+# Table generation time for the mini-C grammar, phase by phase: ply's
+# LRGeneratedTable against lalrgen.LRGeneratedTable.  The two must agree
+# on FIRST, FOLLOW and the action and goto tables.
+#
+#   python bench/bench_lalrgen.py [LALR|SLR]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import syntax_analyzer
+# ply is importable once the analyzers have put lib/ on sys.path.
+import lalrgen
+import ply.yacc as yacc
+
+
+class TimedTable(yacc.LRGeneratedTable):
+    """ply's generator, with the time of each phase recorded."""
+
+    def __init__(self, grammar, method):
+        self.times = dict.fromkeys(lalrgen.PHASES, 0.0)
+        self.timed('build_lritems', grammar.build_lritems)
+        self.timed('compute_first', grammar.compute_first)
+        self.timed('compute_follow', grammar.compute_follow)
+        start = time.perf_counter()
+        yacc.LRGeneratedTable.__init__(self, grammar, method)
+        # lr_parse_table() runs the other two phases itself.
+        self.times['lr_parse_table'] = time.perf_counter() - start - \
+            self.times['lr0_items'] - self.times['add_lalr_lookaheads']
+
+    def timed(self, phase, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.times[phase] += time.perf_counter() - start
+        return result
+
+    def lr0_items(self):
+        return self.timed('lr0_items', yacc.LRGeneratedTable.lr0_items, self)
+
+    def add_lalr_lookaheads(self, C):
+        return self.timed('add_lalr_lookaheads',
+                          yacc.LRGeneratedTable.add_lalr_lookaheads, self, C)
+
+
+def grammar():
+    log = yacc.NullLogger()
+    pinfo = lalrgen.reflect(syntax_analyzer, errorlog=log)
+    return lalrgen.build_grammar(pinfo, errorlog=log)
+
+
+def check_sets(ply_grammar, table):
+    names = table.names
+    for name in ply_grammar.Nonterminals:
+        code = table.codes[name]
+        first = set(names[b] for b in lalrgen.bits(table.first[code]))
+        if table.nullable[code]:
+            first.add('<empty>')
+        assert first == set(ply_grammar.First[name]), name
+        if table.lr_method == 'SLR':
+            follow = set(names[b] for b in lalrgen.bits(table.follow[code]))
+            assert follow == set(ply_grammar.Follow[name]), name
+
+
+def main():
+    method = sys.argv[1] if len(sys.argv) > 1 else 'LALR'
+    ply_grammar = grammar()
+    ply_table = TimedTable(ply_grammar, method)
+    table = lalrgen.LRGeneratedTable(grammar(), method)
+
+    assert table.lr_action == ply_table.lr_action
+    assert table.lr_goto == ply_table.lr_goto
+    check_sets(ply_grammar, table)
+    print("%s: %d productions, %d states, %d shift/reduce, %d reduce/reduce conflicts" % (
+        method, len(table.lr_productions), len(table.lr_action),
+        len(table.sr_conflicts), len(table.rr_conflicts)))
+
+    print("%-20s %10s %10s %8s" % ("phase", "ply s", "lalrgen s", "speedup"))
+    for phase in lalrgen.PHASES + ('total',):
+        if phase == 'total':
+            old, new = sum(ply_table.times.values()), sum(table.times.values())
+        else:
+            old, new = ply_table.times[phase], table.times[phase]
+        print("%-20s %10.4f %10.4f %8s" % (
+            phase, old, new, "%.1fx" % (old / new) if new else "-"))
+
+
+if __name__ == "__main__":
+    main()
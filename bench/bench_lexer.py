@@ -0,0 +1,85 @@
+# ----------------------------------------------------------------------
+# bench_lexer.py
+#
+# Lexer throughput (MB/s) of the PLY lexer and the master-regex scanner,
+# without and with the token profile of scanprofile.py, on generated
+# mini-C inputs.  All three must produce the same token stream, also on
+# runs of punctuators where a wrong rule order would split tokens
+# differently.
+#
+#   python bench/bench_lexer.py [size-in-KB ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import lexical_analyzer
+import scanner
+
+
+def ply_tokens(data):
+    lexer = lexical_analyzer.get_lexer()
+    lexer.input(data)
+    return [(t.type, t.value, t.lexpos) for t in lexer]
+
+
+PLAIN = scanner.Scanner()
+
+
+def scanner_tokens(data):
+    return PLAIN.scan(data)
+
+
+def profiled_tokens(data):
+    return scanner.get_scanner().scan(data)
+
+
+def punctuators():
+    """Every literal rule next to every other, glued and spaced."""
+    words = [scanner.literal_string(regex) for name, regex in PLAIN.rules]
+    words = [w for w in words if w] + ['x', '1', '1.5', "'c'", '"s"']
+    glued = ''.join(a + b for a in words for b in words)
+    return glued + '\n' + ' '.join(words)
+
+
+def best_of(func, data, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [256, 1024, 4096]
+    # Build both lexers outside the timed region.
+    lexical_analyzer.get_lexer()
+    scanner.get_scanner()
+
+    data = punctuators()
+    if not ply_tokens(data) == scanner_tokens(data) == profiled_tokens(data):
+        raise SystemExit("token streams differ on punctuators")
+
+    print("%8s %10s %12s %12s %12s %8s" % (
+        "KB", "tokens", "PLY MB/s", "scan MB/s", "profiled", "speedup"))
+    for kb in sizes:
+        data = gen.program(kb * 1024)
+        mb = len(data) / (1024.0 * 1024.0)
+        ply_time, expected = best_of(ply_tokens, data)
+        scan_time, actual = best_of(scanner_tokens, data)
+        profiled_time, profiled = best_of(profiled_tokens, data)
+        if not actual == profiled == expected:
+            raise SystemExit("token streams differ at %d KB" % kb)
+        print("%8d %10d %12.2f %12.2f %12.2f %7.1fx" % (
+            kb, len(actual), mb / ply_time, mb / scan_time, mb / profiled_time,
+            ply_time / profiled_time))
+
+
+if __name__ == "__main__":
+    main()
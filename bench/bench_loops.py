@@ -0,0 +1,50 @@
+# ----------------------------------------------------------------------
+# bench_loops.py
+#
+# The loop optimizations (src/loopopt.py) on the TA's example and on
+# generated programs: each is optimized by src/opt.py without and with
+# them, and run in the interpreter.  Reports the instructions hoisted
+# and multiplications strength-reduced, the instructions executed and
+# the time of the run (best of three) both ways.  The output of each
+# program is checked to be the same both ways.
+#
+# There is no native code generator, so the speedups are those of the
+# interpreter.
+#
+#   python bench/bench_loops.py [matrix size ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import opt
+import syntax_analyzer
+from bench_opt import compile, run
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 20]
+    syntax_analyzer.get_parser()
+    inputs = [("example", gen.example()), ("kernels 100", gen.kernels(100))]
+    inputs += [("matrix %d" % n, gen.matrix(n)) for n in sizes]
+
+    print("%-12s %8s %8s %10s %10s %9s %9s %8s" % (
+        "program", "hoisted", "reduced", "dynamic", "loops", "run", "loops", "speedup"))
+    for name, data in inputs:
+        program = compile(data)
+        opt.optimize(program, loops=False)
+        value, out, dynamic, elapsed = run(program)
+        program = compile(data)
+        stats = opt.optimize(program)
+        value2, out2, dynamic2, elapsed2 = run(program)
+        assert (value, out) == (value2, out2), name
+        print("%-12s %8d %8d %10d %10d %8.3fs %8.3fs %7.2fx" % (
+            name, stats["hoisted"], stats["reduced"], dynamic, dynamic2,
+            elapsed, elapsed2, elapsed / elapsed2))
+
+
+if __name__ == "__main__":
+    main()
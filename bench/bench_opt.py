@@ -0,0 +1,74 @@
+# ----------------------------------------------------------------------
+# bench_opt.py
+#
+# The SSA optimizer (src/opt.py) on the TA's example and on generated
+# programs: instructions of the code (static) and instructions the
+# interpreter executes (dynamic) before and after optimizing, the time
+# of the run in the interpreter (best of three) and of the optimizer
+# itself.  The output of each program is checked to be the same both
+# ways.
+#
+# There is no native code generator: the instructions of the generated
+# code are TAC instructions.
+#
+#   python bench/bench_opt.py [kernels ...]
+# ----------------------------------------------------------------------
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import interp
+import opt
+import semantic_analyzer
+import syntax_analyzer
+import tac
+
+
+def compile(data):
+    ast = syntax_analyzer.parse(data)
+    assert semantic_analyzer.analyze(ast).errors == 0
+    return tac.generate(ast)
+
+
+def run(program, repeat=3):
+    """(value, output, instructions executed, best time) of running program."""
+    best = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        start = time.perf_counter()
+        value, count = interp.run(program, out)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return value, out.getvalue(), count, best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100]
+    syntax_analyzer.get_parser()
+    inputs = [("example", gen.example())]
+    inputs += [("kernels %d" % n, gen.kernels(n)) for n in sizes]
+    inputs.append(("lines 10000", gen.lines(10000)))
+
+    print("%-12s %8s %8s %10s %10s %9s %9s %8s %9s" % (
+        "program", "static", "after", "dynamic", "after", "run", "after", "speedup", "optimize"))
+    for name, data in inputs:
+        program = compile(data)
+        static = program.instructions()
+        value, out, dynamic, elapsed = run(program)
+        start = time.perf_counter()
+        opt.optimize(program)
+        optimizing = time.perf_counter() - start
+        value2, out2, dynamic2, elapsed2 = run(program)
+        assert (value, out) == (value2, out2), name
+        print("%-12s %8d %8d %10d %10d %8.3fs %8.3fs %7.2fx %8.3fs" % (
+            name, static, program.instructions(), dynamic, dynamic2,
+            elapsed, elapsed2, elapsed / elapsed2, optimizing))
+
+
+if __name__ == "__main__":
+    main()
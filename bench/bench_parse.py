@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------
+# bench_parse.py
+#
+# Parser throughput in tokens per second: ply's stock parse loop
+# (LRParser.parseopt_notrack) against fastparse.FastParser, both running
+# the same grammar actions on the same tables.  Tokens are lexed up front
+# and replayed, so only the parse loop is measured.
+#
+#   python bench/bench_parse.py [size-in-KB ...]
+# ----------------------------------------------------------------------
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import lexical_analyzer
+import syntax_analyzer
+
+
+class ReplayLexer:
+    """Hands out a pre-lexed token list."""
+
+    def __init__(self, data, toks):
+        self.lexdata = data
+        self.toks = toks
+        self.next = iter(toks).__next__
+
+    def input(self, data):
+        self.next = iter(self.toks).__next__
+
+    def token(self):
+        try:
+            return self.next()
+        except StopIteration:
+            return None
+
+
+def dump(ast):
+    out = io.StringIO()
+    ast.show(out)
+    return out.getvalue()
+
+
+def best(func, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [64, 256, 1024]
+    stock = syntax_analyzer.get_parser()
+    fast = syntax_analyzer.get_fast_parser()
+    print("dense tables: %d bytes for %d states" % (
+        fast.dense.nbytes(), len(fast.dense.action_default)))
+
+    print("%8s %10s %14s %14s %8s" % ("KB", "tokens", "stock tok/s", "fast tok/s", "speedup"))
+    for kb in sizes:
+        data = gen.program(kb * 1024)
+        lexer = lexical_analyzer.get_lexer()
+        lexer.input(data)
+        toks = list(lexer)
+        runs = 3 if kb <= 256 else 1
+
+        stock_ast, stock_time = best(
+            lambda: stock.parse(lexer=ReplayLexer(data, toks)), runs)
+        fast_ast, fast_time = best(
+            lambda: fast.parse(lexer=ReplayLexer(data, toks)), runs)
+        assert dump(stock_ast) == dump(fast_ast)
+        print("%8d %10d %14.0f %14.0f %7.2fx" % (
+            kb, len(toks), len(toks) / stock_time, len(toks) / fast_time,
+            stock_time / fast_time))
+
+
+if __name__ == "__main__":
+    main()
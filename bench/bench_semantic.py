@@ -0,0 +1,71 @@
+# ----------------------------------------------------------------------
+# bench_semantic.py
+#
+# Semantic analysis time for generated programs of the given number of
+# lines: the time of the pass, the expressions it typed and the casts it
+# inserted, the slowest function, and the cost of asking every
+# expression its type again once the types are cached on the nodes.
+# Then one function with a single expression nested deeper and deeper,
+# which must stay linear.
+#
+#   python bench/bench_semantic.py [lines ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import node
+import semantic_analyzer
+import syntax_analyzer
+
+
+def analyzed(data):
+    ast = syntax_analyzer.parse(data)
+    start = time.perf_counter()
+    analyzer = semantic_analyzer.analyze(ast)
+    elapsed = time.perf_counter() - start
+    assert analyzer.errors == 0
+    return ast, analyzer, elapsed
+
+
+def deep(depth):
+    """A function returning one expression of depth BinOps and casts."""
+    expr = 'c'
+    for k in range(depth):
+        expr = '(%s %s %s)' % (expr, '+-*'[k % 3], 'd' if k % 2 else 'c')
+    return 'double f(char c, double d)\n{\n  return %s;\n}\n' % expr
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    syntax_analyzer.get_parser()
+
+    print("%8s %10s %8s %10s %12s %12s %10s" % (
+        "lines", "exprs", "casts", "sema", "lines/s", "slowest fn", "cached"))
+    for count in sizes:
+        data = gen.lines(count)
+        ast, analyzer, elapsed = analyzed(data)
+        exprs = [n for n in node.walk(ast) if isinstance(n, node.Expression)]
+        casts = sum(1 for n in exprs if isinstance(n, node.Cast))
+        slowest = max(seconds for _, _, seconds in analyzer.function_times)
+        start = time.perf_counter()
+        for n in exprs:
+            analyzer.typeof(n)
+        cached = time.perf_counter() - start
+        print("%8d %10d %8d %9.3fs %12.0f %10.3fms %9.3fs" % (
+            data.count("\n"), len(exprs), casts, elapsed, data.count("\n") / elapsed,
+            slowest * 1e3, cached))
+
+    print()
+    print("%8s %10s %12s" % ("depth", "sema", "us/level"))
+    for depth in (50, 100, 200):
+        _, analyzer, elapsed = analyzed(deep(depth))
+        print("%8d %9.4fs %12.2f" % (depth, elapsed, elapsed / depth * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# ----------------------------------------------------------------------
+# bench_startup.py
+#
+# Startup time of the syntax analyzer: a fresh interpreter imports
+# syntax_analyzer and parses the TA example, with the LALR table cache
+# disabled, cold (empty cache directory) and warm.
+#
+#   python bench/bench_startup.py [runs]
+# ----------------------------------------------------------------------
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+EXAMPLE = os.path.join(ROOT, "test", "mandatory_example.c")
+
+SCRIPT = """
+import sys
+sys.path.insert(0, %r)
+import syntax_analyzer
+with open(%r) as f:
+    syntax_analyzer.parse(f.read())
+""" % (SRC, EXAMPLE)
+
+
+def run_once(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", SCRIPT], env=env, check=True,
+                   stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def measure(label, runs, make_env):
+    times = []
+    for _ in range(runs):
+        env, cleanup = make_env()
+        try:
+            times.append(run_once(env))
+        finally:
+            cleanup()
+    print("%-10s min %7.1f ms   median %7.1f ms" %
+          (label, min(times) * 1e3, statistics.median(times) * 1e3))
+    return min(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    base_env = dict(os.environ)
+    warm_dir = tempfile.mkdtemp(prefix="artide-bench-")
+
+    def no_cache():
+        env = dict(base_env, ARTIDE_TABCACHE="0")
+        return env, lambda: None
+
+    def cold():
+        path = tempfile.mkdtemp(prefix="artide-bench-")
+        env = dict(base_env, ARTIDE_CACHE_DIR=path)
+        return env, lambda: shutil.rmtree(path, ignore_errors=True)
+
+    def warm():
+        env = dict(base_env, ARTIDE_CACHE_DIR=warm_dir)
+        return env, lambda: None
+
+    try:
+        # Populate the warm cache once.
+        run_once(warm()[0])
+        nocache = measure("no cache", runs, no_cache)
+        measure("cold", runs, cold)
+        hot = measure("warm", runs, warm)
+        print("warm startup is %.1fx faster than building the tables" % (nocache / hot))
+    finally:
+        shutil.rmtree(warm_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
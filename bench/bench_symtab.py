@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------
+# bench_symtab.py
+#
+# Identifier lookup cost in symtab.SymTab as blocks nest deeper: the
+# shadow-stack lookup against walking the chain of enclosing
+# SymTabBlocks, for a name declared in the global block and one declared
+# in the innermost block.  Then the cost of asking a ScopeIndex (the
+# snapshot kept after the blocks are left) which scope is innermost at a
+# line, for programs with more and more scopes, and the size of an
+# entry.
+#
+#   python bench/bench_symtab.py [depth ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import atoms
+import symtab
+import typetab
+
+
+LOOKUPS = 200000
+PER_BLOCK = 8
+
+
+def chain_get(tab, id):
+    """Lookup by walking the enclosing blocks."""
+    block = tab.cur
+    while block is not None:
+        entry = block.table.get(id)
+        if entry is not None:
+            return entry
+        block = block.prev
+    raise symtab.UndefIdError(id, symtab.SYMTAB_ERROR_UNDEF_ID)
+
+
+def nested(depth):
+    tab = symtab.SymTab()
+    tab.insert(symtab.SymTabEntry(atoms.intern('g'), typetab.INT))
+    for d in range(depth):
+        tab.insert_block_table(symtab.SymTabBlock())
+        for k in range(PER_BLOCK):
+            tab.insert(symtab.SymTabEntry(atoms.intern('v%d_%d' % (d, k)), typetab.INT))
+    return tab
+
+
+def timed(get, tab, id):
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        get(tab, id)
+    return (time.perf_counter() - start) / LOOKUPS * 1e9
+
+
+def program_scopes(functions):
+    """A SymTab after a program of functions, each with two nested blocks."""
+    tab = symtab.SymTab()
+    line = 1
+    for f in range(functions):
+        tab.insert(symtab.SymTabEntry(atoms.intern('f%d' % f), typetab.INT, lineno=line))
+        tab.insert_block_table(symtab.SymTabBlock(start=line))
+        tab.insert(symtab.SymTabEntry(atoms.intern('i'), typetab.INT, lineno=line + 1))
+        tab.insert_block_table(symtab.SymTabBlock(start=line + 2))
+        tab.insert(symtab.SymTabEntry(atoms.intern('t'), typetab.INT, lineno=line + 3))
+        tab.remove_block_table(line + 5)
+        tab.remove_block_table(line + 7)
+        line += 8
+    return tab, line
+
+
+def main():
+    depths = [int(arg) for arg in sys.argv[1:]] or [1, 4, 16, 64]
+    print("%6s %14s %14s %14s %14s %12s" % (
+        "depth", "global chain", "global", "inner chain", "inner", "exit us"))
+    for depth in depths:
+        tab = nested(depth)
+        outer = atoms.intern('g')
+        inner = atoms.intern('v%d_0' % (depth - 1))
+        assert tab.get(outer) is chain_get(tab, outer)
+        row = [timed(chain_get, tab, outer), timed(symtab.SymTab.get, tab, outer),
+               timed(chain_get, tab, inner), timed(symtab.SymTab.get, tab, inner)]
+        start = time.perf_counter()
+        while tab.cur.prev is not None:
+            tab.remove_block_table()
+        exit_time = (time.perf_counter() - start) / depth * 1e6
+        print("%6d %12.0fns %12.0fns %12.0fns %12.0fns %12.2f" % (
+            (depth,) + tuple(row) + (exit_time,)))
+
+    print()
+    print("%8s %8s %14s" % ("scopes", "lines", "scope_at"))
+    for functions in (100, 1000, 10000):
+        tab, lines = program_scopes(functions)
+        index = tab.snapshot()
+        assert index.scope_at(12).number == 4
+        start = time.perf_counter()
+        for n in range(LOOKUPS):
+            index.scope_at(n % lines)
+        elapsed = (time.perf_counter() - start) / LOOKUPS * 1e9
+        print("%8d %8d %12.0fns" % (len(index.scopes), lines, elapsed))
+
+    entry = index.scopes[-1].entries[0]
+    print()
+    print("SymTabEntry: %d bytes, %d distinct types" % (sys.getsizeof(entry), typetab.count()))
+
+
+if __name__ == "__main__":
+    main()
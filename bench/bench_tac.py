@@ -0,0 +1,58 @@
+# ----------------------------------------------------------------------
+# bench_tac.py
+#
+# Three-address code generation for generated programs of the given
+# number of lines: generation time, instructions per second, and the
+# bytes per instruction of the columnar tac.Quads against the same code
+# held as one tuple per instruction in a list.
+#
+#   python bench/bench_tac.py [lines ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import semantic_analyzer
+import syntax_analyzer
+import tac
+
+
+def tuple_bytes(program):
+    """Bytes of the code as a list of (op, a, b, c, line) tuples per function."""
+    size = 0
+    for f in program.functions.values():
+        code = f.code
+        quads = [(code.op[i], code.a[i], code.b[i], code.c[i], code.line[i])
+                 for i in range(len(code))]
+        size += sys.getsizeof(quads) + sum(sys.getsizeof(q) for q in quads)
+        # Operand ids above the small int cache are separate objects.
+        size += sum(sys.getsizeof(x) for q in quads for x in q[1:4] if x > 256)
+    return size
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    syntax_analyzer.get_parser()
+
+    print("%8s %10s %10s %12s %10s %10s %10s" % (
+        "lines", "quads", "generate", "quads/s", "quad B", "tuple B", "symbols"))
+    for count in sizes:
+        data = gen.lines(count)
+        ast = syntax_analyzer.parse(data)
+        assert semantic_analyzer.analyze(ast).errors == 0
+        start = time.perf_counter()
+        program = tac.generate(ast)
+        elapsed = time.perf_counter() - start
+        n = program.instructions()
+        code_bytes = sum(f.code.nbytes() for f in program.functions.values())
+        print("%8d %10d %9.3fs %12.0f %10.1f %10.1f %10d" % (
+            data.count("\n"), n, elapsed, n / elapsed, code_bytes / float(n),
+            tuple_bytes(program) / float(n), len(program.symbols)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# ----------------------------------------------------------------------
+# bench_tokbuf.py
+#
+# Memory held by a tokenized source: a list of ply.lex.LexToken objects
+# versus a columnar tokbuf.TokenBuffer, plus the time to parse the same
+# input from either representation.
+#
+#   python bench/bench_tokbuf.py [size-in-KB ...]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gen
+import lexical_analyzer
+import scanner
+import syntax_analyzer
+
+
+def retained(func, *args):
+    """Return (result, bytes still allocated by func once it returns)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def lextoken_list(data):
+    lexer = lexical_analyzer.get_lexer()
+    lexer.input(data)
+    return list(lexer)
+
+
+def token_buffer(data):
+    return scanner.get_scanner().scan_buffer(data)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [256, 1024, 4096]
+    lexical_analyzer.get_lexer()
+    scanner.get_scanner().compile_bytes()
+    syntax_analyzer.get_parser()
+
+    print("%8s %10s %14s %14s %10s %10s" % (
+        "KB", "tokens", "LexToken B/tok", "buffer B/tok", "PLY parse", "buf parse"))
+    for kb in sizes:
+        data = gen.program(kb * 1024)
+        source = data.encode("utf-8")
+        toks, list_bytes = retained(lextoken_list, data)
+        buf, buf_bytes = retained(token_buffer, source)
+        assert len(toks) == len(buf)
+        ntok = len(buf)
+        del toks
+
+        ply_time = timed(lambda: syntax_analyzer.parse(data))
+        buf_time = timed(lambda: syntax_analyzer.parse(source, lexer=scanner.BufferLexer()))
+        print("%8d %10d %14.1f %14.1f %9.2fs %9.2fs" % (
+            kb, ntok, list_bytes / float(ntok), buf_bytes / float(ntok), ply_time, buf_time))
+
+
+if __name__ == "__main__":
+    main()
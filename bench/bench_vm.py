@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------
+# bench_vm.py
+#
+# The bytecode VM (src/bytecode.py, src/vm.py) against the interpreter
+# of the three-address code (src/interp.py) and a tree-walking
+# interpreter of the AST (treewalk.py) on loops (gen.kernels), recursion
+# (gen.recursion), arrays (gen.matrix) and the TA's example.  The TAC
+# interpreter and the VM run each program as generated and after
+# src/opt.py optimizes it.  Reports the time of each run (best of
+# three), the speedup of the VM over the tree walker, and the bytes of
+# the code of the program as TAC (op, a, b and c columns) and as
+# bytecode.  The output of every run is checked to be the same.
+#
+#   python bench/bench_vm.py [matrix size ...]
+# ----------------------------------------------------------------------
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import bytecode
+import gen
+import interp
+import opt
+import semantic_analyzer
+import syntax_analyzer
+import tac
+import treewalk
+import vm
+
+
+def best(run, repeat=3):
+    """(value, output, best time) of calling run(out)."""
+    elapsed = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        start = time.perf_counter()
+        value = run(out)
+        t = time.perf_counter() - start
+        elapsed = t if elapsed is None else min(elapsed, t)
+    return value, out.getvalue(), elapsed
+
+
+def tac_bytes(program):
+    return sum(column.itemsize * len(column) for f in program.functions.values()
+               for column in (f.code.op, f.code.a, f.code.b, f.code.c))
+
+
+def measure(data):
+    """Times of the tree walker, the TAC interpreter, the VM, and the two
+    after optimizing, and code sizes as TAC and bytecode."""
+    ast = syntax_analyzer.parse(data)
+    assert semantic_analyzer.analyze(ast).errors == 0
+    results = [best(lambda out: treewalk.run(ast, out))]
+    program = tac.generate(ast)
+    for optimized in (False, True):
+        if optimized:
+            opt.optimize(program)
+        code = bytecode.compile(program)
+        results.append(best(lambda out: interp.run(program, out)[0]))
+        results.append(best(lambda out: vm.VM(code, out).run()))
+    for value, out, _ in results:
+        assert (value, out) == results[0][:2]
+    return [elapsed for _, _, elapsed in results], tac_bytes(program), code.nbytes()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [16, 24]
+    syntax_analyzer.get_parser()
+    inputs = [("example", gen.example()), ("kernels 50", gen.kernels(50)),
+              ("recursion 16", gen.recursion(16))]
+    inputs += [("matrix %d" % n, gen.matrix(n)) for n in sizes]
+
+    print("%-13s %8s %8s %8s %8s %8s %8s %8s %7s %7s" % (
+        "program", "tree", "tac", "vm", "tac -O", "vm -O", "vm", "vm -O", "tac -O", "vm -O"))
+    print("%-13s %8s %8s %8s %8s %8s %8s %8s %7s %7s" % (
+        "", "", "", "", "", "", "speedup", "speedup", "bytes", "bytes"))
+    for name, data in inputs:
+        times, static, size = measure(data)
+        tree, _, machine, _, optimized = times
+        print("%-13s %7.3fs %7.3fs %7.3fs %7.3fs %7.3fs %7.2fx %7.2fx %7d %7d" % (
+            (name,) + tuple(times) + (tree / machine, tree / optimized, static, size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# ----------------------------------------------------------------------
+# gen.py
+#
+# Synthetic mini-C inputs for the benchmarks.
+# ----------------------------------------------------------------------
+
+import os
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+EXAMPLE = os.path.join(ROOT, "test", "mandatory_example.c")
+
+FUNCTION = """
+/* function %(n)d */
+int avg%(n)d(int count, int *value)
+{
+  int i, total;
+  total = 0;
+  for(i = 0; i < count; i++)
+  {
+    total = total + value[i] * %(n)d - (i << 2) %% 7;
+  }
+  while (total > 1000 && count != 0) { total = total / 2; }
+  return (total / count);
+}
+"""
+
+MAIN = """
+int main(void)
+{
+  int mark[4];
+  int i, sum;
+  float average;
+  sum = 0;
+  for(i = 0; i < 4; i++)
+  {
+    mark[i] = i * 30;
+    sum = sum + mark[i];
+    average = avg%(n)d(i + 1, mark);
+    if(average > 40)
+    {
+      printf("%%f\\n", average);
+    }
+  }
+  return 0;
+}
+"""
+
+KERNEL = """
+/* kernel %(n)d */
+int kernel%(n)d(int *v, int n)
+{
+  int i, j, s, t, scale, debug;
+  scale = %(n)d %% 5 + 1;
+  debug = 0;
+  s = 0;
+  for(i = 0; i < n; i++)
+  {
+    t = v[i];
+    for(j = 0; j < 4; j++)
+    {
+      s = s + t * scale + j * (scale + 1);
+      if(debug)
+      {
+        printf("%%d %%d\\n", i, s);
+      }
+    }
+    v[i] = s %% 1000;
+  }
+  return s;
+}
+"""
+
+DRIVER = """
+int main(void)
+{
+  int v[16];
+  int i, total;
+  for(i = 0; i < 16; i++)
+  {
+    v[i] = i;
+  }
+  total = 0;
+%(calls)s  printf("%%d\\n", total);
+  return 0;
+}
+"""
+
+MATRIX = """
+int a[%(cells)d];
+int b[%(cells)d];
+int c[%(cells)d];
+
+int main(void)
+{
+  int i, j, k, s, sum;
+  for(i = 0; i < %(n)d; i++)
+  {
+    for(j = 0; j < %(n)d; j++)
+    {
+      a[i * %(n)d + j] = i + j;
+      b[i * %(n)d + j] = i - j;
+    }
+  }
+  for(i = 0; i < %(n)d; i++)
+  {
+    for(j = 0; j < %(n)d; j++)
+    {
+      s = 0;
+      for(k = 0; k < %(n)d; k++)
+      {
+        s = s + a[i * %(n)d + k] * b[k * %(n)d + j];
+      }
+      c[i * %(n)d + j] = s;
+    }
+  }
+  sum = 0;
+  for(i = 0; i < %(cells)d; i++)
+  {
+    sum = sum + c[i] %% 1000;
+  }
+  printf("%%d\\n", sum);
+  return 0;
+}
+"""
+
+HELPERS = """
+int square(int x)
+{
+  return x * x;
+}
+
+int clamp(int x, int lo, int hi)
+{
+  if(x < lo)
+    return lo;
+  if(x > hi)
+    return hi;
+  return x;
+}
+
+int fib(int n)
+{
+  if(n < 2)
+    return n;
+  return fib(n - 1) + fib(n - 2);
+}
+"""
+
+MIX = """
+/* mix %(n)d */
+int mix%(n)d(int a, int b)
+{
+  int t;
+  t = square(a %% 100) + clamp(b, 0, %(n)d + 10) * %(n)d;
+  return t %% 1009;
+}
+"""
+
+CALLER = """
+int main(void)
+{
+  int i, s;
+  s = 0;
+  for(i = 0; i < 200; i++)
+  {
+%(calls)s  }
+  printf("%%d %%d\\n", s, fib(12));
+  return 0;
+}
+"""
+
+
+RECURSION = """
+int fib(int n)
+{
+  if(n < 2)
+    return n;
+  return fib(n - 1) + fib(n - 2);
+}
+
+void sort(int *a, int lo, int hi)
+{
+  int i, j, p, t;
+  if(lo >= hi)
+    return;
+  p = a[(lo + hi) / 2];
+  i = lo;
+  j = hi;
+  while(i <= j)
+  {
+    while(a[i] < p)
+      i++;
+    while(a[j] > p)
+      j--;
+    if(i <= j)
+    {
+      t = a[i];
+      a[i] = a[j];
+      a[j] = t;
+      i++;
+      j--;
+    }
+  }
+  sort(a, lo, j);
+  sort(a, i, hi);
+}
+
+int main(void)
+{
+  int v[%(cells)d];
+  int i, s;
+  for(i = 0; i < %(cells)d; i++)
+    v[i] = (i * 7919) %% %(cells)d;
+  sort(v, 0, %(cells)d - 1);
+  s = 0;
+  for(i = 1; i < %(cells)d; i++)
+    if(v[i - 1] > v[i])
+      s++;
+  printf("%%d %%d\\n", fib(%(n)d), s);
+  return 0;
+}
+"""
+
+def example():
+    with open(EXAMPLE) as f:
+        return f.read()
+
+
+def program(size):
+    """Return a mini-C translation unit of roughly size bytes."""
+    parts = []
+    total = 0
+    n = 0
+    while total < size:
+        part = FUNCTION % {"n": n}
+        parts.append(part)
+        total += len(part)
+        n += 1
+    parts.append(MAIN % {"n": n - 1})
+    return "".join(parts)
+
+
+def lines(count):
+    """Return a mini-C translation unit of at least count lines."""
+    per_function = FUNCTION.count("\n")
+    return program(len(FUNCTION) * (count // per_function + 1))
+
+
+def kernels(count):
+    """Return a mini-C translation unit of count loop kernels, all run by
+    main: work for the interpreter, with constants to fold, a branch
+    that is never taken and copies to propagate."""
+    parts = [KERNEL % {"n": n} for n in range(count)]
+    calls = "".join("  total = total + kernel%d(v, 16) %% 1000;\n" % n for n in range(count))
+    parts.append(DRIVER % {"calls": calls})
+    return "".join(parts)
+
+
+def matrix(n):
+    """Return a mini-C translation unit that multiplies two n by n
+    matrices kept in one-dimensional arrays."""
+    return MATRIX % {"n": n, "cells": n * n}
+
+
+def calls(count):
+    """Return a mini-C translation unit whose main calls count small
+    functions in a loop, and they call smaller ones: work for the
+    inliner, and a recursive function it must leave alone."""
+    parts = [HELPERS] + [MIX % {"n": n} for n in range(count)]
+    body = "".join("    s = (s + mix%d(i, s)) %% 100000;\n" % n for n in range(count))
+    parts.append(CALLER % {"calls": body})
+    return "".join(parts)
+
+
+def recursion(n):
+    """Return a mini-C translation unit that computes fib(n) by double
+    recursion and quicksorts 100 * n integers."""
+    return RECURSION % {"n": n, "cells": 100 * n}
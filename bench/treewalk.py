@@ -0,0 +1,446 @@
+# ----------------------------------------------------------------------
+# treewalk.py
+#
+# A tree-walking interpreter of mini-C, the baseline bench_vm.py measures
+# src/interp.py and src/vm.py against.  It runs the tree checked by
+# src/semantic_analyzer.py as it is: every time a statement runs, its
+# nodes are visited again, every name is looked up in a dict per scope
+# from the innermost out, and break, continue and return are Python
+# exceptions.  Types come from the analyzer's ctype of each node.
+#
+# Values and memory are those of src/interp.py (lists, boxes and (list,
+# index) pointers), and the arithmetic is interp.fold, so a program
+# prints and returns the same here as there.  A function pointer is the
+# name of the function.  goto is not supported, nor
+# a case label inside a statement nested in its switch's body.
+#
+#   python bench/treewalk.py FILE
+#
+# runs a mini-C file and exits with the value of main.
+# ----------------------------------------------------------------------
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import atoms
+import node
+import tac
+import typetab
+from interp import InterpError, cells, convert, fold, printf
+from typetab import INT, VOID, decay
+
+
+class Break(Exception):
+    pass
+
+
+class Continue(Exception):
+    pass
+
+
+class Return(Exception):
+    def __init__(self, value):
+        Exception.__init__(self)
+        self.value = value
+
+
+class TreeWalker:
+    """Runs a checked node.TranslationUnit; printf output goes to out."""
+
+    def __init__(self, ast, out=sys.stdout):
+        self.ast = ast
+        self.out = out
+        self.functions = {}
+        self.params = {}
+        self.globals = {}
+        # The scopes of the running function, innermost last.
+        self.scopes = [self.globals]
+        self.constants = {}
+        self.line = None
+        self._dispatch = {}
+
+    def visit(self, n):
+        method = self._dispatch.get(type(n))
+        if method is None:
+            method = self._dispatch[type(n)] = getattr(self, 'do_' + type(n).__name__)
+        return method(n)
+
+    def run(self, entry='main'):
+        """Declare the globals and functions and run entry; return its value."""
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 20000))
+        try:
+            for ext in self.ast.ext:
+                if isinstance(ext, node.FunctionDef):
+                    self.functions[ext.decl.name] = ext
+                else:
+                    self.statement(ext)
+            for name, f in self.functions.items():
+                if str(name) == entry:
+                    value = self.call(f, [])
+                    return 0 if value is None else value
+            raise InterpError("no function '%s'" % entry)
+        except ZeroDivisionError:
+            raise InterpError('division by zero', self.line)
+        except ArithmeticError as e:
+            raise InterpError(str(e), self.line)
+        except (TypeError, IndexError, ValueError):
+            raise InterpError('invalid memory access', self.line)
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return self.globals[name]
+
+    def call(self, f, args):
+        names = self.params.get(f)
+        if names is None:
+            func = f.decl.type
+            while not isinstance(func, node.FuncDecl):
+                func = func.type
+            names = self.params[f] = [] if func.args is None else [
+                p.name for p in func.args.params if not isinstance(p, node.EllipsisParam)]
+        scope = {}
+        for name, value in zip(names, args):
+            scope[name] = [value]
+        saved = self.scopes
+        self.scopes = [scope]
+        try:
+            for item in f.body.items:
+                self.statement(item)
+        except Return as r:
+            return r.value
+        finally:
+            self.scopes = saved
+        return None
+
+    # Expressions
+
+    def address(self, e):
+        """The pointer to the object of lvalue e."""
+        if isinstance(e, node.ID):
+            return (self.lookup(e.name), 0)
+        if isinstance(e, node.ArrayRef):
+            base = self.visit(e.name)
+            index = self.visit(e.subscript)
+            if not decay(e.name.ctype).is_pointer():
+                base, index = index, base
+            p = (base[0], base[1] + index * cells(e.ctype))
+        else:
+            # *p
+            p = self.visit(e.expr)
+        if p[1] < 0:
+            raise IndexError(p[1])
+        return p
+
+    def do_Constant(self, e):
+        value = self.constants.get(e)
+        if value is None:
+            value = typetab.constant_value(e)
+            if e.type == 'string':
+                value = ([ord(ch) for ch in value] + [0], 0)
+            self.constants[e] = value
+        return value
+
+    def do_ID(self, e):
+        kind = e.ctype.kind
+        if kind == 'function':
+            return e.name
+        mem = self.lookup(e.name)
+        if kind == 'array':
+            return (mem, 0)
+        return mem[0]
+
+    def do_Cast(self, e):
+        value = self.visit(e.expr)
+        t = e.ctype
+        source = decay(e.expr.ctype)
+        if t is VOID or source is t or t.is_pointer() and source.is_pointer():
+            return value
+        return convert(t, value)
+
+    def do_BinOp(self, e):
+        op = e.op
+        if op == '&&':
+            return 1 if self.visit(e.left) and self.visit(e.right) else 0
+        if op == '||':
+            return 1 if self.visit(e.left) or self.visit(e.right) else 0
+        left = self.visit(e.left)
+        right = self.visit(e.right)
+        t = e.ctype
+        if t.is_pointer():
+            scale = cells(t.of)
+            if op == '-':
+                return (left[0], left[1] - right * scale)
+            if decay(e.left.ctype).is_pointer():
+                return (left[0], left[1] + right * scale)
+            return (right[0], right[1] + left * scale)
+        lt = decay(e.left.ctype)
+        if lt.is_pointer() or decay(e.right.ctype).is_pointer():
+            if op == '-':
+                if left[0] is not right[0]:
+                    raise InterpError('subtraction of pointers to different objects', self.line)
+                return (left[1] - right[1]) // cells(lt.of)
+            if op in ('==', '!='):
+                same = left is right or left != 0 and right != 0 and \
+                    left[0] is right[0] and left[1] == right[1]
+                return int(same == (op == '=='))
+            return fold(tac.BINARY[op], INT, left[1], right[1])
+        return fold(tac.BINARY[op], t, left, right)
+
+    def do_UnaryOp(self, e):
+        op = e.op
+        if op == 'sizeof':
+            operand = e.expr
+            t = typetab.from_decl(operand) if isinstance(operand, node.Typename) else operand.ctype
+            return typetab.sizeof(t)
+        if op == '&':
+            if e.expr.ctype.kind == 'function':
+                return self.visit(e.expr)
+            return self.address(e.expr)
+        if op == '*':
+            p = self.visit(e.expr)
+            if e.ctype.kind in ('array', 'function'):
+                return p
+            if p[1] < 0:
+                raise IndexError(p[1])
+            return p[0][p[1]]
+        if op == '+':
+            return self.visit(e.expr)
+        if op in tac.UNARY:
+            return fold(tac.UNARY[op], e.ctype, self.visit(e.expr))
+        # ++ and --
+        target = e.expr
+        p = self.address(target)
+        old = p[0][p[1]]
+        t = target.ctype
+        step = 1 if '+' in op else -1
+        if t.is_pointer():
+            new = (old[0], old[1] + step * cells(t.of))
+        else:
+            new = convert(t, old + step)
+        p[0][p[1]] = new
+        return old if op[0] == 'p' else new
+
+    def do_Assignment(self, e):
+        p = self.address(e.lvalue)
+        if e.op == '=':
+            value = self.visit(e.rvalue)
+            p[0][p[1]] = value
+            return value
+        right = self.visit(e.rvalue)
+        old = p[0][p[1]]
+        t = e.lvalue.ctype
+        if t.is_pointer():
+            step = right * cells(t.of)
+            value = (old[0], old[1] + step if e.op == '+=' else old[1] - step)
+        else:
+            rt = decay(e.rvalue.ctype)
+            value = fold(tac.BINARY[e.op[:-1]], rt, old if rt is t else convert(rt, old), right)
+            if rt is not t:
+                value = convert(t, value)
+        p[0][p[1]] = value
+        return value
+
+    def do_TernaryOp(self, e):
+        return self.visit(e.iftrue) if self.visit(e.cond) else self.visit(e.iffalse)
+
+    def do_ArrayRef(self, e):
+        p = self.address(e)
+        if e.ctype.kind == 'array':
+            return p
+        return p[0][p[1]]
+
+    def do_Call(self, e):
+        args = [self.visit(arg) for arg in e.args.exprs] if e.args is not None else []
+        name = self.visit(e.name)
+        if not isinstance(name, atoms.Atom):
+            raise InterpError('call through an invalid function pointer', self.line)
+        f = self.functions.get(name)
+        if f is not None:
+            return self.call(f, args)
+        if str(name) == 'printf':
+            return printf(self.out, args)
+        raise InterpError("call of an undefined function '%s'" % name, self.line)
+
+    def do_ExprList(self, e):
+        value = 0
+        for expr in e.exprs:
+            value = self.visit(expr)
+        return value
+
+    # Declarations
+
+    def do_Decl(self, n):
+        if n.name is None:
+            return
+        t = typetab.from_decl(n.type)
+        if t.kind == 'function':
+            return
+        init = n.init
+        if t.kind == 'array' and t.length is None and init is not None:
+            length = len(init.exprs) if isinstance(init, node.InitList) else \
+                len(typetab.constant_value(init)) + 1
+            t = typetab.array(t.of, length)
+        if t.kind == 'array':
+            mem = self.scopes[-1][n.name] = [0] * cells(t)
+            if init is not None:
+                self.initialize(mem, 0, t, init)
+            return
+        box = self.scopes[-1][n.name] = [0]
+        if init is not None:
+            if isinstance(init, node.InitList):
+                init = init.exprs[0]
+            box[0] = self.visit(init)
+
+    def initialize(self, mem, base, t, init):
+        if isinstance(init, node.InitList):
+            items = init.exprs
+        else:
+            items = [ord(ch) for ch in typetab.constant_value(init)] + [0]
+        size = cells(t.of)
+        for i, item in enumerate(items):
+            if t.of.kind == 'array':
+                self.initialize(mem, base + i * size, t.of, item)
+            elif isinstance(item, int):
+                mem[base + i * size] = item
+            else:
+                mem[base + i * size] = self.visit(item)
+
+    # Statements
+
+    def statement(self, n):
+        if n.lineno is not None:
+            self.line = n.lineno
+        self.visit(n)
+
+    def do_Compound(self, n):
+        self.scopes.append({})
+        try:
+            for item in n.items:
+                self.statement(item)
+        finally:
+            self.scopes.pop()
+
+    def do_EmptyStatement(self, n):
+        pass
+
+    def do_If(self, n):
+        if self.visit(n.cond):
+            self.statement(n.iftrue)
+        elif n.iffalse is not None:
+            self.statement(n.iffalse)
+
+    def do_While(self, n):
+        while self.visit(n.cond):
+            try:
+                self.statement(n.stmt)
+            except Break:
+                break
+            except Continue:
+                pass
+
+    def do_DoWhile(self, n):
+        while True:
+            try:
+                self.statement(n.stmt)
+            except Break:
+                break
+            except Continue:
+                pass
+            if not self.visit(n.cond):
+                break
+
+    def do_For(self, n):
+        if n.init is not None:
+            self.visit(n.init)
+        while n.cond is None or self.visit(n.cond):
+            try:
+                self.statement(n.stmt)
+            except Break:
+                break
+            except Continue:
+                pass
+            if n.next is not None:
+                self.visit(n.next)
+
+    def do_Switch(self, n):
+        value = self.visit(n.cond)
+        target = None
+        for case in tac.switch_labels(n.stmt):
+            if isinstance(case, node.Default):
+                target = target or case
+            elif value == self.visit(case.expr):
+                target = case
+                break
+        if target is None:
+            return
+        items = n.stmt.items if isinstance(n.stmt, node.Compound) else [n.stmt]
+        for k, item in enumerate(items):
+            label = item
+            while label is not target and isinstance(label, (node.Case, node.Default)):
+                label = label.stmt
+            if label is target:
+                break
+        else:
+            raise InterpError('case label inside a nested statement', target.lineno)
+        self.scopes.append({})
+        try:
+            self.statement(target)
+            for item in items[k + 1:]:
+                self.statement(item)
+        except Break:
+            pass
+        finally:
+            self.scopes.pop()
+
+    def do_Case(self, n):
+        self.statement(n.stmt)
+
+    do_Default = do_Case
+
+    def do_Label(self, n):
+        self.statement(n.stmt)
+
+    def do_Goto(self, n):
+        raise InterpError('goto is not supported', n.lineno)
+
+    def do_Break(self, n):
+        raise Break()
+
+    def do_Continue(self, n):
+        raise Continue()
+
+    def do_Return(self, n):
+        raise Return(self.visit(n.expr) if n.expr is not None else None)
+
+
+def run(ast, out=sys.stdout):
+    """Run a checked AST; return main's value."""
+    return TreeWalker(ast, out).run()
+
+
+def main(argv):
+    import semantic_analyzer
+    import syntax_analyzer
+
+    with open(argv[0]) as f:
+        ast = syntax_analyzer.parse(f.read())
+    if ast is None or semantic_analyzer.analyze(ast).errors:
+        return 1
+    try:
+        value = run(ast)
+    except InterpError as e:
+        sys.stdout.flush()
+        sys.stderr.write('%s:%s: %s\n' % (argv[0], e.lineno, e.msg))
+        return 1
+    return value & 0xFF
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
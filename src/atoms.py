@@ -0,0 +1,87 @@
+# ----------------------------------------------------------------------
+# atoms.py
+#
+# The compiler-wide table of interned names.  Every distinct identifier
+# (and string literal) is given a small integer, its atom, the first time
+# it is seen; later occurrences share the same Atom object.  The AST, the
+# symbol table and the IR keep atoms instead of string slices, so a name
+# is stored once however often it occurs and every table keyed by names
+# hashes and compares plain ints.
+#
+# An Atom is an int that prints as the name it stands for:
+#
+#   >>> a = intern('main')
+#   >>> a, str(a), int(a)
+#   ('main', 'main', 0)
+#
+# Token values from a tokbuf.TokenBuffer (memoryview slices of the
+# source) are looked up by their bytes, so an identifier seen before is
+# interned without decoding it.
+# ----------------------------------------------------------------------
+
+import sys
+
+
+# Atom -> name, and name (str or bytes) -> Atom.
+NAMES = []
+_atoms = {}
+
+
+class Atom(int):
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return NAMES[self]
+
+    def __str__(self):
+        return NAMES[self]
+
+    def __repr__(self):
+        return repr(NAMES[self])
+
+    def __reduce__(self):
+        # Atoms are only meaningful in their own process; other processes
+        # re-intern the name.
+        return (intern, (NAMES[self],))
+
+
+def intern(value):
+    """Return the Atom of a name given as str or as a bytes-like value."""
+    try:
+        atom = _atoms.get(value)
+    except TypeError:
+        # Slices of a writable buffer are not hashable.
+        value = bytes(value)
+        atom = _atoms.get(value)
+    if atom is None:
+        atom = _add(value)
+    return atom
+
+
+def _add(value):
+    if isinstance(value, str):
+        text = value
+    else:
+        value = bytes(value)
+        text = value.decode('utf-8')
+    atom = _atoms.get(text)
+    if atom is None:
+        atom = Atom(len(NAMES))
+        NAMES.append(sys.intern(text))
+        _atoms[text] = atom
+    _atoms[value] = atom
+    return atom
+
+
+def lookup(name):
+    """Return the Atom of name if it was interned, else None."""
+    return _atoms.get(name)
+
+
+def name(atom):
+    return NAMES[atom]
+
+
+def count():
+    return len(NAMES)
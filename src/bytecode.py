@@ -0,0 +1,475 @@
+# ----------------------------------------------------------------------
+# bytecode.py
+#
+# Compiles the three-address code of a tac.Program into register
+# bytecode for the virtual machine of vm.py.
+#
+# The code of a function is one array('i') of instructions, each an
+# opcode followed by its operands (see ARITY).  Operands are registers:
+# a call's registers start as a copy of the function's template, which
+# holds the constants, the strings, and the lists of the globals, so an
+# instruction never asks where an operand lives.  Where the TAC left
+# that question to the interpreter the compiler answers it once:
+#
+#   - a variable in memory (a global scalar, or a local whose address is
+#     taken) is a register holding its box; LOADV and STOREV move its
+#     value in and out of the scratch registers around the instruction.
+#   - an integer addition of a small constant is ADDI, with the
+#     constant in the instruction.
+#   - integer and float arithmetic are told apart: ADD, SUB, MUL, NEG
+#     and DIVI, whose results the VM wraps to 32 bits (and a TOCHAR after
+#     them to 8 for a char), or ADDF, SUBF, MULF, NEGF and DIVF.
+#     Conversion is TOCHAR, TOINT or TOFLOAT, and pointer arithmetic
+#     PADD, PSUB, PDIFF or PCMP with the size of the element in the
+#     instruction.
+#   - a load or store through p + n, where nothing else reads p + n, is
+#     one LOADX or STOREX on p and n in its place, if that is in the
+#     same block and p and n do not change before it.
+#   - a comparison only read by the conditional jump after it becomes a
+#     compare-and-branch (JLT, ... for ifnz, JNLT, ... for ifz), and a
+#     jump to such a test (the end of a loop body) a copy of it that
+#     jumps back into the body, so an iteration takes one jump, not two.
+#   - the PARAMs before a CALL become operands of the CALL, which copies
+#     them to the first registers of the callee.
+#
+# Labels become offsets into the array, and calls name the callee by its
+# index in Bytecode.functions.  A function pointer is the name of the
+# function; ICALL calls the function named in a register.
+#
+#   python src/bytecode.py FILE
+#
+# prints the bytecode of a mini-C file.
+# ----------------------------------------------------------------------
+
+import sys
+from array import array
+
+import interp
+import tac
+import typetab
+
+# Opcodes, in the order the VM tells them apart: moves, arithmetic and
+# memory, then jumps and calls, then the rest.
+(MOV, ADDI, ADD, SUB, MUL, LOAD, STORE, LOADX, LOADXI, STOREX, STOREXI, PADD, PADDI,
+ LOADV, STOREV,
+ JLT, JGT, JLE, JGE, JEQ, JNE, JNLT, JNGT, JNLE, JNGE, JMP, JZ, JNZ, CALL, ICALL, RET, RETV,
+ LT, GT, LE, GE, EQ, NE, ADDF, SUBF, MULF, DIVI, DIVF, MOD, SHL, SHR, AND, OR, XOR,
+ NEG, NEGF, NOT, INV, TOCHAR, TOINT, TOFLOAT, PSUB, PDIFF, PCMP, ADDR, PRINTF) = range(61)
+
+OPNAMES = ('mov', 'addi', 'add', 'sub', 'mul', 'load', 'store', 'loadx', 'loadxi', 'storex',
+           'storexi', 'padd', 'paddi', 'loadv', 'storev',
+           'jlt', 'jgt', 'jle', 'jge', 'jeq', 'jne', 'jnlt', 'jngt', 'jnle', 'jnge',
+           'jmp', 'jz', 'jnz', 'call', 'icall', 'ret', 'retv', 'lt', 'gt', 'le', 'ge', 'eq', 'ne',
+           'addf', 'subf', 'mulf', 'divi', 'divf', 'mod', 'shl', 'shr', 'and', 'or', 'xor',
+           'neg', 'negf', 'not', 'inv', 'tochar', 'toint', 'tofloat', 'psub', 'pdiff', 'pcmp', 'addr', 'printf')
+
+# Operands of each opcode; CALL, ICALL and PRINTF have their number of
+# arguments last and are followed by the arguments' registers.
+ARITY = (2, 3, 3, 3, 3, 2, 2, 4, 3, 4, 3, 4, 3, 2, 2,
+         3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 1, 2, 2, 3, 3, 1, 0,
+         3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3,
+         2, 2, 2, 2, 2, 2, 2, 4, 4, 4, 2, 2)
+
+ARITHMETIC = {tac.ADD: ADD, tac.SUB: SUB, tac.MUL: MUL, tac.MOD: MOD, tac.SHL: SHL,
+              tac.SHR: SHR, tac.AND: AND, tac.OR: OR, tac.XOR: XOR, tac.LT: LT, tac.GT: GT,
+              tac.LE: LE, tac.GE: GE, tac.EQ: EQ, tac.NE: NE}
+UNARY = {tac.NEG: NEG, tac.NOT: NOT, tac.INV: INV}
+FLOATING = {tac.ADD: ADDF, tac.SUB: SUBF, tac.MUL: MULF, tac.DIV: DIVF, tac.NEG: NEGF}
+# Integer operations whose result can overflow a char.
+NARROWED = frozenset((tac.ADD, tac.SUB, tac.MUL, tac.DIV, tac.SHL, tac.NEG))
+CONVERSIONS = {'char': TOCHAR, 'int': TOINT, 'float': TOFLOAT, 'double': TOFLOAT}
+# Comparison -> compare-and-branch when true, when false.
+BRANCHES = {tac.LT: (JLT, JNLT), tac.GT: (JGT, JNGT), tac.LE: (JLE, JNLE),
+            tac.GE: (JGE, JNGE), tac.EQ: (JEQ, JNE), tac.NE: (JNE, JEQ)}
+
+# Instructions a load or store is not moved across to fuse it with its
+# address.
+BOUNDARIES = frozenset((tac.LABEL, tac.JUMP, tac.JZ, tac.JNZ, tac.CALL, tac.RET))
+
+# Largest constant kept in an instruction.
+IMMEDIATE = 1 << 30
+
+
+class Chunk:
+    """The bytecode of one function.
+
+    template is the registers a call starts with, its arguments going
+    to registers 1 to n; fresh lists the (register, cells) of the arrays
+    and boxes each call makes.  starts and lines give the offset and
+    source line of each instruction."""
+
+    __slots__ = ('name', 'code', 'template', 'fresh', 'starts', 'lines')
+
+    def __init__(self, name):
+        self.name = name
+        self.code = array('i')
+        self.template = [None]
+        self.fresh = []
+        self.starts = array('i')
+        self.lines = array('i')
+
+    def nbytes(self):
+        return self.code.itemsize * len(self.code)
+
+
+class Bytecode:
+    """The bytecode of a program: functions by index, the index of each
+    function's name, and the index of the global initializers."""
+
+    def __init__(self):
+        self.functions = []
+        self.index = {}
+        self.init = None
+
+    def nbytes(self):
+        return sum(chunk.nbytes() for chunk in self.functions)
+
+
+class Compiler:
+    """Compiles a tac.Program to Bytecode."""
+
+    def __init__(self, program):
+        self.program = program
+        self.symbols = program.symbols
+        self.bytecode = Bytecode()
+        self.globals = dict((sid, [0] * interp.cells(program.symbols.type[sid]))
+                            for sid in program.globals)
+        self.strings = {}
+        self.numbers = {}
+        for f in program.functions.values():
+            self.numbers[f.sid] = len(self.numbers)
+
+    def compile(self):
+        bytecode = self.bytecode
+        for f in self.program.functions.values():
+            bytecode.index[str(f.name)] = len(bytecode.functions)
+            bytecode.functions.append(self.function(f))
+        bytecode.init = bytecode.index.get(str(tac.INIT))
+        return bytecode
+
+    def string(self, sid):
+        ptr = self.strings.get(sid)
+        if ptr is None:
+            text = typetab.string_value(str(self.symbols.value[sid]))
+            ptr = self.strings[sid] = ([ord(ch) for ch in text] + [0], 0)
+        return ptr
+
+    def function(self, f):
+        symbols = self.symbols
+        kind, types, values = symbols.kind, symbols.type, symbols.value
+        chunk = Chunk(str(f.name))
+        template = chunk.template
+        quads = f.code
+        n = len(quads)
+        taken = set(quads.b[i] for i in range(n) if quads.op[i] == tac.ADDR)
+        reads = {}
+        for i in range(n):
+            op = quads.op[i]
+            if op in tac.USE_A:
+                reads[quads.a[i]] = reads.get(quads.a[i], 0) + 1
+            if op in tac.USE_B:
+                reads[quads.b[i]] = reads.get(quads.b[i], 0) + 1
+            if op in tac.USE_C:
+                reads[quads.c[i]] = reads.get(quads.c[i], 0) + 1
+        # sid -> register, and the registers holding a box.
+        regs = {}
+        boxes = set()
+
+        def register(sid):
+            reg = regs.get(sid)
+            if reg is not None:
+                return reg
+            k = kind[sid]
+            t = types[sid]
+            reg = regs[sid] = len(template)
+            if k == tac.CONST:
+                template.append(values[sid])
+            elif k == tac.STRING:
+                template.append(self.string(sid))
+            elif k == tac.FUNC:
+                template.append(str(values[sid]))
+            elif k == tac.GLOBAL:
+                template.append(self.globals[sid])
+                if t.kind != 'array':
+                    boxes.add(reg)
+            elif t.kind == 'array':
+                template.append(None)
+                chunk.fresh.append((reg, interp.cells(t)))
+            elif sid in taken:
+                template.append(None)
+                chunk.fresh.append((reg, 1))
+                boxes.add(reg)
+            else:
+                template.append(0)
+            return reg
+
+        # The arguments of a call go to registers 1 to n; a parameter in
+        # memory is stored to its box on entry.
+        prologue = []
+        for p in f.params:
+            reg = len(template)
+            template.append(0)
+            if p in taken:
+                prologue.append((register(p), reg))
+            else:
+                regs[p] = reg
+        scratch = [len(template) + k for k in range(3)]
+        template.extend((0, 0, 0))
+        code = chunk.code
+        # Label -> its quad; quad -> offset of its code; (offset of a
+        # jump, quad it goes to).
+        labels = dict((quads.a[i], i) for i in range(n) if quads.op[i] == tac.LABEL)
+        positions = [0] * (n + 1)
+        fixups = []
+        # Registers of the PARAMs of the next CALL.
+        pending = []
+
+        def emit(line, *words):
+            chunk.starts.append(len(code))
+            chunk.lines.append(line)
+            code.extend(words)
+
+        def read(sid, k, line):
+            # The register of operand sid's value, loaded from its box
+            # into scratch register k if it has one (k is None: into a
+            # register of its own).
+            reg = register(sid)
+            if reg in boxes:
+                if k is None:
+                    template.append(0)
+                    dst = len(template) - 1
+                else:
+                    dst = scratch[k]
+                emit(line, LOADV, dst, reg)
+                return dst
+            return reg
+
+        def offset(sid, scale):
+            # The constant sid * scale, if it fits in an instruction.
+            if kind[sid] == tac.CONST and types[sid].kind in ('char', 'int') and \
+                    -IMMEDIATE < values[sid] * scale < IMMEDIATE:
+                return values[sid] * scale
+            return None
+
+        def single(sid):
+            # Is sid a register read once?
+            return reads.get(sid) == 1 and kind[sid] != tac.GLOBAL and sid not in taken
+
+        def fusable(i):
+            # Is quad i a comparison only read by the jump after it?
+            if i + 1 >= n or quads.op[i] not in BRANCHES or \
+                    quads.op[i + 1] not in (tac.JZ, tac.JNZ):
+                return False
+            a, b, c = quads.a[i], quads.b[i], quads.c[i]
+            return quads.b[i + 1] == a and single(a) and \
+                not types[b].is_pointer() and not types[c].is_pointer()
+
+        def indexing(i):
+            # The quad of the load or store that is the only reader of
+            # p + n at quad i, if p and n keep their values up to it.
+            a, b, c = quads.a[i], quads.b[i], quads.c[i]
+            if quads.op[i] != tac.ADD or not types[a].is_pointer() or not single(a):
+                return None
+            memory = any(kind[v] == tac.GLOBAL or v in taken for v in (b, c))
+            for k in range(i + 1, n):
+                op = quads.op[k]
+                if op == tac.LOAD and quads.b[k] == a or \
+                        op == tac.STORE and quads.a[k] == a and quads.b[k] != a:
+                    return k
+                if op in BOUNDARIES or op in tac.DEF_A and quads.a[k] in (b, c) or \
+                        memory and op == tac.STORE:
+                    return None
+            return None
+
+        # Quad of a load or store -> quad of the p + n it is fused with.
+        fused = {}
+        for i in range(n):
+            k = indexing(i)
+            if k is not None:
+                fused[k] = i
+        adds = set(fused.values())
+
+        def follows(i, target):
+            # Does quad target come right after quad i - 1 in the code?
+            return target >= i and all(quads.op[k] in (tac.NOP, tac.LABEL)
+                                       for k in range(i, target))
+
+        def branch(i, when, line):
+            # The compare-and-branch of quads i and i + 1, jumping where
+            # the jump of i + 1 does if when, past it if not.
+            op, _, b, c = quads[i]
+            emit(line, BRANCHES[op][not when], 0, read(b, 0, line), read(c, 1, line))
+
+        for box, reg in prologue:
+            emit(f.lineno, STOREV, box, reg)
+        i = 0
+        while i < n:
+            positions[i] = len(code)
+            op, a, b, c = quads[i]
+            line = quads.line[i]
+            i += 1
+            if op in (tac.NOP, tac.LABEL):
+                continue
+            if i - 1 in adds:
+                continue
+            if i - 1 in fused:
+                # p[n] for a load or store through p + n.
+                _, t, x, y = quads[fused[i - 1]]
+                scale = interp.cells(types[t].of)
+                ptr, index = (x, y) if types[x].is_pointer() else (y, x)
+                step = offset(index, scale)
+                p = read(ptr, 0, line)
+                if op == tac.STORE:
+                    v = read(b, 2, line)
+                    if step is None:
+                        emit(line, STOREX, p, read(index, 1, line), scale, v)
+                    else:
+                        emit(line, STOREXI, p, step, v)
+                    continue
+                dst = register(a)
+                out = scratch[2] if dst in boxes else dst
+                if step is None:
+                    emit(line, LOADX, out, p, read(index, 1, line), scale)
+                else:
+                    emit(line, LOADXI, out, p, step)
+                if dst in boxes:
+                    emit(line, STOREV, dst, out)
+                continue
+            if op == tac.JUMP:
+                target = labels[a]
+                while target < n and quads.op[target] in (tac.NOP, tac.LABEL):
+                    target += 1
+                if fusable(target):
+                    # A jump to a loop's test is the test, jumping back
+                    # into the loop if it holds.
+                    branch(target, quads.op[target + 1] == tac.JZ, line)
+                    fixups.append((chunk.starts[-1], target + 2))
+                    a = quads.a[target + 1]
+                if not follows(i, labels[a]):
+                    emit(line, JMP, 0)
+                    fixups.append((chunk.starts[-1], labels[a]))
+                continue
+            if op in (tac.JZ, tac.JNZ):
+                emit(line, JZ if op == tac.JZ else JNZ, 0, read(b, 0, line))
+                fixups.append((chunk.starts[-1], labels[a]))
+                continue
+            if op == tac.PARAM:
+                pending.append(read(b, None, line))
+                continue
+            if op == tac.RET:
+                if b:
+                    emit(line, RET, read(b, 0, line))
+                else:
+                    emit(line, RETV)
+                continue
+            if op == tac.STORE:
+                emit(line, STORE, read(a, 0, line), read(b, 1, line))
+                continue
+            if fusable(i - 1):
+                branch(i - 1, quads.op[i] == tac.JNZ, line)
+                fixups.append((chunk.starts[-1], labels[quads.a[i]]))
+                i += 1
+                continue
+            # Instructions with a result.
+            dst = register(a) if a else 0
+            boxed = dst in boxes
+            out = scratch[2] if boxed else dst
+            ta = types[a]
+            if op == tac.CALL:
+                args = pending[len(pending) - c:]
+                del pending[len(pending) - c:]
+                if b in self.numbers:
+                    emit(line, CALL, out, self.numbers[b], c, *args)
+                elif kind[b] == tac.FUNC and str(values[b]) in interp.Interpreter.BUILTINS:
+                    emit(line, PRINTF, out, c, *args)
+                else:
+                    # Through a pointer, or to a function declared but
+                    # never defined, which fails when called.
+                    emit(line, ICALL, out, read(b, 0, line), c, *args)
+            elif op == tac.COPY:
+                emit(line, MOV, out, read(b, 0, line))
+            elif op == tac.CONV:
+                conv = CONVERSIONS.get(ta.kind)
+                if conv is None:
+                    emit(line, MOV, out, read(b, 0, line))
+                else:
+                    emit(line, conv, out, read(b, 0, line))
+            elif op == tac.ADDR:
+                emit(line, ADDR, out, register(b))
+            elif op == tac.LOAD:
+                emit(line, LOAD, out, read(b, 0, line))
+            elif op in FLOATING and ta.rank > typetab.INT.rank:
+                if op == tac.NEG:
+                    emit(line, NEGF, out, read(b, 0, line))
+                else:
+                    emit(line, FLOATING[op], out, read(b, 0, line), read(c, 1, line))
+            elif op in UNARY:
+                emit(line, UNARY[op], out, read(b, 0, line))
+            elif op in (tac.ADD, tac.SUB) and ta.is_pointer():
+                scale = interp.cells(ta.of)
+                if types[b].is_pointer():
+                    ptr, index = b, c
+                else:
+                    ptr, index = c, b
+                step = offset(index, scale)
+                if step is not None:
+                    emit(line, PADDI, out, read(ptr, 0, line), step if op == tac.ADD else -step)
+                else:
+                    emit(line, PADD if op == tac.ADD else PSUB, out, read(ptr, 0, line),
+                         read(index, 1, line), scale)
+            elif op == tac.SUB and types[b].is_pointer():
+                emit(line, PDIFF, out, read(b, 0, line), read(c, 1, line),
+                     interp.cells(types[b].of))
+            elif op in BRANCHES and (types[b].is_pointer() or types[c].is_pointer()):
+                emit(line, PCMP, out, read(b, 0, line), read(c, 1, line), op)
+            elif op == tac.DIV:
+                emit(line, DIVI, out, read(b, 0, line), read(c, 1, line))
+            elif op in (tac.ADD, tac.SUB) and offset(c, 1) is not None:
+                emit(line, ADDI, out, read(b, 0, line), values[c] if op == tac.ADD else -values[c])
+            elif op == tac.ADD and offset(b, 1) is not None:
+                emit(line, ADDI, out, read(c, 0, line), values[b])
+            else:
+                emit(line, ARITHMETIC[op], out, read(b, 0, line), read(c, 1, line))
+            if ta is typetab.CHAR and op in NARROWED:
+                emit(line, TOCHAR, out, out)
+            if boxed:
+                emit(line, STOREV, dst, out)
+        positions[n] = len(code)
+        for at, target in fixups:
+            code[at + 1] = positions[target]
+        return chunk
+
+
+def compile(program):
+    """The Bytecode of a tac.Program."""
+    return Compiler(program).compile()
+
+
+def disassemble(chunk, out=sys.stdout):
+    code = chunk.code
+    out.write('function %s: %d registers, %d bytes\n' % (
+        chunk.name, len(chunk.template), chunk.nbytes()))
+    for start in chunk.starts:
+        op = code[start]
+        end = start + 1 + ARITY[op]
+        if op in (CALL, ICALL, PRINTF):
+            end += code[end - 1]
+        operands = code[start + 1:end]
+        out.write('  %5d  %-8s %s\n' % (start, OPNAMES[op], ' '.join(map(str, operands))))
+
+
+def main(argv):
+    import semantic_analyzer
+    import syntax_analyzer
+
+    with open(argv[0]) as f:
+        ast = syntax_analyzer.parse(f.read())
+    if ast is None or semantic_analyzer.analyze(ast).errors:
+        return 1
+    for chunk in compile(tac.generate(ast)).functions:
+        disassemble(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,239 @@
+# ----------------------------------------------------------------------
+# cfg.py
+#
+# Basic blocks and the control-flow graph of a tac.Function.
+#
+# A block is a run of instructions [start[b], end[b]) of the function's
+# Quads.  Leaders are the first instruction, every LABEL, and every
+# instruction after a JUMP, JZ, JNZ or RET, so loops (while, do, for),
+# branches (if, switch, ?:, && and ||), break, continue, goto and return
+# all end or begin blocks.  Block 0 is the entry.
+#
+# On top of the graph (succs and preds, lists of block numbers) the CFG
+# computes, in reverse postorder:
+#
+#   idom        immediate dominators (Cooper, Harvey and Kennedy's
+#               iterative algorithm, which converges in two or three
+#               passes on the graphs of structured code)
+#   frontiers   dominance frontiers
+#   loops       natural loops of the back edges
+#
+# Unreachable blocks have no dominator (idom -1) and are left out of
+# order.
+#
+#   python src/cfg.py FILE
+#
+# prints the blocks of every function of a mini-C file.
+# ----------------------------------------------------------------------
+
+import sys
+from array import array
+from bisect import bisect_right
+
+import tac
+
+
+BRANCHES = (tac.JUMP, tac.JZ, tac.JNZ, tac.RET)
+
+
+class CFG:
+    """The control-flow graph of one tac.Function."""
+
+    def __init__(self, function):
+        self.function = function
+        code = self.code = function.code
+        ops = code.op
+        n = len(ops)
+
+        leaders = array('i', [0] if n else [])
+        for i in range(1, n):
+            if ops[i] == tac.LABEL or ops[i - 1] in BRANCHES:
+                leaders.append(i)
+        self.start = leaders
+        self.end = leaders[1:]
+        if n:
+            self.end.append(n)
+        nblocks = len(leaders)
+
+        # Label operand -> block it starts.
+        self.labels = {}
+        for b in range(nblocks):
+            i = leaders[b]
+            while i < self.end[b] and ops[i] == tac.LABEL:
+                self.labels[code.a[i]] = b
+                i += 1
+
+        self.succs = [[] for _ in range(nblocks)]
+        self.preds = [[] for _ in range(nblocks)]
+        for b in range(nblocks):
+            last = self.end[b] - 1
+            op = ops[last]
+            if op in (tac.JUMP, tac.JZ, tac.JNZ):
+                self.edge(b, self.labels[code.a[last]])
+            if op not in (tac.JUMP, tac.RET) and b + 1 < nblocks:
+                self.edge(b, b + 1)
+
+        self.order = self.reverse_postorder()
+        self.idom = self.dominators()
+        self._number_dom_tree()
+
+    def __len__(self):
+        return len(self.start)
+
+    def edge(self, a, b):
+        if b not in self.succs[a]:
+            self.succs[a].append(b)
+            self.preds[b].append(a)
+
+    def block_of(self, i):
+        """The block of instruction i."""
+        return bisect_right(self.start, i) - 1
+
+    def instructions(self, b):
+        return range(self.start[b], self.end[b])
+
+    def reverse_postorder(self):
+        """The blocks reachable from the entry, in reverse postorder."""
+        if not len(self):
+            return []
+        post = []
+        seen = bytearray(len(self))
+        seen[0] = 1
+        stack = [(0, iter(self.succs[0]))]
+        while stack:
+            b, succs = stack[-1]
+            for s in succs:
+                if not seen[s]:
+                    seen[s] = 1
+                    stack.append((s, iter(self.succs[s])))
+                    break
+            else:
+                stack.pop()
+                post.append(b)
+        post.reverse()
+        return post
+
+    def dominators(self):
+        """Immediate dominators, by block (-1 if unreachable)."""
+        idom = array('i', [-1]) * len(self)
+        if not self.order:
+            return idom
+        rpo = array('i', [-1]) * len(self)
+        for k, b in enumerate(self.order):
+            rpo[b] = k
+        idom[0] = 0
+        changed = True
+        while changed:
+            changed = False
+            for b in self.order[1:]:
+                new = -1
+                for p in self.preds[b]:
+                    if idom[p] < 0:
+                        continue
+                    if new < 0:
+                        new = p
+                        continue
+                    # Intersect: walk both fingers up to the common dominator.
+                    a = p
+                    while a != new:
+                        while rpo[a] > rpo[new]:
+                            a = idom[a]
+                        while rpo[new] > rpo[a]:
+                            new = idom[new]
+                if idom[b] != new:
+                    idom[b] = new
+                    changed = True
+        return idom
+
+    def _number_dom_tree(self):
+        # Preorder and postorder numbers of the dominator tree make
+        # dominates() constant time.
+        self.children = [[] for _ in range(len(self))]
+        for b in self.order[1:]:
+            self.children[self.idom[b]].append(b)
+        self.pre = array('i', [-1]) * len(self)
+        self.post = array('i', [-1]) * len(self)
+        if not self.order:
+            return
+        counter = 0
+        stack = [(0, False)]
+        while stack:
+            b, done = stack.pop()
+            if done:
+                self.post[b] = counter
+                counter += 1
+                continue
+            self.pre[b] = counter
+            counter += 1
+            stack.append((b, True))
+            for c in reversed(self.children[b]):
+                stack.append((c, False))
+
+    def dominates(self, a, b):
+        """Whether block a dominates block b (every block dominates itself)."""
+        return self.pre[a] >= 0 and self.pre[b] >= 0 and \
+            self.pre[a] <= self.pre[b] and self.post[b] <= self.post[a]
+
+    def frontiers(self):
+        """The dominance frontier of every block, as sets."""
+        df = [set() for _ in range(len(self))]
+        idom = self.idom
+        for b in self.order:
+            preds = [p for p in self.preds[b] if idom[p] >= 0]
+            if len(preds) < 2:
+                continue
+            for p in preds:
+                runner = p
+                while runner != idom[b]:
+                    df[runner].add(b)
+                    runner = idom[runner]
+        return df
+
+    def back_edges(self):
+        """(latch, header) pairs: edges to a block that dominates their source."""
+        return [(b, s) for b in self.order for s in self.succs[b] if self.dominates(s, b)]
+
+    def loops(self):
+        """{header: set of blocks} of the natural loops, loops that share
+        a header merged."""
+        loops = {}
+        for latch, header in self.back_edges():
+            body = loops.setdefault(header, {header})
+            stack = [latch]
+            while stack:
+                b = stack.pop()
+                if b not in body and self.idom[b] >= 0:
+                    body.add(b)
+                    stack.extend(self.preds[b])
+        return loops
+
+
+def build(program):
+    """{function name: CFG} for every function of a tac.Program."""
+    return dict((name, CFG(f)) for name, f in program.functions.items())
+
+
+def main(argv):
+    import semantic_analyzer
+    import syntax_analyzer
+
+    for path in argv:
+        with open(path) as f:
+            ast = syntax_analyzer.parse(f.read())
+        if ast is None or semantic_analyzer.analyze(ast).errors:
+            return 1
+        program = tac.generate(ast)
+        for name, graph in build(program).items():
+            print('function %s: %d blocks, loops at %s' % (
+                name, len(graph), sorted('B%d' % h for h in graph.loops())))
+            for b in range(len(graph)):
+                print('B%d  preds %s  succs %s  idom %s' % (
+                    b, graph.preds[b], graph.succs[b],
+                    graph.idom[b] if graph.idom[b] >= 0 else '-'))
+                for i in graph.instructions(b):
+                    print(tac.format_quad(program.symbols, *graph.code[i]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
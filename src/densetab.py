@@ -0,0 +1,150 @@
+# ----------------------------------------------------------------------
+# densetab.py
+#
+# Integer-encoded, row-displacement compressed LR tables.
+#
+# ply.yacc keeps the action and goto tables as dicts of dicts keyed by
+# symbol names.  Here terminals are numbered like the tokens tuple of
+# lexical_analyzer.py (tokbuf.TOKEN_CODES, then '$end' and any other
+# table terminal), nonterminals in order of appearance, and every state
+# row is packed into shared arrays ("comb vectors"):
+#
+#   action_value[action_base[state] + terminal]   if
+#   action_check[action_base[state] + terminal] == state,
+#   else action_default[state]
+#
+#   goto_value[goto_base[state] + nonterminal]
+#
+# Each state's most frequent reduction becomes its default action, so a
+# row only stores its shifts and its other reductions; an error is
+# detected at the latest before the next shift.  Goto lookups are only
+# made for entries that exist, so goto rows need no check array.
+#
+# Action values follow ply: > 0 shift to that state, < 0 reduce by that
+# production, 0 accept.  The error action is -len(productions), one past
+# the last production.
+# ----------------------------------------------------------------------
+
+from array import array
+
+import tokbuf
+
+
+ARRAYS = ('action_base', 'action_check', 'action_value', 'action_default',
+          'goto_base', 'goto_value')
+
+# Table arrays are signed 32-bit integers.
+TYPECODE = 'i'
+
+
+class DenseTables:
+    def __init__(self, terminals, nonterminals, arrays):
+        self.terminals = tuple(terminals)
+        self.nonterminals = tuple(nonterminals)
+        self.terminal_codes = dict((name, code) for code, name in enumerate(self.terminals))
+        self.nonterminal_codes = dict((name, code) for code, name in enumerate(self.nonterminals))
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def action(self, state, code):
+        i = self.action_base[state] + code
+        if self.action_check[i] == state:
+            return self.action_value[i]
+        return self.action_default[state]
+
+    def goto(self, state, code):
+        return self.goto_value[self.goto_base[state] + code]
+
+    def nbytes(self):
+        return sum(len(getattr(self, name)) * 4 for name in ARRAYS)
+
+
+def pack(rows, width, check):
+    """Pack sparse rows ({column: value}) into comb vectors.
+
+    Returns (base, values, checks); checks[i] is the row that owns slot i
+    (or -1), and is None when check is false.
+    """
+    base = [0] * len(rows)
+    values = []
+    checks = []
+    # Bit i is set when slot i is taken.  A row fits at the offsets where
+    # none of its columns lands on a taken slot, so the lowest clear bit
+    # of the taken slots shifted down by each column is its offset.
+    taken = 0
+    # Fill with the densest rows first, which leaves the fewest holes.
+    order = sorted(range(len(rows)), key=lambda r: -len(rows[r]))
+    for r in order:
+        row = rows[r]
+        if not row:
+            continue
+        columns = sorted(row)
+        clash = 0
+        mask = 0
+        for c in columns:
+            clash |= taken >> c
+            mask |= 1 << c
+        offset = (~clash & (clash + 1)).bit_length() - 1
+        taken |= mask << offset
+        base[r] = offset
+        top = offset + columns[-1] + 1
+        if top > len(values):
+            grow = top - len(values)
+            values.extend([0] * grow)
+            checks.extend([-1] * grow)
+        for c in columns:
+            values[offset + c] = row[c]
+            checks[offset + c] = r
+
+    # Pad so that base + any column stays inside the arrays.
+    pad = max(base) + width - len(values) if rows else 0
+    if pad > 0:
+        values.extend([0] * pad)
+        checks.extend([-1] * pad)
+    return base, values, (checks if check else None)
+
+
+def encode(action, goto, productions):
+    """Encode ply's dict tables (LRParser.action/goto) as DenseTables."""
+    terminals = list(tokbuf.TOKEN_NAMES)
+    extra = set()
+    for row in action.values():
+        extra.update(name for name in row if name not in tokbuf.TOKEN_CODES)
+    terminals.extend(sorted(extra))
+    nonterminals = []
+    for prod in productions:
+        if prod.name not in nonterminals:
+            nonterminals.append(prod.name)
+    tcode = dict((name, code) for code, name in enumerate(terminals))
+    ncode = dict((name, code) for code, name in enumerate(nonterminals))
+
+    nstates = max(action) + 1
+    error = -len(productions)
+    defaults = [error] * nstates
+    action_rows = [{} for _ in range(nstates)]
+    for state, row in action.items():
+        reductions = {}
+        for act in row.values():
+            if act < 0:
+                reductions[act] = reductions.get(act, 0) + 1
+        if reductions:
+            # Most frequent reduction; ties go to the lowest production.
+            defaults[state] = max(sorted(reductions, reverse=True), key=reductions.get)
+        action_rows[state] = dict((tcode[name], act) for name, act in row.items()
+                                  if act != defaults[state])
+
+    goto_rows = [{} for _ in range(nstates)]
+    for state, row in goto.items():
+        goto_rows[state] = dict((ncode[name], target) for name, target in row.items())
+
+    action_base, action_value, action_check = pack(action_rows, len(terminals), True)
+    goto_base, goto_value, _ = pack(goto_rows, len(nonterminals), False)
+    arrays = {
+        'action_base': array(TYPECODE, action_base),
+        'action_check': array(TYPECODE, action_check),
+        'action_value': array(TYPECODE, action_value),
+        'action_default': array(TYPECODE, defaults),
+        'goto_base': array(TYPECODE, goto_base),
+        'goto_value': array(TYPECODE, goto_value),
+    }
+    return DenseTables(terminals, nonterminals, arrays)
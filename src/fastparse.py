@@ -0,0 +1,226 @@
+# ----------------------------------------------------------------------
+# fastparse.py
+#
+# A specialized LR parse loop for the mini-C grammar.  It runs on the
+# same LALR tables as ply.yacc.LRParser but
+#
+#   - looks actions and gotos up by integer symbol codes in the compressed
+#     densetab arrays instead of nested dicts keyed by symbol names,
+#   - keeps plain Python values on a symbol stack that is reused from one
+#     parse to the next, without a YaccSymbol per shift or reduction,
+#   - does not call actions that only pass a value through (t[0] = t[1],
+#     t[0] = None or pass), and calls the others with one reusable
+#     Reduction object in place of a fresh YaccProduction.
+#
+# Error recovery is left to ply: on the first syntax error FastParser
+# re-runs the input through the stock LRParser, so p_error and the
+# resulting diagnostics are exactly those of ply.yacc.  The tokens are
+# replayed, not lexed again, so no illegal character is reported twice.
+# ----------------------------------------------------------------------
+
+import dis
+
+import densetab
+
+
+# How a reduction produces its value.
+CALL = 0     # call the action
+FIRST = 1    # the value of the first (nonterminal) symbol
+NONE = 2     # None
+
+
+class ParseError(Exception):
+    pass
+
+
+def _syntax_error(t):
+    raise ParseError()
+
+
+def _first(t):
+    t[0] = t[1]
+
+
+def _none(t):
+    t[0] = None
+
+
+def _pass(t):
+    pass
+
+
+def _instructions(func):
+    # Docstrings, if any, are not part of the instruction stream.
+    return [(i.opname, i.argval) for i in dis.get_instructions(func)
+            if i.opname not in ('RESUME', 'NOP', 'CACHE')]
+
+
+TRIVIAL = {}
+
+
+def trivial_mode(func):
+    """Return FIRST or NONE if func is a trivial action, else CALL."""
+    if not TRIVIAL:
+        TRIVIAL[repr(_instructions(_first))] = FIRST
+        TRIVIAL[repr(_instructions(_none))] = NONE
+        TRIVIAL[repr(_instructions(_pass))] = NONE
+    return TRIVIAL.get(repr(_instructions(func)), CALL)
+
+
+class Reduction:
+    """The p argument of grammar actions: a cheap YaccProduction.
+
+    slice holds the token objects of terminals and the values of
+    nonterminals; terminal[n] tells which is which.
+    """
+
+    __slots__ = ('slice', 'terminal', 'lexer', 'parser')
+
+    def __init__(self, lexer, parser):
+        self.slice = None
+        self.terminal = None
+        self.lexer = lexer
+        self.parser = parser
+
+    def __getitem__(self, n):
+        value = self.slice[n]
+        return value.value if self.terminal[n] else value
+
+    def __setitem__(self, n, value):
+        self.slice[n] = value
+
+    def __len__(self):
+        return len(self.slice)
+
+    def lineno(self, n):
+        return getattr(self.slice[n], 'lineno', 0) if self.terminal[n] else 0
+
+    def lexpos(self, n):
+        return getattr(self.slice[n], 'lexpos', 0) if self.terminal[n] else 0
+
+
+class FastParser:
+    """A fast parse loop over the tables of a ply.yacc.LRParser."""
+
+    def __init__(self, parser):
+        self.parser = parser
+        dense = getattr(parser, 'dense', None)
+        if dense is None:
+            dense = densetab.encode(parser.action, parser.goto, parser.productions)
+        self.dense = dense
+        self.codes = dense.terminal_codes
+        self.end = self.codes['$end']
+        self.productions = [self.compile(prod) for prod in parser.productions]
+        # The error action reduces by an extra production whose action
+        # raises, so the loop never tests for errors on the success path.
+        self.productions.append((0, 0, _syntax_error, CALL, (False,)))
+        self.states = []
+        self.symbols = []
+
+    def compile(self, prod):
+        rhs = prod.str.split('->')[1].split()
+        if rhs == ['<empty>']:
+            rhs = []
+        terminal = (False,) + tuple(symbol in self.codes for symbol in rhs)
+        func = prod.callable
+        mode = CALL if func is None else trivial_mode(func)
+        if mode == FIRST and (not rhs or terminal[1]):
+            # t[1] of a terminal is its token value, not the token.
+            mode = CALL
+        return (prod.len, self.dense.nonterminal_codes[prod.name], func, mode, terminal)
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        if debug or tracking or tokenfunc is not None:
+            return self.parser.parse(input, lexer, debug, tracking, tokenfunc)
+        if input is not None:
+            lexer.input(input)
+
+        dense = self.dense
+        action_base = dense.action_base
+        action_check = dense.action_check
+        action_value = dense.action_value
+        action_default = dense.action_default
+        goto_base = dense.goto_base
+        goto_value = dense.goto_value
+        productions = self.productions
+        codes = self.codes
+        end = self.end
+        get_token = lexer.token
+        t = Reduction(lexer, self)
+
+        states = self.states
+        symbols = self.symbols
+        del states[:]
+        del symbols[:]
+        states.append(0)
+        symbols.append(None)
+        state = 0
+        lookahead = None
+        code = end
+
+        try:
+            while True:
+                if lookahead is None:
+                    lookahead = get_token()
+                    code = end if lookahead is None else codes[lookahead.type]
+                i = action_base[state] + code
+                act = action_value[i] if action_check[i] == state else action_default[state]
+                if act > 0:
+                    state = act
+                    states.append(state)
+                    symbols.append(lookahead)
+                    lookahead = None
+                    continue
+                if act == 0:
+                    return symbols[-1]
+
+                plen, lhs, func, mode, terminal = productions[-act]
+                if mode == FIRST:
+                    value = symbols[-plen]
+                elif mode == NONE:
+                    value = None
+                else:
+                    if plen:
+                        targ = symbols[-plen - 1:]
+                        targ[0] = None
+                    else:
+                        targ = [None]
+                    t.slice = targ
+                    t.terminal = terminal
+                    func(t)
+                    value = targ[0]
+                if plen:
+                    del symbols[-plen:]
+                    del states[-plen:]
+                state = goto_value[goto_base[states[-1]] + lhs]
+                states.append(state)
+                symbols.append(value)
+        except ParseError:
+            return self.recover(input, lexer)
+        finally:
+            del states[:]
+            del symbols[:]
+
+    def recover(self, input, lexer):
+        """Reparse with the stock parser, which reports and recovers."""
+        rewind = getattr(lexer, 'rewind', None)
+        if rewind is not None:
+            rewind()
+            return self.parser.parse(lexer=lexer)
+        # A ply lexer lexes again; the illegal characters before where it
+        # stopped were reported already.
+        stop = lexer.lexpos
+        report = lexer.lexerrorf
+
+        def error(t):
+            if t.lexpos < stop:
+                t.lexer.skip(1)
+            else:
+                report(t)
+
+        lexer.input(input if input is not None else lexer.lexdata)
+        lexer.lexerrorf = error
+        try:
+            return self.parser.parse(lexer=lexer)
+        finally:
+            lexer.lexerrorf = report
@@ -0,0 +1,221 @@
+# ----------------------------------------------------------------------
+# incremental.py
+#
+# Incremental reparsing of an edited source buffer.  A Document keeps the
+# AST of every top-level external_declaration together with its source
+# span.  An edit only re-lexes and re-parses the declarations it touches:
+# the lexer is started at the lexpos of the first affected declaration and
+# stopped at the first unaffected one, the new declarations are parsed as
+# a translation_unit of their own, and the spans (and line numbers) of the
+# declarations after the edit are shifted.  Anything the region parse
+# cannot vouch for -- a syntax error, or a token or comment that runs past
+# the region -- falls back to parsing the whole buffer.
+# ----------------------------------------------------------------------
+
+import sys
+
+import lexical_analyzer
+import node
+import syntax_analyzer
+import ply.yacc as yacc
+
+
+class RegionError(Exception):
+    """Raised to abandon a region parse that hit a syntax error."""
+
+
+class Entry:
+    """One external_declaration: its nodes and its [start, end) span."""
+
+    __slots__ = ('start', 'end', 'nodes', 'shift')
+
+    def __init__(self, start, end, nodes):
+        self.start = start
+        self.end = end
+        self.nodes = nodes
+        # Line delta not yet applied to the nodes (see Document.ast()).
+        self.shift = 0
+
+
+def shift_lines(nodes, delta):
+    seen = set()
+    for root in nodes:
+        for n in node.walk(root):
+            # Declarators of one declaration share their base type node.
+            if id(n) in seen:
+                continue
+            seen.add(id(n))
+            if n.lineno is not None:
+                n.lineno += delta
+            if isinstance(n, node.Compound) and n.end_lineno is not None:
+                n.end_lineno += delta
+
+
+def common_prefix(a, b):
+    """Return the length of the common prefix of a and b.
+
+    The bisection compares whole slices, so the scan runs in C.
+    """
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class Document:
+    """A source buffer and the AST of its external declarations."""
+
+    def __init__(self, source=''):
+        self.source = source
+        self.entries = []
+        self.errors = 0
+        # Number of declarations parsed by the last parse or edit.
+        self.reparsed = 0
+        self._region = False
+        self._spans = []
+        self._lexer = None
+        self.parser = self._make_parser(syntax_analyzer.get_parser())
+        self.parse_all()
+
+    def _make_parser(self, parser):
+        """Return a copy of parser that records external_declaration spans."""
+        productions = []
+        for prod in parser.productions:
+            mini = yacc.MiniProduction(prod.str, prod.name, prod.len, prod.func,
+                                       prod.file, prod.line)
+            mini.callable = prod.callable
+            if prod.name == 'external_declaration':
+                mini.callable = self._recorder(prod.callable)
+            productions.append(mini)
+        lr = yacc.LRTable()
+        lr.lr_productions = productions
+        lr.lr_action = parser.action
+        lr.lr_goto = parser.goto
+        return yacc.LRParser(lr, self._error)
+
+    def _recorder(self, action):
+        spans = self._spans
+
+        def record(t):
+            action(t)
+            start, last = t.lexspan(1)
+            # Every external declaration ends in a one-character '}' or ';'.
+            spans.append(Entry(start, last + 1, t[0]))
+        return record
+
+    def _error(self, t):
+        self.errors += 1
+        if self._region:
+            raise RegionError()
+        if t is None:
+            syntax_analyzer.end_error(self._lexer)
+        else:
+            syntax_analyzer.p_error(t)
+
+    def _parse(self, start, stop):
+        """Parse the declarations in source[start:stop].
+
+        Returns (entries, offset of the first token at or after stop).
+        """
+        lexer = self._lexer = lexical_analyzer.get_lexer()
+        lexer.input(self.source)
+        lexer.lexpos = start
+        boundary = []
+
+        def token():
+            tok = lexer.token()
+            if tok is None or tok.lexpos >= stop:
+                boundary.append(len(self.source) if tok is None else tok.lexpos)
+                return None
+            return tok
+
+        first = token()
+        if first is None:
+            return [], boundary[0]
+        pending = [first]
+
+        def tokenfunc():
+            return pending.pop() if pending else token()
+
+        del self._spans[:]
+        self.parser.parse(lexer=lexer, tokenfunc=tokenfunc, tracking=True)
+        entries = list(self._spans)
+        del self._spans[:]
+        return entries, boundary[0] if boundary else len(self.source)
+
+    def parse_all(self):
+        self.errors = 0
+        self.entries, _ = self._parse(0, len(self.source))
+        self.reparsed = len(self.entries)
+
+    def edit(self, start, end, text):
+        """Replace source[start:end] with text and update the AST."""
+        old = self.source
+        self.source = old[:start] + text + old[end:]
+        if self.errors:
+            self.parse_all()
+            return
+
+        delta = len(text) - (end - start)
+        lines = text.count('\n') - old.count('\n', start, end)
+
+        # Declarations strictly before/after the edit are kept; an edit that
+        # touches a declaration's first or last character reparses it.
+        entries = self.entries
+        lo = 0
+        while lo < len(entries) and entries[lo].end < start:
+            lo += 1
+        hi = lo
+        while hi < len(entries) and entries[hi].start <= end:
+            hi += 1
+        region_start = entries[lo - 1].end if lo > 0 else 0
+        if hi < len(entries):
+            next_start = entries[hi].start + delta
+        else:
+            next_start = len(self.source)
+
+        self._region = True
+        try:
+            new, boundary = self._parse(region_start, next_start)
+        except RegionError:
+            new = None
+        finally:
+            self._region = False
+        if new is None or boundary != next_start:
+            self.parse_all()
+            return
+
+        for entry in entries[hi:]:
+            entry.start += delta
+            entry.end += delta
+            entry.shift += lines
+        entries[lo:hi] = new
+        self.reparsed = len(new)
+
+    def update(self, source):
+        """Replace the whole buffer, reparsing only what changed."""
+        old = self.source
+        prefix = common_prefix(old, source)
+        limit = min(len(old), len(source)) - prefix
+        suffix = common_prefix(old[::-1][:limit], source[::-1][:limit])
+        self.edit(prefix, len(old) - suffix, source[prefix:len(source) - suffix])
+
+    def ast(self):
+        """Return the TranslationUnit of the current source."""
+        ext = []
+        for entry in self.entries:
+            if entry.shift:
+                shift_lines(entry.nodes, entry.shift)
+                entry.shift = 0
+            ext.extend(entry.nodes)
+        return node.TranslationUnit(ext, ext[0].lineno if ext else None)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as f:
+        doc = Document(f.read())
+    doc.ast().show()
@@ -0,0 +1,259 @@
+# ----------------------------------------------------------------------
+# inline.py
+#
+# Function inlining over the three-address code, run by opt.py before
+# the SSA passes so that they see the callee's code in place.
+#
+# The call graph has an edge from each function to each function it
+# calls.  A function on a cycle of it (Tarjan's strongly connected
+# components) is recursive and never inlined; the others are visited
+# callees first, so what was inlined into a function comes along when it
+# is inlined in turn.
+#
+# Whether a call is inlined is up to a CostModel: its cost is the size
+# of the callee less what the call itself takes (a PARAM per argument,
+# the CALL and the RET), its benefit grows with the loops around the
+# call and the constant arguments, and a caller may grow to growth times
+# its size at most.  The callee's temporaries, variables and labels are
+# copied under new ids; PARAMs become copies to the parameters and each
+# RET a copy to the call's result and a jump past the body.  Functions
+# no call or address is left to are dropped, main and the global
+# initializers aside.
+# ----------------------------------------------------------------------
+
+import atoms
+import cfg
+import tac
+
+
+class CostModel:
+    """The knobs of the inliner.  A call is inlined when
+
+        size - call - arguments - loop * depth - constant * constants
+
+    is at most threshold, where size is the callee's number of
+    instructions, depth the number of loops around the call and
+    constants the number of constant arguments, and the caller has not
+    yet grown past growth times its size."""
+
+    __slots__ = ('threshold', 'call', 'loop', 'constant', 'growth')
+
+    def __init__(self, threshold=16, call=2, loop=12, constant=3, growth=3.0):
+        self.threshold = threshold
+        self.call = call
+        self.loop = loop
+        self.constant = constant
+        self.growth = growth
+
+    def accepts(self, size, arguments, depth, constants):
+        cost = size - self.call - arguments
+        benefit = self.loop * depth + self.constant * constants
+        return cost - benefit <= self.threshold
+
+
+def size(f):
+    """The number of instructions of f, labels aside."""
+    return sum(1 for op in f.code.op if op not in (tac.LABEL, tac.NOP))
+
+
+def call_graph(program):
+    """{function sid: list of the function sids it calls}."""
+    functions = set(f.sid for f in program.functions.values())
+    graph = {}
+    for f in program.functions.values():
+        code = f.code
+        callees = graph[f.sid] = []
+        for i in range(len(code)):
+            if code.op[i] == tac.CALL and code.b[i] in functions and code.b[i] not in callees:
+                callees.append(code.b[i])
+    return graph
+
+
+def components(graph):
+    """The strongly connected components of graph, callees before callers
+    (Tarjan's algorithm, without recursion)."""
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    result = []
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(graph[root]))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            v, succs = work[-1]
+            for w in succs:
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(graph[w])))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    result.append(component)
+    return result
+
+
+def recursive(graph):
+    """The functions of graph that can call themselves."""
+    found = set()
+    for component in components(graph):
+        if len(component) > 1 or component[0] in graph[component[0]]:
+            found.update(component)
+    return found
+
+
+class Inliner:
+    """Inlines the calls of a tac.Program a CostModel accepts."""
+
+    def __init__(self, program, model=None):
+        self.program = program
+        self.symbols = program.symbols
+        self.model = model or CostModel()
+        self.functions = dict((f.sid, f) for f in program.functions.values())
+        self.stats = {'inlined': 0, 'removed': 0}
+
+    def run(self):
+        graph = call_graph(self.program)
+        loops = recursive(graph)
+        for component in components(graph):
+            for sid in component:
+                self.inline_calls(self.functions[sid], loops)
+        self.remove_unused()
+        return self.stats
+
+    def depths(self, f):
+        """The loop depth of every instruction of f."""
+        graph = cfg.CFG(f)
+        depth = [0] * len(graph)
+        for body in graph.loops().values():
+            for b in body:
+                depth[b] += 1
+        return [depth[graph.block_of(i)] for i in range(len(f.code))]
+
+    def inline_calls(self, f, loops):
+        code = f.code
+        symbols = self.symbols
+        sites = [i for i in range(len(code)) if code.op[i] == tac.CALL and
+                 code.b[i] in self.functions and code.b[i] not in loops]
+        if not sites:
+            return
+        depths = self.depths(f)
+        budget = self.model.growth * size(f)
+        grown = size(f)
+        chosen = []
+        for i in sites:
+            callee = self.functions[code.b[i]]
+            n = code.c[i]
+            if i < n or any(code.op[k] != tac.PARAM for k in range(i - n, i)) or \
+                    n != len(callee.params):
+                continue
+            constants = sum(1 for k in range(i - n, i) if symbols.kind[code.b[k]] == tac.CONST)
+            body = size(callee)
+            if grown + body > budget or not self.model.accepts(body, n, depths[i], constants):
+                continue
+            grown += body
+            chosen.append(i)
+        if not chosen:
+            return
+        out = tac.Quads()
+        start = 0
+        for i in chosen:
+            n = code.c[i]
+            for k in range(start, i - n):
+                out.emit(code.op[k], code.a[k], code.b[k], code.c[k], code.line[k])
+            self.expand(f, self.functions[code.b[i]], code.a[i],
+                        [code.b[k] for k in range(i - n, i)], code.line[i], out)
+            start = i + 1
+        for k in range(start, len(code)):
+            out.emit(code.op[k], code.a[k], code.b[k], code.c[k], code.line[k])
+        f.code = out
+        self.stats['inlined'] += len(chosen)
+
+    def expand(self, f, callee, dst, args, line, out):
+        """Emit the body of callee, called from f with args, its value
+        going to dst."""
+        symbols = self.symbols
+        kind, types, values = symbols.kind, symbols.type, symbols.value
+        renamed = {}
+
+        def rename(sid):
+            new = renamed.get(sid)
+            if new is None:
+                k = kind[sid]
+                if k == tac.TEMP:
+                    f.ntemps += 1
+                    new = symbols.add(k, types[sid], f.ntemps)
+                elif k == tac.LABEL_ID:
+                    f.nlabels += 1
+                    new = symbols.add(k, types[sid], f.nlabels)
+                elif k == tac.VAR:
+                    name = atoms.intern('%s.%s' % (callee.name, values[sid]))
+                    new = symbols.add(k, types[sid], name)
+                    f.locals.append(new)
+                else:
+                    new = sid
+                renamed[sid] = new
+            return new
+
+        for param, arg in zip(callee.params, args):
+            out.emit(tac.COPY, rename(param), arg, line=line)
+        code = callee.code
+        f.nlabels += 1
+        end = symbols.add(tac.LABEL_ID, tac.VOID, f.nlabels)
+        jumps = False
+        last = len(code) - 1
+        for i in range(len(code)):
+            op, a, b, c = code[i]
+            if op == tac.RET:
+                if dst and b:
+                    out.emit(tac.COPY, dst, rename(b), line=code.line[i])
+                if i != last:
+                    out.emit(tac.JUMP, end, line=code.line[i])
+                    jumps = True
+                continue
+            a = rename(a) if a else 0
+            b = rename(b) if b else 0
+            if op != tac.CALL and c:
+                c = rename(c)
+            out.emit(op, a, b, c, code.line[i])
+        if jumps:
+            out.emit(tac.LABEL, end, line=line)
+
+    def remove_unused(self):
+        # Called or not, a function whose address is taken is used.
+        kind = self.program.symbols.kind
+        used = set()
+        for f in self.program.functions.values():
+            code = f.code
+            used.update(sid for sid in code.b if kind[sid] == tac.FUNC)
+            used.update(code.c[i] for i in range(len(code))
+                        if code.op[i] in tac.USE_C and kind[code.c[i]] == tac.FUNC)
+        for name, f in list(self.program.functions.items()):
+            if f.sid not in used and name != tac.INIT and str(name) != 'main':
+                del self.program.functions[name]
+                self.stats['removed'] += 1
+
+
+def inline(program, model=None):
+    """Inline the calls of a tac.Program model (a CostModel) accepts, in
+    place; return counts of calls inlined and functions removed."""
+    return Inliner(program, model).run()
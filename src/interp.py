@@ -0,0 +1,529 @@
+# ----------------------------------------------------------------------
+# interp.py
+#
+# An interpreter of the three-address code, and the reference for what
+# each instruction computes: the optimizer folds constants with fold()
+# below, so folding can never disagree with running the code.
+#
+# Values are Python ints (char and int) and floats (float and double;
+# float arithmetic is done in double precision); integer arithmetic
+# wraps around to the range of its type, in two's complement.  Memory
+# is made of Python lists: an array variable owns a list of its scalar
+# elements (row after row for arrays of arrays), and a scalar variable
+# whose address is taken lives in a list of one element, its box.  A pointer
+# is a (list, index) tuple and the null pointer is 0; a load or store
+# checks the index against both ends of the list, as a negative index
+# would silently count from its end.  Globals are boxes and lists shared
+# by every function.
+#
+# Before running, the code of each function is decoded once into a list
+# of (op, a, b, c, x) tuples: operands become indexes into the register
+# list of a call (~index for a boxed variable), labels become instruction
+# indexes and are dropped, and pointer arithmetic is told apart from
+# number arithmetic.  A function pointer is the operand id of the
+# function it points to, so a CALL whose func is not a function reads
+# the callee from its register.  count is the number of TAC instructions
+# executed, calls the number of calls (printf's too).
+#
+#   python src/interp.py [-O] [--count] FILE
+#
+# runs a mini-C file (-O: after src/opt.py optimizes it) and exits with
+# the value of main.
+# ----------------------------------------------------------------------
+
+import sys
+
+import tac
+import typetab
+from typetab import INT
+
+
+class InterpError(Exception):
+    """A run-time error: msg and the source line it happened on."""
+
+    def __init__(self, msg, lineno=None):
+        Exception.__init__(self, msg)
+        self.msg = msg
+        self.lineno = lineno
+
+
+def convert(t, v):
+    """The value v converted to type t, as CONV does."""
+    kind = t.kind
+    if kind == 'char':
+        v = int(v) & 0xFF
+        return v - 0x100 if v & 0x80 else v
+    if kind == 'int':
+        return wrap(int(v))
+    if kind in ('float', 'double'):
+        return float(v)
+    return v
+
+
+def wrap(v):
+    """The int v reduced to 32 bits, in two's complement."""
+    return (v + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+
+
+def divide(x, y):
+    """Integer division truncating toward zero, as in C."""
+    q = abs(x) // abs(y)
+    return q if (x < 0) == (y < 0) else -q
+
+
+def fold(op, t, x, y=None):
+    """The result, of type t, of arithmetic instruction op on the values
+    x and y.  Raises ArithmeticError where C leaves the result undefined."""
+    if op == tac.COPY:
+        return x
+    if op == tac.CONV:
+        return convert(t, x)
+    # An integer result wraps around to the range of t.
+    if op == tac.ADD:
+        return convert(t, x + y)
+    if op == tac.SUB:
+        return convert(t, x - y)
+    if op == tac.MUL:
+        return convert(t, x * y)
+    if op == tac.DIV:
+        if t.rank > INT.rank:
+            return x / y
+        return convert(t, divide(x, y))
+    if op == tac.MOD:
+        return x - y * divide(x, y)
+    if op in (tac.SHL, tac.SHR):
+        if y < 0:
+            raise ArithmeticError('negative shift count')
+        return convert(t, x << y) if op == tac.SHL else x >> y
+    if op == tac.AND:
+        return x & y
+    if op == tac.OR:
+        return x | y
+    if op == tac.XOR:
+        return x ^ y
+    if op == tac.LT:
+        return int(x < y)
+    if op == tac.GT:
+        return int(x > y)
+    if op == tac.LE:
+        return int(x <= y)
+    if op == tac.GE:
+        return int(x >= y)
+    if op == tac.EQ:
+        return int(x == y)
+    if op == tac.NE:
+        return int(x != y)
+    if op == tac.NEG:
+        return convert(t, -x)
+    if op == tac.NOT:
+        return int(not x)
+    if op == tac.INV:
+        return ~x
+    raise ValueError('not an arithmetic instruction: %s' % tac.OPNAMES[op])
+
+
+def cells(t):
+    """The number of scalar elements of an object of type t."""
+    if t.kind == 'array':
+        return (t.length or 0) * cells(t.of)
+    return 1
+
+
+def c_string(ptr):
+    """The str a char pointer points to."""
+    mem, i = ptr
+    if i < 0:
+        raise IndexError(i)
+    end = mem.index(0, i)
+    return ''.join(map(chr, mem[i:end])) if end > i else ''
+
+
+def printf(out, args):
+    fmt = c_string(args[0])
+    values = []
+    k = 1
+    i = fmt.find('%')
+    pieces = [fmt[:i] if i >= 0 else fmt]
+    while i >= 0:
+        j = i + 1
+        while j < len(fmt) and fmt[j] not in 'diucsfeEgGxXop%':
+            j += 1
+        spec = fmt[i:j + 1].replace('l', '').replace('h', '')
+        conv = spec[-1:]
+        if conv == 'u':
+            spec = spec[:-1] + 'd'
+        elif conv == 'p':
+            spec = spec[:-1] + 's'
+        if conv != '%' and k < len(args):
+            v = args[k]
+            k += 1
+            if conv == 's':
+                v = c_string(v)
+            elif conv == 'p':
+                v = '0x%x' % (id(v[0]) + v[1] if v else 0)
+            values.append(v)
+        pieces.append(spec)
+        i = fmt.find('%', j + 1)
+        pieces.append(fmt[j + 1:i] if i >= 0 else fmt[j + 1:])
+    text = ''.join(pieces) % tuple(values)
+    out.write(text)
+    return len(text)
+
+
+# Decoded operations
+(I_COPY, I_CONV, I_ADD, I_SUB, I_MUL, I_FOLD, I_LT, I_GT, I_LE, I_GE, I_EQ, I_NE,
+ I_PADD, I_PSUB, I_PDIFF, I_PCMP, I_ADDR, I_LOAD, I_STORE,
+ I_JUMP, I_JZ, I_JNZ, I_PARAM, I_CALL, I_ICALL, I_RET) = range(26)
+
+NUMBER_OPS = {tac.ADD: I_ADD, tac.SUB: I_SUB, tac.MUL: I_MUL,
+              tac.LT: I_LT, tac.GT: I_GT, tac.LE: I_LE, tac.GE: I_GE,
+              tac.EQ: I_EQ, tac.NE: I_NE}
+
+
+class Code:
+    """A function decoded for the interpreter."""
+
+    __slots__ = ('function', 'insts', 'lines', 'template', 'fresh', 'params')
+
+    def __init__(self, function):
+        self.function = function
+        self.insts = []
+        self.lines = []
+        # Initial registers of a call: constants, globals, zeros.
+        self.template = [None]
+        # (register, cells) of the local arrays and boxes made per call.
+        self.fresh = []
+        self.params = []
+
+
+class Interpreter:
+    """Runs a tac.Program; printf output goes to out."""
+
+    BUILTINS = ('printf',)
+
+    def __init__(self, program, out=sys.stdout):
+        self.program = program
+        self.symbols = program.symbols
+        self.out = out
+        self.count = 0
+        self.calls = 0
+        self.globals = {}
+        self.strings = {}
+        symbols = self.symbols
+        for sid in program.globals:
+            t = symbols.type[sid]
+            self.globals[sid] = [0] * cells(t)
+        self.codes = {}
+        self._functions = dict((f.sid, f) for f in program.functions.values())
+
+    def code(self, sid):
+        code = self.codes.get(sid)
+        if code is None:
+            f = self._functions.get(sid)
+            if f is None:
+                raise InterpError("call of an undefined function '%s'" % self.symbols.value[sid])
+            code = self.codes[sid] = self.decode(f)
+        return code
+
+    def callee(self, ptr):
+        """(operand id, builtin name or None) of the function ptr points to."""
+        symbols = self.symbols
+        if type(ptr) is not int or not 0 < ptr < len(symbols) or symbols.kind[ptr] != tac.FUNC:
+            raise InterpError('call through an invalid function pointer')
+        name = str(symbols.value[ptr])
+        if name in self.BUILTINS and ptr not in self._functions:
+            return ptr, name
+        return ptr, None
+
+    def string(self, sid):
+        ptr = self.strings.get(sid)
+        if ptr is None:
+            text = typetab.string_value(str(self.symbols.value[sid]))
+            ptr = self.strings[sid] = ([ord(ch) for ch in text] + [0], 0)
+        return ptr
+
+    def decode(self, f):
+        symbols = self.symbols
+        kind, types, values = symbols.kind, symbols.type, symbols.value
+        code = Code(f)
+        template = code.template
+        quads = f.code
+        taken = set(quads.b[i] for i in range(len(quads)) if quads.op[i] == tac.ADDR)
+        regs = {}
+
+        def operand(sid):
+            if not sid:
+                return 0
+            enc = regs.get(sid)
+            if enc is not None:
+                return enc
+            k = kind[sid]
+            t = types[sid]
+            slot = len(template)
+            enc = slot
+            if k == tac.CONST:
+                template.append(values[sid])
+            elif k == tac.STRING:
+                template.append(self.string(sid))
+            elif k == tac.FUNC:
+                template.append(sid)
+            elif k == tac.GLOBAL:
+                template.append(self.globals[sid])
+                if t.kind != 'array':
+                    enc = ~slot
+            elif t.kind == 'array':
+                template.append(None)
+                code.fresh.append((slot, cells(t)))
+            elif sid in taken:
+                template.append(None)
+                code.fresh.append((slot, 1))
+                enc = ~slot
+            else:
+                template.append(0)
+            regs[sid] = enc
+            return enc
+
+        code.params = [operand(p) for p in f.params]
+        # Labels -> index of the next decoded instruction.
+        targets = {}
+        n = 0
+        for i in range(len(quads)):
+            if quads.op[i] == tac.LABEL:
+                targets[quads.a[i]] = n
+            elif quads.op[i] != tac.NOP:
+                n += 1
+        insts = code.insts
+        for i in range(len(quads)):
+            op, a, b, c = quads[i]
+            if op in (tac.LABEL, tac.NOP):
+                continue
+            if op in (tac.JUMP, tac.JZ, tac.JNZ):
+                inst = ({tac.JUMP: I_JUMP, tac.JZ: I_JZ, tac.JNZ: I_JNZ}[op], targets[a], operand(b), 0, None)
+            elif op == tac.CALL:
+                if kind[b] != tac.FUNC:
+                    inst = (I_ICALL, operand(a), operand(b), c, None)
+                elif str(values[b]) in self.BUILTINS and b not in self._functions:
+                    inst = (I_CALL, operand(a), b, c, str(values[b]))
+                else:
+                    inst = (I_CALL, operand(a), b, c, None)
+            elif op in (tac.ADD, tac.SUB) and (types[a].is_pointer()):
+                scale = cells(types[a].of)
+                if types[b].is_pointer():
+                    inst = (I_PADD if op == tac.ADD else I_PSUB, operand(a), operand(b), operand(c), scale)
+                else:
+                    inst = (I_PADD, operand(a), operand(c), operand(b), scale)
+            elif op == tac.SUB and types[b].is_pointer():
+                inst = (I_PDIFF, operand(a), operand(b), operand(c), cells(types[b].of))
+            elif tac.LT <= op <= tac.NE and (types[b].is_pointer() or types[c].is_pointer()):
+                inst = (I_PCMP, operand(a), operand(b), operand(c), op)
+            elif op in NUMBER_OPS and types[a].kind != 'char':
+                # x tells an int result, which wraps, from a float one.
+                inst = (NUMBER_OPS[op], operand(a), operand(b), operand(c), types[a] is INT)
+            elif op == tac.COPY:
+                inst = (I_COPY, operand(a), operand(b), 0, None)
+            elif op == tac.CONV:
+                inst = (I_CONV, operand(a), operand(b), 0, types[a])
+            elif op == tac.ADDR:
+                inst = (I_ADDR, operand(a), operand(b), 0, None)
+            elif op == tac.LOAD:
+                inst = (I_LOAD, operand(a), operand(b), 0, None)
+            elif op == tac.STORE:
+                inst = (I_STORE, operand(a), operand(b), 0, None)
+            elif op == tac.PARAM:
+                inst = (I_PARAM, 0, operand(b), 0, None)
+            elif op == tac.RET:
+                inst = (I_RET, 0, operand(b), 0, None)
+            else:
+                inst = (I_FOLD, operand(a), operand(b), operand(c), (op, types[a]))
+            insts.append(inst)
+            code.lines.append(quads.line[i])
+        return code
+
+    def enter(self, code, args):
+        regs = code.template[:]
+        for slot, n in code.fresh:
+            regs[slot] = [0] * n
+        for p, v in zip(code.params, args):
+            if p >= 0:
+                regs[p] = v
+            else:
+                regs[~p][0] = v
+        return regs
+
+    def run(self, entry='main', args=()):
+        """Run the global initializers and then entry; return its value."""
+        init = self.program.functions.get(tac.INIT)
+        if init is not None:
+            self.call(init.sid, [])
+        for f in self.program.functions.values():
+            if str(f.name) == entry:
+                value = self.call(f.sid, list(args))
+                return 0 if value is None else value
+        raise InterpError("no function '%s'" % entry)
+
+    def call(self, sid, args):
+        code = self.code(sid)
+        insts = code.insts
+        regs = self.enter(code, args)
+        pc = 0
+        count = 0
+        params = []
+        stack = []
+        try:
+            while True:
+                op, a, b, c, x = insts[pc]
+                pc += 1
+                count += 1
+                if op == I_COPY:
+                    v = regs[b] if b >= 0 else regs[~b][0]
+                elif op == I_ADD:
+                    v = (regs[b] if b >= 0 else regs[~b][0]) + (regs[c] if c >= 0 else regs[~c][0])
+                    if x and not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = wrap(v)
+                elif op == I_LT:
+                    v = int((regs[b] if b >= 0 else regs[~b][0]) < (regs[c] if c >= 0 else regs[~c][0]))
+                elif op == I_JZ:
+                    if not (regs[b] if b >= 0 else regs[~b][0]):
+                        pc = a
+                    continue
+                elif op == I_JUMP:
+                    pc = a
+                    continue
+                elif op == I_PADD:
+                    p = regs[b] if b >= 0 else regs[~b][0]
+                    v = (p[0], p[1] + (regs[c] if c >= 0 else regs[~c][0]) * x)
+                elif op == I_LOAD:
+                    p = regs[b] if b >= 0 else regs[~b][0]
+                    if p[1] < 0:
+                        raise IndexError(p[1])
+                    v = p[0][p[1]]
+                elif op == I_STORE:
+                    p = regs[a] if a >= 0 else regs[~a][0]
+                    if p[1] < 0:
+                        raise IndexError(p[1])
+                    p[0][p[1]] = regs[b] if b >= 0 else regs[~b][0]
+                    continue
+                elif op == I_SUB:
+                    v = (regs[b] if b >= 0 else regs[~b][0]) - (regs[c] if c >= 0 else regs[~c][0])
+                    if x and not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = wrap(v)
+                elif op == I_MUL:
+                    v = (regs[b] if b >= 0 else regs[~b][0]) * (regs[c] if c >= 0 else regs[~c][0])
+                    if x and not -0x80000000 <= v <= 0x7FFFFFFF:
+                        v = wrap(v)
+                elif op == I_GT:
+                    v = int((regs[b] if b >= 0 else regs[~b][0]) > (regs[c] if c >= 0 else regs[~c][0]))
+                elif op == I_LE:
+                    v = int((regs[b] if b >= 0 else regs[~b][0]) <= (regs[c] if c >= 0 else regs[~c][0]))
+                elif op == I_GE:
+                    v = int((regs[b] if b >= 0 else regs[~b][0]) >= (regs[c] if c >= 0 else regs[~c][0]))
+                elif op == I_EQ:
+                    v = int((regs[b] if b >= 0 else regs[~b][0]) == (regs[c] if c >= 0 else regs[~c][0]))
+                elif op == I_NE:
+                    v = int((regs[b] if b >= 0 else regs[~b][0]) != (regs[c] if c >= 0 else regs[~c][0]))
+                elif op == I_JNZ:
+                    if regs[b] if b >= 0 else regs[~b][0]:
+                        pc = a
+                    continue
+                elif op == I_CONV:
+                    v = convert(x, regs[b] if b >= 0 else regs[~b][0])
+                elif op == I_FOLD:
+                    v = fold(x[0], x[1], regs[b] if b >= 0 else regs[~b][0],
+                             regs[c] if c > 0 else regs[~c][0] if c < 0 else None)
+                elif op == I_ADDR:
+                    v = (regs[b if b >= 0 else ~b], 0)
+                elif op == I_PSUB:
+                    p = regs[b] if b >= 0 else regs[~b][0]
+                    v = (p[0], p[1] - (regs[c] if c >= 0 else regs[~c][0]) * x)
+                elif op == I_PDIFF:
+                    p = regs[b] if b >= 0 else regs[~b][0]
+                    q = regs[c] if c >= 0 else regs[~c][0]
+                    if p[0] is not q[0]:
+                        raise InterpError('subtraction of pointers to different objects')
+                    v = (p[1] - q[1]) // x
+                elif op == I_PCMP:
+                    p = regs[b] if b >= 0 else regs[~b][0]
+                    q = regs[c] if c >= 0 else regs[~c][0]
+                    if x in (tac.EQ, tac.NE):
+                        same = p is q or p != 0 and q != 0 and p[0] is q[0] and p[1] == q[1]
+                        v = int(same == (x == tac.EQ))
+                    else:
+                        v = fold(x, INT, p[1], q[1])
+                elif op == I_PARAM:
+                    params.append(regs[b] if b >= 0 else regs[~b][0])
+                    continue
+                elif op == I_CALL or op == I_ICALL:
+                    args = params[len(params) - c:]
+                    del params[len(params) - c:]
+                    self.calls += 1
+                    if op == I_ICALL:
+                        b, x = self.callee(regs[b] if b >= 0 else regs[~b][0])
+                    if x is not None:
+                        v = printf(self.out, args)
+                    else:
+                        stack.append((code, insts, regs, pc, a))
+                        code = self.code(b)
+                        insts = code.insts
+                        regs = self.enter(code, args)
+                        pc = 0
+                        continue
+                else:
+                    # I_RET
+                    v = (regs[b] if b >= 0 else regs[~b][0]) if b else None
+                    if not stack:
+                        return v
+                    code, insts, regs, pc, a = stack.pop()
+                    if not a:
+                        continue
+                if a >= 0:
+                    regs[a] = v
+                else:
+                    regs[~a][0] = v
+        except InterpError as e:
+            e.lineno = code.lines[pc - 1]
+            raise
+        except ZeroDivisionError:
+            raise InterpError('division by zero', code.lines[pc - 1])
+        except ArithmeticError as e:
+            raise InterpError(str(e), code.lines[pc - 1])
+        except (TypeError, IndexError, ValueError):
+            raise InterpError('invalid memory access', code.lines[pc - 1])
+        finally:
+            self.count += count
+
+
+def run(program, out=sys.stdout):
+    """Run a program; return (main's value, instructions executed)."""
+    interp = Interpreter(program, out)
+    value = interp.run()
+    return value, interp.count
+
+
+def main(argv):
+    import semantic_analyzer
+    import syntax_analyzer
+
+    count = '--count' in argv
+    optimize = '-O' in argv
+    argv = [arg for arg in argv if arg not in ('--count', '-O')]
+    with open(argv[0]) as f:
+        ast = syntax_analyzer.parse(f.read())
+    if ast is None or semantic_analyzer.analyze(ast).errors:
+        return 1
+    program = tac.generate(ast)
+    if optimize:
+        import opt
+        opt.optimize(program)
+    try:
+        value, executed = run(program)
+    except InterpError as e:
+        sys.stdout.flush()
+        sys.stderr.write('%s:%s: %s\n' % (argv[0], e.lineno, e.msg))
+        return 1
+    if count:
+        sys.stderr.write('%d instructions executed\n' % executed)
+    return value & 0xFF
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,566 @@
+# ----------------------------------------------------------------------
+# lalrgen.py
+#
+# LALR(1) and SLR table generation for ply grammars.
+#
+# ply.yacc.LRGeneratedTable builds its item sets out of LRItem objects,
+# tracks closures with attributes set on productions, keys goto sets by
+# id() in nested dicts and keeps every lookahead and follow set as a list
+# that is searched before each append.  This generator computes the same
+# tables with
+#
+#   - grammar symbols numbered (terminals first, then '$end', then the
+#     nonterminals), so every terminal set is a Python int used as a
+#     bitset: FIRST, FOLLOW, the DeRemer-Pennello read and follow sets
+#     and the lookaheads are unions of ints,
+#   - interned item cores: the item "production p, dot at d" is the
+#     integer item_base[p] + d, with the symbol after the dot and the
+#     dot-0 items it closes over precomputed per item,
+#   - item sets as tuples of item numbers, goto sets looked up by the
+#     tuple of their kernel items, and the goto function of every state
+#     recorded once while the states are built.
+#
+# The item sets are built and numbered in exactly the order ply builds
+# them and conflicts are resolved by the same rules, so lr_action and
+# lr_goto are equal to those of ply.yacc.LRGeneratedTable.  make_parser()
+# stands in for ply.yacc.yacc(write_tables=False, debug=False).
+# ----------------------------------------------------------------------
+
+import sys
+import time
+
+import ply.yacc as yacc
+
+
+PHASES = ('build_lritems', 'compute_first', 'compute_follow', 'lr0_items',
+          'add_lalr_lookaheads', 'lr_parse_table')
+
+
+def bits(mask):
+    """Yield the numbers of the bits set in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def digraph(relation, sets):
+    """Close sets under relation: F(x) = sets[x] | F(y) for y in relation[x].
+
+    This is ply's digraph()/traverse() over integer nodes and bitset
+    values, with an explicit stack in place of recursion.
+    """
+    count = len(sets)
+    result = list(sets)
+    depth = [0] * count
+    stack = []
+    done = count + 1
+    for root in range(count):
+        if depth[root]:
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        path = [[root, 0, len(stack)]]
+        while path:
+            frame = path[-1]
+            x, k, d = frame
+            rel = relation[x]
+            if k < len(rel):
+                frame[1] = k + 1
+                y = rel[k]
+                if not depth[y]:
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    path.append([y, 0, len(stack)])
+                    continue
+                if depth[y] < depth[x]:
+                    depth[x] = depth[y]
+                result[x] |= result[y]
+                continue
+            path.pop()
+            if depth[x] == d:
+                # x is the root of a strongly connected component.
+                value = result[x]
+                while True:
+                    z = stack.pop()
+                    depth[z] = done
+                    result[z] = value
+                    if z == x:
+                        break
+            if path:
+                parent = path[-1][0]
+                if depth[x] < depth[parent]:
+                    depth[parent] = depth[x]
+                result[parent] |= result[x]
+    return result
+
+
+class LRGeneratedTable(yacc.LRTable):
+    """LR tables for a ply.yacc.Grammar, like ply.yacc.LRGeneratedTable.
+
+    The time spent in each of PHASES is recorded in self.times.
+    """
+
+    def __init__(self, grammar, method='LALR'):
+        if method not in ('SLR', 'LALR'):
+            raise yacc.LALRError('Unsupported method %s' % method)
+        yacc.LRTable.__init__(self)
+        self.grammar = grammar
+        self.lr_method = method
+        self.lr_productions = grammar.Productions
+        self.sr_conflicts = []
+        self.rr_conflicts = []
+        self.times = dict.fromkeys(PHASES, 0.0)
+
+        self.timed('build_lritems', self.build_lritems)
+        self.timed('compute_first', self.compute_first)
+        if method == 'SLR':
+            self.timed('compute_follow', self.compute_follow)
+        self.timed('lr0_items', self.lr0_items)
+        if method == 'LALR':
+            self.timed('add_lalr_lookaheads', self.add_lalr_lookaheads)
+        self.timed('lr_parse_table', self.lr_parse_table)
+
+    def timed(self, phase, func):
+        start = time.perf_counter()
+        func()
+        self.times[phase] += time.perf_counter() - start
+
+    # ------------------------------------------------------------------
+    # Symbols and items
+    # ------------------------------------------------------------------
+
+    def build_lritems(self):
+        grammar = self.grammar
+        productions = grammar.Productions
+        names = list(grammar.Terminals)
+        self.nterminals = len(names)
+        self.end = len(names)
+        names.append('$end')
+        for name in grammar.Nonterminals:
+            names.append(name)
+        code = dict((name, i) for i, name in enumerate(names))
+        for prod in productions:
+            if prod.name not in code:
+                code[prod.name] = len(names)
+                names.append(prod.name)
+        self.names = names
+        self.codes = code
+
+        self.prod_lhs = [code[p.name] for p in productions]
+        self.prod_rhs = [tuple(code[s] for s in p.prod) for p in productions]
+        self.prod_usyms = [tuple(code[s] for s in p.usyms) for p in productions]
+        by_lhs = [[] for _ in names]
+
+        # Items are numbered production by production, dot by dot.
+        self.item_base = base = []
+        self.item_prod = item_prod = []
+        self.item_dot = item_dot = []
+        self.item_next = item_next = []
+        for p, rhs in enumerate(self.prod_rhs):
+            base.append(len(item_prod))
+            by_lhs[self.prod_lhs[p]].append(len(item_prod))
+            for dot in range(len(rhs) + 1):
+                item_prod.append(p)
+                item_dot.append(dot)
+                item_next.append(rhs[dot] if dot < len(rhs) else -1)
+        # The dot-0 items the closure adds for the symbol after the dot
+        # (Grammar.Prodnames order).
+        empty = ()
+        self.item_after = [tuple(by_lhs[sym]) if sym > self.end else empty
+                           for sym in item_next]
+
+    # ------------------------------------------------------------------
+    # FIRST and FOLLOW
+    # ------------------------------------------------------------------
+
+    def compute_first(self):
+        """FIRST sets of all symbols as bitsets, and the nullable symbols."""
+        nsyms = len(self.names)
+        first = [0] * nsyms
+        for sym in range(self.end + 1):
+            first[sym] = 1 << sym
+        nullable = [False] * nsyms
+        prods = list(zip(self.prod_lhs, self.prod_rhs))[1:]
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in prods:
+                mask = first[lhs]
+                for sym in rhs:
+                    mask |= first[sym]
+                    if not nullable[sym]:
+                        break
+                else:
+                    if not nullable[lhs]:
+                        nullable[lhs] = changed = True
+                if mask != first[lhs]:
+                    first[lhs] = mask
+                    changed = True
+        self.first = first
+        self.nullable = nullable
+
+    def first_of(self, symbols):
+        """FIRST of a symbol string: (bitset, whether it is nullable)."""
+        first = self.first
+        nullable = self.nullable
+        mask = 0
+        for sym in symbols:
+            mask |= first[sym]
+            if not nullable[sym]:
+                return mask, False
+        return mask, True
+
+    def compute_follow(self):
+        """FOLLOW sets of the nonterminals as bitsets."""
+        follow = [0] * len(self.names)
+        follow[self.prod_rhs[0][0]] = 1 << self.end
+        prods = list(zip(self.prod_lhs, self.prod_rhs))[1:]
+        changed = True
+        while changed:
+            changed = False
+            for lhs, rhs in prods:
+                for i, sym in enumerate(rhs):
+                    if sym <= self.end:
+                        continue
+                    mask, empty = self.first_of(rhs[i + 1:])
+                    if empty:
+                        mask |= follow[lhs]
+                    if mask | follow[sym] != follow[sym]:
+                        follow[sym] |= mask
+                        changed = True
+        self.follow = follow
+
+    # ------------------------------------------------------------------
+    # LR(0) item sets
+    # ------------------------------------------------------------------
+
+    def closure(self, kernel):
+        items = list(kernel)
+        added = set()
+        after = self.item_after
+        # items grows while it is walked.
+        for item in items:
+            for new in after[item]:
+                if new not in added:
+                    added.add(new)
+                    items.append(new)
+        return tuple(items)
+
+    def lr0_items(self):
+        """Build the LR(0) item sets and their goto function.
+
+        ply visits the symbols of a state in order of their first
+        appearance in the productions of its items, and numbers a new
+        goto set when it is first reached; so does this.
+        """
+        item_prod = self.item_prod
+        item_next = self.item_next
+        usyms = self.prod_usyms
+        states = [self.closure((self.item_base[0],))]
+        gotos = []
+        known = {}
+        i = 0
+        while i < len(states):
+            items = states[i]
+            i += 1
+            kernels = {}
+            for item in items:
+                sym = item_next[item]
+                if sym >= 0:
+                    kernel = kernels.get(sym)
+                    if kernel is None:
+                        kernels[sym] = [item + 1]
+                    else:
+                        kernel.append(item + 1)
+            row = {}
+            seen = set()
+            for item in items:
+                p = item_prod[item]
+                if p in seen:
+                    continue
+                seen.add(p)
+                for sym in usyms[p]:
+                    if sym in row or sym not in kernels:
+                        continue
+                    kernel = tuple(kernels[sym])
+                    target = known.get(kernel)
+                    if target is None:
+                        target = known[kernel] = len(states)
+                        states.append(self.closure(kernel))
+                    row[sym] = target
+            gotos.append(row)
+        self.states = states
+        self.gotos = gotos
+
+    # ------------------------------------------------------------------
+    # LALR(1) lookaheads (DeRemer and Pennello)
+    # ------------------------------------------------------------------
+
+    def add_lalr_lookaheads(self):
+        """Compute self.lookaheads: (state, production) -> bitset."""
+        states = self.states
+        gotos = self.gotos
+        end = self.end
+        item_next = self.item_next
+        item_prod = self.item_prod
+        item_dot = self.item_dot
+        prod_lhs = self.prod_lhs
+        prod_rhs = self.prod_rhs
+        nullable = self.nullable
+        nsyms = len(self.names)
+
+        # Nonterminal transitions, numbered; trans maps state * nsyms + N
+        # to the number of the transition (state, N).
+        trans = {}
+        transitions = []
+        shifts = []
+        for state, items in enumerate(states):
+            mask = 0
+            for item in items:
+                sym = item_next[item]
+                if sym > end:
+                    key = state * nsyms + sym
+                    if key not in trans:
+                        trans[key] = len(transitions)
+                        transitions.append((state, sym))
+                elif sym >= 0:
+                    mask |= 1 << sym
+            shifts.append(mask)
+
+        # Direct reads and the reads relation.
+        start = prod_rhs[0][0]
+        direct = []
+        reads = []
+        for state, sym in transitions:
+            target = gotos[state][sym]
+            mask = shifts[target]
+            if state == 0 and sym == start:
+                mask |= 1 << end
+            direct.append(mask)
+            rel = []
+            for item in states[target]:
+                a = item_next[item]
+                if a > end and nullable[a]:
+                    rel.append(trans[target * nsyms + a])
+            reads.append(rel)
+        read = digraph(reads, direct)
+
+        # The includes and lookback relations.  Like ply, walk every item
+        # of N in the state, but only a dot-0 item has a lookback.
+        includes = [[] for _ in transitions]
+        lookback = [[] for _ in transitions]
+        for t, (state, nonterm) in enumerate(transitions):
+            for item in states[state]:
+                p = item_prod[item]
+                if prod_lhs[p] != nonterm:
+                    continue
+                rhs = prod_rhs[p]
+                j = state
+                for k in range(item_dot[item], len(rhs)):
+                    sym = rhs[k]
+                    u = trans.get(j * nsyms + sym)
+                    if u is not None:
+                        for rest in rhs[k + 1:]:
+                            if not nullable[rest]:
+                                break
+                        else:
+                            includes[u].append(t)
+                    j = gotos[j][sym]
+                if item_dot[item] == 0:
+                    lookback[t].append((j, p))
+        follow = digraph(includes, read)
+
+        lookaheads = {}
+        for t, lb in enumerate(lookback):
+            for key in lb:
+                lookaheads[key] = lookaheads.get(key, 0) | follow[t]
+        self.lookaheads = lookaheads
+
+    # ------------------------------------------------------------------
+    # The action and goto tables
+    # ------------------------------------------------------------------
+
+    def lr_parse_table(self):
+        Productions = self.grammar.Productions
+        Precedence = self.grammar.Precedence
+        names = self.names
+        end = self.end
+        item_next = self.item_next
+        item_prod = self.item_prod
+        lalr = self.lr_method == 'LALR'
+        action = self.lr_action = {}
+        goto = self.lr_goto = {}
+
+        for st, items in enumerate(self.states):
+            row = self.gotos[st]
+            st_action = {}
+            st_actionp = {}
+            for item in items:
+                sym = item_next[item]
+                p = item_prod[item]
+                if sym < 0:
+                    if p == 0:
+                        st_action['$end'] = 0
+                        st_actionp['$end'] = p
+                        continue
+                    if lalr:
+                        laheads = self.lookaheads.get((st, p), 0)
+                    else:
+                        laheads = self.follow[self.prod_lhs[p]]
+                    for code in bits(laheads):
+                        a = names[code]
+                        r = st_action.get(a)
+                        if r is None:
+                            st_action[a] = -p
+                            st_actionp[a] = p
+                            Productions[p].reduced += 1
+                        elif r > 0:
+                            # Shift/reduce conflict.
+                            sprec, slevel = Precedence.get(a, ('right', 0))
+                            rprec, rlevel = Productions[p].prec
+                            if (slevel < rlevel) or ((slevel == rlevel) and (rprec == 'left')):
+                                st_action[a] = -p
+                                st_actionp[a] = p
+                                if not slevel and not rlevel:
+                                    self.sr_conflicts.append((st, a, 'reduce'))
+                                Productions[p].reduced += 1
+                            elif (slevel == rlevel) and (rprec == 'nonassoc'):
+                                st_action[a] = None
+                            elif not rlevel:
+                                self.sr_conflicts.append((st, a, 'shift'))
+                        elif r < 0:
+                            # Reduce/reduce conflict: the earlier rule wins.
+                            oldp = Productions[-r]
+                            pp = Productions[p]
+                            if oldp.line > pp.line:
+                                st_action[a] = -p
+                                st_actionp[a] = p
+                                chosenp, rejectp = pp, oldp
+                                pp.reduced += 1
+                                oldp.reduced -= 1
+                            else:
+                                chosenp, rejectp = oldp, pp
+                            self.rr_conflicts.append((st, chosenp, rejectp))
+                        else:
+                            raise yacc.LALRError('Unknown conflict in state %d' % st)
+                elif sym < end:
+                    a = names[sym]
+                    j = row[sym]
+                    r = st_action.get(a)
+                    if r is None:
+                        st_action[a] = j
+                        st_actionp[a] = p
+                    elif r > 0:
+                        if r != j:
+                            raise yacc.LALRError('Shift/shift conflict in state %d' % st)
+                    elif r < 0:
+                        sprec, slevel = Precedence.get(a, ('right', 0))
+                        rprec, rlevel = Productions[st_actionp[a]].prec
+                        if (slevel > rlevel) or ((slevel == rlevel) and (rprec == 'right')):
+                            Productions[st_actionp[a]].reduced -= 1
+                            st_action[a] = j
+                            st_actionp[a] = p
+                            if not rlevel:
+                                self.sr_conflicts.append((st, a, 'shift'))
+                        elif (slevel == rlevel) and (rprec == 'nonassoc'):
+                            st_action[a] = None
+                        elif not slevel and not rlevel:
+                            self.sr_conflicts.append((st, a, 'reduce'))
+                    else:
+                        raise yacc.LALRError('Unknown conflict in state %d' % st)
+
+            action[st] = st_action
+            goto[st] = dict((names[sym], j) for sym, j in row.items() if sym > end)
+
+
+def build_grammar(pinfo, start=None, errorlog=None):
+    """Build and check the ply.yacc.Grammar of a ParserReflect.
+
+    Reports problems to errorlog the way ply.yacc.yacc() does and raises
+    YaccError if the grammar is unusable.
+    """
+    errors = False
+    grammar = yacc.Grammar(pinfo.tokens)
+    for term, assoc, level in pinfo.preclist:
+        try:
+            grammar.set_precedence(term, assoc, level)
+        except yacc.GrammarError as e:
+            errorlog.warning('%s', e)
+
+    for funcname, gram in pinfo.grammar:
+        file, line, prodname, syms = gram
+        try:
+            grammar.add_production(prodname, syms, funcname, file, line)
+        except yacc.GrammarError as e:
+            errorlog.error('%s', e)
+            errors = True
+
+    try:
+        grammar.set_start(pinfo.start if start is None else start)
+    except yacc.GrammarError as e:
+        errorlog.error(str(e))
+        errors = True
+    if errors:
+        raise yacc.YaccError('Unable to build parser')
+
+    for sym, prod in grammar.undefined_symbols():
+        errorlog.error('%s:%d: Symbol %r used, but not defined as a token or a rule',
+                       prod.file, prod.line, sym)
+        errors = True
+
+    unused_terminals = grammar.unused_terminals()
+    for term in unused_terminals:
+        errorlog.warning('Token %r defined, but not used', term)
+    unused_rules = grammar.unused_rules()
+    for prod in unused_rules:
+        errorlog.warning('%s:%d: Rule %r defined, but not used', prod.file, prod.line, prod.name)
+    if len(unused_terminals) == 1:
+        errorlog.warning('There is 1 unused token')
+    if len(unused_terminals) > 1:
+        errorlog.warning('There are %d unused tokens', len(unused_terminals))
+    if len(unused_rules) == 1:
+        errorlog.warning('There is 1 unused rule')
+    if len(unused_rules) > 1:
+        errorlog.warning('There are %d unused rules', len(unused_rules))
+
+    for u in grammar.find_unreachable():
+        errorlog.warning('Symbol %r is unreachable', u)
+    for inf in grammar.infinite_cycles():
+        errorlog.error('Infinite recursion detected for symbol %r', inf)
+        errors = True
+    for term, assoc in grammar.unused_precedence():
+        errorlog.error('Precedence rule %r defined for unknown symbol %r', assoc, term)
+        errors = True
+    if errors:
+        raise yacc.YaccError('Unable to build parser')
+    return grammar
+
+
+def reflect(module, start=None, errorlog=None):
+    """Collect and validate the grammar of a module (ply.yacc.ParserReflect)."""
+    pdict = dict((k, getattr(module, k)) for k in dir(module))
+    if start is not None:
+        pdict['start'] = start
+    pinfo = yacc.ParserReflect(pdict, log=errorlog)
+    pinfo.get_all()
+    if pinfo.error or pinfo.validate_all():
+        raise yacc.YaccError('Unable to build parser')
+    if not pinfo.error_func:
+        errorlog.warning('no p_error() function is defined')
+    return pinfo
+
+
+def make_parser(module, method='LALR', start=None, errorlog=None):
+    """Build an LRParser for a grammar module.
+
+    Like ply.yacc.yacc(module=module, debug=False, write_tables=False),
+    with the tables generated by LRGeneratedTable.
+    """
+    if errorlog is None:
+        errorlog = yacc.PlyLogger(sys.stderr)
+    pinfo = reflect(module, start, errorlog)
+    grammar = build_grammar(pinfo, start, errorlog)
+    lr = LRGeneratedTable(grammar, method)
+    lr.bind_callables(pinfo.pdict)
+    return yacc.LRParser(lr, pinfo.error_func)
@@ -4,11 +4,11 @@
 # A lexical analyzer for ANSI C (C89 / C90).
 # ----------------------------------------------------------------------
 
+import os
 import sys
-sys.path.insert(0, "../lib")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
 
-import ply.lex as lex
-from ply.lex import TOKEN
+import lineindex
 
 
 # Keywords
@@ -89,7 +89,7 @@ def t_CCONST(t):
             [^\'\\\n]
             | \\[\'\"\?\\abfnrtv]
             | \\[0-7]{1,3}
-            | \\x[0-9a-fA-f]+
+            | \\x[0-9a-fA-F]+
         )+
         \'
      """
@@ -97,15 +97,21 @@ def t_CCONST(t):
 
 
 def t_FCONST(t):
-    r'(\d*\.?\d+) ((e|E)(\+|-)?\d+)? (f|l|F|L)?'
+    r"""
+        (
+            ((\d+\.\d* | \.\d+) ((e|E)(\+|-)?\d+)?)
+            | (\d+ (e|E)(\+|-)?\d+)
+        )
+        (f|l|F|L)?
+     """
     return t
 
 
 def t_ICONST(t):
     r"""
-        ([1-9]\d* ([uU][lL]? | [lL][uU]?)?)
+        (0(x|X) [0-9a-fA-F]+ ([uU][lL]? | [lL][uU]?)?)
+        | ([1-9]\d* ([uU][lL]? | [lL][uU]?)?)
         | (0[0-7]* ([uU][lL]? | [lL][uU]?)?)
-        | (0(x|X) [0-9a-fA-F]+ ([uU][lL]? | [lL][uU]?))
      """
     return t
 
@@ -116,12 +122,10 @@ def t_STR_LITER(t):
         L?
         \"
         (
-            (
-                [^\"\\\n]
-                | \\[\'\"\?\\abfnrtv]
-                | \\[0-7]{1,3}
-                | \\x[0-9a-fA-f]+
-            )+
+            [^\"\\\n]
+            | \\[\'\"\?\\abfnrtv]
+            | \\[0-7]{1,3}
+            | \\x[0-9a-fA-F]+
         )*
         \"
      """
@@ -190,8 +194,10 @@ t_RBRACE = r'\}'
 t_SEMI_COLON = r';'
 t_ELLIPSIS = r'\.\.\.'
 
-# Completely ignored characters
-t_ignore = ' \t\x0c'
+# Completely ignored characters.  Newlines are ignored as well: line
+# numbers are not tracked while scanning but resolved from the token's
+# lexpos through a line index (see find_position()).
+t_ignore = ' \t\x0c\n'
 
 
 # Identifier
@@ -201,30 +207,67 @@ def t_ID(t):
     return t
 
 
-# Newlines
-def t_NEWLINE(t):
-    r'\n+'
-    t.lexer.lineno += t.value.count("\n")
-
-
 # Comments
-def t_comment(t):
-    r'/\*(.|\n)*?\*/'
-    t.lexer.lineno += t.value.count('\n')
-
+t_ignore_comment = r'/\*(.|\n)*?\*/'
 
 # Preprocessor directive (ignored)
-def t_preprocessor(t):
-    r'\#(.)*?\n'
-    t.lexer.lineno += 1
+t_ignore_preprocessor = r'\#(.)*?\n'
 
 
 # Error handling
 def t_error(t):
-    print("Illegal character %s" % repr(t.value[0]))
+    lineno, column = find_position(t.lexer, t.lexpos)
+    print("%d:%d: Illegal character %s" % (lineno, column, repr(t.value[0])))
     t.lexer.skip(1)
 
 
-lexical_analyzer = lex.lex()
+# Source positions
+def find_position(lexer, lexpos):
+    """Return the (lineno, column) of lexpos in the input of lexer.
+
+    The line index of the current input is built on first use and kept on
+    the lexer, so every later lookup is a binary search.
+    """
+    index = getattr(lexer, 'line_index', None)
+    if index is None or index.source is not lexer.lexdata:
+        index = lexer.line_index = lineindex.LineIndex(lexer.lexdata)
+    return index.position(lexpos)
+
+
+def find_lineno(lexer, lexpos):
+    return find_position(lexer, lexpos)[0]
+
+
+def find_column(lexer, lexpos):
+    return find_position(lexer, lexpos)[1]
+
+
+# The lexer is built on first use, so that importing this module (e.g. only
+# for the token tuple) does not pay for compiling the master regex.
+_lexer = None
+
+
+def get_lexer():
+    """Return a fresh lexer for mini-C.
+
+    The master lexer is built once per process; every call returns an
+    independent clone of it, so callers may freely input() into it.
+    """
+    global _lexer
+    if _lexer is None:
+        import ply.lex as lex
+        _lexer = lex.lex(module=sys.modules[__name__])
+    return _lexer.clone()
+
+
 if __name__ == "__main__":
-    lex.runmain(lexical_analyzer)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            data = f.read()
+    else:
+        data = sys.stdin.read()
+    lexer = get_lexer()
+    lexer.input(data)
+    for tok in lexer:
+        lineno, column = find_position(lexer, tok.lexpos)
+        print("(%s,%r,%d,%d)" % (tok.type, tok.value, lineno, column))
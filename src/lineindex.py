@@ -0,0 +1,59 @@
+# ----------------------------------------------------------------------
+# lineindex.py
+#
+# A sorted index of the newline offsets of a source buffer.  It is built
+# once per file and resolves the line and column of any offset by binary
+# search, so the lexers do not have to count newlines while scanning.
+# ----------------------------------------------------------------------
+
+import re
+from array import array
+from bisect import bisect_left
+
+NEWLINE = re.compile('\n')
+NEWLINE_BYTES = re.compile(b'\n')
+
+
+class LineIndex:
+    """Line/column lookup for a str or bytes-like source.
+
+    Lines and columns are 1-based; offsets are indices into the source
+    (characters for str, bytes otherwise).
+    """
+
+    def __init__(self, source):
+        self.source = source
+        pattern = NEWLINE if isinstance(source, str) else NEWLINE_BYTES
+        self.newlines = array('I', [m.start() for m in pattern.finditer(source)])
+
+    def __len__(self):
+        """Return the number of lines."""
+        return len(self.newlines) + 1
+
+    def lineno(self, offset):
+        return bisect_left(self.newlines, offset) + 1
+
+    def column(self, offset):
+        return self.position(offset)[1]
+
+    def position(self, offset):
+        """Return the (lineno, column) of offset."""
+        line = bisect_left(self.newlines, offset)
+        if line == 0:
+            return 1, offset + 1
+        return line + 1, offset - self.newlines[line - 1]
+
+    def line_start(self, lineno):
+        """Return the offset of the first character of a line."""
+        if lineno <= 1:
+            return 0
+        return self.newlines[lineno - 2] + 1
+
+    def line_end(self, lineno):
+        """Return the offset of the newline ending a line (or the source end)."""
+        if lineno > len(self.newlines):
+            return len(self.source)
+        return self.newlines[lineno - 1]
+
+    def nbytes(self):
+        return self.newlines.itemsize * len(self.newlines)
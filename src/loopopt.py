@@ -0,0 +1,306 @@
+# ----------------------------------------------------------------------
+# loopopt.py
+#
+# Loop optimizations on the SSA form (ssa.py), run by opt.py after the
+# scalar passes.  The loops are the natural loops of the back edges that
+# are still executable (while, do and for alike, and those made with
+# goto), outermost first, and each gets
+#
+#   hoisting    an instruction whose operands do not change in the loop
+#               moves to the edges that enter it, so it runs once per
+#               entry instead of once per iteration (&a of an array, n *
+#               4 of an invariant n), and the same instruction moved twice
+#               is computed once.  Only instructions that cannot fail
+#               move, since the loop may not run them at all: no loads,
+#               no division but by a constant, no pointer arithmetic but
+#               on an address of an array.
+#   strength    for a basic induction variable i (i = phi(i0, i + c) at
+#   reduction   the header) and a constant k, i * k becomes a new
+#               induction variable j = phi(i0 * k, j + c * k), updated by
+#               an addition on the back edges.  A test of i against an
+#               invariant n is made on j against n * k where k > 0, so
+#               that i itself goes when nothing else reads it.
+#
+# There are no preheader blocks: code for the entry and back edges is
+# kept on the edges (ssa.SSA.edge_code) until the code leaves SSA form.
+# ----------------------------------------------------------------------
+
+import ssa
+import tac
+from typetab import INT
+
+
+# Instructions that always succeed when their operands are numbers.
+SAFE = frozenset((tac.COPY, tac.CONV, tac.ADD, tac.SUB, tac.MUL, tac.AND, tac.OR, tac.XOR,
+                  tac.LT, tac.GT, tac.LE, tac.GE, tac.EQ, tac.NE, tac.NEG, tac.NOT, tac.INV))
+
+COMPARISONS = frozenset((tac.LT, tac.GT, tac.LE, tac.GE, tac.EQ, tac.NE))
+
+
+def loops(form):
+    """[(header, set of blocks)] of the natural loops of the executable
+    edges, loops that share a header merged, outermost first."""
+    graph = form.graph
+    bodies = {}
+    for latch, header in form.edges:
+        if not graph.dominates(header, latch):
+            continue
+        body = bodies.setdefault(header, {header})
+        stack = [latch]
+        while stack:
+            b = stack.pop()
+            if b not in body:
+                body.add(b)
+                stack.extend(p for p in graph.preds[b] if (p, b) in form.edges)
+    return sorted(bodies.items(), key=lambda item: (-len(item[1]), graph.pre[item[0]]))
+
+
+class LoopOptimizer:
+    """Hoisting and strength reduction over the loops of an ssa.SSA."""
+
+    def __init__(self, form, stats):
+        self.form = form
+        self.stats = stats
+        symbols = form.symbols
+        self.kind, self.types, self.values = symbols.kind, symbols.type, symbols.value
+        graph, code = form.graph, form.code
+        # SSA value -> block of its definition (None once hoisted), and
+        # instruction of its definition.
+        self.block = {}
+        self.site = {}
+        # Values known to be addresses of arrays.
+        self.addresses = set()
+        for b in form.reachable:
+            for phi in form.phis[b]:
+                self.block[phi.dst] = b
+            for i in graph.instructions(b):
+                op = code.op[i]
+                if op in tac.DEF_A and code.a[i] in form.origin:
+                    self.block[code.a[i]] = b
+                    self.site[code.a[i]] = i
+                    if op == tac.ADDR:
+                        self.addresses.add(code.a[i])
+        self.alias = {}
+
+    def run(self):
+        form = self.form
+        for header, body in loops(form):
+            preds = form.graph.preds[header]
+            entries = [p for p in preds if p not in body and (p, header) in form.edges]
+            if not entries:
+                continue
+            self.hoist(header, body, entries)
+            self.reduce(header, body)
+        if self.alias:
+            self.rename()
+
+    def is_constant(self, sid):
+        return self.kind[sid] == tac.CONST
+
+    def invariant(self, sid, body):
+        k = self.kind[sid]
+        if k in (tac.CONST, tac.STRING, tac.FUNC):
+            return True
+        if not self.form.is_value(sid):
+            # Memory: a store or call in the loop may change it.
+            return False
+        return self.block.get(sid) not in body
+
+    def safe(self, op, a, b, c):
+        types = self.types
+        if op == tac.ADDR:
+            return True
+        if op in (tac.DIV, tac.MOD):
+            ok = self.is_constant(c) and self.values[c] != 0
+        elif op in (tac.SHL, tac.SHR):
+            ok = self.is_constant(c) and self.values[c] >= 0
+        else:
+            ok = op in SAFE
+        if not ok:
+            return False
+        if types[a].is_pointer() or types[b].is_pointer() or c and types[c].is_pointer():
+            # p + n fails for a null p; an array's address never is.
+            return op in (tac.ADD, tac.SUB, tac.COPY) and all(
+                v in self.addresses for v in (b, c) if v and types[v].is_pointer())
+        return True
+
+    def hoist(self, header, body, entries):
+        form = self.form
+        graph, code = form.graph, form.code
+        moved = []
+        # (op, b, c) -> the value of the instruction moved first, which
+        # the same instruction found again reuses.
+        same = {}
+        changed = True
+        while changed:
+            changed = False
+            for b in sorted(body, key=graph.pre.__getitem__):
+                for i in graph.instructions(b):
+                    op, a, x, y = code[i]
+                    if op not in tac.DEF_A or a not in form.origin or \
+                            not self.safe(op, a, x, y) or \
+                            not all(self.invariant(v, body) for v in form.uses(i)):
+                        continue
+                    key = (op, self.alias.get(x, x), self.alias.get(y, y))
+                    if key in same and self.types[same[key]] is self.types[a]:
+                        self.alias[a] = same[key]
+                    else:
+                        same[key] = a
+                        moved.append((op, a, x, y))
+                    self.block[a] = None
+                    code.op[i] = tac.NOP
+                    changed = True
+        if moved:
+            for p in entries:
+                form.edge_code.setdefault((p, header), []).extend(moved)
+            self.stats['hoisted'] += len(moved)
+
+    def constant(self, value):
+        return self.form.symbols.const(INT, value)
+
+    def basic_induction_variables(self, header, body):
+        """{i: (i + c, c)} for the phis i of the header stepped by a
+        constant c on every back edge."""
+        form = self.form
+        code = form.code
+        preds = form.graph.preds[header]
+        ivs = {}
+        for phi in form.phis[header]:
+            i = phi.dst
+            if self.types[i] is not INT:
+                continue
+            steps = set(phi.args[k] for k, p in enumerate(preds)
+                        if p in body and (p, header) in form.edges)
+            if len(steps) != 1:
+                continue
+            nxt = steps.pop()
+            site = self.site.get(nxt)
+            if site is None or self.block.get(nxt) not in body:
+                continue
+            op, _, x, y = code[site]
+            if op == tac.ADD and x == i and self.is_constant(y):
+                ivs[i] = (nxt, self.values[y])
+            elif op == tac.ADD and y == i and self.is_constant(x):
+                ivs[i] = (nxt, self.values[x])
+            elif op == tac.SUB and x == i and self.is_constant(y):
+                ivs[i] = (nxt, -self.values[y])
+        return ivs
+
+    def reduce(self, header, body):
+        form = self.form
+        graph, code = form.graph, form.code
+        ivs = self.basic_induction_variables(header, body)
+        if not ivs:
+            return
+        nexts = dict((nxt, i) for i, (nxt, _) in ivs.items())
+        derived = {}
+        for b in sorted(body, key=graph.pre.__getitem__):
+            for n in graph.instructions(b):
+                op, a, x, y = code[n]
+                if op != tac.MUL or self.types[a] is not INT:
+                    continue
+                if not self.is_constant(y):
+                    x, y = y, x
+                if not self.is_constant(y) or (x not in ivs and x not in nexts):
+                    continue
+                factor = self.values[y]
+                i = x if x in ivs else nexts[x]
+                step = ivs[i][1]
+                j = derived.get((i, factor))
+                if j is None:
+                    j = derived[(i, factor)] = self.derive(header, body, i, step, factor)
+                if x == i:
+                    # i * k is j: read j instead.
+                    self.alias[a] = j
+                    code.op[n] = tac.NOP
+                else:
+                    # (i + c) * k is j + c * k.
+                    code.op[n], code.b[n], code.c[n] = tac.ADD, j, self.constant(step * factor)
+                self.stats['reduced'] += 1
+        self.replace_tests(header, body, ivs, derived)
+
+    def derive(self, header, body, i, step, factor):
+        """Make the induction variable j = i * factor at the header."""
+        form = self.form
+        preds = form.graph.preds[header]
+        i_phi = [phi for phi in form.phis[header] if phi.dst == i][0]
+        j = form.temp(INT)
+        args = []
+        for k, p in enumerate(preds):
+            if (p, header) not in form.edges:
+                args.append(j)
+            elif p in body:
+                nxt = form.temp(INT)
+                form.edge_code.setdefault((p, header), []).append(
+                    (tac.ADD, nxt, j, self.constant(step * factor)))
+                args.append(nxt)
+            else:
+                start = i_phi.args[k]
+                if self.is_constant(start):
+                    args.append(self.constant(self.values[start] * factor))
+                else:
+                    value = form.temp(INT)
+                    form.edge_code.setdefault((p, header), []).append(
+                        (tac.MUL, value, start, self.constant(factor)))
+                    args.append(value)
+        form.phis[header].append(ssa.Phi(j, j, args))
+        self.block[j] = header
+        return j
+
+    def replace_tests(self, header, body, ivs, derived):
+        # i < n becomes j < n * k, for the first j = i * k with k > 0.
+        form = self.form
+        graph, code = form.graph, form.code
+        scaled = {}
+        for (i, factor), j in sorted(derived.items()):
+            if factor > 0:
+                scaled.setdefault(i, (j, factor))
+        entries = [p for p in graph.preds[header] if p not in body and (p, header) in form.edges]
+        for b in sorted(body, key=graph.pre.__getitem__):
+            for n in graph.instructions(b):
+                op, a, x, y = code[n]
+                if op not in COMPARISONS:
+                    continue
+                if x in scaled and y not in ivs and self.types[y] is INT and self.invariant(y, body):
+                    j, factor = scaled[x]
+                    code.b[n], code.c[n] = j, self.bound(y, factor, entries, header)
+                elif y in scaled and x not in ivs and self.types[x] is INT and self.invariant(x, body):
+                    j, factor = scaled[y]
+                    code.b[n], code.c[n] = self.bound(x, factor, entries, header), j
+                else:
+                    continue
+                self.stats['tests'] += 1
+
+    def bound(self, n, factor, entries, header):
+        if self.is_constant(n):
+            return self.constant(self.values[n] * factor)
+        form = self.form
+        value = form.temp(INT)
+        for p in entries:
+            form.edge_code.setdefault((p, header), []).append(
+                (tac.MUL, value, n, self.constant(factor)))
+        return value
+
+    def rename(self):
+        """Make every read of a reduced product read its induction variable."""
+        form = self.form
+        graph, code = form.graph, form.code
+        alias = self.alias
+        for b in form.reachable:
+            for phi in form.phis[b]:
+                phi.args = [alias.get(v, v) for v in phi.args]
+            for n in graph.instructions(b):
+                op = code.op[n]
+                if op in tac.USE_A:
+                    code.a[n] = alias.get(code.a[n], code.a[n])
+                if op in tac.USE_B:
+                    code.b[n] = alias.get(code.b[n], code.b[n])
+                if op in tac.USE_C:
+                    code.c[n] = alias.get(code.c[n], code.c[n])
+        for edge, insts in form.edge_code.items():
+            form.edge_code[edge] = [(op, a, alias.get(b, b), alias.get(c, c))
+                                    for op, a, b, c in insts]
+
+
+def optimize_loops(form, stats):
+    LoopOptimizer(form, stats).run()
@@ -0,0 +1,171 @@
+# ----------------------------------------------------------------------
+# minic.py
+#
+# The mini-C compiler driver.  It compiles any number of files, spread
+# over a pool of worker processes; each worker loads the (cached) LALR
+# tables and the scanner once and then compiles the files it is handed.
+# Diagnostics are printed in the order the files were given, as soon as
+# every earlier file is done, and --time reports the processor time
+# spent in each phase, summed over the workers, the aggregate throughput
+# and the functions that took longest to analyze.
+#
+#   python src/minic.py [-j JOBS] [--time] FILE...
+# ----------------------------------------------------------------------
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import scanner
+import semantic_analyzer
+import syntax_analyzer
+
+
+PHASES = ('lex', 'parse', 'sema')
+
+# How many of the slowest functions --time lists.
+SLOWEST = 5
+
+
+class Result:
+    """What compiling one file produced, as sent back by a worker."""
+
+    __slots__ = ('path', 'diagnostics', 'times', 'nbytes', 'ntokens', 'ok', 'functions')
+
+    def __init__(self, path):
+        self.path = path
+        self.diagnostics = []
+        # Processor time of each phase.
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.nbytes = 0
+        self.ntokens = 0
+        self.ok = False
+        # (seconds, lineno, name) of the functions that took longest to
+        # analyze.
+        self.functions = []
+
+
+def init_worker():
+    """Build the scanner and load the parser tables once per process."""
+    scanner.get_scanner().compile_bytes()
+    syntax_analyzer.get_parser()
+
+
+def compile_file(path):
+    result = Result(path)
+    # The analyzers report errors by printing them as "line:column: ...".
+    out = io.StringIO()
+    lexer = scanner.BufferLexer()
+    try:
+        with contextlib.redirect_stdout(out):
+            start = time.process_time()
+            lexer.input_file(path)
+            lexed = time.process_time()
+            ast = syntax_analyzer.parse(None, lexer=lexer)
+            parsed = time.process_time()
+            if ast is not None:
+                analyzer = semantic_analyzer.analyze(ast)
+                result.functions = sorted(
+                    ((seconds, lineno, str(name)) for name, lineno, seconds
+                     in analyzer.function_times), reverse=True)[:SLOWEST]
+            analyzed = time.process_time()
+        result.times['lex'] = lexed - start
+        result.times['parse'] = parsed - lexed
+        result.times['sema'] = analyzed - parsed
+        result.nbytes = len(lexer.buf.source)
+        result.ntokens = len(lexer.buf)
+        result.ok = ast is not None
+    except (OSError, UnicodeError) as e:
+        out.write(' error: %s\n' % e)
+    except Exception as e:
+        # A compiler bug: report it against this file and go on with the
+        # others.
+        out.write(' internal error: %s: %s\n' % (type(e).__name__, e))
+    finally:
+        if lexer.buf is not None:
+            lexer.buf.close()
+    result.diagnostics = ['%s:%s' % (path, line) for line in out.getvalue().splitlines()]
+    if result.diagnostics:
+        result.ok = False
+    return result
+
+
+def compile_files(paths, jobs):
+    """Yield the Result of each path, in order."""
+    if jobs == 1:
+        init_worker()
+        for path in paths:
+            yield compile_file(path)
+        return
+    # Large chunks amortize the IPC cost of small files.
+    chunksize = max(1, min(64, len(paths) // (jobs * 4)))
+    with ProcessPoolExecutor(jobs, initializer=init_worker) as pool:
+        for result in pool.map(compile_file, paths, chunksize=chunksize):
+            yield result
+
+
+def report(results, elapsed, jobs, out=sys.stderr):
+    totals = dict.fromkeys(PHASES, 0.0)
+    nbytes = ntokens = 0
+    functions = []
+    for result in results:
+        for phase in PHASES:
+            totals[phase] += result.times[phase]
+        nbytes += result.nbytes
+        ntokens += result.ntokens
+        functions.extend((seconds, result.path, lineno, name)
+                         for seconds, lineno, name in result.functions)
+    out.write('%d files, %d bytes, %d tokens in %.3f s with %d jobs\n' % (
+        len(results), nbytes, ntokens, elapsed, jobs))
+    for phase in PHASES:
+        out.write('  %-8s %9.3f s (cpu)\n' % (phase, totals[phase]))
+    if elapsed > 0:
+        out.write('  %.1f files/s, %.2f MB/s, %.0f tokens/s\n' % (
+            len(results) / elapsed, nbytes / elapsed / 1e6, ntokens / elapsed))
+    functions.sort(reverse=True)
+    if functions:
+        out.write('  slowest functions to analyze:\n')
+        for seconds, path, lineno, name in functions[:SLOWEST]:
+            out.write('  %9.3f ms  %s:%s: %s\n' % (seconds * 1e3, path, lineno, name))
+
+
+def positive(text):
+    """argparse type of a count of at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid int value: %r' % text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be at least 1: %s' % text)
+    return value
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='minic', description='Compile mini-C files.')
+    ap.add_argument('files', nargs='+', metavar='FILE')
+    ap.add_argument('-j', '--jobs', type=positive, default=None,
+                    help='number of worker processes (default: one per CPU)')
+    ap.add_argument('--time', action='store_true',
+                    help='report per-phase timing and throughput')
+    args = ap.parse_args(argv)
+
+    jobs = min(args.jobs or os.cpu_count() or 1, len(args.files))
+    start = time.perf_counter()
+    results = []
+    for result in compile_files(args.files, jobs):
+        for line in result.diagnostics:
+            print(line)
+        results.append(result)
+    elapsed = time.perf_counter() - start
+
+    if args.time:
+        report(results, elapsed, jobs)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
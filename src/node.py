@@ -1,3 +1,6 @@
+import sys
+
+
 class Node:
     def __init__(self, data = None, child_list = []):
         self.data = data
@@ -24,3 +27,444 @@ class Node:
     def remove_children(self, child_list):
         for child in child_list:
             self.remove_child(child)
+
+
+# ----------------------------------------------------------------------
+# Abstract syntax tree
+#
+# The grammar actions in syntax_analyzer.py build the tree out of the
+# classes below.  Every node kind has a fixed set of fields declared in
+# __slots__, so nodes carry no per-instance __dict__.  Fields hold either
+# plain values (names, operators), child nodes, or Python lists of child
+# nodes; lineno is the source line the node starts on.
+# ----------------------------------------------------------------------
+
+class ASTNode:
+    __slots__ = ('lineno',)
+
+    def children(self):
+        """Return the (field name, child node) pairs of this node."""
+        nodes = []
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, ASTNode):
+                nodes.append((name, value))
+            elif isinstance(value, list):
+                for i, child in enumerate(value):
+                    if isinstance(child, ASTNode):
+                        nodes.append(('%s[%d]' % (name, i), child))
+        return nodes
+
+    def attrs(self):
+        """Return the (field name, value) pairs that are not child nodes."""
+        values = []
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                if value and not any(isinstance(v, ASTNode) for v in value):
+                    values.append((name, value))
+            elif not isinstance(value, ASTNode) and value is not None:
+                values.append((name, value))
+        return values
+
+    def show(self, buf=sys.stdout, indent=0, label=None):
+        lead = ' ' * indent + (label + ': ' if label else '')
+        attrs = ', '.join('%s=%r' % item for item in self.attrs() if item[0] != 'lineno')
+        buf.write('%s%s(%s) <%s>\n' % (lead, type(self).__name__, attrs, self.lineno))
+        for name, child in self.children():
+            child.show(buf, indent + 2, name)
+
+    def __repr__(self):
+        fields = ', '.join('%s=%r' % (name, getattr(self, name)) for name in self.__slots__)
+        return '%s(%s)' % (type(self).__name__, fields)
+
+
+def walk(root):
+    """Yield every node of the tree under root (root first)."""
+    stack = [root]
+    while stack:
+        n = stack.pop()
+        yield n
+        stack.extend(reversed([child for _, child in n.children()]))
+
+
+# Top level
+
+class TranslationUnit(ASTNode):
+    __slots__ = ('ext',)
+
+    def __init__(self, ext, lineno=None):
+        self.ext = ext
+        self.lineno = lineno
+
+
+class FunctionDef(ASTNode):
+    __slots__ = ('decl', 'param_decls', 'body')
+
+    def __init__(self, decl, param_decls, body, lineno=None):
+        self.decl = decl
+        self.param_decls = param_decls
+        self.body = body
+        self.lineno = lineno
+
+
+# Declarations and types
+
+class Decl(ASTNode):
+    __slots__ = ('name', 'quals', 'storage', 'type', 'init', 'bitsize')
+
+    def __init__(self, name, quals, storage, type, init, bitsize=None, lineno=None):
+        self.name = name
+        self.quals = quals
+        self.storage = storage
+        self.type = type
+        self.init = init
+        self.bitsize = bitsize
+        self.lineno = lineno
+
+
+class TypeDecl(ASTNode):
+    __slots__ = ('declname', 'quals', 'type')
+
+    def __init__(self, declname, quals, type, lineno=None):
+        self.declname = declname
+        self.quals = quals
+        self.type = type
+        self.lineno = lineno
+
+
+class IdentifierType(ASTNode):
+    __slots__ = ('names',)
+
+    def __init__(self, names, lineno=None):
+        self.names = names
+        self.lineno = lineno
+
+
+class PtrDecl(ASTNode):
+    __slots__ = ('quals', 'type')
+
+    def __init__(self, quals, type, lineno=None):
+        self.quals = quals
+        self.type = type
+        self.lineno = lineno
+
+
+class ArrayDecl(ASTNode):
+    __slots__ = ('type', 'dim')
+
+    def __init__(self, type, dim, lineno=None):
+        self.type = type
+        self.dim = dim
+        self.lineno = lineno
+
+
+class FuncDecl(ASTNode):
+    __slots__ = ('args', 'type')
+
+    def __init__(self, args, type, lineno=None):
+        self.args = args
+        self.type = type
+        self.lineno = lineno
+
+
+class ParamList(ASTNode):
+    __slots__ = ('params',)
+
+    def __init__(self, params, lineno=None):
+        self.params = params
+        self.lineno = lineno
+
+
+class EllipsisParam(ASTNode):
+    __slots__ = ()
+
+    def __init__(self, lineno=None):
+        self.lineno = lineno
+
+
+class Typename(ASTNode):
+    __slots__ = ('quals', 'type')
+
+    def __init__(self, quals, type, lineno=None):
+        self.quals = quals
+        self.type = type
+        self.lineno = lineno
+
+
+class Struct(ASTNode):
+    __slots__ = ('kind', 'name', 'decls')
+
+    def __init__(self, kind, name, decls, lineno=None):
+        self.kind = kind
+        self.name = name
+        self.decls = decls
+        self.lineno = lineno
+
+
+class Enum(ASTNode):
+    __slots__ = ('name', 'values')
+
+    def __init__(self, name, values, lineno=None):
+        self.name = name
+        self.values = values
+        self.lineno = lineno
+
+
+class Enumerator(ASTNode):
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name, value, lineno=None):
+        self.name = name
+        self.value = value
+        self.lineno = lineno
+
+
+class InitList(ASTNode):
+    __slots__ = ('exprs',)
+
+    def __init__(self, exprs, lineno=None):
+        self.exprs = exprs
+        self.lineno = lineno
+
+
+# Statements
+
+class Compound(ASTNode):
+    __slots__ = ('items', 'end_lineno')
+
+    def __init__(self, items, lineno=None, end_lineno=None):
+        self.items = items
+        self.lineno = lineno
+        # The line of the closing brace.
+        self.end_lineno = end_lineno
+
+
+class EmptyStatement(ASTNode):
+    __slots__ = ()
+
+    def __init__(self, lineno=None):
+        self.lineno = lineno
+
+
+class If(ASTNode):
+    __slots__ = ('cond', 'iftrue', 'iffalse')
+
+    def __init__(self, cond, iftrue, iffalse, lineno=None):
+        self.cond = cond
+        self.iftrue = iftrue
+        self.iffalse = iffalse
+        self.lineno = lineno
+
+
+class Switch(ASTNode):
+    __slots__ = ('cond', 'stmt')
+
+    def __init__(self, cond, stmt, lineno=None):
+        self.cond = cond
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class While(ASTNode):
+    __slots__ = ('cond', 'stmt')
+
+    def __init__(self, cond, stmt, lineno=None):
+        self.cond = cond
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class DoWhile(ASTNode):
+    __slots__ = ('cond', 'stmt')
+
+    def __init__(self, cond, stmt, lineno=None):
+        self.cond = cond
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class For(ASTNode):
+    __slots__ = ('init', 'cond', 'next', 'stmt')
+
+    def __init__(self, init, cond, next, stmt, lineno=None):
+        self.init = init
+        self.cond = cond
+        self.next = next
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class Label(ASTNode):
+    __slots__ = ('name', 'stmt')
+
+    def __init__(self, name, stmt, lineno=None):
+        self.name = name
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class Case(ASTNode):
+    __slots__ = ('expr', 'stmt')
+
+    def __init__(self, expr, stmt, lineno=None):
+        self.expr = expr
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class Default(ASTNode):
+    __slots__ = ('stmt',)
+
+    def __init__(self, stmt, lineno=None):
+        self.stmt = stmt
+        self.lineno = lineno
+
+
+class Goto(ASTNode):
+    __slots__ = ('name',)
+
+    def __init__(self, name, lineno=None):
+        self.name = name
+        self.lineno = lineno
+
+
+class Break(ASTNode):
+    __slots__ = ()
+
+    def __init__(self, lineno=None):
+        self.lineno = lineno
+
+
+class Continue(ASTNode):
+    __slots__ = ()
+
+    def __init__(self, lineno=None):
+        self.lineno = lineno
+
+
+class Return(ASTNode):
+    __slots__ = ('expr',)
+
+    def __init__(self, expr, lineno=None):
+        self.expr = expr
+        self.lineno = lineno
+
+
+# Expressions
+
+class Expression(ASTNode):
+    """Base class of the expression nodes.
+
+    ctype is the typetab.Type of the expression, set once by the semantic
+    analyzer; it is unset until then and is not one of the fields that
+    children(), attrs() and show() list.
+    """
+    __slots__ = ('ctype',)
+
+
+class Assignment(Expression):
+    __slots__ = ('op', 'lvalue', 'rvalue')
+
+    def __init__(self, op, lvalue, rvalue, lineno=None):
+        self.op = op
+        self.lvalue = lvalue
+        self.rvalue = rvalue
+        self.lineno = lineno
+
+
+class TernaryOp(Expression):
+    __slots__ = ('cond', 'iftrue', 'iffalse')
+
+    def __init__(self, cond, iftrue, iffalse, lineno=None):
+        self.cond = cond
+        self.iftrue = iftrue
+        self.iffalse = iffalse
+        self.lineno = lineno
+
+
+class BinOp(Expression):
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right, lineno=None):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.lineno = lineno
+
+
+class UnaryOp(Expression):
+    """A unary operation.
+
+    Postfix increment and decrement use the operators 'p++' and 'p--';
+    sizeof of a type has a Typename as its operand.
+    """
+    __slots__ = ('op', 'expr')
+
+    def __init__(self, op, expr, lineno=None):
+        self.op = op
+        self.expr = expr
+        self.lineno = lineno
+
+
+class Cast(Expression):
+    __slots__ = ('to_type', 'expr')
+
+    def __init__(self, to_type, expr, lineno=None):
+        self.to_type = to_type
+        self.expr = expr
+        self.lineno = lineno
+
+
+class Call(Expression):
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, args, lineno=None):
+        self.name = name
+        self.args = args
+        self.lineno = lineno
+
+
+class ArrayRef(Expression):
+    __slots__ = ('name', 'subscript')
+
+    def __init__(self, name, subscript, lineno=None):
+        self.name = name
+        self.subscript = subscript
+        self.lineno = lineno
+
+
+class StructRef(Expression):
+    __slots__ = ('name', 'type', 'field')
+
+    def __init__(self, name, type, field, lineno=None):
+        self.name = name
+        self.type = type
+        self.field = field
+        self.lineno = lineno
+
+
+class ExprList(Expression):
+    __slots__ = ('exprs',)
+
+    def __init__(self, exprs, lineno=None):
+        self.exprs = exprs
+        self.lineno = lineno
+
+
+class ID(Expression):
+    __slots__ = ('name',)
+
+    def __init__(self, name, lineno=None):
+        self.name = name
+        self.lineno = lineno
+
+
+class Constant(Expression):
+    """A literal; type is one of 'int', 'float', 'double', 'char', 'string'."""
+    __slots__ = ('type', 'value')
+
+    def __init__(self, type, value, lineno=None):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
@@ -0,0 +1,385 @@
+# ----------------------------------------------------------------------
+# opt.py
+#
+# The SSA optimizer of the three-address code.  Calls are inlined first
+# (inline.py); then each function is put in SSA form (ssa.py) and goes
+# through
+#
+#   sccp        sparse conditional constant propagation (Wegman and
+#               Zadeck): values are TOP, a constant or BOTTOM, and only
+#               edges found executable are followed, so a branch on a
+#               constant and the blocks only it reaches disappear.
+#               Constants fold with interp.fold, the interpreter's own
+#               arithmetic; a fold C leaves undefined (x / 0) is left to
+#               run.
+#   identities  x + 0, x * 1 and the like become copies of x.
+#   copies      copy propagation: uses of x after x = y read y, and a
+#               phi of one value is that value.
+#   dead code   mark and sweep: the instructions with effects (stores,
+#               calls, branches, returns, writes to memory variables)
+#               are live, and so is every definition a live instruction
+#               reads; the rest goes.
+#
+# and then the loop optimizations of loopopt.py (hoisting of invariant
+# code, strength reduction of induction variables) and dead code again,
+# before the code is taken out of SSA form.
+#
+#   python src/opt.py FILE
+#
+# prints the optimized code of a mini-C file, like src/tac.py.
+# ----------------------------------------------------------------------
+
+import sys
+
+import inline
+import interp
+import loopopt
+import ssa
+import tac
+from typetab import INT
+
+
+class _Bottom:
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'BOTTOM'
+
+
+TOP = None
+BOTTOM = _Bottom()
+
+FOLDABLE = frozenset((tac.COPY, tac.CONV, tac.ADD, tac.SUB, tac.MUL, tac.DIV, tac.MOD,
+                      tac.SHL, tac.SHR, tac.AND, tac.OR, tac.XOR, tac.LT, tac.GT,
+                      tac.LE, tac.GE, tac.EQ, tac.NE, tac.NEG, tac.NOT, tac.INV))
+
+# Constant operand that leaves the other unchanged, and whether it may
+# come first.
+IDENTITIES = {tac.ADD: (0, True), tac.SUB: (0, False), tac.MUL: (1, True), tac.DIV: (1, False),
+              tac.SHL: (0, False), tac.SHR: (0, False), tac.OR: (0, True), tac.XOR: (0, True)}
+
+
+def _meet(x, y):
+    if x is TOP:
+        return y
+    if y is TOP or x is BOTTOM:
+        return x
+    if y is BOTTOM or x != y or type(x) is not type(y):
+        return BOTTOM
+    return x
+
+
+class SCCP:
+    """Sparse conditional constant propagation over an ssa.SSA."""
+
+    def __init__(self, form):
+        self.form = form
+        symbols = form.symbols
+        self.kind, self.types, self.constants = symbols.kind, symbols.type, symbols.value
+        self.values = {}
+        # Where each SSA value is defined and read: an instruction index
+        # or a (block, phi) pair.
+        self.defs = {}
+        self.uses = {}
+        graph, code = form.graph, form.code
+        for b in graph.order:
+            for phi in form.phis[b]:
+                self.defs[phi.dst] = (b, phi)
+                for arg in phi.args:
+                    self.uses.setdefault(arg, []).append((b, phi))
+            for i in graph.instructions(b):
+                if code.op[i] in tac.DEF_A and code.a[i] in form.origin:
+                    self.defs[code.a[i]] = i
+                for used in form.uses(i):
+                    self.uses.setdefault(used, []).append(i)
+        self.edges = set()
+        self.blocks = set()
+
+    def value(self, sid):
+        if self.kind[sid] == tac.CONST:
+            return self.constants[sid]
+        if sid in self.form.origin:
+            return self.values.get(sid, TOP)
+        return BOTTOM
+
+    def run(self):
+        graph = self.form.graph
+        if not len(graph):
+            return
+        flow = [(-1, 0)]
+        work = []
+        while flow or work:
+            while flow:
+                p, b = flow.pop()
+                if (p, b) in self.edges:
+                    continue
+                self.edges.add((p, b))
+                for phi in self.form.phis[b]:
+                    self.visit_phi(b, phi, work)
+                if b not in self.blocks:
+                    self.blocks.add(b)
+                    for i in graph.instructions(b):
+                        self.visit(b, i, work, flow)
+            while work:
+                sid = work.pop()
+                for site in self.uses.get(sid, ()):
+                    if type(site) is tuple:
+                        if site[0] in self.blocks:
+                            self.visit_phi(site[0], site[1], work)
+                    else:
+                        b = graph.block_of(site)
+                        if b in self.blocks:
+                            self.visit(b, site, work, flow)
+        self.edges.discard((-1, 0))
+
+    def lower(self, sid, value, work):
+        old = self.values.get(sid, TOP)
+        new = _meet(old, value)
+        if new is not old and (old is TOP or new is BOTTOM):
+            self.values[sid] = new
+            work.append(sid)
+
+    def visit_phi(self, b, phi, work):
+        value = TOP
+        preds = self.form.graph.preds[b]
+        for k, arg in enumerate(phi.args):
+            if (preds[k], b) in self.edges:
+                value = _meet(value, self.value(arg))
+        self.lower(phi.dst, value, work)
+
+    def visit(self, b, i, work, flow):
+        code = self.form.code
+        graph = self.form.graph
+        op = code.op[i]
+        if op in tac.DEF_A:
+            a = code.a[i]
+            if a in self.form.origin:
+                self.lower(a, self.evaluate(op, a, code.b[i], code.c[i]), work)
+        if i != graph.end[b] - 1:
+            return
+        if op == tac.JUMP:
+            flow.append((b, graph.labels[code.a[i]]))
+        elif op in (tac.JZ, tac.JNZ):
+            cond = self.value(code.b[i])
+            if cond is BOTTOM:
+                flow.extend((b, s) for s in graph.succs[b])
+            elif cond is not TOP:
+                taken = not cond if op == tac.JZ else bool(cond)
+                flow.append((b, graph.labels[code.a[i]] if taken else b + 1))
+        elif op != tac.RET:
+            flow.extend((b, s) for s in graph.succs[b])
+
+    def evaluate(self, op, a, b, c):
+        types = self.types
+        if op not in FOLDABLE or types[a].is_pointer() or types[b].is_pointer() or \
+                op in tac.USE_C and types[c].is_pointer():
+            return BOTTOM
+        x = self.value(b)
+        y = self.value(c) if op in tac.USE_C else 0
+        if x is BOTTOM or y is BOTTOM:
+            return BOTTOM
+        if x is TOP or y is TOP:
+            return TOP
+        try:
+            return interp.fold(op, types[a], x, y)
+        except ArithmeticError:
+            return BOTTOM
+
+    def rewrite(self, stats):
+        """Put the constants in the code and drop what never runs."""
+        form = self.form
+        graph, code, symbols = form.graph, form.code, form.symbols
+        form.reachable = self.blocks
+        form.edges = self.edges
+        stats['blocks'] += len(graph.order) - len(self.blocks)
+        constants = {}
+        for sid, value in self.values.items():
+            if value is not BOTTOM and value is not TOP:
+                constants[sid] = symbols.const(self.types[sid], value)
+        stats['constants'] += len(constants)
+        for b in self.blocks:
+            for phi in form.phis[b]:
+                phi.args = [constants.get(arg, arg) for arg in phi.args]
+            for i in graph.instructions(b):
+                op = code.op[i]
+                if op in tac.USE_A:
+                    code.a[i] = constants.get(code.a[i], code.a[i])
+                if op in tac.USE_B:
+                    code.b[i] = constants.get(code.b[i], code.b[i])
+                if op in tac.USE_C:
+                    code.c[i] = constants.get(code.c[i], code.c[i])
+                if op in (tac.JZ, tac.JNZ) and symbols.kind[code.b[i]] == tac.CONST:
+                    cond = symbols.value[code.b[i]]
+                    if (not cond if op == tac.JZ else bool(cond)):
+                        code.op[i] = tac.JUMP
+                        code.b[i] = 0
+                    else:
+                        code.op[i] = tac.NOP
+                    stats['branches'] += 1
+
+
+def simplify(form, stats):
+    """Turn the integer instructions with an identity operand into copies."""
+    graph, code, symbols = form.graph, form.code, form.symbols
+    kind, types, values = symbols.kind, symbols.type, symbols.value
+    for b in form.reachable:
+        for i in graph.instructions(b):
+            identity = IDENTITIES.get(code.op[i])
+            if identity is None:
+                continue
+            a, x, y = code.a[i], code.b[i], code.c[i]
+            if types[a].rank > INT.rank or types[a].is_pointer():
+                continue
+            value, commutes = identity
+            if kind[y] == tac.CONST and values[y] == value and types[x] is types[a]:
+                code.op[i], code.c[i] = tac.COPY, 0
+            elif commutes and kind[x] == tac.CONST and values[x] == value and types[y] is types[a]:
+                code.op[i], code.b[i], code.c[i] = tac.COPY, y, 0
+            else:
+                continue
+            stats['identities'] += 1
+
+
+def propagate_copies(form, stats):
+    """Make uses of copies and single-valued phis read the original value."""
+    graph, code, symbols = form.graph, form.code, form.symbols
+    types = symbols.type
+    alias = {}
+
+    def find(sid):
+        while sid in alias:
+            sid = alias[sid]
+        return sid
+
+    blocks = [b for b in graph.order if b in form.reachable]
+    for b in blocks:
+        for i in graph.instructions(b):
+            if code.op[i] == tac.COPY and code.a[i] in form.origin:
+                a, src = code.a[i], code.b[i]
+                if types[a] is types[src] and (symbols.kind[src] == tac.CONST or form.is_value(src)):
+                    alias[a] = src
+                    code.op[i] = tac.NOP
+                    stats['copies'] += 1
+    changed = True
+    while changed:
+        changed = False
+        for b in blocks:
+            preds = graph.preds[b]
+            kept = []
+            for phi in form.phis[b]:
+                args = set(find(arg) for k, arg in enumerate(phi.args)
+                           if (preds[k], b) in form.edges)
+                args.discard(phi.dst)
+                if len(args) == 1:
+                    alias[phi.dst] = args.pop()
+                    changed = True
+                    stats['copies'] += 1
+                else:
+                    kept.append(phi)
+            form.phis[b] = kept
+    if not alias:
+        return
+    for b in blocks:
+        for phi in form.phis[b]:
+            phi.args = [find(arg) for arg in phi.args]
+        for i in graph.instructions(b):
+            op = code.op[i]
+            if op in tac.USE_A:
+                code.a[i] = find(code.a[i])
+            if op in tac.USE_B:
+                code.b[i] = find(code.b[i])
+            if op in tac.USE_C:
+                code.c[i] = find(code.c[i])
+
+
+def eliminate_dead_code(form, stats):
+    """Delete the definitions of values no effect depends on."""
+    graph, code = form.graph, form.code
+    defs = {}
+    live = set()
+    work = []
+    for b in form.reachable:
+        for phi in form.phis[b]:
+            defs[phi.dst] = phi
+        for i in graph.instructions(b):
+            op = code.op[i]
+            if op == tac.NOP:
+                continue
+            if op in tac.DEF_A and op != tac.CALL and code.a[i] in form.origin:
+                defs[code.a[i]] = i
+            else:
+                live.add(i)
+                work.extend(form.uses(i))
+    for insts in form.edge_code.values():
+        for inst in insts:
+            work.extend(ssa.reads(*inst))
+    while work:
+        site = defs.pop(work.pop(), None)
+        if site is None:
+            continue
+        live.add(site)
+        if type(site) is int:
+            work.extend(form.uses(site))
+        else:
+            work.extend(site.args)
+    for b in form.reachable:
+        form.phis[b] = [phi for phi in form.phis[b] if phi in live]
+    for site in defs.values():
+        if type(site) is int:
+            code.op[site] = tac.NOP
+            stats['dead'] += 1
+
+
+def optimize_function(f, symbols, stats, loops=True):
+    form = ssa.SSA(f, symbols)
+    sccp = SCCP(form)
+    sccp.run()
+    sccp.rewrite(stats)
+    simplify(form, stats)
+    propagate_copies(form, stats)
+    eliminate_dead_code(form, stats)
+    if loops:
+        loopopt.optimize_loops(form, stats)
+        eliminate_dead_code(form, stats)
+    form.to_tac()
+
+
+def optimize(program, loops=True, inlining=True, model=None):
+    """Optimize a tac.Program in place: inline calls as model (an
+    inline.CostModel) accepts unless inlining is false, then optimize
+    every function, with the loop optimizations of loopopt.py unless
+    loops is false.  Return counts of what was done, by kind."""
+    stats = dict.fromkeys(('inlined', 'removed', 'constants', 'branches', 'blocks', 'identities',
+                           'copies', 'dead', 'hoisted', 'reduced', 'tests'), 0)
+    if inlining:
+        stats.update(inline.inline(program, model))
+    for f in program.functions.values():
+        optimize_function(f, program.symbols, stats, loops)
+    return stats
+
+
+def main(argv):
+    import argparse
+    import semantic_analyzer
+    import syntax_analyzer
+
+    ap = argparse.ArgumentParser(prog='opt', description='Print the optimized TAC of a mini-C file.')
+    ap.add_argument('file', metavar='FILE')
+    args = ap.parse_args(argv)
+
+    with open(args.file) as f:
+        ast = syntax_analyzer.parse(f.read())
+    if ast is None or semantic_analyzer.analyze(ast).errors:
+        return 1
+    program = tac.generate(ast)
+    before = program.instructions()
+    stats = optimize(program)
+    tac.dump(program)
+    sys.stderr.write('%d -> %d instructions; %s\n' % (
+        before, program.instructions(),
+        ', '.join('%s %d' % item for item in stats.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,548 @@
+# ----------------------------------------------------------------------
+# scanner.py
+#
+# A bulk scanner for mini-C.  It reads the same token rules as
+# lexical_analyzer.py, but compiles them into one master regular
+# expression and tokenizes a whole buffer with a single finditer() pass:
+# there is no per-token call into t_* functions, keywords are resolved
+# through keyword_map, and tokens are produced as one list.
+#
+# A Scanner can be built for a TokenProfile, the frequencies of the token
+# rules and of the characters tokens start with on a sample corpus (see
+# measure() and scanprofile.py).  The alternatives of the master regex
+# are then tried in order of decreasing frequency wherever that cannot
+# change which rule matches, so the common tokens (identifiers, blanks,
+# punctuators) are found with the fewest failed attempts.
+#
+#   python src/scanner.py --profile FILE... > src/scanprofile.py
+# ----------------------------------------------------------------------
+
+import mmap
+import re
+import sys
+import types
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+import lexical_analyzer
+import lineindex
+import tokbuf
+from ply.lex import LexToken
+
+
+# Group names of the two synthetic alternatives of the master regex.
+IGNORE_GROUP = 'ignore'
+ERROR_GROUP = 'error'
+
+ASCII = [chr(c) for c in range(128)]
+
+CATEGORY_REGEX = {
+    sre_constants.CATEGORY_DIGIT: r'\d',
+    sre_constants.CATEGORY_NOT_DIGIT: r'\D',
+    sre_constants.CATEGORY_SPACE: r'\s',
+    sre_constants.CATEGORY_NOT_SPACE: r'\S',
+    sre_constants.CATEGORY_WORD: r'\w',
+    sre_constants.CATEGORY_NOT_WORD: r'\W',
+}
+
+
+def collect_rules(module):
+    """Return the (name, regex) token rules of a lexer module.
+
+    The rules are returned in the order ply.lex tries them: function rules
+    in order of definition, then string rules by decreasing regex length.
+    """
+    funcs = []
+    strings = []
+    for name in dir(module):
+        if not name.startswith('t_') or name in ('t_ignore', 't_error'):
+            continue
+        item = getattr(module, name)
+        if isinstance(item, types.FunctionType):
+            funcs.append((item.__code__.co_firstlineno, name, item.__doc__))
+        elif isinstance(item, str):
+            strings.append((name, item))
+    funcs.sort()
+    strings.sort(key=lambda rule: len(rule[1]), reverse=True)
+    return [(name, regex) for _, name, regex in funcs] + strings
+
+
+def first_chars(regex, flags=re.VERBOSE):
+    """Return (chars, nullable) for a regex.
+
+    chars is the set of ASCII characters a match of regex can start with
+    and nullable tells whether it can match the empty string.  The analysis
+    is conservative: constructs it does not understand may start with any
+    character.
+    """
+    return _first_seq(sre_parse.parse(regex, flags))
+
+
+def _first_seq(items):
+    chars = set()
+    for op, av in items:
+        first, nullable = _first_op(op, av)
+        chars |= first
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def _first_op(op, av):
+    c = sre_constants
+    if op is c.LITERAL:
+        return {chr(av)}, False
+    if op is c.NOT_LITERAL:
+        return set(ASCII) - {chr(av)}, False
+    if op is c.ANY:
+        return set(ASCII) - {'\n'}, False
+    if op is c.IN:
+        chars = set()
+        negate = False
+        for item_op, item in av:
+            if item_op is c.NEGATE:
+                negate = True
+            elif item_op is c.LITERAL:
+                chars.add(chr(item))
+            elif item_op is c.RANGE:
+                chars.update(chr(i) for i in range(item[0], min(item[1], 127) + 1))
+            elif item_op is c.CATEGORY and item in CATEGORY_REGEX:
+                chars.update(ch for ch in ASCII if re.match(CATEGORY_REGEX[item], ch))
+            else:
+                return set(ASCII), False
+        return (set(ASCII) - chars if negate else chars), False
+    if op is c.SUBPATTERN:
+        return _first_seq(av[-1])
+    if op is c.BRANCH:
+        chars = set()
+        nullable = False
+        for branch in av[1]:
+            first, empty = _first_seq(branch)
+            chars |= first
+            nullable = nullable or empty
+        return chars, nullable
+    if op in (c.MAX_REPEAT, c.MIN_REPEAT):
+        first, nullable = _first_seq(av[2])
+        return first, nullable or av[0] == 0
+    return set(ASCII), True
+
+
+def literal_string(regex, flags=re.VERBOSE):
+    """Return the string a regex matches if it is a plain literal, else None."""
+    chars = []
+    for op, av in sre_parse.parse(regex, flags):
+        if op is not sre_constants.LITERAL:
+            return None
+        chars.append(chr(av))
+    return ''.join(chars)
+
+
+def exclusive(a, b):
+    """Tell whether literal rules a and b never match at the same position."""
+    return a is not None and b is not None and \
+        not a.startswith(b) and not b.startswith(a)
+
+
+class TokenProfile:
+    """Token frequencies on a sample corpus.
+
+    rules counts the matches of each rule ('t_ID', ..., plus 'ignore' for
+    blanks) and chars the characters the matches start with.
+    """
+
+    __slots__ = ('rules', 'chars')
+
+    def __init__(self, rules=None, chars=None):
+        self.rules = dict(rules or {})
+        self.chars = dict(chars or {})
+
+    def weight(self, chars):
+        get = self.chars.get
+        return sum(get(c, 0) for c in chars)
+
+    def order(self, rules, key):
+        """Order the rule indices of key (in PLY order) by frequency.
+
+        A rule only moves ahead of an earlier one when both are literal
+        strings and neither is a prefix of the other; every other pair
+        keeps its PLY order, so the first matching alternative is always
+        the rule PLY would pick.
+        """
+        literals = dict((i, literal_string(rules[i][1])) for i in key)
+        count = dict((i, self.rules.get(rules[i][0], 0)) for i in key)
+        remaining = list(key)
+        result = []
+        while remaining:
+            best = 0
+            for pos in range(1, len(remaining)):
+                i = remaining[pos]
+                if count[i] <= count[remaining[best]]:
+                    continue
+                if all(exclusive(literals[j], literals[i]) for j in remaining[:pos]):
+                    best = pos
+            result.append(remaining.pop(best))
+        return tuple(result)
+
+
+def measure(texts, scanner=None):
+    """Return the TokenProfile of a sample corpus (an iterable of str)."""
+    master = (scanner or Scanner()).master
+    rules = {}
+    chars = {}
+    for data in texts:
+        for m in master.finditer(data):
+            name = m.lastgroup.rsplit('__', 1)[0]
+            rules[name] = rules.get(name, 0) + 1
+            c = data[m.start()]
+            chars[c] = chars.get(c, 0) + 1
+    return TokenProfile(rules, chars)
+
+
+def default_profile():
+    """The profile in scanprofile.py, measured on the example programs."""
+    import scanprofile
+    return TokenProfile(scanprofile.RULES, scanprofile.CHARS)
+
+
+def emit_profile(profile, sources, out=sys.stdout):
+    """Write a profile as the source of a scanprofile module."""
+    out.write('# ----------------------------------------------------------------------\n')
+    out.write('# scanprofile.py\n#\n')
+    out.write('# Token frequencies for scanner.Scanner, generated by\n#\n')
+    out.write('#   python src/scanner.py --profile %s\n' % ' '.join(sources))
+    out.write('# ----------------------------------------------------------------------\n\n')
+    for name, counts in (('RULES', profile.rules), ('CHARS', profile.chars)):
+        out.write('%s = {\n' % name)
+        for key, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            out.write('    %r: %d,\n' % (key, count))
+        out.write('}\n')
+        if name == 'RULES':
+            out.write('\n')
+
+
+class ScanError(Exception):
+    """Exception raised for an illegal character when no error handler is set.
+
+    Attributes:
+        lexpos -- offset of the illegal character
+        msg -- explanation of the error
+    """
+
+    def __init__(self, char, lexpos):
+        self.lexpos = lexpos
+        self.msg = "Illegal character %s" % repr(char)
+
+
+def print_error(char, lineno, column):
+    print("%d:%d: Illegal character %s" % (lineno, column, repr(char)))
+
+
+class Scanner:
+    """A master-regex tokenizer for the token rules of a lexer module.
+
+    scan() returns a list of (type, value, lexpos) tuples which is
+    token-for-token identical to what the PLY lexer built from the same
+    module produces.  Like the PLY lexer it does not track line numbers;
+    they are resolved from lexpos through a lineindex.LineIndex.
+
+    Given a TokenProfile, the alternatives are tried in order of
+    frequency; the tokens are the same.
+    """
+
+    def __init__(self, module=lexical_analyzer, rules=None, errorf=print_error,
+                 profile=None):
+        if rules is None:
+            rules = collect_rules(module)
+        self.module = module
+        self.rules = rules
+        self.errorf = errorf
+        self.keyword_map = module.keyword_map
+
+        ignore = getattr(module, 't_ignore', '')
+
+        # Group name -> token type.  None marks discarded matches.
+        self.types = {IGNORE_GROUP: None, ERROR_GROUP: None}
+
+        # Partition the ASCII characters by the rules that can start a match
+        # with them, and give every partition its own alternation guarded by
+        # a one-character lookahead.  The rules inside a partition keep their
+        # PLY order (up to TokenProfile.order), so matching is unchanged,
+        # but the regex engine only tries the handful of rules that can
+        # possibly match.
+        firsts = [first_chars(regex) for name, regex in rules]
+        classes = {}
+        for c in ASCII:
+            key = tuple(i for i, (chars, nullable) in enumerate(firsts)
+                        if nullable or c in chars)
+            if key:
+                classes.setdefault(key, []).append(c)
+
+        # (chars, alternative) in the order they are tried.
+        parts = []
+        for key, chars in classes.items():
+            if profile is not None:
+                key = profile.order(rules, key)
+            parts.append((chars, self.alternative(rules, key, '[%s]' % re.escape(''.join(chars)))))
+        if profile is not None:
+            # The guards of the partitions are disjoint, so any order of
+            # them matches the same way.
+            parts.sort(key=lambda part: -profile.weight(part[0]))
+        if ignore:
+            part = (ignore, '(?P<%s>[%s]+)' % (IGNORE_GROUP, re.escape(ignore)))
+            # Blanks go first unless some rule can start with one.
+            at = 0
+            if profile is not None and not any(set(ignore) & set(chars) for chars, _ in parts):
+                weight = profile.weight(ignore)
+                while at < len(parts) and profile.weight(parts[at][0]) >= weight:
+                    at += 1
+            parts.insert(at, part)
+        # Non-ASCII characters may still start a match of a rule with a
+        # negated class; they fall back to all rules in order.
+        parts.append((None, self.alternative(rules, range(len(rules)), '[^\\x00-\\x7f]')))
+
+        parts = [regex for _, regex in parts]
+        parts.append('(?P<%s>[\\s\\S])' % ERROR_GROUP)
+        self.master = re.compile('|'.join(parts), re.VERBOSE)
+
+        # The bytes flavour of the master regex is compiled on first use.
+        self._master_bytes = None
+        self._codes = None
+        self._keyword_codes = None
+
+    def alternative(self, rules, key, guard):
+        alts = []
+        for i in key:
+            name, regex = rules[i]
+            group = '%s__%d' % (name, len(self.types))
+            self.types[group] = None if name.startswith('t_ignore_') else name[2:]
+            alts.append('(?P<%s>%s)' % (group, regex))
+        return '(?=%s)(?:%s)' % (guard, '|'.join(alts))
+
+    def scan(self, data):
+        toks = []
+        append = toks.append
+        group_types = self.types
+        keyword_get = self.keyword_map.get
+        index = None
+
+        for m in self.master.finditer(data):
+            group = m.lastgroup
+            tok_type = group_types[group]
+            if tok_type is not None:
+                value = m.group()
+                if tok_type == 'ID':
+                    tok_type = keyword_get(value, 'ID')
+                append((tok_type, value, m.start()))
+            elif group == ERROR_GROUP:
+                if index is None:
+                    index = lineindex.LineIndex(data)
+                self.error(m.group(), index, m.start())
+        return toks
+
+    def compile_bytes(self):
+        """Compile the master regex for bytes input.
+
+        Note that \\w and \\d only match ASCII characters in a bytes
+        pattern, so identifiers are limited to ASCII in this mode.
+        """
+        if self._master_bytes is None:
+            self._master_bytes = re.compile(self.master.pattern.encode('ascii'), re.VERBOSE)
+            # Group name -> token type code; -1 marks discarded matches and
+            # -2 illegal characters.
+            codes = {}
+            for group, tok_type in self.types.items():
+                codes[group] = -1 if tok_type is None else tokbuf.TOKEN_CODES[tok_type]
+            codes[ERROR_GROUP] = -2
+            self._codes = codes
+            self._keyword_codes = dict((word.encode('ascii'), tokbuf.TOKEN_CODES[tok_type])
+                                       for word, tok_type in self.keyword_map.items())
+        return self._master_bytes
+
+    def scan_buffer(self, source):
+        """Tokenize a bytes-like source into a tokbuf.TokenBuffer."""
+        master = self.compile_bytes()
+        codes = self._codes
+        keyword_get = self._keyword_codes.get
+        id_code = tokbuf.TOKEN_CODES['ID']
+
+        buf = tokbuf.TokenBuffer(source)
+        types_append = buf.types.append
+        starts_append = buf.starts.append
+        ends_append = buf.ends.append
+
+        for m in master.finditer(source):
+            code = codes[m.lastgroup]
+            if code >= 0:
+                start, end = m.span()
+                if code == id_code:
+                    code = keyword_get(m.group(), id_code)
+                types_append(code)
+                starts_append(start)
+                ends_append(end)
+            elif code == -2:
+                start = m.start()
+                self.error(m.group().decode('latin-1'), buf.line_index, start)
+        return buf
+
+    def scan_file(self, path):
+        """Tokenize a file through a read-only memory map.
+
+        The returned TokenBuffer scans and slices the mapped pages
+        directly, so the file is never copied into a Python string; call
+        its close() once the tokens are no longer needed.
+        """
+        with open(path, 'rb') as f:
+            try:
+                source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                source = b''
+        return self.scan_buffer(source)
+
+    def error(self, char, index, lexpos):
+        if self.errorf is None:
+            raise ScanError(char, lexpos)
+        lineno, column = index.position(lexpos)
+        self.errorf(char, lineno, column)
+
+
+class ScannerLexer:
+    """Adapter exposing a Scanner with the input()/token() lexer interface.
+
+    The whole input is tokenized by input(); token() then hands out
+    ply.lex.LexToken objects so the result can drive ply.yacc parsers.
+    """
+
+    def __init__(self, scanner=None):
+        self.scanner = scanner or get_scanner()
+        self.lexdata = ''
+        self.line_index = lineindex.LineIndex('')
+        self.lineno = 1
+        self.tokens = []
+        self.toks = iter(())
+
+    def input(self, data):
+        self.lexdata = data
+        self.line_index = lineindex.LineIndex(data)
+        self.tokens = self.scanner.scan(data)
+        self.toks = iter(self.tokens)
+
+    def rewind(self):
+        """Hand out the tokens again from the first, without rescanning."""
+        self.lineno = 1
+        self.toks = iter(self.tokens)
+
+    def token(self):
+        for tok_type, value, lexpos in self.toks:
+            tok = LexToken()
+            tok.type = tok_type
+            tok.value = value
+            tok.lineno = self.lineno = self.line_index.lineno(lexpos)
+            tok.lexpos = lexpos
+            tok.lexer = self
+            return tok
+        return None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        tok = self.token()
+        if tok is None:
+            raise StopIteration
+        return tok
+
+
+class BufferLexer:
+    """Adapter feeding a tokbuf.TokenBuffer to ply.yacc parsers.
+
+    input() accepts a str (encoded as UTF-8) or any bytes-like object, and
+    token() returns tokbuf.BufferToken views, so token values are only
+    materialized when a grammar action reads them.
+    """
+
+    def __init__(self, scanner=None):
+        self.scanner = scanner or get_scanner()
+        self.buf = None
+        self.pos = 0
+
+    def input(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.buf = self.scanner.scan_buffer(data)
+        self.pos = 0
+
+    def input_file(self, path):
+        self.buf = self.scanner.scan_file(path)
+        self.pos = 0
+
+    def rewind(self):
+        """Hand out the tokens again from the first, without rescanning."""
+        self.pos = 0
+
+    def token(self):
+        pos = self.pos
+        if pos >= len(self.buf.types):
+            return None
+        self.pos = pos + 1
+        return tokbuf.BufferToken(self.buf, pos, self)
+
+    @property
+    def lexdata(self):
+        return self.buf.source
+
+    @property
+    def line_index(self):
+        return self.buf.line_index
+
+    @property
+    def lineno(self):
+        if self.pos == 0:
+            return 1
+        return self.buf.lineno(self.pos - 1)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        tok = self.token()
+        if tok is None:
+            raise StopIteration
+        return tok
+
+
+_scanner = None
+
+
+def get_scanner():
+    global _scanner
+    if _scanner is None:
+        _scanner = Scanner(profile=default_profile())
+    return _scanner
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--profile']:
+        texts = []
+        for path in sys.argv[2:]:
+            with open(path) as f:
+                texts.append(f.read())
+        emit_profile(measure(texts), sys.argv[2:])
+    elif len(sys.argv) > 1:
+        # Files are memory-mapped rather than read into a string.
+        for path in sys.argv[1:]:
+            buf = get_scanner().scan_file(path)
+            for i in range(len(buf)):
+                lineno, column = buf.position(i)
+                print("(%s,%r,%d,%d)" % (buf.type(i), buf.text(i), lineno, column))
+            buf.close()
+    else:
+        data = sys.stdin.read()
+        index = lineindex.LineIndex(data)
+        for tok_type, value, lexpos in get_scanner().scan(data):
+            lineno, column = index.position(lexpos)
+            print("(%s,%r,%d,%d)" % (tok_type, value, lineno, column))
@@ -0,0 +1,64 @@
+# ----------------------------------------------------------------------
+# scanprofile.py
+#
+# Token frequencies for scanner.Scanner, generated by
+#
+#   python src/scanner.py --profile test/mandatory_example.c
+# ----------------------------------------------------------------------
+
+RULES = {
+    'ignore': 83,
+    't_ID': 56,
+    't_SEMI_COLON': 17,
+    't_ASSIGN': 9,
+    't_ICONST': 9,
+    't_LPAREN': 8,
+    't_RPAREN': 8,
+    't_COMMA': 7,
+    't_LBRACE': 5,
+    't_RBRACE': 5,
+    't_LBRACKET': 4,
+    't_RBRACKET': 4,
+    't_PLUS': 3,
+    't_ASTERISK': 2,
+    't_INCREMENT': 2,
+    't_LT': 2,
+    't_DIV': 1,
+    't_GT': 1,
+    't_STR_LITER': 1,
+    't_ignore_comment': 1,
+}
+
+CHARS = {
+    ' ': 54,
+    '\n': 29,
+    'i': 21,
+    ';': 17,
+    '=': 9,
+    '(': 8,
+    ')': 8,
+    ',': 7,
+    'a': 6,
+    'c': 6,
+    '+': 5,
+    'm': 5,
+    's': 5,
+    't': 5,
+    '{': 5,
+    '}': 5,
+    '0': 4,
+    '[': 4,
+    ']': 4,
+    '4': 3,
+    'f': 3,
+    'v': 3,
+    '*': 2,
+    '/': 2,
+    '<': 2,
+    '"': 1,
+    '1': 1,
+    '3': 1,
+    '>': 1,
+    'p': 1,
+    'r': 1,
+}
@@ -0,0 +1,624 @@
+# ----------------------------------------------------------------------
+# semantic_analyzer.py
+#
+# Static and type checking of the tree built by syntax_analyzer, in a
+# single pass:
+#
+#   - every identifier is declared once per scope and before it is used
+#     (with symtab.SymTab);
+#   - break is inside a loop or switch, and continue inside a loop;
+#   - the operands of operators, assignments, calls and returns have
+#     compatible types.
+#
+# The type of every expression is computed once and kept on the node as
+# n.ctype (see node.Expression).  Where an operand has to be converted
+# to another arithmetic type, the conversion is inserted in place: the
+# field of the parent that held the operand is made to hold a node.Cast
+# of it, and nothing else of the tree is rebuilt.
+#
+# Errors are printed as "line: message".  An undeclared name is typed
+# typetab.ERROR, which the checks of the expressions built on it accept
+# silently, so each mistake is reported once.  The time spent in each
+# function definition is kept in Analyzer.function_times;
+#
+#   python src/semantic_analyzer.py [--slowest N] FILE...
+#
+# checks the files and lists the functions that took longest.
+# ----------------------------------------------------------------------
+
+import sys
+import time
+
+import atoms
+import node
+import symtab
+import typetab
+from typetab import VOID, CHAR, INT, FLOAT, DOUBLE, ERROR
+
+
+ARITHMETIC_OPS = frozenset(('+', '-', '*', '/'))
+INTEGER_OPS = frozenset(('%', '<<', '>>', '&', '|', '^'))
+RELATIONAL_OPS = frozenset(('<', '>', '<=', '>=', '==', '!='))
+LOGICAL_OPS = frozenset(('&&', '||'))
+
+CONSTANT_TYPES = {'int': INT, 'char': CHAR, 'float': FLOAT, 'double': DOUBLE,
+                  'string': typetab.pointer(CHAR)}
+
+# Functions every program may call without declaring them.
+BUILTINS = (
+    ('printf', typetab.function(INT, (typetab.pointer(CHAR),), varargs=True)),
+)
+
+
+def print_error(lineno, msg):
+    print('%s: %s' % (lineno, msg))
+
+
+def implicit_cast(expr, t):
+    """Return a Cast of expr to t, already typed."""
+    cast = node.Cast(typetab.to_typename(t, expr.lineno), expr, expr.lineno)
+    cast.ctype = t
+    return cast
+
+
+def is_null(expr):
+    return isinstance(expr, node.Constant) and expr.type == 'int' and \
+        typetab.constant_value(expr) == 0
+
+
+def is_lvalue(expr):
+    return isinstance(expr, (node.ID, node.ArrayRef)) or \
+        (isinstance(expr, node.UnaryOp) and expr.op == '*')
+
+
+def _get(holder, key):
+    # key is a field name of a node or an index into a list of nodes.
+    return holder[key] if type(key) is int else getattr(holder, key)
+
+
+def _set(holder, key, value):
+    if type(key) is int:
+        holder[key] = value
+    else:
+        setattr(holder, key, value)
+
+
+class Analyzer:
+    """One pass of static and type checking over a TranslationUnit.
+
+    errors counts the errors reported through errorf(lineno, msg), symtab
+    is the symbol table (its global block stays open after the pass), and
+    function_times lists (name, lineno, seconds) for every function
+    definition.
+    """
+
+    def __init__(self, errorf=print_error):
+        self.errorf = errorf
+        self.errors = 0
+        self.symtab = symtab.SymTab()
+        self.function_times = []
+        # Return type of the function being analyzed.
+        self.returns = None
+        self.loops = 0
+        self.switches = 0
+        # Last line seen; a block closes at its brace or, if that line is
+        # not known, here.
+        self.last_line = 0
+        self._dispatch = {}
+        for name, t in BUILTINS:
+            self.symtab.insert(symtab.SymTabEntry(atoms.intern(name), t, True))
+
+    def error(self, lineno, msg):
+        self.errors += 1
+        self.errorf(lineno, msg)
+
+    def scopes(self):
+        """Return the symtab.ScopeIndex of the program."""
+        return self.symtab.snapshot()
+
+    def visit(self, n):
+        method = self._dispatch.get(type(n))
+        if method is None:
+            method = self._dispatch[type(n)] = getattr(self, 'visit_' + type(n).__name__)
+        return method(n)
+
+    # Types of expressions
+
+    def typeof(self, n):
+        """Return the type of expression n, computing it the first time."""
+        try:
+            return n.ctype
+        except AttributeError:
+            pass
+        t = n.ctype = self.visit(n)
+        return t
+
+    def operand(self, holder, key):
+        """The type of the expression in holder[key] used as a value."""
+        return typetab.decay(self.typeof(_get(holder, key)))
+
+    def convert(self, holder, key, t):
+        """Convert the arithmetic operand in holder[key] to t."""
+        expr = _get(holder, key)
+        if typetab.decay(expr.ctype) is not t:
+            _set(holder, key, implicit_cast(expr, t))
+
+    def assign(self, holder, key, target, lineno, what):
+        """Check and convert the value in holder[key] for storing in an
+        object of type target."""
+        t = self.operand(holder, key)
+        if target.is_arithmetic() and t.is_arithmetic():
+            self.convert(holder, key, target)
+        elif target is t or t is ERROR or target is ERROR:
+            pass
+        elif target.is_pointer() and (is_null(_get(holder, key)) or t.is_pointer() and
+                                      (target.of is VOID or t.of is VOID)):
+            pass
+        else:
+            self.error(lineno, "incompatible types in %s ('%s' from '%s')" % (what, target, t))
+
+    def condition(self, holder, key):
+        t = self.operand(holder, key)
+        if not t.is_scalar() and t is not ERROR:
+            self.error(_get(holder, key).lineno,
+                       "used '%s' where a scalar is required" % t)
+
+    def visit_ID(self, n):
+        try:
+            return self.symtab.get(n.name).type
+        except symtab.UndefIdError as e:
+            self.error(n.lineno, e.msg)
+            return ERROR
+
+    def visit_Constant(self, n):
+        if n.type == 'char':
+            try:
+                typetab.constant_value(n)
+            except ValueError as e:
+                self.error(n.lineno, str(e))
+        return CONSTANT_TYPES[n.type]
+
+    def visit_ExprList(self, n):
+        # The comma operator.
+        t = VOID
+        for i in range(len(n.exprs)):
+            t = self.operand(n.exprs, i)
+        return t
+
+    def visit_Assignment(self, n):
+        lt = self.typeof(n.lvalue)
+        if lt is ERROR:
+            self.typeof(n.rvalue)
+            return lt
+        if not is_lvalue(n.lvalue) or lt.kind in ('array', 'function'):
+            self.error(n.lineno, 'lvalue required as left operand of assignment')
+            self.typeof(n.rvalue)
+            return lt
+        if n.op == '=':
+            self.assign(n, 'rvalue', lt, n.lineno, 'assignment')
+            return lt
+        # Compound assignment: the operation is done in the common type
+        # of both sides and its result converted back to lt.
+        op = n.op[:-1]
+        rt = self.operand(n, 'rvalue')
+        if rt is ERROR:
+            return lt
+        if lt.is_arithmetic() and rt.is_arithmetic() and \
+                (op in ARITHMETIC_OPS or lt.is_integer() and rt.is_integer()):
+            if op in ('<<', '>>'):
+                self.convert(n, 'rvalue', typetab.common(rt, rt))
+            else:
+                self.convert(n, 'rvalue', typetab.common(lt, rt))
+        elif op in ('+', '-') and lt.is_pointer() and rt.is_integer():
+            self.convert(n, 'rvalue', INT)
+        else:
+            self.error(n.lineno, "invalid operands to %s (have '%s' and '%s')" % (n.op, lt, rt))
+        return lt
+
+    def visit_TernaryOp(self, n):
+        self.condition(n, 'cond')
+        a = self.operand(n, 'iftrue')
+        b = self.operand(n, 'iffalse')
+        if a is ERROR or b is ERROR:
+            return ERROR
+        if a.is_arithmetic() and b.is_arithmetic():
+            t = typetab.common(a, b)
+            self.convert(n, 'iftrue', t)
+            self.convert(n, 'iffalse', t)
+            return t
+        if a is b:
+            return a
+        if a.is_pointer() and is_null(n.iffalse):
+            return a
+        if b.is_pointer() and is_null(n.iftrue):
+            return b
+        self.error(n.lineno, "type mismatch in conditional expression ('%s' and '%s')" % (a, b))
+        return a
+
+    def visit_BinOp(self, n):
+        op = n.op
+        lt = self.operand(n, 'left')
+        rt = self.operand(n, 'right')
+        if lt is ERROR or rt is ERROR:
+            return ERROR
+        if op in LOGICAL_OPS:
+            if not (lt.is_scalar() and rt.is_scalar()):
+                self.error(n.lineno, "invalid operands to binary %s (have '%s' and '%s')" % (op, lt, rt))
+            return INT
+        if lt.is_arithmetic() and rt.is_arithmetic():
+            if op in INTEGER_OPS:
+                if not (lt.is_integer() and rt.is_integer()):
+                    self.error(n.lineno, "invalid operands to binary %s (have '%s' and '%s')" % (op, lt, rt))
+                    return INT
+                if op in ('<<', '>>'):
+                    # Each operand is promoted on its own.
+                    t = typetab.common(lt, lt)
+                    self.convert(n, 'left', t)
+                    self.convert(n, 'right', typetab.common(rt, rt))
+                    return t
+            t = typetab.common(lt, rt)
+            self.convert(n, 'left', t)
+            self.convert(n, 'right', t)
+            return INT if op in RELATIONAL_OPS else t
+        if op in ('+', '-') and lt.is_pointer() and rt.is_integer():
+            self.convert(n, 'right', INT)
+            return lt
+        if op == '+' and lt.is_integer() and rt.is_pointer():
+            self.convert(n, 'left', INT)
+            return rt
+        if op == '-' and lt.is_pointer() and lt is rt:
+            return INT
+        if op in RELATIONAL_OPS and (lt.is_pointer() or rt.is_pointer()):
+            if lt is rt or lt.is_pointer() and is_null(n.right) or \
+                    rt.is_pointer() and is_null(n.left):
+                return INT
+        self.error(n.lineno, "invalid operands to binary %s (have '%s' and '%s')" % (op, lt, rt))
+        return INT
+
+    def visit_UnaryOp(self, n):
+        op = n.op
+        if op == 'sizeof':
+            if isinstance(n.expr, node.Typename):
+                self.declared_type(n.expr)
+            else:
+                self.typeof(n.expr)
+            return INT
+        if op == '&':
+            t = self.typeof(n.expr)
+            if t is ERROR:
+                return t
+            if not is_lvalue(n.expr) and t.kind != 'function':
+                self.error(n.lineno, "lvalue required as unary '&' operand")
+            return typetab.pointer(t)
+        t = self.operand(n, 'expr')
+        if t is ERROR:
+            return t
+        if op == '*':
+            if not t.is_pointer() or t.of is VOID:
+                self.error(n.lineno, "invalid type argument of unary '*' (have '%s')" % t)
+                return INT
+            return t.of
+        if op in ('++', '--', 'p++', 'p--'):
+            if not is_lvalue(n.expr):
+                self.error(n.lineno, 'lvalue required as %s operand' % (
+                    'increment' if '+' in op else 'decrement'))
+            elif not t.is_scalar():
+                self.error(n.lineno, "wrong type argument to %s (have '%s')" % (
+                    'increment' if '+' in op else 'decrement', t))
+            return t
+        if op == '!':
+            if not t.is_scalar():
+                self.error(n.lineno, "wrong type argument to unary ! (have '%s')" % t)
+            return INT
+        if op in ('-', '+') and t.is_arithmetic() or op == '~' and t.is_integer():
+            t = typetab.common(t, t)
+            self.convert(n, 'expr', t)
+            return t
+        self.error(n.lineno, "wrong type argument to unary %s (have '%s')" % (op, t))
+        return INT
+
+    def visit_Cast(self, n):
+        t = self.declared_type(n.to_type)
+        s = self.operand(n, 'expr')
+        if t is VOID or s is ERROR:
+            return t
+        if not (t.is_scalar() and s.is_scalar()) or \
+                t.is_pointer() and s.kind in ('float', 'double') or \
+                s.is_pointer() and t.kind in ('float', 'double'):
+            self.error(n.lineno, "cannot convert '%s' to '%s'" % (s, t))
+        return t
+
+    def visit_Call(self, n):
+        ft = self.operand(n, 'name')
+        args = n.args.exprs if n.args is not None else []
+        if ft is ERROR:
+            for i in range(len(args)):
+                self.operand(args, i)
+            return ft
+        if not (ft.is_pointer() and ft.of.kind == 'function'):
+            self.error(n.lineno, 'called object is not a function')
+            for i in range(len(args)):
+                self.operand(args, i)
+            return INT
+        ft = ft.of
+        name = n.name.name if isinstance(n.name, node.ID) else 'function'
+        params = ft.params
+        if len(args) < len(params):
+            self.error(n.lineno, "too few arguments to function '%s'" % name)
+        elif len(args) > len(params) and not ft.varargs:
+            self.error(n.lineno, "too many arguments to function '%s'" % name)
+        for i in range(len(args)):
+            if i < len(params):
+                self.assign(args, i, params[i], n.lineno, "argument %d of '%s'" % (i + 1, name))
+                continue
+            # Default argument promotions.
+            t = self.operand(args, i)
+            if t is FLOAT:
+                self.convert(args, i, DOUBLE)
+            elif t is CHAR:
+                self.convert(args, i, INT)
+        return ft.of
+
+    def visit_ArrayRef(self, n):
+        at = self.operand(n, 'name')
+        it = self.operand(n, 'subscript')
+        if at is ERROR:
+            return at
+        if not at.is_pointer() or at.of is VOID:
+            self.error(n.lineno, 'subscripted value is neither array nor pointer')
+            return INT
+        if it is ERROR:
+            pass
+        elif not it.is_integer():
+            self.error(n.lineno, 'array subscript is not an integer')
+        else:
+            self.convert(n, 'subscript', INT)
+        return at.of
+
+    def visit_StructRef(self, n):
+        self.error(n.lineno, 'struct is not supported in mini-C')
+        return INT
+
+    # Declarations
+
+    def declared_type(self, decl):
+        """The type of a declarator chain, or INT after reporting why it
+        has none."""
+        try:
+            return typetab.from_decl(decl)
+        except typetab.UnsupportedTypeError as e:
+            self.error(e.lineno or decl.lineno, e.msg)
+            return INT
+
+    def declare(self, name, t, lineno, defined=False):
+        try:
+            self.symtab.insert(symtab.SymTabEntry(name, t, defined, lineno))
+        except symtab.DupDeclError as e:
+            prev = self.symtab.cur.table[name]
+            if t.kind == 'function' and prev.type is t and not (defined and prev.assigned):
+                prev.assigned = prev.assigned or defined
+            elif t.kind == 'function' and prev.type is t:
+                self.error(lineno, "redefinition of '%s'" % name)
+            else:
+                self.error(lineno, e.msg)
+
+    def initialize(self, holder, key, t, lineno):
+        """Check the initializer in holder[key] for an object of type t;
+        return t, with the length of an unsized array filled in."""
+        init = _get(holder, key)
+        if isinstance(init, node.InitList):
+            if t.kind != 'array':
+                if len(init.exprs) != 1:
+                    self.error(lineno, "invalid initializer for '%s'" % t)
+                    return t
+                self.initialize(init.exprs, 0, t, lineno)
+                return t
+            for i in range(len(init.exprs)):
+                self.initialize(init.exprs, i, t.of, lineno)
+            if t.length is None:
+                return typetab.array(t.of, len(init.exprs))
+            if len(init.exprs) > t.length:
+                self.error(lineno, 'excess elements in array initializer')
+            return t
+        if t.kind == 'array':
+            if not (t.of is CHAR and isinstance(init, node.Constant) and init.type == 'string'):
+                self.error(lineno, "invalid initializer for '%s'" % t)
+                return t
+            self.typeof(init)
+            if t.length is None:
+                return typetab.array(CHAR, len(typetab.constant_value(init)) + 1)
+            return t
+        self.assign(holder, key, t, lineno, 'initialization')
+        return t
+
+    def visit_Decl(self, n):
+        t = self.declared_type(n.type)
+        if n.name is None:
+            return
+        if t is VOID:
+            self.error(n.lineno, "variable '%s' declared void" % n.name)
+        if n.init is not None:
+            t = self.initialize(n, 'init', t, n.lineno)
+        self.declare(n.name, t, n.lineno, n.init is not None)
+
+    def visit_FunctionDef(self, n):
+        start = time.perf_counter()
+        decl = n.decl
+        func = decl.type
+        while not isinstance(func, node.FuncDecl):
+            func = func.type
+        ft = self.declared_type(decl.type)
+        if ft.kind != 'function':
+            ft = typetab.function(INT)
+        self.declare(decl.name, ft, decl.lineno, True)
+        if n.param_decls:
+            self.error(n.lineno, 'old-style parameter declarations are not supported in mini-C')
+
+        # The parameters and the outermost block of the body are one scope.
+        self.symtab.insert_block_table(symtab.SymTabBlock(start=n.lineno))
+        self.last_line = n.lineno
+        if func.args is not None and ft.params:
+            params = [p for p in func.args.params if not isinstance(p, node.EllipsisParam)]
+            for param, t in zip(params, ft.params):
+                if param.name is None:
+                    self.error(param.lineno, 'parameter name omitted')
+                else:
+                    self.declare(param.name, t, param.lineno, True)
+        self.returns = ft.of
+        for item in n.body.items:
+            self.statement(item)
+        self.returns = None
+        self.close_block(n.body)
+        self.function_times.append((decl.name, n.lineno, time.perf_counter() - start))
+
+    def visit_TranslationUnit(self, n):
+        for ext in n.ext:
+            self.visit(ext)
+
+    # Statements
+
+    def statement(self, n):
+        if n.lineno is not None and n.lineno > self.last_line:
+            self.last_line = n.lineno
+        if isinstance(n, node.Expression):
+            self.typeof(n)
+        else:
+            self.visit(n)
+
+    def visit_Compound(self, n):
+        self.symtab.insert_block_table(symtab.SymTabBlock(start=n.lineno))
+        for item in n.items:
+            self.statement(item)
+        self.close_block(n)
+
+    def close_block(self, n):
+        """Leave the block of Compound n at its closing brace."""
+        if n.end_lineno is not None and n.end_lineno > self.last_line:
+            self.last_line = n.end_lineno
+        self.symtab.remove_block_table(self.last_line)
+
+    def visit_EmptyStatement(self, n):
+        pass
+
+    def visit_If(self, n):
+        self.condition(n, 'cond')
+        self.statement(n.iftrue)
+        if n.iffalse is not None:
+            self.statement(n.iffalse)
+
+    def loop(self, body):
+        self.loops += 1
+        self.statement(body)
+        self.loops -= 1
+
+    def visit_While(self, n):
+        self.condition(n, 'cond')
+        self.loop(n.stmt)
+
+    def visit_DoWhile(self, n):
+        self.loop(n.stmt)
+        self.condition(n, 'cond')
+
+    def visit_For(self, n):
+        if n.init is not None:
+            self.typeof(n.init)
+        if n.cond is not None:
+            self.condition(n, 'cond')
+        if n.next is not None:
+            self.typeof(n.next)
+        self.loop(n.stmt)
+
+    def visit_Switch(self, n):
+        t = self.operand(n, 'cond')
+        if t is ERROR:
+            pass
+        elif not t.is_integer():
+            self.error(n.lineno, 'switch quantity not an integer')
+        else:
+            self.convert(n, 'cond', INT)
+        self.switches += 1
+        self.statement(n.stmt)
+        self.switches -= 1
+
+    def visit_Case(self, n):
+        if not self.switches:
+            self.error(n.lineno, "case label not within a switch statement")
+        t = self.operand(n, 'expr')
+        if not t.is_integer() and t is not ERROR:
+            self.error(n.lineno, 'case label does not reduce to an integer constant')
+        self.statement(n.stmt)
+
+    def visit_Default(self, n):
+        if not self.switches:
+            self.error(n.lineno, "'default' label not within a switch statement")
+        self.statement(n.stmt)
+
+    def visit_Label(self, n):
+        self.statement(n.stmt)
+
+    def visit_Goto(self, n):
+        pass
+
+    def visit_Break(self, n):
+        if not (self.loops or self.switches):
+            self.error(n.lineno, 'break statement not within loop or switch')
+
+    def visit_Continue(self, n):
+        if not self.loops:
+            self.error(n.lineno, 'continue statement not within a loop')
+
+    def visit_Return(self, n):
+        if n.expr is None:
+            return
+        if self.returns is VOID:
+            self.error(n.lineno, "'return' with a value, in function returning void")
+            self.typeof(n.expr)
+        else:
+            self.assign(n, 'expr', self.returns, n.lineno, 'return')
+
+
+def analyze(ast, errorf=print_error):
+    """Check a TranslationUnit, typing and converting it in place, and
+    return the Analyzer (errors, symtab, function_times)."""
+    analyzer = Analyzer(errorf)
+    try:
+        analyzer.visit(ast)
+    except RecursionError:
+        analyzer.error(analyzer.last_line, 'code nested too deeply')
+    return analyzer
+
+
+def main(argv):
+    import argparse
+    import scanner
+    import syntax_analyzer
+
+    ap = argparse.ArgumentParser(prog='semantic_analyzer')
+    ap.add_argument('files', nargs='+', metavar='FILE')
+    ap.add_argument('--slowest', type=int, default=10, metavar='N',
+                    help='list the N functions that took longest (default: 10)')
+    args = ap.parse_args(argv)
+
+    status = 0
+    times = []
+    for path in args.files:
+        lexer = scanner.BufferLexer()
+        lexer.input_file(path)
+        ast = syntax_analyzer.parse(None, lexer=lexer)
+        lexer.buf.close()
+        if ast is None:
+            status = 1
+            continue
+        analyzer = analyze(ast, lambda lineno, msg: print('%s:%s: %s' % (path, lineno, msg)))
+        if analyzer.errors:
+            status = 1
+        times.extend((seconds, path, lineno, name) for name, lineno, seconds in analyzer.function_times)
+
+    times.sort(reverse=True)
+    for seconds, path, lineno, name in times[:args.slowest]:
+        sys.stderr.write('%10.3f ms  %s:%s: %s\n' % (seconds * 1e3, path, lineno, name))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,456 @@
+# ----------------------------------------------------------------------
+# ssa.py
+#
+# Static single assignment form of a tac.Function, for the optimizer.
+#
+# The variables put in SSA form are the temporaries and the scalar locals
+# whose address is never taken; globals, arrays and boxed locals stay in
+# memory and are left alone.  Every definition of such a variable gets a
+# fresh operand id, a version (shown as t12 or name_3); the original id
+# stands for the value on entry to the function (a parameter's
+# argument).  Phis are placed at the iterated dominance frontiers of the
+# definitions, for the variables that are live across blocks only
+# (semi-pruned form), and renaming walks the dominator tree.
+#
+# The SSA form keeps the function's columnar code, with operands renamed
+# in place; phis are kept beside it, per block.  Passes delete an
+# instruction by turning it into a NOP and an edge by dropping it from
+# edges; code they move out of a block goes on an edge.  to_tac() leaves
+# SSA form: each phi becomes a copy on its incoming edges (a parallel
+# copy per edge, critical edges split) and the code is laid out again
+# without the deleted instructions, blocks, and labels nothing jumps to.
+# ----------------------------------------------------------------------
+
+from array import array
+
+import atoms
+import cfg
+import tac
+
+
+class Phi:
+    """dst = phi(args): args[k] comes from the k-th predecessor of the block."""
+
+    __slots__ = ('dst', 'var', 'args')
+
+    def __init__(self, dst, var, args):
+        self.dst = dst
+        self.var = var
+        self.args = args
+
+
+class SSA:
+    """The SSA form of a tac.Function (symbols is its program's)."""
+
+    def __init__(self, function, symbols):
+        self.function = function
+        self.symbols = symbols
+        code = function.code
+        self.code = tac.Quads()
+        if len(code) and code.op[0] == tac.LABEL:
+            # Keep the entry block free of predecessors (a loop at the
+            # top of the body), so it needs no phis.
+            self.code.emit(tac.NOP, line=code.line[0])
+        for column in tac.Quads.__slots__:
+            getattr(self.code, column).extend(getattr(code, column))
+        function.code = self.code
+        try:
+            self.graph = graph = cfg.CFG(function)
+        finally:
+            function.code = code
+        self.phis = [[] for _ in range(len(graph))]
+        # Edges between reachable blocks; passes drop the ones that are
+        # never taken.
+        self.edges = set((b, s) for b in graph.order for s in graph.succs[b])
+        self.reachable = set(graph.order)
+        # (pred, succ) -> instructions (op, a, b, c) that passes moved to
+        # the edge, run before its phi copies.
+        self.edge_code = {}
+        # Version -> the variable it is a version of.
+        self.origin = {}
+        self.variables = self._variables()
+        self._place_phis()
+        self._rename()
+
+    def is_value(self, sid):
+        """Whether operand sid is an SSA value (a version or an entry value)."""
+        return sid in self.origin or sid in self.variables
+
+    def _variables(self):
+        symbols = self.symbols
+        kind, types = symbols.kind, symbols.type
+        code = self.code
+        taken = set()
+        candidates = set()
+        for i in range(len(code)):
+            op = code.op[i]
+            if op == tac.ADDR:
+                taken.add(code.b[i])
+            if op in tac.DEF_A and code.a[i]:
+                candidates.add(code.a[i])
+        candidates.update(self.function.params)
+        return set(sid for sid in candidates
+                   if kind[sid] in (tac.TEMP, tac.VAR) and sid not in taken and
+                   types[sid].kind != 'array')
+
+    def _place_phis(self):
+        graph = self.graph
+        code = self.code
+        variables = self.variables
+        defs = {}
+        # Variables read in some block before they are set in it.
+        nonlocal_ = set()
+        for b in graph.order:
+            killed = set()
+            for i in graph.instructions(b):
+                op = code.op[i]
+                for used in self.uses(i):
+                    if used in variables and used not in killed:
+                        nonlocal_.add(used)
+                if op in tac.DEF_A and code.a[i] in variables:
+                    killed.add(code.a[i])
+                    defs.setdefault(code.a[i], set()).add(b)
+        frontiers = graph.frontiers()
+        for var in nonlocal_:
+            blocks = defs.get(var, set()) | {0}
+            work = list(blocks)
+            placed = set()
+            while work:
+                b = work.pop()
+                for y in frontiers[b]:
+                    if y not in placed:
+                        placed.add(y)
+                        self.phis[y].append(Phi(var, var, [var] * len(graph.preds[y])))
+                        if y not in blocks:
+                            blocks.add(y)
+                            work.append(y)
+
+    def uses(self, i):
+        """The operands instruction i reads."""
+        return _uses(self.code, i)
+
+    def temp(self, t):
+        """A new SSA value of type t, for the passes."""
+        f = self.function
+        f.ntemps += 1
+        sid = self.symbols.add(tac.TEMP, t, f.ntemps)
+        self.origin[sid] = sid
+        return sid
+
+    def version(self, var):
+        symbols = self.symbols
+        f = self.function
+        if symbols.kind[var] == tac.TEMP:
+            f.ntemps += 1
+            sid = symbols.add(tac.TEMP, symbols.type[var], f.ntemps)
+        else:
+            f.ntemps += 1
+            name = atoms.intern('%s_%d' % (symbols.value[var], f.ntemps))
+            sid = symbols.add(tac.VAR, symbols.type[var], name)
+        self.origin[sid] = var
+        return sid
+
+    def _rename(self):
+        graph = self.graph
+        code = self.code
+        variables = self.variables
+        stacks = dict((var, [var]) for var in variables)
+        work = [(0, None)] if len(graph) else []
+        while work:
+            b, pushed = work.pop()
+            if pushed is not None:
+                for var in pushed:
+                    stacks[var].pop()
+                continue
+            pushed = []
+            for phi in self.phis[b]:
+                phi.dst = self.version(phi.var)
+                stacks[phi.var].append(phi.dst)
+                pushed.append(phi.var)
+            for i in graph.instructions(b):
+                op = code.op[i]
+                if op in tac.USE_A and code.a[i] in variables:
+                    code.a[i] = stacks[code.a[i]][-1]
+                if op in tac.USE_B and code.b[i] in variables:
+                    code.b[i] = stacks[code.b[i]][-1]
+                if op in tac.USE_C and code.c[i] in variables:
+                    code.c[i] = stacks[code.c[i]][-1]
+                if op in tac.DEF_A and code.a[i] in variables:
+                    var = code.a[i]
+                    code.a[i] = self.version(var)
+                    stacks[var].append(code.a[i])
+                    pushed.append(var)
+            for s in graph.succs[b]:
+                k = graph.preds[s].index(b)
+                for phi in self.phis[s]:
+                    phi.args[k] = stacks[phi.var][-1]
+            work.append((b, pushed))
+            for child in reversed(graph.children[b]):
+                work.append((child, None))
+
+    # Leaving SSA form
+
+    def to_tac(self):
+        """Replace the function's code with the code of the SSA form."""
+        graph = self.graph
+        code = self.code
+        out = tac.Quads()
+        # Split branch edges, whose copies go in a block of their own at
+        # the end: (label, pred, succ, branch target, line).
+        tails = []
+        for b in range(len(graph)):
+            if b not in self.reachable:
+                continue
+            succs = [s for s in graph.succs[b] if (b, s) in self.edges]
+            last = None
+            for i in graph.instructions(b):
+                if code.op[i] != tac.NOP:
+                    last = i
+            branch = last is not None and code.op[last] in cfg.BRANCHES
+            for i in graph.instructions(b):
+                if code.op[i] == tac.NOP or i == last and branch:
+                    continue
+                out.emit(code.op[i], code.a[i], code.b[i], code.c[i], code.line[i])
+            line = code.line[last] if last is not None else 0
+            fall = b + 1 if (b, b + 1) in self.edges else None
+            if len(succs) == 1:
+                self._copies(out, b, succs[0], line)
+                if branch:
+                    out.emit(code.op[last], code.a[last], code.b[last], code.c[last], line)
+                continue
+            if branch:
+                target = code.a[last]
+                jumped = [s for s in succs if s != fall]
+                if jumped and ((b, jumped[0]) in self.edge_code or self._phi_copies(jumped[0], b)):
+                    label = self._label()
+                    tails.append((label, b, jumped[0], target, line))
+                    target = label
+                out.emit(code.op[last], target, code.b[last], code.c[last], line)
+            if fall is not None:
+                self._copies(out, b, fall, line)
+        for label, b, s, target, line in tails:
+            out.emit(tac.LABEL, label, line=line)
+            self._copies(out, b, s, line)
+            out.emit(tac.JUMP, target, line=line)
+        self.function.code = cleanup(out)
+        self._coalesce()
+
+    def _coalesce(self):
+        # Give the two sides of a copy one name where their live ranges
+        # do not overlap, and drop the copy: most of the phi copies go,
+        # i = i + 1 is left of t = i + 1; i = t, and a loop branches
+        # straight back to its header.
+        f = self.function
+        code = f.code
+        values = set(self.origin)
+        for i in range(len(code)):
+            values.update(v for v in _uses(code, i) if v in self.variables)
+        values.update(f.params)
+        adjacent = interference(f, values)
+        kind, types = self.symbols.kind, self.symbols.type
+        entry = self.variables
+        rep = {}
+
+        def find(sid):
+            while sid in rep:
+                sid = rep[sid]
+            return sid
+
+        op, a, b = code.op, code.a, code.b
+        merged = False
+        for i in range(len(code)):
+            if op[i] != tac.COPY or a[i] not in values or b[i] not in values:
+                continue
+            x, y = find(a[i]), find(b[i])
+            if x == y or types[x] is not types[y] or y in adjacent[x]:
+                continue
+            if x in entry:
+                if y in entry:
+                    # Two arguments (or uninitialized variables): both
+                    # are set on entry.
+                    continue
+                x, y = y, x
+            elif y not in entry and kind[x] == tac.VAR and kind[y] == tac.TEMP:
+                x, y = y, x
+            # x joins y: an entry value keeps its name, and so does a
+            # variable merged with a temporary.
+            rep[x] = y
+            for z in adjacent.pop(x):
+                adjacent[z].discard(x)
+                adjacent[z].add(y)
+                adjacent[y].add(z)
+            merged = True
+        if not merged:
+            return
+        c = code.c
+        for i in range(len(code)):
+            o = op[i]
+            if o in tac.DEF_A or o in tac.USE_A:
+                a[i] = find(a[i])
+            if o in tac.USE_B:
+                b[i] = find(b[i])
+            if o in tac.USE_C:
+                c[i] = find(c[i])
+            if o == tac.COPY and a[i] == b[i]:
+                op[i] = tac.NOP
+        f.code = cleanup(code)
+
+    def _label(self):
+        f = self.function
+        f.nlabels += 1
+        return self.symbols.add(tac.LABEL_ID, tac.VOID, f.nlabels)
+
+    def _phi_copies(self, s, b):
+        k = self.graph.preds[s].index(b)
+        return [(phi.dst, phi.args[k]) for phi in self.phis[s] if phi.dst != phi.args[k]]
+
+    def _copies(self, out, b, s, line):
+        """Emit the code of edge b -> s and its phi copies, as one parallel
+        copy."""
+        for op, x, y, z in self.edge_code.get((b, s), ()):
+            out.emit(op, x, y, z, line)
+        copies = self._phi_copies(s, b)
+        while copies:
+            sources = set(src for _, src in copies)
+            ready = [c for c in copies if c[0] not in sources]
+            if not ready:
+                # A cycle: save one destination in a temporary first.
+                dst = copies[0][0]
+                temp = self.temp(self.symbols.type[dst])
+                out.emit(tac.COPY, temp, dst, line=line)
+                copies = [(d, temp if src == dst else src) for d, src in copies]
+                continue
+            for dst, src in ready:
+                out.emit(tac.COPY, dst, src, line=line)
+            copies = [c for c in copies if c not in ready]
+
+
+def reads(op, a, b, c):
+    """The operands instruction (op, a, b, c) reads."""
+    used = []
+    if op in tac.USE_A:
+        used.append(a)
+    if op in tac.USE_B and b:
+        used.append(b)
+    if op in tac.USE_C:
+        used.append(c)
+    return used
+
+
+def _uses(code, i):
+    return reads(code.op[i], code.a[i], code.b[i], code.c[i])
+
+
+def interference(function, values):
+    """{value: set of values live where it is set} for the operands in
+    values, over the code of function.  A copy's destination does not
+    interfere with its source."""
+    graph = cfg.CFG(function)
+    code = function.code
+    op, a, b = code.op, code.a, code.b
+    nblocks = len(graph)
+    gen = [set() for _ in range(nblocks)]
+    kill = [set() for _ in range(nblocks)]
+    for blk in graph.order:
+        for i in reversed(graph.instructions(blk)):
+            if op[i] in tac.DEF_A and a[i] in values:
+                gen[blk].discard(a[i])
+                kill[blk].add(a[i])
+            gen[blk].update(v for v in _uses(code, i) if v in values)
+    live_in = [set() for _ in range(nblocks)]
+    changed = True
+    while changed:
+        changed = False
+        for blk in reversed(graph.order):
+            out = set()
+            for s in graph.succs[blk]:
+                out |= live_in[s]
+            new = gen[blk] | (out - kill[blk])
+            if new != live_in[blk]:
+                live_in[blk] = new
+                changed = True
+    adjacent = dict((v, set()) for v in values)
+    for blk in graph.order:
+        live = set()
+        for s in graph.succs[blk]:
+            live |= live_in[s]
+        for i in reversed(graph.instructions(blk)):
+            if op[i] in tac.DEF_A and a[i] in values:
+                d = a[i]
+                for v in live:
+                    if v != d and not (op[i] == tac.COPY and v == b[i]):
+                        adjacent[d].add(v)
+                        adjacent[v].add(d)
+                live.discard(d)
+            live.update(v for v in _uses(code, i) if v in values)
+    # The arguments are all set at once, on entry.
+    if nblocks:
+        entry = live_in[0] | set(function.params)
+        for v in entry:
+            adjacent[v].update(entry)
+            adjacent[v].discard(v)
+    return adjacent
+
+
+def cleanup(code):
+    """Lay out code again without NOPs, jumps to the next instruction or
+    to a jump, code after a jump that no label makes reachable, and labels
+    no jump targets."""
+    op, a = code.op, code.a
+    n = len(code)
+    # Label -> index of the first instruction after it.
+    place = {}
+    for i in range(n - 1, -1, -1):
+        if op[i] == tac.LABEL:
+            place[a[i]] = place.get(a[i + 1], i + 1) if i + 1 < n and op[i + 1] == tac.LABEL else i + 1
+    a = array('i', a)
+
+    def destination(label):
+        seen = set()
+        while label not in seen:
+            seen.add(label)
+            i = place.get(label, n)
+            while i < n and op[i] == tac.NOP:
+                i += 1
+            if i >= n or op[i] != tac.JUMP:
+                break
+            label = a[i]
+        return label
+
+    for i in range(n):
+        if op[i] in (tac.JUMP, tac.JZ, tac.JNZ):
+            a[i] = destination(a[i])
+    keep = bytearray(op[i] != tac.NOP for i in range(n))
+    changed = True
+    while changed:
+        changed = False
+        targets = set(a[i] for i in range(n) if keep[i] and op[i] in (tac.JUMP, tac.JZ, tac.JNZ))
+        reached = True
+        for i in range(n):
+            if op[i] == tac.LABEL:
+                if keep[i] != (a[i] in targets):
+                    keep[i] = a[i] in targets
+                    changed = True
+                reached = reached or keep[i]
+                continue
+            if not keep[i]:
+                continue
+            if not reached:
+                keep[i] = 0
+                changed = True
+                continue
+            if op[i] == tac.JUMP:
+                j = i + 1
+                while j < n and (op[j] == tac.LABEL or not keep[j]):
+                    if op[j] == tac.LABEL and a[j] == a[i]:
+                        keep[i] = 0
+                        changed = True
+                        break
+                    j += 1
+            if keep[i] and op[i] in (tac.JUMP, tac.RET):
+                reached = False
+    out = tac.Quads()
+    for i in range(n):
+        if keep[i]:
+            out.emit(op[i], a[i], code.b[i], code.c[i], code.line[i])
+    return out
@@ -1,3 +1,7 @@
+import sys
+from array import array
+from bisect import bisect_right
+
 SYMTAB_ERROR_DUP_DECL = "redeclaration of '%s' with no linkage"
 SYMTAB_ERROR_UNDEF_ID = "'%s' undeclared"
 
@@ -26,29 +30,50 @@ class UndefIdError(SymTabError):
 
 
 class SymTabEntry:
-    def __init__(self, id, type, assigned=False):
+    """A declared name: its id (an atoms.Atom), its type (a typetab.Type,
+    shared by every entry of that type) and the line it is declared on."""
+
+    __slots__ = ('id', 'type', 'assigned', 'lineno')
+
+    def __init__(self, id, type, assigned=False, lineno=None):
         self.id = id
         self.type = type
         self.assigned = assigned
+        self.lineno = lineno
 
 
 class SymTabBlock:
-    def __init__(self, prev=None, nexts=[]):
+    """The declarations of one scope.
+
+    table maps each id declared in the block to its entry, in order of
+    declaration; SymTab also uses it as the undo log of the scope.  start
+    and end are the source lines the block spans, if known, and number
+    is its position in SymTab.scopes.
+    """
+
+    def __init__(self, prev=None, nexts=None, start=None, end=None):
         self.prev = prev
-        self.nexts = nexts
+        self.nexts = [] if nexts is None else nexts
         self.table = {}
+        self.start = start
+        self.end = end
+        self.number = None
+
+    def freeze(self):
+        parent = self.prev.number if self.prev is not None else None
+        return Scope(self.number, parent, self.start, self.end, tuple(self.table.values()))
 
     def insert(self, symbol):
         if symbol.id in self.table:
-            raise DupDeclError(id, SYMTAB_ERROR_DUP_DECL)
+            raise DupDeclError(symbol.id, SYMTAB_ERROR_DUP_DECL)
         else:
             self.table[symbol.id] = symbol
 
     def remove(self, id):
-        if id not in self.table.keys():
+        if id not in self.table:
             raise UndefIdError(id, SYMTAB_ERROR_UNDEF_ID)
         else:
-            self.table.pop(id)
+            return self.table.pop(id)
 
     def get(self, id):
         try:
@@ -58,31 +83,164 @@ class SymTabBlock:
 
 
 class SymTab:
+    """A scoped symbol table with constant-time lookup.
+
+    Besides the tree of SymTabBlocks, every visible id has a shadow stack
+    in self.visible: its entries from the outermost to the innermost open
+    block that declares it.  get() is a single dict lookup however deep
+    the nesting, and leaving a block pops the stacks of just the ids in
+    its table.
+
+    A block that is left is kept as an immutable Scope in self.scopes;
+    snapshot() indexes them by source line for the debugger.
+    """
+
     def __init__(self):
         global_table = SymTabBlock(None)
+        global_table.number = 0
         self.cur = global_table
+        self.visible = {}
+        # The Scope of every block, by block number; None while it is open.
+        self.scopes = [None]
 
     def insert_block_table(self, block_table):
         self.cur.nexts.append(block_table)
         block_table.prev = self.cur
+        block_table.number = len(self.scopes)
+        self.scopes.append(None)
         self.cur = block_table
-
-    def remove_block_table(self):
-        self.cur.prev.pop(self.cur)
-        self.cur = self.cur.prev
+        for symbol in block_table.table.values():
+            self._push(symbol)
+
+    def remove_block_table(self, end=None):
+        """Leave the current block; end is its last line, if not yet set."""
+        block = self.cur
+        if end is not None:
+            block.end = end
+        self.scopes[block.number] = block.freeze()
+        for id in block.table:
+            self._pop(id)
+        nexts = block.prev.nexts
+        if nexts and nexts[-1] is block:
+            nexts.pop()
+        else:
+            nexts.remove(block)
+        self.cur = block.prev
 
     def insert(self, symbol):
         self.cur.insert(symbol)
+        self._push(symbol)
 
     def remove(self, id):
         self.cur.remove(id)
+        self._pop(id)
 
     def get(self, id):
-        table = self.cur
-        while table != None:
-            entry = table.get(id)
-            if entry != None:
-                table = table.prev
-            else:
-                return entry
-        return None
+        """Return the innermost visible entry of id."""
+        try:
+            return self.visible[id][-1]
+        except KeyError:
+            raise UndefIdError(id, SYMTAB_ERROR_UNDEF_ID)
+
+    def _push(self, symbol):
+        stack = self.visible.get(symbol.id)
+        if stack is None:
+            self.visible[symbol.id] = [symbol]
+        else:
+            stack.append(symbol)
+
+    def _pop(self, id):
+        stack = self.visible[id]
+        stack.pop()
+        if not stack:
+            del self.visible[id]
+
+    def snapshot(self):
+        """Return a ScopeIndex of every block so far, open ones included."""
+        scopes = list(self.scopes)
+        block = self.cur
+        while block is not None:
+            scopes[block.number] = block.freeze()
+            block = block.prev
+        return ScopeIndex(scopes)
+
+
+class Scope:
+    """An immutable snapshot of a block: its lines and its entries.
+
+    parent is the number of the enclosing scope (None for the global one).
+    """
+
+    __slots__ = ('number', 'parent', 'start', 'end', 'entries')
+
+    def __init__(self, number, parent, start, end, entries):
+        self.number = number
+        self.parent = parent
+        self.start = start
+        self.end = end
+        self.entries = entries
+
+    def __repr__(self):
+        return 'Scope(%r, lines %r-%r, %s)' % (
+            self.number, self.start, self.end, ', '.join(str(e.id) for e in self.entries))
+
+
+class ScopeIndex:
+    """The scopes of a program by source line.
+
+    Scopes nest, so the lines split into runs that each have one
+    innermost scope; points holds the first line of every run and owners
+    the number of its innermost scope (-1 for none).  scope_at() is a
+    binary search.  A scope without a start line covers every line,
+    and one without an end line runs to the end of the file.
+    """
+
+    def __init__(self, scopes):
+        self.scopes = scopes
+        spans = []
+        for scope in scopes:
+            start = 1 if scope.start is None else scope.start
+            end = sys.maxsize if scope.end is None else scope.end
+            spans.append((start, -end, scope.number))
+        spans.sort()
+
+        bounds = set()
+        for start, end, number in spans:
+            bounds.add(start)
+            if -end < sys.maxsize:
+                bounds.add(-end + 1)
+        self.points = array('q', sorted(bounds))
+        self.owners = array('i')
+        stack = []
+        i = 0
+        for point in self.points:
+            while i < len(spans) and spans[i][0] <= point:
+                while stack and -stack[-1][1] < spans[i][0]:
+                    stack.pop()
+                stack.append(spans[i])
+                i += 1
+            while stack and -stack[-1][1] < point:
+                stack.pop()
+            self.owners.append(stack[-1][2] if stack else -1)
+
+    def scope_at(self, lineno):
+        """Return the innermost Scope that contains lineno, or None."""
+        k = bisect_right(self.points, lineno) - 1
+        if k < 0 or self.owners[k] < 0:
+            return None
+        return self.scopes[self.owners[k]]
+
+    def visible(self, lineno):
+        """Return {id: SymTabEntry} of the names visible at lineno.
+
+        Inner declarations hide outer ones, and entries declared after
+        lineno are not visible yet.
+        """
+        result = {}
+        scope = self.scope_at(lineno)
+        while scope is not None:
+            for entry in scope.entries:
+                if entry.id not in result and (entry.lineno is None or entry.lineno <= lineno):
+                    result[entry.id] = entry
+            scope = self.scopes[scope.parent] if scope.parent is not None else None
+        return result
@@ -1,1108 +1,1273 @@
-# -----------------------------------------------------------------------------
-# syntax_analyzer.py
-#
-# A syntax analyzer for ANSI C.  Based on the grammar in K&R, 2nd Ed.
-# -----------------------------------------------------------------------------
-
-import sys
-import lexical_analyzer
-import ply.yacc as yacc
-
-# Get the token map
-tokens = lexical_analyzer.tokens
-
-# translation-unit:
-
-
-def p_translation_unit_1(t):
-    'translation_unit : external_declaration'
-    pass
-
-
-def p_translation_unit_2(t):
-    'translation_unit : translation_unit external_declaration'
-    pass
-
-# external-declaration:
-
-
-def p_external_declaration_1(t):
-    'external_declaration : function_definition'
-    pass
-
-
-def p_external_declaration_2(t):
-    'external_declaration : declaration'
-    pass
-
-# function-definition:
-
-
-def p_function_definition_1(t):
-    'function_definition : declaration_specifiers declarator declaration_list compound_statement'
-    pass
-
-
-def p_function_definition_2(t):
-    'function_definition : declarator declaration_list compound_statement'
-    pass
-
-
-def p_function_definition_3(t):
-    'function_definition : declarator compound_statement'
-    pass
-
-
-def p_function_definition_4(t):
-    'function_definition : declaration_specifiers declarator compound_statement'
-    pass
-
-# declaration:
-
-
-def p_declaration_1(t):
-    'declaration : declaration_specifiers init_declarator_list SEMI'
-    pass
-
-
-def p_declaration_2(t):
-    'declaration : declaration_specifiers SEMI'
-    pass
-
-# declaration-list:
-
-
-def p_declaration_list_1(t):
-    'declaration_list : declaration'
-    pass
-
-
-def p_declaration_list_2(t):
-    'declaration_list : declaration_list declaration '
-    pass
-
-# declaration-specifiers
-
-
-def p_declaration_specifiers_1(t):
-    'declaration_specifiers : storage_class_specifier declaration_specifiers'
-    pass
-
-
-def p_declaration_specifiers_2(t):
-    'declaration_specifiers : type_specifier declaration_specifiers'
-    pass
-
-
-def p_declaration_specifiers_3(t):
-    'declaration_specifiers : type_qualifier declaration_specifiers'
-    pass
-
-
-def p_declaration_specifiers_4(t):
-    'declaration_specifiers : storage_class_specifier'
-    pass
-
-
-def p_declaration_specifiers_5(t):
-    'declaration_specifiers : type_specifier'
-    pass
-
-
-def p_declaration_specifiers_6(t):
-    'declaration_specifiers : type_qualifier'
-    pass
-
-# storage-class-specifier
-
-
-def p_storage_class_specifier(t):
-    '''storage_class_specifier : AUTO
-                               | REGISTER
-                               | STATIC
-                               | EXTERN
-                               | TYPEDEF
-                               '''
-    pass
-
-# type-specifier:
-
-
-def p_type_specifier(t):
-    '''type_specifier : VOID
-                      | CHAR
-                      | SHORT
-                      | INT
-                      | LONG
-                      | FLOAT
-                      | DOUBLE
-                      | SIGNED
-                      | UNSIGNED
-                      | struct_or_union_specifier
-                      | enum_specifier
-                      | TYPEID
-                      '''
-    pass
-
-# type-qualifier:
-
-
-def p_type_qualifier(t):
-    '''type_qualifier : CONST
-                      | VOLATILE'''
-    pass
-
-# struct-or-union-specifier
-
-
-def p_struct_or_union_specifier_1(t):
-    'struct_or_union_specifier : struct_or_union ID LBRACE struct_declaration_list RBRACE'
-    pass
-
-
-def p_struct_or_union_specifier_2(t):
-    'struct_or_union_specifier : struct_or_union LBRACE struct_declaration_list RBRACE'
-    pass
-
-
-def p_struct_or_union_specifier_3(t):
-    'struct_or_union_specifier : struct_or_union ID'
-    pass
-
-# struct-or-union:
-
-
-def p_struct_or_union(t):
-    '''struct_or_union : STRUCT
-                       | UNION
-                       '''
-    pass
-
-# struct-declaration-list:
-
-
-def p_struct_declaration_list_1(t):
-    'struct_declaration_list : struct_declaration'
-    pass
-
-
-def p_struct_declaration_list_2(t):
-    'struct_declaration_list : struct_declaration_list struct_declaration'
-    pass
-
-# init-declarator-list:
-
-
-def p_init_declarator_list_1(t):
-    'init_declarator_list : init_declarator'
-    pass
-
-
-def p_init_declarator_list_2(t):
-    'init_declarator_list : init_declarator_list COMMA init_declarator'
-    pass
-
-# init-declarator
-
-
-def p_init_declarator_1(t):
-    'init_declarator : declarator'
-    pass
-
-
-def p_init_declarator_2(t):
-    'init_declarator : declarator EQUALS initializer'
-    pass
-
-# struct-declaration:
-
-
-def p_struct_declaration(t):
-    'struct_declaration : specifier_qualifier_list struct_declarator_list SEMI'
-    pass
-
-# specifier-qualifier-list:
-
-
-def p_specifier_qualifier_list_1(t):
-    'specifier_qualifier_list : type_specifier specifier_qualifier_list'
-    pass
-
-
-def p_specifier_qualifier_list_2(t):
-    'specifier_qualifier_list : type_specifier'
-    pass
-
-
-def p_specifier_qualifier_list_3(t):
-    'specifier_qualifier_list : type_qualifier specifier_qualifier_list'
-    pass
-
-
-def p_specifier_qualifier_list_4(t):
-    'specifier_qualifier_list : type_qualifier'
-    pass
-
-# struct-declarator-list:
-
-
-def p_struct_declarator_list_1(t):
-    'struct_declarator_list : struct_declarator'
-    pass
-
-
-def p_struct_declarator_list_2(t):
-    'struct_declarator_list : struct_declarator_list COMMA struct_declarator'
-    pass
-
-# struct-declarator:
-
-
-def p_struct_declarator_1(t):
-    'struct_declarator : declarator'
-    pass
-
-
-def p_struct_declarator_2(t):
-    'struct_declarator : declarator COLON constant_expression'
-    pass
-
-
-def p_struct_declarator_3(t):
-    'struct_declarator : COLON constant_expression'
-    pass
-
-# enum-specifier:
-
-
-def p_enum_specifier_1(t):
-    'enum_specifier : ENUM ID LBRACE enumerator_list RBRACE'
-    pass
-
-
-def p_enum_specifier_2(t):
-    'enum_specifier : ENUM LBRACE enumerator_list RBRACE'
-    pass
-
-
-def p_enum_specifier_3(t):
-    'enum_specifier : ENUM ID'
-    pass
-
-# enumerator_list:
-
-
-def p_enumerator_list_1(t):
-    'enumerator_list : enumerator'
-    pass
-
-
-def p_enumerator_list_2(t):
-    'enumerator_list : enumerator_list COMMA enumerator'
-    pass
-
-# enumerator:
-
-
-def p_enumerator_1(t):
-    'enumerator : ID'
-    pass
-
-
-def p_enumerator_2(t):
-    'enumerator : ID EQUALS constant_expression'
-    pass
-
-# declarator:
-
-
-def p_declarator_1(t):
-    'declarator : pointer direct_declarator'
-    pass
-
-
-def p_declarator_2(t):
-    'declarator : direct_declarator'
-    pass
-
-# direct-declarator:
-
-
-def p_direct_declarator_1(t):
-    'direct_declarator : ID'
-    pass
-
-
-def p_direct_declarator_2(t):
-    'direct_declarator : LPAREN declarator RPAREN'
-    pass
-
-
-def p_direct_declarator_3(t):
-    'direct_declarator : direct_declarator LBRACKET constant_expression_opt RBRACKET'
-    pass
-
-
-def p_direct_declarator_4(t):
-    'direct_declarator : direct_declarator LPAREN parameter_type_list RPAREN '
-    pass
-
-
-def p_direct_declarator_5(t):
-    'direct_declarator : direct_declarator LPAREN identifier_list RPAREN '
-    pass
-
-
-def p_direct_declarator_6(t):
-    'direct_declarator : direct_declarator LPAREN RPAREN '
-    pass
-
-# pointer:
-
-
-def p_pointer_1(t):
-    'pointer : TIMES type_qualifier_list'
-    pass
-
-
-def p_pointer_2(t):
-    'pointer : TIMES'
-    pass
-
-
-def p_pointer_3(t):
-    'pointer : TIMES type_qualifier_list pointer'
-    pass
-
-
-def p_pointer_4(t):
-    'pointer : TIMES pointer'
-    pass
-
-# type-qualifier-list:
-
-
-def p_type_qualifier_list_1(t):
-    'type_qualifier_list : type_qualifier'
-    pass
-
-
-def p_type_qualifier_list_2(t):
-    'type_qualifier_list : type_qualifier_list type_qualifier'
-    pass
-
-# parameter-type-list:
-
-
-def p_parameter_type_list_1(t):
-    'parameter_type_list : parameter_list'
-    pass
-
-
-def p_parameter_type_list_2(t):
-    'parameter_type_list : parameter_list COMMA ELLIPSIS'
-    pass
-
-# parameter-list:
-
-
-def p_parameter_list_1(t):
-    'parameter_list : parameter_declaration'
-    pass
-
-
-def p_parameter_list_2(t):
-    'parameter_list : parameter_list COMMA parameter_declaration'
-    pass
-
-# parameter-declaration:
-
-
-def p_parameter_declaration_1(t):
-    'parameter_declaration : declaration_specifiers declarator'
-    pass
-
-
-def p_parameter_declaration_2(t):
-    'parameter_declaration : declaration_specifiers abstract_declarator_opt'
-    pass
-
-# identifier-list:
-
-
-def p_identifier_list_1(t):
-    'identifier_list : ID'
-    pass
-
-
-def p_identifier_list_2(t):
-    'identifier_list : identifier_list COMMA ID'
-    pass
-
-# initializer:
-
-
-def p_initializer_1(t):
-    'initializer : assignment_expression'
-    pass
-
-
-def p_initializer_2(t):
-    '''initializer : LBRACE initializer_list RBRACE
-                   | LBRACE initializer_list COMMA RBRACE'''
-    pass
-
-# initializer-list:
-
-
-def p_initializer_list_1(t):
-    'initializer_list : initializer'
-    pass
-
-
-def p_initializer_list_2(t):
-    'initializer_list : initializer_list COMMA initializer'
-    pass
-
-# type-name:
-
-
-def p_type_name(t):
-    'type_name : specifier_qualifier_list abstract_declarator_opt'
-    pass
-
-
-def p_abstract_declarator_opt_1(t):
-    'abstract_declarator_opt : empty'
-    pass
-
-
-def p_abstract_declarator_opt_2(t):
-    'abstract_declarator_opt : abstract_declarator'
-    pass
-
-# abstract-declarator:
-
-
-def p_abstract_declarator_1(t):
-    'abstract_declarator : pointer '
-    pass
-
-
-def p_abstract_declarator_2(t):
-    'abstract_declarator : pointer direct_abstract_declarator'
-    pass
-
-
-def p_abstract_declarator_3(t):
-    'abstract_declarator : direct_abstract_declarator'
-    pass
-
-# direct-abstract-declarator:
-
-
-def p_direct_abstract_declarator_1(t):
-    'direct_abstract_declarator : LPAREN abstract_declarator RPAREN'
-    pass
-
-
-def p_direct_abstract_declarator_2(t):
-    'direct_abstract_declarator : direct_abstract_declarator LBRACKET constant_expression_opt RBRACKET'
-    pass
-
-
-def p_direct_abstract_declarator_3(t):
-    'direct_abstract_declarator : LBRACKET constant_expression_opt RBRACKET'
-    pass
-
-
-def p_direct_abstract_declarator_4(t):
-    'direct_abstract_declarator : direct_abstract_declarator LPAREN parameter_type_list_opt RPAREN'
-    pass
-
-
-def p_direct_abstract_declarator_5(t):
-    'direct_abstract_declarator : LPAREN parameter_type_list_opt RPAREN'
-    pass
-
-# Optional fields in abstract declarators
-
-
-def p_constant_expression_opt_1(t):
-    'constant_expression_opt : empty'
-    pass
-
-
-def p_constant_expression_opt_2(t):
-    'constant_expression_opt : constant_expression'
-    pass
-
-
-def p_parameter_type_list_opt_1(t):
-    'parameter_type_list_opt : empty'
-    pass
-
-
-def p_parameter_type_list_opt_2(t):
-    'parameter_type_list_opt : parameter_type_list'
-    pass
-
-# statement:
-
-
-def p_statement(t):
-    '''
-    statement : labeled_statement
-              | expression_statement
-              | compound_statement
-              | selection_statement
-              | iteration_statement
-              | jump_statement
-              '''
-    pass
-
-# labeled-statement:
-
-
-def p_labeled_statement_1(t):
-    'labeled_statement : ID COLON statement'
-    pass
-
-
-def p_labeled_statement_2(t):
-    'labeled_statement : CASE constant_expression COLON statement'
-    pass
-
-
-def p_labeled_statement_3(t):
-    'labeled_statement : DEFAULT COLON statement'
-    pass
-
-# expression-statement:
-
-
-def p_expression_statement(t):
-    'expression_statement : expression_opt SEMI'
-    pass
-
-# compound-statement:
-
-
-def p_compound_statement_1(t):
-    'compound_statement : LBRACE declaration_list statement_list RBRACE'
-    pass
-
-
-def p_compound_statement_2(t):
-    'compound_statement : LBRACE statement_list RBRACE'
-    pass
-
-
-def p_compound_statement_3(t):
-    'compound_statement : LBRACE declaration_list RBRACE'
-    pass
-
-
-def p_compound_statement_4(t):
-    'compound_statement : LBRACE RBRACE'
-    pass
-
-# statement-list:
-
-
-def p_statement_list_1(t):
-    'statement_list : statement'
-    pass
-
-
-def p_statement_list_2(t):
-    'statement_list : statement_list statement'
-    pass
-
-# selection-statement
-
-
-def p_selection_statement_1(t):
-    'selection_statement : IF LPAREN expression RPAREN statement'
-    pass
-
-
-def p_selection_statement_2(t):
-    'selection_statement : IF LPAREN expression RPAREN statement ELSE statement '
-    pass
-
-
-def p_selection_statement_3(t):
-    'selection_statement : SWITCH LPAREN expression RPAREN statement '
-    pass
-
-# iteration_statement:
-
-
-def p_iteration_statement_1(t):
-    'iteration_statement : WHILE LPAREN expression RPAREN statement'
-    pass
-
-
-def p_iteration_statement_2(t):
-    'iteration_statement : FOR LPAREN expression_opt SEMI expression_opt SEMI expression_opt RPAREN statement '
-    pass
-
-
-def p_iteration_statement_3(t):
-    'iteration_statement : DO statement WHILE LPAREN expression RPAREN SEMI'
-    pass
-
-# jump_statement:
-
-
-def p_jump_statement_1(t):
-    'jump_statement : GOTO ID SEMI'
-    pass
-
-
-def p_jump_statement_2(t):
-    'jump_statement : CONTINUE SEMI'
-    pass
-
-
-def p_jump_statement_3(t):
-    'jump_statement : BREAK SEMI'
-    pass
-
-
-def p_jump_statement_4(t):
-    'jump_statement : RETURN expression_opt SEMI'
-    pass
-
-
-def p_expression_opt_1(t):
-    'expression_opt : empty'
-    pass
-
-
-def p_expression_opt_2(t):
-    'expression_opt : expression'
-    pass
-
-# expression:
-
-
-def p_expression_1(t):
-    'expression : assignment_expression'
-    pass
-
-
-def p_expression_2(t):
-    'expression : expression COMMA assignment_expression'
-    pass
-
-# assigment_expression:
-
-
-def p_assignment_expression_1(t):
-    'assignment_expression : conditional_expression'
-    pass
-
-
-def p_assignment_expression_2(t):
-    'assignment_expression : unary_expression assignment_operator assignment_expression'
-    pass
-
-# assignment_operator:
-
-
-def p_assignment_operator(t):
-    '''
-    assignment_operator : EQUALS
-                        | TIMESEQUAL
-                        | DIVEQUAL
-                        | MODEQUAL
-                        | PLUSEQUAL
-                        | MINUSEQUAL
-                        | LSHIFTEQUAL
-                        | RSHIFTEQUAL
-                        | ANDEQUAL
-                        | OREQUAL
-                        | XOREQUAL
-                        '''
-    pass
-
-# conditional-expression
-
-
-def p_conditional_expression_1(t):
-    'conditional_expression : logical_or_expression'
-    pass
-
-
-def p_conditional_expression_2(t):
-    'conditional_expression : logical_or_expression CONDOP expression COLON conditional_expression '
-    pass
-
-# constant-expression
-
-
-def p_constant_expression(t):
-    'constant_expression : conditional_expression'
-    pass
-
-# logical-or-expression
-
-
-def p_logical_or_expression_1(t):
-    'logical_or_expression : logical_and_expression'
-    pass
-
-
-def p_logical_or_expression_2(t):
-    'logical_or_expression : logical_or_expression LOR logical_and_expression'
-    pass
-
-# logical-and-expression
-
-
-def p_logical_and_expression_1(t):
-    'logical_and_expression : inclusive_or_expression'
-    pass
-
-
-def p_logical_and_expression_2(t):
-    'logical_and_expression : logical_and_expression LAND inclusive_or_expression'
-    pass
-
-# inclusive-or-expression:
-
-
-def p_inclusive_or_expression_1(t):
-    'inclusive_or_expression : exclusive_or_expression'
-    pass
-
-
-def p_inclusive_or_expression_2(t):
-    'inclusive_or_expression : inclusive_or_expression OR exclusive_or_expression'
-    pass
-
-# exclusive-or-expression:
-
-
-def p_exclusive_or_expression_1(t):
-    'exclusive_or_expression :  and_expression'
-    pass
-
-
-def p_exclusive_or_expression_2(t):
-    'exclusive_or_expression :  exclusive_or_expression XOR and_expression'
-    pass
-
-# AND-expression
-
-
-def p_and_expression_1(t):
-    'and_expression : equality_expression'
-    pass
-
-
-def p_and_expression_2(t):
-    'and_expression : and_expression AND equality_expression'
-    pass
-
-
-# equality-expression:
-def p_equality_expression_1(t):
-    'equality_expression : relational_expression'
-    pass
-
-
-def p_equality_expression_2(t):
-    'equality_expression : equality_expression EQ relational_expression'
-    pass
-
-
-def p_equality_expression_3(t):
-    'equality_expression : equality_expression NE relational_expression'
-    pass
-
-
-# relational-expression:
-def p_relational_expression_1(t):
-    'relational_expression : shift_expression'
-    pass
-
-
-def p_relational_expression_2(t):
-    'relational_expression : relational_expression LT shift_expression'
-    pass
-
-
-def p_relational_expression_3(t):
-    'relational_expression : relational_expression GT shift_expression'
-    pass
-
-
-def p_relational_expression_4(t):
-    'relational_expression : relational_expression LE shift_expression'
-    pass
-
-
-def p_relational_expression_5(t):
-    'relational_expression : relational_expression GE shift_expression'
-    pass
-
-# shift-expression
-
-
-def p_shift_expression_1(t):
-    'shift_expression : additive_expression'
-    pass
-
-
-def p_shift_expression_2(t):
-    'shift_expression : shift_expression LSHIFT additive_expression'
-    pass
-
-
-def p_shift_expression_3(t):
-    'shift_expression : shift_expression RSHIFT additive_expression'
-    pass
-
-# additive-expression
-
-
-def p_additive_expression_1(t):
-    'additive_expression : multiplicative_expression'
-    pass
-
-
-def p_additive_expression_2(t):
-    'additive_expression : additive_expression PLUS multiplicative_expression'
-    pass
-
-
-def p_additive_expression_3(t):
-    'additive_expression : additive_expression MINUS multiplicative_expression'
-    pass
-
-# multiplicative-expression
-
-
-def p_multiplicative_expression_1(t):
-    'multiplicative_expression : cast_expression'
-    pass
-
-
-def p_multiplicative_expression_2(t):
-    'multiplicative_expression : multiplicative_expression TIMES cast_expression'
-    pass
-
-
-def p_multiplicative_expression_3(t):
-    'multiplicative_expression : multiplicative_expression DIVIDE cast_expression'
-    pass
-
-
-def p_multiplicative_expression_4(t):
-    'multiplicative_expression : multiplicative_expression MOD cast_expression'
-    pass
-
-# cast-expression:
-
-
-def p_cast_expression_1(t):
-    'cast_expression : unary_expression'
-    pass
-
-
-def p_cast_expression_2(t):
-    'cast_expression : LPAREN type_name RPAREN cast_expression'
-    pass
-
-# unary-expression:
-
-
-def p_unary_expression_1(t):
-    'unary_expression : postfix_expression'
-    pass
-
-
-def p_unary_expression_2(t):
-    'unary_expression : PLUSPLUS unary_expression'
-    pass
-
-
-def p_unary_expression_3(t):
-    'unary_expression : MINUSMINUS unary_expression'
-    pass
-
-
-def p_unary_expression_4(t):
-    'unary_expression : unary_operator cast_expression'
-    pass
-
-
-def p_unary_expression_5(t):
-    'unary_expression : SIZEOF unary_expression'
-    pass
-
-
-def p_unary_expression_6(t):
-    'unary_expression : SIZEOF LPAREN type_name RPAREN'
-    pass
-
-# unary-operator
-
-
-def p_unary_operator(t):
-    '''unary_operator : AND
-                    | TIMES
-                    | PLUS
-                    | MINUS
-                    | NOT
-                    | LNOT '''
-    pass
-
-# postfix-expression:
-
-
-def p_postfix_expression_1(t):
-    'postfix_expression : primary_expression'
-    pass
-
-
-def p_postfix_expression_2(t):
-    'postfix_expression : postfix_expression LBRACKET expression RBRACKET'
-    pass
-
-
-def p_postfix_expression_3(t):
-    'postfix_expression : postfix_expression LPAREN argument_expression_list RPAREN'
-    pass
-
-
-def p_postfix_expression_4(t):
-    'postfix_expression : postfix_expression LPAREN RPAREN'
-    pass
-
-
-def p_postfix_expression_5(t):
-    'postfix_expression : postfix_expression PERIOD ID'
-    pass
-
-
-def p_postfix_expression_6(t):
-    'postfix_expression : postfix_expression ARROW ID'
-    pass
-
-
-def p_postfix_expression_7(t):
-    'postfix_expression : postfix_expression PLUSPLUS'
-    pass
-
-
-def p_postfix_expression_8(t):
-    'postfix_expression : postfix_expression MINUSMINUS'
-    pass
-
-# primary-expression:
-
-
-def p_primary_expression(t):
-    '''primary_expression :  ID
-                        |  constant
-                        |  SCONST
-                        |  LPAREN expression RPAREN'''
-    pass
-
-# argument-expression-list:
-
-
-def p_argument_expression_list(t):
-    '''argument_expression_list :  assignment_expression
-                              |  argument_expression_list COMMA assignment_expression'''
-    pass
-
-# constant:
-
-
-def p_constant(t):
-    '''constant : ICONST
-               | FCONST
-               | CCONST'''
-    pass
-
-
-def p_empty(t):
-    'empty : '
-    pass
-
-
-def p_error(t):
-    print("Whoa. We're hosed")
-
-import profile
-# Build the grammar
-
-yacc.yacc()
-#yacc.yacc(method='LALR',write_tables=False,debug=False)
-
-#profile.run("yacc.yacc(method='LALR')")
-( I N T , ' i n t ' , 1 , 0 )  
- ( I D , ' m a i n ' , 1 , 4 )  
- ( L P A R E N , ' ( ' , 1 , 8 )  
- ( R P A R E N , ' ) ' , 1 , 9 )  
- ( L B R A C E , ' { ' , 2 , 1 1 )  
- ( R E T U R N , ' r e t u r n ' , 3 , 1 5 )  
- ( I C O N S T , ' 0 ' , 3 , 2 2 )  
- ( S E M I , ' ; ' , 3 , 2 3 )  
- ( R B R A C E , ' } ' , 4 , 2 5 )  
- 
-( I N T , ' i n t ' , 1 , 0 )  
- ( I D , ' m a i n ' , 1 , 4 )  
- ( L P A R E N , ' ( ' , 1 , 8 )  
- ( R P A R E N , ' ) ' , 1 , 9 )  
- ( L B R A C E , ' { ' , 2 , 1 1 )  
- ( I N T , ' i n t ' , 3 , 1 5 )  
- ( I D , ' i ' , 3 , 1 9 )  
- ( S E M I , ' ; ' , 3 , 2 0 )  
- ( I D , ' i ' , 4 , 2 4 )  
- ( E Q U A L S , ' = ' , 4 , 2 6 )  
- ( I C O N S T , ' 1 ' , 4 , 2 8 )  
- ( S E M I , ' ; ' , 4 , 2 9 )  
- ( R E T U R N , ' r e t u r n ' , 5 , 3 3 )  
- ( I C O N S T , ' 0 ' , 5 , 4 0 )  
- ( S E M I , ' ; ' , 5 , 4 1 )  
- ( R B R A C E , ' } ' , 6 , 4 3 )  
- 
-( I N T , ' i n t ' , 1 , 0 )  
- ( I D , ' m a i n ' , 1 , 4 )  
- ( L P A R E N , ' ( ' , 1 , 8 )  
- ( R P A R E N , ' ) ' , 1 , 9 )  
- ( L B R A C E , ' { ' , 2 , 1 1 )  
- ( I N T , ' i n t ' , 3 , 1 5 )  
- ( I D , ' i ' , 3 , 1 9 )  
- ( S E M I , ' ; ' , 3 , 2 0 )  
- ( I D , ' i ' , 4 , 2 4 )  
- ( E Q U A L S , ' = ' , 4 , 2 6 )  
- ( I C O N S T , ' 1 ' , 4 , 2 8 )  
- ( S E M I , ' ; ' , 4 , 2 9 )  
- ( R E T U R N , ' r e t u r n ' , 5 , 3 3 )  
- ( I C O N S T , ' 0 ' , 5 , 4 0 )  
- ( S E M I , ' ; ' , 5 , 4 1 )  
- ( R B R A C E , ' } ' , 6 , 4 3 )  
- Reading from standard input (type EOF to end):
-(INT,'int',1,0)
-(ID,'main',1,4)
-(LPAREN,'(',1,8)
-(RPAREN,')',1,9)
-(LBRACE,'{',2,11)
-(INT,'int',3,15)
-(ID,'i',3,19)
-(SEMI,';',3,20)
-(ID,'i',4,24)
-(EQUALS,'=',4,26)
-(ICONST,'1',4,28)
-(SEMI,';',4,29)
-(RETURN,'return',5,33)
-(ICONST,'0',5,40)
-(SEMI,';',5,41)
-(RBRACE,'}',6,43)
+# -----------------------------------------------------------------------------
+# syntax_analyzer.py
+#
+# A syntax analyzer for ANSI C.  Based on the grammar in K&R, 2nd Ed.
+# -----------------------------------------------------------------------------
+
+import sys
+import atoms
+import lexical_analyzer
+import node
+import tokbuf
+
+# Get the token map
+tokens = lexical_analyzer.tokens
+
+# -----------------------------------------------------------------------------
+# AST construction
+#
+# The grammar actions build the node.py AST.  Declaration specifiers are
+# collected into a dict of 'storage', 'quals' and 'type' lists, declarators
+# into TypeDecl/PtrDecl/ArrayDecl/FuncDecl chains whose innermost TypeDecl
+# gets the base type once the whole declaration has been seen.
+# Identifiers and string literals are stored as atoms (atoms.Atom).
+# -----------------------------------------------------------------------------
+
+ASSIGNMENT_OPERATORS = {
+    'ASSIGN': '=', 'MUL_ASSIGN': '*=', 'DIV_ASSIGN': '/=', 'MOD_ASSIGN': '%=',
+    'ADD_ASSIGN': '+=', 'SUB_ASSIGN': '-=', 'B_LSHIFT_ASSIGN': '<<=',
+    'B_RSHIFT_ASSIGN': '>>=', 'B_AND_ASSIGN': '&=', 'B_OR_ASSIGN': '|=',
+    'B_XOR_ASSIGN': '^=',
+}
+
+UNARY_OPERATORS = {
+    'AMPERSAND': '&', 'ASTERISK': '*', 'PLUS': '+', 'MINUS': '-',
+    'B_NOT': '~', 'L_NOT': '!',
+}
+
+CONSTANT_TYPES = {'ICONST': 'int', 'FCONST': 'double', 'CCONST': 'char'}
+
+_text = tokbuf.as_text
+_atom = atoms.intern
+
+
+def _lineno(t, n):
+    """Return the source line of the n-th (terminal) symbol of a production."""
+    return lexical_analyzer.find_lineno(t.lexer, t.lexpos(n))
+
+
+def _add_spec(spec, kind, value):
+    if spec is None:
+        spec = {'storage': [], 'quals': [], 'type': []}
+    # Specifier lists are right-recursive, so prepend to keep source order.
+    spec[kind].insert(0, value)
+    return spec
+
+
+def _base_type(spec, lineno=None):
+    for item in spec['type']:
+        if isinstance(item, node.ASTNode):
+            return item
+    return node.IdentifierType(spec['type'] or ['int'], lineno)
+
+
+def _type_modify_decl(decl, modifier):
+    """Put a pointer/array/function modifier chain just above the
+    innermost TypeDecl of decl, and return the resulting declarator."""
+    modifier_tail = modifier
+    while modifier_tail.type is not None:
+        modifier_tail = modifier_tail.type
+    if isinstance(decl, node.TypeDecl):
+        modifier_tail.type = decl
+        return modifier
+    decl_tail = decl
+    while not isinstance(decl_tail.type, node.TypeDecl):
+        decl_tail = decl_tail.type
+    modifier_tail.type = decl_tail.type
+    decl_tail.type = modifier
+    return decl
+
+
+def _nest_pointer(pointer, inner):
+    tail = pointer
+    while tail.type is not None:
+        tail = tail.type
+    tail.type = inner
+    return pointer
+
+
+def _fix_decl(decl_type, spec, lineno=None):
+    """Attach the base type of spec to the innermost TypeDecl of decl_type."""
+    if decl_type is None:
+        decl_type = node.TypeDecl(None, [], None, lineno)
+    tail = decl_type
+    while not isinstance(tail, node.TypeDecl):
+        tail = tail.type
+    tail.quals = spec['quals']
+    tail.type = _base_type(spec, tail.lineno)
+    return decl_type
+
+
+def _decl_name(decl_type):
+    while decl_type is not None and not isinstance(decl_type, node.TypeDecl):
+        decl_type = decl_type.type
+    return decl_type.declname if decl_type is not None else None
+
+
+def _make_decl(spec, declarator, init, bitsize=None):
+    if declarator is not None:
+        lineno = declarator.lineno
+    elif bitsize is not None:
+        lineno = bitsize.lineno
+    else:
+        lineno = None
+    decl_type = _fix_decl(declarator, spec, lineno)
+    return node.Decl(_decl_name(decl_type), spec['quals'], spec['storage'],
+                     decl_type, init, bitsize, lineno)
+
+
+def _fill_lineno(root, lineno):
+    for n in node.walk(root):
+        if n.lineno is None:
+            n.lineno = lineno
+
+
+def _function_def(spec, declarator, param_decls, body):
+    if spec is None:
+        # K&R style definitions without a return type return int.
+        spec = _add_spec(None, 'type', 'int')
+    decl = _make_decl(spec, declarator, None)
+    return node.FunctionDef(decl, param_decls, body, decl.lineno)
+
+# translation-unit:
+
+
+def p_translation_unit_1(t):
+    'translation_unit : external_declaration'
+    t[0] = node.TranslationUnit(list(t[1]), t[1][0].lineno if t[1] else None)
+
+
+def p_translation_unit_2(t):
+    'translation_unit : translation_unit external_declaration'
+    t[1].ext.extend(t[2])
+    t[0] = t[1]
+
+# external-declaration:
+
+
+def p_external_declaration_1(t):
+    'external_declaration : function_definition'
+    t[0] = [t[1]]
+
+
+def p_external_declaration_2(t):
+    'external_declaration : declaration'
+    t[0] = t[1]
+
+# function-definition:
+
+
+def p_function_definition_1(t):
+    'function_definition : declaration_specifiers declarator declaration_list compound_statement'
+    t[0] = _function_def(t[1], t[2], t[3], t[4])
+
+
+def p_function_definition_2(t):
+    'function_definition : declarator declaration_list compound_statement'
+    t[0] = _function_def(None, t[1], t[2], t[3])
+
+
+def p_function_definition_3(t):
+    'function_definition : declarator compound_statement'
+    t[0] = _function_def(None, t[1], None, t[2])
+
+
+def p_function_definition_4(t):
+    'function_definition : declaration_specifiers declarator compound_statement'
+    t[0] = _function_def(t[1], t[2], None, t[3])
+
+# declaration:
+
+
+def p_declaration_1(t):
+    'declaration : declaration_specifiers init_declarator_list SEMI_COLON'
+    t[0] = [_make_decl(t[1], decl, init) for decl, init in t[2]]
+
+
+def p_declaration_2(t):
+    'declaration : declaration_specifiers SEMI_COLON'
+    spec = t[1]
+    t[0] = [node.Decl(None, spec['quals'], spec['storage'],
+                      _base_type(spec, _lineno(t, 2)), None, lineno=_lineno(t, 2))]
+
+# declaration-list:
+
+
+def p_declaration_list_1(t):
+    'declaration_list : declaration'
+    t[0] = t[1]
+
+
+def p_declaration_list_2(t):
+    'declaration_list : declaration_list declaration '
+    t[0] = t[1] + t[2]
+
+# declaration-specifiers
+
+
+def p_declaration_specifiers_1(t):
+    'declaration_specifiers : storage_class_specifier declaration_specifiers'
+    t[0] = _add_spec(t[2], 'storage', t[1])
+
+
+def p_declaration_specifiers_2(t):
+    'declaration_specifiers : type_specifier declaration_specifiers'
+    t[0] = _add_spec(t[2], 'type', t[1])
+
+
+def p_declaration_specifiers_3(t):
+    'declaration_specifiers : type_qualifier declaration_specifiers'
+    t[0] = _add_spec(t[2], 'quals', t[1])
+
+
+def p_declaration_specifiers_4(t):
+    'declaration_specifiers : storage_class_specifier'
+    t[0] = _add_spec(None, 'storage', t[1])
+
+
+def p_declaration_specifiers_5(t):
+    'declaration_specifiers : type_specifier'
+    t[0] = _add_spec(None, 'type', t[1])
+
+
+def p_declaration_specifiers_6(t):
+    'declaration_specifiers : type_qualifier'
+    t[0] = _add_spec(None, 'quals', t[1])
+
+# storage-class-specifier
+
+
+def p_storage_class_specifier(t):
+    '''storage_class_specifier : AUTO
+                               | REGISTER
+                               | STATIC
+                               | EXTERN
+                               | TYPEDEF
+                               '''
+    t[0] = t.slice[1].type.lower()
+
+# type-specifier:
+
+
+def p_type_specifier(t):
+    '''type_specifier : VOID
+                      | CHAR
+                      | SHORT
+                      | INT
+                      | LONG
+                      | FLOAT
+                      | DOUBLE
+                      | SIGNED
+                      | UNSIGNED
+                      | struct_or_union_specifier
+                      | enum_specifier
+                      | TYPEID
+                      '''
+    if isinstance(t[1], node.ASTNode):
+        t[0] = t[1]
+    elif t.slice[1].type == 'TYPEID':
+        t[0] = _text(t[1])
+    else:
+        t[0] = t.slice[1].type.lower()
+
+# type-qualifier:
+
+
+def p_type_qualifier(t):
+    '''type_qualifier : CONST
+                      | VOLATILE'''
+    t[0] = t.slice[1].type.lower()
+
+# struct-or-union-specifier
+
+
+def p_struct_or_union_specifier_1(t):
+    'struct_or_union_specifier : struct_or_union ID LBRACE struct_declaration_list RBRACE'
+    t[0] = node.Struct(t[1], _atom(t[2]), t[4], _lineno(t, 2))
+
+
+def p_struct_or_union_specifier_2(t):
+    'struct_or_union_specifier : struct_or_union LBRACE struct_declaration_list RBRACE'
+    t[0] = node.Struct(t[1], None, t[3], _lineno(t, 2))
+
+
+def p_struct_or_union_specifier_3(t):
+    'struct_or_union_specifier : struct_or_union ID'
+    t[0] = node.Struct(t[1], _atom(t[2]), None, _lineno(t, 2))
+
+# struct-or-union:
+
+
+def p_struct_or_union(t):
+    '''struct_or_union : STRUCT
+                       | UNION
+                       '''
+    t[0] = t.slice[1].type.lower()
+
+# struct-declaration-list:
+
+
+def p_struct_declaration_list_1(t):
+    'struct_declaration_list : struct_declaration'
+    t[0] = t[1]
+
+
+def p_struct_declaration_list_2(t):
+    'struct_declaration_list : struct_declaration_list struct_declaration'
+    t[0] = t[1] + t[2]
+
+# init-declarator-list:
+
+
+def p_init_declarator_list_1(t):
+    'init_declarator_list : init_declarator'
+    t[0] = [t[1]]
+
+
+def p_init_declarator_list_2(t):
+    'init_declarator_list : init_declarator_list COMMA init_declarator'
+    t[1].append(t[3])
+    t[0] = t[1]
+
+# init-declarator
+
+
+def p_init_declarator_1(t):
+    'init_declarator : declarator'
+    t[0] = (t[1], None)
+
+
+def p_init_declarator_2(t):
+    'init_declarator : declarator ASSIGN initializer'
+    t[0] = (t[1], t[3])
+
+# struct-declaration:
+
+
+def p_struct_declaration(t):
+    'struct_declaration : specifier_qualifier_list struct_declarator_list SEMI_COLON'
+    t[0] = [_make_decl(t[1], decl, None, bitsize) for decl, bitsize in t[2]]
+
+# specifier-qualifier-list:
+
+
+def p_specifier_qualifier_list_1(t):
+    'specifier_qualifier_list : type_specifier specifier_qualifier_list'
+    t[0] = _add_spec(t[2], 'type', t[1])
+
+
+def p_specifier_qualifier_list_2(t):
+    'specifier_qualifier_list : type_specifier'
+    t[0] = _add_spec(None, 'type', t[1])
+
+
+def p_specifier_qualifier_list_3(t):
+    'specifier_qualifier_list : type_qualifier specifier_qualifier_list'
+    t[0] = _add_spec(t[2], 'quals', t[1])
+
+
+def p_specifier_qualifier_list_4(t):
+    'specifier_qualifier_list : type_qualifier'
+    t[0] = _add_spec(None, 'quals', t[1])
+
+# struct-declarator-list:
+
+
+def p_struct_declarator_list_1(t):
+    'struct_declarator_list : struct_declarator'
+    t[0] = [t[1]]
+
+
+def p_struct_declarator_list_2(t):
+    'struct_declarator_list : struct_declarator_list COMMA struct_declarator'
+    t[1].append(t[3])
+    t[0] = t[1]
+
+# struct-declarator:
+
+
+def p_struct_declarator_1(t):
+    'struct_declarator : declarator'
+    t[0] = (t[1], None)
+
+
+def p_struct_declarator_2(t):
+    'struct_declarator : declarator COLON constant_expression'
+    t[0] = (t[1], t[3])
+
+
+def p_struct_declarator_3(t):
+    'struct_declarator : COLON constant_expression'
+    t[0] = (None, t[2])
+
+# enum-specifier:
+
+
+def p_enum_specifier_1(t):
+    'enum_specifier : ENUM ID LBRACE enumerator_list RBRACE'
+    t[0] = node.Enum(_atom(t[2]), t[4], _lineno(t, 1))
+
+
+def p_enum_specifier_2(t):
+    'enum_specifier : ENUM LBRACE enumerator_list RBRACE'
+    t[0] = node.Enum(None, t[3], _lineno(t, 1))
+
+
+def p_enum_specifier_3(t):
+    'enum_specifier : ENUM ID'
+    t[0] = node.Enum(_atom(t[2]), None, _lineno(t, 1))
+
+# enumerator_list:
+
+
+def p_enumerator_list_1(t):
+    'enumerator_list : enumerator'
+    t[0] = [t[1]]
+
+
+def p_enumerator_list_2(t):
+    'enumerator_list : enumerator_list COMMA enumerator'
+    t[1].append(t[3])
+    t[0] = t[1]
+
+# enumerator:
+
+
+def p_enumerator_1(t):
+    'enumerator : ID'
+    t[0] = node.Enumerator(_atom(t[1]), None, _lineno(t, 1))
+
+
+def p_enumerator_2(t):
+    'enumerator : ID ASSIGN constant_expression'
+    t[0] = node.Enumerator(_atom(t[1]), t[3], _lineno(t, 1))
+
+# declarator:
+
+
+def p_declarator_1(t):
+    'declarator : pointer direct_declarator'
+    t[0] = _type_modify_decl(t[2], t[1])
+
+
+def p_declarator_2(t):
+    'declarator : direct_declarator'
+    t[0] = t[1]
+
+# direct-declarator:
+
+
+def p_direct_declarator_1(t):
+    'direct_declarator : ID'
+    t[0] = node.TypeDecl(_atom(t[1]), [], None, _lineno(t, 1))
+
+
+def p_direct_declarator_2(t):
+    'direct_declarator : LPAREN declarator RPAREN'
+    t[0] = t[2]
+
+
+def p_direct_declarator_3(t):
+    'direct_declarator : direct_declarator LBRACKET constant_expression_opt RBRACKET'
+    t[0] = _type_modify_decl(t[1], node.ArrayDecl(None, t[3], t[1].lineno))
+
+
+def p_direct_declarator_4(t):
+    'direct_declarator : direct_declarator LPAREN parameter_type_list RPAREN '
+    # Abstract parameters such as (void) have no token to take a line from.
+    _fill_lineno(t[3], _lineno(t, 2))
+    t[0] = _type_modify_decl(t[1], node.FuncDecl(t[3], None, t[1].lineno))
+
+
+def p_direct_declarator_5(t):
+    'direct_declarator : direct_declarator LPAREN identifier_list RPAREN '
+    t[0] = _type_modify_decl(t[1], node.FuncDecl(node.ParamList(t[3], t[1].lineno), None, t[1].lineno))
+
+
+def p_direct_declarator_6(t):
+    'direct_declarator : direct_declarator LPAREN RPAREN '
+    t[0] = _type_modify_decl(t[1], node.FuncDecl(None, None, t[1].lineno))
+
+# pointer:
+
+
+def p_pointer_1(t):
+    'pointer : ASTERISK type_qualifier_list'
+    t[0] = node.PtrDecl(t[2], None, _lineno(t, 1))
+
+
+def p_pointer_2(t):
+    'pointer : ASTERISK'
+    t[0] = node.PtrDecl([], None, _lineno(t, 1))
+
+
+def p_pointer_3(t):
+    'pointer : ASTERISK type_qualifier_list pointer'
+    t[0] = _nest_pointer(t[3], node.PtrDecl(t[2], None, _lineno(t, 1)))
+
+
+def p_pointer_4(t):
+    'pointer : ASTERISK pointer'
+    t[0] = _nest_pointer(t[2], node.PtrDecl([], None, _lineno(t, 1)))
+
+# type-qualifier-list:
+
+
+def p_type_qualifier_list_1(t):
+    'type_qualifier_list : type_qualifier'
+    t[0] = [t[1]]
+
+
+def p_type_qualifier_list_2(t):
+    'type_qualifier_list : type_qualifier_list type_qualifier'
+    t[1].append(t[2])
+    t[0] = t[1]
+
+# parameter-type-list:
+
+
+def p_parameter_type_list_1(t):
+    'parameter_type_list : parameter_list'
+    t[0] = node.ParamList(t[1], t[1][0].lineno)
+
+
+def p_parameter_type_list_2(t):
+    'parameter_type_list : parameter_list COMMA ELLIPSIS'
+    t[1].append(node.EllipsisParam(_lineno(t, 3)))
+    t[0] = node.ParamList(t[1], t[1][0].lineno)
+
+# parameter-list:
+
+
+def p_parameter_list_1(t):
+    'parameter_list : parameter_declaration'
+    t[0] = [t[1]]
+
+
+def p_parameter_list_2(t):
+    'parameter_list : parameter_list COMMA parameter_declaration'
+    t[1].append(t[3])
+    t[0] = t[1]
+
+# parameter-declaration:
+
+
+def p_parameter_declaration_1(t):
+    'parameter_declaration : declaration_specifiers declarator'
+    t[0] = _make_decl(t[1], t[2], None)
+
+
+def p_parameter_declaration_2(t):
+    'parameter_declaration : declaration_specifiers abstract_declarator_opt'
+    t[0] = _make_decl(t[1], t[2], None)
+
+# identifier-list:
+
+
+def p_identifier_list_1(t):
+    'identifier_list : ID'
+    t[0] = [node.ID(_atom(t[1]), _lineno(t, 1))]
+
+
+def p_identifier_list_2(t):
+    'identifier_list : identifier_list COMMA ID'
+    t[1].append(node.ID(_atom(t[3]), _lineno(t, 3)))
+    t[0] = t[1]
+
+# initializer:
+
+
+def p_initializer_1(t):
+    'initializer : assignment_expression'
+    t[0] = t[1]
+
+
+def p_initializer_2(t):
+    '''initializer : LBRACE initializer_list RBRACE
+                   | LBRACE initializer_list COMMA RBRACE'''
+    t[0] = node.InitList(t[2], _lineno(t, 1))
+
+# initializer-list:
+
+
+def p_initializer_list_1(t):
+    'initializer_list : initializer'
+    t[0] = [t[1]]
+
+
+def p_initializer_list_2(t):
+    'initializer_list : initializer_list COMMA initializer'
+    t[1].append(t[3])
+    t[0] = t[1]
+
+# type-name:
+
+
+def p_type_name(t):
+    'type_name : specifier_qualifier_list abstract_declarator_opt'
+    t[0] = node.Typename(t[1]['quals'], _fix_decl(t[2], t[1]))
+
+
+def p_abstract_declarator_opt_1(t):
+    'abstract_declarator_opt : empty'
+    t[0] = None
+
+
+def p_abstract_declarator_opt_2(t):
+    'abstract_declarator_opt : abstract_declarator'
+    t[0] = t[1]
+
+# abstract-declarator:
+
+
+def p_abstract_declarator_1(t):
+    'abstract_declarator : pointer '
+    t[0] = _type_modify_decl(node.TypeDecl(None, [], None, t[1].lineno), t[1])
+
+
+def p_abstract_declarator_2(t):
+    'abstract_declarator : pointer direct_abstract_declarator'
+    t[0] = _type_modify_decl(t[2], t[1])
+
+
+def p_abstract_declarator_3(t):
+    'abstract_declarator : direct_abstract_declarator'
+    t[0] = t[1]
+
+# direct-abstract-declarator:
+
+
+def p_direct_abstract_declarator_1(t):
+    'direct_abstract_declarator : LPAREN abstract_declarator RPAREN'
+    t[0] = t[2]
+
+
+def p_direct_abstract_declarator_2(t):
+    'direct_abstract_declarator : direct_abstract_declarator LBRACKET constant_expression_opt RBRACKET'
+    t[0] = _type_modify_decl(t[1], node.ArrayDecl(None, t[3], t[1].lineno))
+
+
+def p_direct_abstract_declarator_3(t):
+    'direct_abstract_declarator : LBRACKET constant_expression_opt RBRACKET'
+    lineno = _lineno(t, 1)
+    t[0] = node.ArrayDecl(node.TypeDecl(None, [], None, lineno), t[2], lineno)
+
+
+def p_direct_abstract_declarator_4(t):
+    'direct_abstract_declarator : direct_abstract_declarator LPAREN parameter_type_list_opt RPAREN'
+    t[0] = _type_modify_decl(t[1], node.FuncDecl(t[3], None, t[1].lineno))
+
+
+def p_direct_abstract_declarator_5(t):
+    'direct_abstract_declarator : LPAREN parameter_type_list_opt RPAREN'
+    lineno = _lineno(t, 1)
+    t[0] = node.FuncDecl(t[2], node.TypeDecl(None, [], None, lineno), lineno)
+
+# Optional fields in abstract declarators
+
+
+def p_constant_expression_opt_1(t):
+    'constant_expression_opt : empty'
+    t[0] = None
+
+
+def p_constant_expression_opt_2(t):
+    'constant_expression_opt : constant_expression'
+    t[0] = t[1]
+
+
+def p_parameter_type_list_opt_1(t):
+    'parameter_type_list_opt : empty'
+    t[0] = None
+
+
+def p_parameter_type_list_opt_2(t):
+    'parameter_type_list_opt : parameter_type_list'
+    t[0] = t[1]
+
+# statement:
+
+
+def p_statement(t):
+    '''
+    statement : labeled_statement
+              | expression_statement
+              | compound_statement
+              | selection_statement
+              | iteration_statement
+              | jump_statement
+              '''
+    t[0] = t[1]
+
+# labeled-statement:
+
+
+def p_labeled_statement_1(t):
+    'labeled_statement : ID COLON statement'
+    t[0] = node.Label(_atom(t[1]), t[3], _lineno(t, 1))
+
+
+def p_labeled_statement_2(t):
+    'labeled_statement : CASE constant_expression COLON statement'
+    t[0] = node.Case(t[2], t[4], _lineno(t, 1))
+
+
+def p_labeled_statement_3(t):
+    'labeled_statement : DEFAULT COLON statement'
+    t[0] = node.Default(t[3], _lineno(t, 1))
+
+# expression-statement:
+
+
+def p_expression_statement(t):
+    'expression_statement : expression_opt SEMI_COLON'
+    if t[1] is None:
+        t[0] = node.EmptyStatement(_lineno(t, 2))
+    else:
+        t[0] = t[1]
+
+# compound-statement:
+
+
+def p_compound_statement_1(t):
+    'compound_statement : LBRACE declaration_list statement_list RBRACE'
+    t[0] = node.Compound(t[2] + t[3], _lineno(t, 1), _lineno(t, 4))
+
+
+def p_compound_statement_2(t):
+    'compound_statement : LBRACE statement_list RBRACE'
+    t[0] = node.Compound(t[2], _lineno(t, 1), _lineno(t, 3))
+
+
+def p_compound_statement_3(t):
+    'compound_statement : LBRACE declaration_list RBRACE'
+    t[0] = node.Compound(t[2], _lineno(t, 1), _lineno(t, 3))
+
+
+def p_compound_statement_4(t):
+    'compound_statement : LBRACE RBRACE'
+    t[0] = node.Compound([], _lineno(t, 1), _lineno(t, 2))
+
+# statement-list:
+
+
+def p_statement_list_1(t):
+    'statement_list : statement'
+    t[0] = [t[1]]
+
+
+def p_statement_list_2(t):
+    'statement_list : statement_list statement'
+    t[1].append(t[2])
+    t[0] = t[1]
+
+# selection-statement
+
+
+def p_selection_statement_1(t):
+    'selection_statement : IF LPAREN expression RPAREN statement'
+    t[0] = node.If(t[3], t[5], None, _lineno(t, 1))
+
+
+def p_selection_statement_2(t):
+    'selection_statement : IF LPAREN expression RPAREN statement ELSE statement '
+    t[0] = node.If(t[3], t[5], t[7], _lineno(t, 1))
+
+
+def p_selection_statement_3(t):
+    'selection_statement : SWITCH LPAREN expression RPAREN statement '
+    t[0] = node.Switch(t[3], t[5], _lineno(t, 1))
+
+# iteration_statement:
+
+
+def p_iteration_statement_1(t):
+    'iteration_statement : WHILE LPAREN expression RPAREN statement'
+    t[0] = node.While(t[3], t[5], _lineno(t, 1))
+
+
+def p_iteration_statement_2(t):
+    'iteration_statement : FOR LPAREN expression_opt SEMI_COLON expression_opt SEMI_COLON expression_opt RPAREN statement '
+    t[0] = node.For(t[3], t[5], t[7], t[9], _lineno(t, 1))
+
+
+def p_iteration_statement_3(t):
+    'iteration_statement : DO statement WHILE LPAREN expression RPAREN SEMI_COLON'
+    t[0] = node.DoWhile(t[5], t[2], _lineno(t, 1))
+
+# jump_statement:
+
+
+def p_jump_statement_1(t):
+    'jump_statement : GOTO ID SEMI_COLON'
+    t[0] = node.Goto(_atom(t[2]), _lineno(t, 1))
+
+
+def p_jump_statement_2(t):
+    'jump_statement : CONTINUE SEMI_COLON'
+    t[0] = node.Continue(_lineno(t, 1))
+
+
+def p_jump_statement_3(t):
+    'jump_statement : BREAK SEMI_COLON'
+    t[0] = node.Break(_lineno(t, 1))
+
+
+def p_jump_statement_4(t):
+    'jump_statement : RETURN expression_opt SEMI_COLON'
+    t[0] = node.Return(t[2], _lineno(t, 1))
+
+
+def p_expression_opt_1(t):
+    'expression_opt : empty'
+    t[0] = None
+
+
+def p_expression_opt_2(t):
+    'expression_opt : expression'
+    t[0] = t[1]
+
+# expression:
+
+
+def p_expression_1(t):
+    'expression : assignment_expression'
+    t[0] = t[1]
+
+
+def p_expression_2(t):
+    'expression : expression COMMA assignment_expression'
+    if isinstance(t[1], node.ExprList):
+        t[1].exprs.append(t[3])
+        t[0] = t[1]
+    else:
+        t[0] = node.ExprList([t[1], t[3]], t[1].lineno)
+
+# assigment_expression:
+
+
+def p_assignment_expression_1(t):
+    'assignment_expression : conditional_expression'
+    t[0] = t[1]
+
+
+def p_assignment_expression_2(t):
+    'assignment_expression : unary_expression assignment_operator assignment_expression'
+    t[0] = node.Assignment(t[2], t[1], t[3], t[1].lineno)
+
+# assignment_operator:
+
+
+def p_assignment_operator(t):
+    '''
+    assignment_operator : ASSIGN
+                        | MUL_ASSIGN
+                        | DIV_ASSIGN
+                        | MOD_ASSIGN
+                        | ADD_ASSIGN
+                        | SUB_ASSIGN
+                        | B_LSHIFT_ASSIGN
+                        | B_RSHIFT_ASSIGN
+                        | B_AND_ASSIGN
+                        | B_OR_ASSIGN
+                        | B_XOR_ASSIGN
+                        '''
+    t[0] = ASSIGNMENT_OPERATORS[t.slice[1].type]
+
+# conditional-expression
+
+
+def p_conditional_expression_1(t):
+    'conditional_expression : logical_or_expression'
+    t[0] = t[1]
+
+
+def p_conditional_expression_2(t):
+    'conditional_expression : logical_or_expression TERNARY expression COLON conditional_expression '
+    t[0] = node.TernaryOp(t[1], t[3], t[5], t[1].lineno)
+
+# constant-expression
+
+
+def p_constant_expression(t):
+    'constant_expression : conditional_expression'
+    t[0] = t[1]
+
+# logical-or-expression
+
+
+def p_logical_or_expression_1(t):
+    'logical_or_expression : logical_and_expression'
+    t[0] = t[1]
+
+
+def p_logical_or_expression_2(t):
+    'logical_or_expression : logical_or_expression L_OR logical_and_expression'
+    t[0] = node.BinOp('||', t[1], t[3], t[1].lineno)
+
+# logical-and-expression
+
+
+def p_logical_and_expression_1(t):
+    'logical_and_expression : inclusive_or_expression'
+    t[0] = t[1]
+
+
+def p_logical_and_expression_2(t):
+    'logical_and_expression : logical_and_expression L_AND inclusive_or_expression'
+    t[0] = node.BinOp('&&', t[1], t[3], t[1].lineno)
+
+# inclusive-or-expression:
+
+
+def p_inclusive_or_expression_1(t):
+    'inclusive_or_expression : exclusive_or_expression'
+    t[0] = t[1]
+
+
+def p_inclusive_or_expression_2(t):
+    'inclusive_or_expression : inclusive_or_expression B_OR exclusive_or_expression'
+    t[0] = node.BinOp('|', t[1], t[3], t[1].lineno)
+
+# exclusive-or-expression:
+
+
+def p_exclusive_or_expression_1(t):
+    'exclusive_or_expression :  and_expression'
+    t[0] = t[1]
+
+
+def p_exclusive_or_expression_2(t):
+    'exclusive_or_expression :  exclusive_or_expression B_XOR and_expression'
+    t[0] = node.BinOp('^', t[1], t[3], t[1].lineno)
+
+# AND-expression
+
+
+def p_and_expression_1(t):
+    'and_expression : equality_expression'
+    t[0] = t[1]
+
+
+def p_and_expression_2(t):
+    'and_expression : and_expression AMPERSAND equality_expression'
+    t[0] = node.BinOp('&', t[1], t[3], t[1].lineno)
+
+
+# equality-expression:
+def p_equality_expression_1(t):
+    'equality_expression : relational_expression'
+    t[0] = t[1]
+
+
+def p_equality_expression_2(t):
+    'equality_expression : equality_expression EQ relational_expression'
+    t[0] = node.BinOp('==', t[1], t[3], t[1].lineno)
+
+
+def p_equality_expression_3(t):
+    'equality_expression : equality_expression NE relational_expression'
+    t[0] = node.BinOp('!=', t[1], t[3], t[1].lineno)
+
+
+# relational-expression:
+def p_relational_expression_1(t):
+    'relational_expression : shift_expression'
+    t[0] = t[1]
+
+
+def p_relational_expression_2(t):
+    'relational_expression : relational_expression LT shift_expression'
+    t[0] = node.BinOp('<', t[1], t[3], t[1].lineno)
+
+
+def p_relational_expression_3(t):
+    'relational_expression : relational_expression GT shift_expression'
+    t[0] = node.BinOp('>', t[1], t[3], t[1].lineno)
+
+
+def p_relational_expression_4(t):
+    'relational_expression : relational_expression LE shift_expression'
+    t[0] = node.BinOp('<=', t[1], t[3], t[1].lineno)
+
+
+def p_relational_expression_5(t):
+    'relational_expression : relational_expression GE shift_expression'
+    t[0] = node.BinOp('>=', t[1], t[3], t[1].lineno)
+
+# shift-expression
+
+
+def p_shift_expression_1(t):
+    'shift_expression : additive_expression'
+    t[0] = t[1]
+
+
+def p_shift_expression_2(t):
+    'shift_expression : shift_expression B_LSHIFT additive_expression'
+    t[0] = node.BinOp('<<', t[1], t[3], t[1].lineno)
+
+
+def p_shift_expression_3(t):
+    'shift_expression : shift_expression B_RSHIFT additive_expression'
+    t[0] = node.BinOp('>>', t[1], t[3], t[1].lineno)
+
+# additive-expression
+
+
+def p_additive_expression_1(t):
+    'additive_expression : multiplicative_expression'
+    t[0] = t[1]
+
+
+def p_additive_expression_2(t):
+    'additive_expression : additive_expression PLUS multiplicative_expression'
+    t[0] = node.BinOp('+', t[1], t[3], t[1].lineno)
+
+
+def p_additive_expression_3(t):
+    'additive_expression : additive_expression MINUS multiplicative_expression'
+    t[0] = node.BinOp('-', t[1], t[3], t[1].lineno)
+
+# multiplicative-expression
+
+
+def p_multiplicative_expression_1(t):
+    'multiplicative_expression : cast_expression'
+    t[0] = t[1]
+
+
+def p_multiplicative_expression_2(t):
+    'multiplicative_expression : multiplicative_expression ASTERISK cast_expression'
+    t[0] = node.BinOp('*', t[1], t[3], t[1].lineno)
+
+
+def p_multiplicative_expression_3(t):
+    'multiplicative_expression : multiplicative_expression DIV cast_expression'
+    t[0] = node.BinOp('/', t[1], t[3], t[1].lineno)
+
+
+def p_multiplicative_expression_4(t):
+    'multiplicative_expression : multiplicative_expression MOD cast_expression'
+    t[0] = node.BinOp('%', t[1], t[3], t[1].lineno)
+
+# cast-expression:
+
+
+def p_cast_expression_1(t):
+    'cast_expression : unary_expression'
+    t[0] = t[1]
+
+
+def p_cast_expression_2(t):
+    'cast_expression : LPAREN type_name RPAREN cast_expression'
+    _fill_lineno(t[2], _lineno(t, 1))
+    t[0] = node.Cast(t[2], t[4], _lineno(t, 1))
+
+# unary-expression:
+
+
+def p_unary_expression_1(t):
+    'unary_expression : postfix_expression'
+    t[0] = t[1]
+
+
+def p_unary_expression_2(t):
+    'unary_expression : INCREMENT unary_expression'
+    t[0] = node.UnaryOp('++', t[2], _lineno(t, 1))
+
+
+def p_unary_expression_3(t):
+    'unary_expression : DECREMENT unary_expression'
+    t[0] = node.UnaryOp('--', t[2], _lineno(t, 1))
+
+
+def p_unary_expression_4(t):
+    'unary_expression : unary_operator cast_expression'
+    t[0] = node.UnaryOp(t[1], t[2], t[2].lineno)
+
+
+def p_unary_expression_5(t):
+    'unary_expression : SIZEOF unary_expression'
+    t[0] = node.UnaryOp('sizeof', t[2], _lineno(t, 1))
+
+
+def p_unary_expression_6(t):
+    'unary_expression : SIZEOF LPAREN type_name RPAREN'
+    _fill_lineno(t[3], _lineno(t, 1))
+    t[0] = node.UnaryOp('sizeof', t[3], _lineno(t, 1))
+
+# unary-operator
+
+
+def p_unary_operator(t):
+    '''unary_operator : AMPERSAND
+                    | ASTERISK
+                    | PLUS
+                    | MINUS
+                    | B_NOT
+                    | L_NOT '''
+    t[0] = UNARY_OPERATORS[t.slice[1].type]
+
+# postfix-expression:
+
+
+def p_postfix_expression_1(t):
+    'postfix_expression : primary_expression'
+    t[0] = t[1]
+
+
+def p_postfix_expression_2(t):
+    'postfix_expression : postfix_expression LBRACKET expression RBRACKET'
+    t[0] = node.ArrayRef(t[1], t[3], t[1].lineno)
+
+
+def p_postfix_expression_3(t):
+    'postfix_expression : postfix_expression LPAREN argument_expression_list RPAREN'
+    t[0] = node.Call(t[1], t[3], t[1].lineno)
+
+
+def p_postfix_expression_4(t):
+    'postfix_expression : postfix_expression LPAREN RPAREN'
+    t[0] = node.Call(t[1], None, t[1].lineno)
+
+
+def p_postfix_expression_5(t):
+    'postfix_expression : postfix_expression PERIOD ID'
+    t[0] = node.StructRef(t[1], '.', node.ID(_atom(t[3]), _lineno(t, 3)), t[1].lineno)
+
+
+def p_postfix_expression_6(t):
+    'postfix_expression : postfix_expression ARROW ID'
+    t[0] = node.StructRef(t[1], '->', node.ID(_atom(t[3]), _lineno(t, 3)), t[1].lineno)
+
+
+def p_postfix_expression_7(t):
+    'postfix_expression : postfix_expression INCREMENT'
+    t[0] = node.UnaryOp('p++', t[1], t[1].lineno)
+
+
+def p_postfix_expression_8(t):
+    'postfix_expression : postfix_expression DECREMENT'
+    t[0] = node.UnaryOp('p--', t[1], t[1].lineno)
+
+# primary-expression:
+
+
+def p_primary_expression(t):
+    '''primary_expression :  ID
+                        |  constant
+                        |  STR_LITER
+                        |  LPAREN expression RPAREN'''
+    if len(t) == 4:
+        t[0] = t[2]
+    elif t.slice[1].type == 'ID':
+        t[0] = node.ID(_atom(t[1]), _lineno(t, 1))
+    elif t.slice[1].type == 'STR_LITER':
+        t[0] = node.Constant('string', _atom(t[1]), _lineno(t, 1))
+    else:
+        t[0] = t[1]
+
+# argument-expression-list:
+
+
+def p_argument_expression_list(t):
+    '''argument_expression_list :  assignment_expression
+                              |  argument_expression_list COMMA assignment_expression'''
+    if len(t) == 2:
+        t[0] = node.ExprList([t[1]], t[1].lineno)
+    else:
+        t[1].exprs.append(t[3])
+        t[0] = t[1]
+
+# constant:
+
+
+def p_constant(t):
+    '''constant : ICONST
+               | FCONST
+               | CCONST'''
+    value = _text(t[1])
+    t[0] = node.Constant(CONSTANT_TYPES[t.slice[1].type], value, _lineno(t, 1))
+    if t[0].type == 'double' and value[-1] in 'fF':
+        t[0].type = 'float'
+
+
+def p_empty(t):
+    'empty : '
+    t[0] = None
+
+
+def p_error(t):
+    if t is None:
+        end_error(_lexer)
+        return
+    lineno, column = lexical_analyzer.find_position(t.lexer, t.lexpos)
+    print("%d:%d: Syntax error at %r" % (lineno, column, tokbuf.as_text(t.value)))
+
+
+# The parser is built on first use: importing this module only defines the
+# grammar, and the LALR tables are loaded from the table cache (or generated
+# and cached) by the first get_parser() call.
+_parser = None
+_fast_parser = None
+# The lexer of the parse in progress, for p_error at the end of input.
+_lexer = None
+
+
+def end_error(lexer):
+    """Report a syntax error at the end of the input of lexer, if known."""
+    if lexer is None:
+        print("Syntax error at end of input")
+    else:
+        lineno, column = end_position(lexer)
+        print("%d:%d: Syntax error at end of input" % (lineno, column))
+
+
+def end_position(lexer):
+    """The (lineno, column) of the last character of the input of lexer
+    that is not white space."""
+    data = lexer.lexdata
+    pos = len(data)
+    while pos > 0 and data[pos - 1:pos].isspace():
+        pos -= 1
+    return lexical_analyzer.find_position(lexer, max(pos - 1, 0))
+
+
+def get_parser():
+    global _parser
+    if _parser is None:
+        import tabcache
+        _parser = tabcache.build_parser(sys.modules[__name__])
+    return _parser
+
+
+def get_fast_parser():
+    """Return a fastparse.FastParser running on the get_parser() tables."""
+    global _fast_parser
+    if _fast_parser is None:
+        import fastparse
+        _fast_parser = fastparse.FastParser(get_parser())
+    return _fast_parser
+
+
+def parse(data, lexer=None, debug=False):
+    """Parse a translation unit and return its node.TranslationUnit."""
+    global _lexer
+    if lexer is None:
+        lexer = lexical_analyzer.get_lexer()
+    _lexer = lexer
+    if debug:
+        return get_parser().parse(data, lexer=lexer, debug=debug)
+    return get_fast_parser().parse(data, lexer=lexer)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            data = f.read()
+    else:
+        data = sys.stdin.read()
+    ast = parse(data)
+    if ast is not None:
+        ast.show()
@@ -0,0 +1,299 @@
+# ----------------------------------------------------------------------
+# tabcache.py
+#
+# A persistent, content-addressed cache of the LALR tables built by
+# lalrgen (the same tables as ply.yacc).  Tables are keyed by a hash of
+# the grammar (start symbol, precedence, token list and the docstrings of
+# every p_* function) and stored as a compressed marshal blob, so that a
+# process only pays for table generation the first time a given grammar
+# is seen.
+#
+# The file also holds the densetab encoding of the tables as raw arrays
+# after the blob:
+#
+#   MAGIC  version  header-size(4)  zlib(marshal(header))  pad  arrays...
+#
+# The file is memory-mapped and the arrays are used in place through
+# memoryview casts, so loading them copies nothing.
+#
+# A cache hit imports neither lalrgen nor ply.yacc: build_parser() then
+# returns a CachedParser, which has the tables the fast parse loop reads
+# and builds a ply.yacc.LRParser only when it is asked to parse itself
+# (for error recovery, debugging or tracking).  The generator is only
+# imported on a miss.
+# ----------------------------------------------------------------------
+
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import types
+import zlib
+
+import densetab
+
+
+CACHE_VERSION = 2
+# The ply.yacc.__tabversion__ of the table format, part of the key; ply
+# is vendored in lib/, so it only changes with the tree.
+TABVERSION = '3.10'
+CACHE_MAGIC = b'ARTIDE-LRTAB\x00'
+HEADER_SIZE = struct.Struct('<I')
+ALIGN = 8
+
+# ARTIDE_CACHE_DIR overrides the cache location; ARTIDE_TABCACHE=0 bypasses
+# the cache entirely.
+CACHE_ENV_DIR = 'ARTIDE_CACHE_DIR'
+CACHE_ENV_ENABLE = 'ARTIDE_TABCACHE'
+
+
+def cache_dir():
+    path = os.environ.get(CACHE_ENV_DIR)
+    if path:
+        return path
+    base = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'artide')
+
+
+def cache_enabled():
+    return os.environ.get(CACHE_ENV_ENABLE, '1') not in ('0', 'no', 'off', '')
+
+
+def grammar_signature(pdict):
+    """Return the grammar signature of a parser module dictionary.
+
+    This is the same information ply.yacc.ParserReflect.signature() hashes,
+    collected without the inspect-based module lookups.
+    """
+    parts = [repr(pdict.get('start'))]
+    prec = pdict.get('precedence')
+    if prec:
+        parts.append(''.join([''.join(p) for p in prec]))
+    parts.append(' '.join(sorted(pdict['tokens'])))
+    pfuncs = []
+    for name, item in pdict.items():
+        if name.startswith('p_') and name != 'p_error' and \
+                isinstance(item, types.FunctionType):
+            pfuncs.append((item.__code__.co_firstlineno, name, item.__doc__ or ''))
+    pfuncs.sort()
+    for line, name, doc in pfuncs:
+        parts.append(name)
+        parts.append(doc)
+    return '\n'.join(parts)
+
+
+def grammar_key(pdict, method='LALR'):
+    h = hashlib.sha256()
+    h.update(('%d:%s:%s:' % (CACHE_VERSION, TABVERSION, method)).encode())
+    h.update(grammar_signature(pdict).encode('utf-8'))
+    return h.hexdigest()
+
+
+def cache_path(key):
+    return os.path.join(cache_dir(), 'lrtab-%s.bin' % key)
+
+
+def dump_tables(lr, key, method='LALR', dense=None):
+    """Serialize an LRTable (or LRParser) into the on-disk cache format."""
+    if hasattr(lr, 'lr_action'):
+        action, goto, productions = lr.lr_action, lr.lr_goto, lr.lr_productions
+    else:
+        action, goto, productions = lr.action, lr.goto, lr.productions
+    if dense is None:
+        dense = densetab.encode(action, goto, productions)
+
+    prods = []
+    for p in productions:
+        if p.func:
+            prods.append((p.str, p.name, p.len, p.func,
+                          os.path.basename(p.file), p.line))
+        else:
+            prods.append((str(p), p.name, p.len, None, None, None))
+
+    # Array offsets are relative to the first aligned offset after the
+    # header.
+    blobs = [getattr(dense, name).tobytes() for name in densetab.ARRAYS]
+    layout = []
+    offset = 0
+    for name, blob in zip(densetab.ARRAYS, blobs):
+        layout.append((name, offset, len(blob)))
+        offset += len(blob) + -len(blob) % ALIGN
+    payload = marshal.dumps((key, method, action, goto, tuple(prods), sys.byteorder,
+                             dense.terminals, dense.nonterminals, tuple(layout)))
+    compressed = zlib.compress(payload, 6)
+
+    out = [CACHE_MAGIC, bytes([CACHE_VERSION]), HEADER_SIZE.pack(len(compressed)), compressed]
+    out.append(bytes(-sum(map(len, out)) % ALIGN))
+    for blob in blobs:
+        out.append(blob)
+        out.append(bytes(-len(blob) % ALIGN))
+    return b''.join(out)
+
+
+class Production:
+    """A production of cached tables, as a ply.yacc.MiniProduction."""
+
+    __slots__ = ('str', 'name', 'len', 'func', 'callable', 'file', 'line')
+
+    def __init__(self, str, name, len, func, file, line):
+        self.str = str
+        self.name = name
+        self.len = len
+        self.func = func
+        self.callable = None
+        self.file = file
+        self.line = line
+
+    def __str__(self):
+        return self.str
+
+    def __repr__(self):
+        return 'Production(%s)' % self.str
+
+
+class Tables:
+    """Tables read from the cache, with the attributes of an LRTable."""
+
+    def __init__(self, method, action, goto, productions, dense):
+        self.lr_method = method
+        self.lr_action = action
+        self.lr_goto = goto
+        self.lr_productions = productions
+        self.dense = dense
+
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            if p.func:
+                p.callable = pdict[p.func]
+
+
+class CachedParser:
+    """The parser of cached tables.
+
+    It has the attributes of a ply.yacc.LRParser that fastparse and
+    incremental read (productions, action, goto, errorfunc and dense);
+    parse() builds the LRParser on first use.
+    """
+
+    def __init__(self, lr, errorf):
+        self.productions = lr.lr_productions
+        self.action = lr.lr_action
+        self.goto = lr.lr_goto
+        self.errorfunc = errorf
+        self.dense = lr.dense
+        self.parser = None
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None):
+        if self.parser is None:
+            import ply.yacc as yacc
+            lr = yacc.LRTable()
+            lr.lr_productions = self.productions
+            lr.lr_action = self.action
+            lr.lr_goto = self.goto
+            self.parser = yacc.LRParser(lr, self.errorfunc)
+        return self.parser.parse(input, lexer, debug, tracking, tokenfunc)
+
+
+def load_tables(data, key):
+    """Rebuild the Tables of cache data, or return None if it is
+    unusable.
+
+    The densetab tables are attached to the result as lr.dense; their
+    arrays are views of data.
+    """
+    prefix = len(CACHE_MAGIC) + 1 + HEADER_SIZE.size
+    if len(data) < prefix or data[:len(CACHE_MAGIC)] != CACHE_MAGIC or \
+            data[len(CACHE_MAGIC)] != CACHE_VERSION:
+        return None
+    size, = HEADER_SIZE.unpack(data[prefix - HEADER_SIZE.size:prefix])
+    try:
+        stored_key, method, action, goto, prods, byteorder, terminals, \
+            nonterminals, layout = marshal.loads(zlib.decompress(data[prefix:prefix + size]))
+    except (ValueError, EOFError, TypeError, zlib.error):
+        return None
+    if stored_key != key or byteorder != sys.byteorder:
+        return None
+
+    start = prefix + size
+    start += -start % ALIGN
+    view = memoryview(data)
+    arrays = {}
+    for name, offset, nbytes in layout:
+        offset += start
+        if offset + nbytes > len(data):
+            return None
+        arrays[name] = view[offset:offset + nbytes].cast(densetab.TYPECODE)
+
+    return Tables(method, action, goto, [Production(*p) for p in prods],
+                  densetab.DenseTables(terminals, nonterminals, arrays))
+
+
+def read_cache(key):
+    try:
+        with open(cache_path(key), 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    return load_tables(data, key)
+
+
+def write_cache(key, data):
+    """Atomically publish a cache file.
+
+    The tables are written to a private temporary file in the cache
+    directory and renamed into place, so concurrent readers only ever see
+    a complete file and concurrent writers simply race to an identical
+    result.
+    """
+    path = cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.lrtab-', dir=os.path.dirname(path))
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def generate_parser(module, method='LALR', errorlog=None):
+    """Generate the tables of a grammar module; return its LRParser."""
+    import lalrgen
+    parser = lalrgen.make_parser(module, method, errorlog=errorlog)
+    parser.dense = densetab.encode(parser.action, parser.goto, parser.productions)
+    return parser
+
+
+def build_parser(module, method='LALR', errorlog=None):
+    """Return a parser for a grammar module, using the table cache: a
+    CachedParser on a hit, else the LRParser of generated tables.
+
+    The parser carries the densetab encoding of its tables as
+    parser.dense.
+    """
+    pdict = vars(module)
+    if not cache_enabled():
+        return generate_parser(module, method, errorlog)
+
+    key = grammar_key(pdict, method)
+    lr = read_cache(key)
+    if lr is not None:
+        lr.bind_callables(pdict)
+        return CachedParser(lr, pdict.get('p_error'))
+
+    parser = generate_parser(module, method, errorlog)
+    write_cache(key, dump_tables(parser, key, method, parser.dense))
+    return parser
@@ -0,0 +1,756 @@
+# ----------------------------------------------------------------------
+# tac.py
+#
+# The three-address code of the middle end, and its generator from the
+# AST (after semantic_analyzer has typed it and inserted the casts).
+#
+# Instructions are not objects.  The code of a function is a Quads: one
+# array of opcodes and three arrays of operands, a (usually the
+# destination), b and c, plus the source line of each instruction.  An
+# operand is an integer id into the Symbols of the program, which keeps
+# the kind, type and value of every temporary, variable, constant, label
+# and function, again as parallel columns; id 0 stands for no operand.
+#
+#   op      a       b       c         text
+#   COPY    dst     src               dst = src
+#   CONV    dst     src               dst = (type of dst) src
+#   ADD..NE dst     left    right     dst = left + right
+#   NEG, NOT, INV   dst     src       dst = -src, !src, ~src
+#   ADDR    dst     var               dst = &var
+#   LOAD    dst     ptr               dst = *ptr
+#   STORE   ptr     src               *ptr = src
+#   LABEL   label                     label:
+#   JUMP    label                     goto label
+#   JZ, JNZ label   cond              ifz cond goto label / if cond goto label
+#   PARAM           src               param src
+#   CALL    dst     func    nargs     dst = call func, nargs
+#   RET             src               return src
+#
+# Pointers count in elements: p + i is an ADD of a pointer and an int.
+#
+#   python src/tac.py FILE
+#
+# prints the code of a mini-C file.
+# ----------------------------------------------------------------------
+
+import sys
+from array import array
+
+import atoms
+import node
+import semantic_analyzer
+import symtab
+import typetab
+from typetab import VOID, CHAR, INT
+
+
+# Opcodes
+(NOP, LABEL, COPY, CONV,
+ ADD, SUB, MUL, DIV, MOD, SHL, SHR, AND, OR, XOR,
+ LT, GT, LE, GE, EQ, NE,
+ NEG, NOT, INV,
+ ADDR, LOAD, STORE,
+ JUMP, JZ, JNZ, PARAM, CALL, RET) = range(32)
+
+OPNAMES = ('nop', 'label', 'copy', 'conv',
+           'add', 'sub', 'mul', 'div', 'mod', 'shl', 'shr', 'and', 'or', 'xor',
+           'lt', 'gt', 'le', 'ge', 'eq', 'ne',
+           'neg', 'not', 'inv',
+           'addr', 'load', 'store',
+           'jump', 'jz', 'jnz', 'param', 'call', 'ret')
+
+# C operator <-> opcode
+BINARY = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '%': MOD, '<<': SHL, '>>': SHR,
+          '&': AND, '|': OR, '^': XOR,
+          '<': LT, '>': GT, '<=': LE, '>=': GE, '==': EQ, '!=': NE}
+UNARY = {'-': NEG, '!': NOT, '~': INV}
+SYMBOLS = dict((op, sym) for sym, op in BINARY.items())
+SYMBOLS.update((op, sym) for sym, op in UNARY.items())
+
+# Which operands an instruction defines and which it reads.  (ADDR takes
+# the address of b without reading it; CALL reads b, a function or a
+# pointer to one, and its c is a count.)
+DEF_A = frozenset((COPY, CONV, ADD, SUB, MUL, DIV, MOD, SHL, SHR, AND, OR, XOR,
+                   LT, GT, LE, GE, EQ, NE, NEG, NOT, INV, ADDR, LOAD, CALL))
+USE_A = frozenset((STORE,))
+USE_B = frozenset((COPY, CONV, ADD, SUB, MUL, DIV, MOD, SHL, SHR, AND, OR, XOR,
+                   LT, GT, LE, GE, EQ, NE, NEG, NOT, INV, LOAD, STORE, JZ, JNZ, PARAM, CALL,
+                   RET))
+USE_C = frozenset((ADD, SUB, MUL, DIV, MOD, SHL, SHR, AND, OR, XOR, LT, GT, LE, GE, EQ, NE))
+
+# Operand kinds
+TEMP, VAR, GLOBAL, CONST, STRING, LABEL_ID, FUNC = range(1, 8)
+
+
+class Symbols:
+    """The operands of a program, by id.
+
+    kind, type and value are columns: value is the name (an atoms.Atom)
+    of a variable or function, the number of a temporary or label within
+    its function, the Python value of a constant, and the literal text of
+    a string.  Constants are shared: there is one id per type and value.
+    """
+
+    __slots__ = ('kind', 'type', 'value', '_consts')
+
+    def __init__(self):
+        self.kind = array('B', [0])
+        self.type = [VOID]
+        self.value = [None]
+        self._consts = {}
+
+    def __len__(self):
+        return len(self.kind)
+
+    def add(self, kind, type, value):
+        self.kind.append(kind)
+        self.type.append(type)
+        self.value.append(value)
+        return len(self.kind) - 1
+
+    def const(self, type, value):
+        key = (type, value)
+        sid = self._consts.get(key)
+        if sid is None:
+            sid = self._consts[key] = self.add(CONST, type, value)
+        return sid
+
+    def name(self, sid):
+        """The text of operand sid in the dump."""
+        kind = self.kind[sid]
+        value = self.value[sid]
+        if kind == TEMP:
+            return 't%d' % value
+        if kind == LABEL_ID:
+            return 'L%d' % value
+        if kind == CONST:
+            return repr(value)
+        return str(value)
+
+    def nbytes(self):
+        return self.kind.itemsize * len(self.kind) + sys.getsizeof(self.type) + \
+            sys.getsizeof(self.value)
+
+
+class Quads:
+    """A sequence of instructions as parallel columns."""
+
+    __slots__ = ('op', 'a', 'b', 'c', 'line')
+
+    def __init__(self):
+        self.op = array('B')
+        self.a = array('i')
+        self.b = array('i')
+        self.c = array('i')
+        self.line = array('i')
+
+    def __len__(self):
+        return len(self.op)
+
+    def emit(self, op, a=0, b=0, c=0, line=0):
+        self.op.append(op)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        self.line.append(line)
+        return len(self.op) - 1
+
+    def __getitem__(self, i):
+        return self.op[i], self.a[i], self.b[i], self.c[i]
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column)
+                   for column in (self.op, self.a, self.b, self.c, self.line))
+
+
+class Function:
+    """The code of one function: params and locals are operand ids."""
+
+    __slots__ = ('name', 'sid', 'type', 'params', 'locals', 'code', 'ntemps', 'nlabels', 'lineno')
+
+    def __init__(self, name, sid, type, lineno=None):
+        self.name = name
+        self.sid = sid
+        self.type = type
+        self.params = []
+        self.locals = []
+        self.code = Quads()
+        self.ntemps = 0
+        self.nlabels = 0
+        self.lineno = lineno
+
+
+class Program:
+    """The TAC of a translation unit.
+
+    functions maps names to Functions in order of definition; globals
+    lists the ids of the file-scope variables, whose initializers are
+    the code of the function INIT, run before main.
+    """
+
+    def __init__(self):
+        self.symbols = Symbols()
+        self.functions = {}
+        self.globals = []
+
+    def instructions(self):
+        return sum(len(f.code) for f in self.functions.values())
+
+    def nbytes(self):
+        return self.symbols.nbytes() + sum(f.code.nbytes() for f in self.functions.values())
+
+
+INIT = atoms.intern('.init')
+
+
+def format_quad(symbols, op, a, b, c):
+    """The text of one instruction."""
+    name = symbols.name
+    if op == LABEL:
+        return '%s:' % name(a)
+    if op == COPY:
+        return '    %s = %s' % (name(a), name(b))
+    if op == CONV:
+        return '    %s = (%s) %s' % (name(a), symbols.type[a], name(b))
+    if ADD <= op <= NE:
+        return '    %s = %s %s %s' % (name(a), name(b), SYMBOLS[op], name(c))
+    if op in (NEG, NOT, INV):
+        return '    %s = %s%s' % (name(a), SYMBOLS[op], name(b))
+    if op == ADDR:
+        return '    %s = &%s' % (name(a), name(b))
+    if op == LOAD:
+        return '    %s = *%s' % (name(a), name(b))
+    if op == STORE:
+        return '    *%s = %s' % (name(a), name(b))
+    if op == JUMP:
+        return '    goto %s' % name(a)
+    if op == JZ:
+        return '    ifz %s goto %s' % (name(b), name(a))
+    if op == JNZ:
+        return '    if %s goto %s' % (name(b), name(a))
+    if op == PARAM:
+        return '    param %s' % name(b)
+    if op == CALL:
+        if a:
+            return '    %s = call %s, %d' % (name(a), name(b), c)
+        return '    call %s, %d' % (name(b), c)
+    if op == RET:
+        return '    return %s' % name(b) if b else '    return'
+    return '    ' + OPNAMES[op]
+
+
+def dump(program, out=sys.stdout):
+    symbols = program.symbols
+    for sid in program.globals:
+        out.write('global %s\n' % symbols.type[sid].spell(symbols.name(sid)))
+    for f in program.functions.values():
+        params = ', '.join(symbols.type[p].spell(symbols.name(p)) for p in f.params)
+        out.write('\nfunction %s(%s):\n' % (f.name, params))
+        for sid in f.locals:
+            out.write('    local %s\n' % symbols.type[sid].spell(symbols.name(sid)))
+        code = f.code
+        for i in range(len(code)):
+            out.write(format_quad(symbols, code.op[i], code.a[i], code.b[i], code.c[i]) + '\n')
+
+
+class Generator:
+    """Translates an analyzed TranslationUnit to a Program."""
+
+    def __init__(self):
+        self.program = Program()
+        self.symbols = self.program.symbols
+        self.symtab = symtab.SymTab()
+        # SymTabEntry -> operand id
+        self.sids = {}
+        self.function = None
+        self.code = None
+        self.line = 0
+        self.breaks = []
+        self.continues = []
+        # id(Case or Default) -> label, for the enclosing switches
+        self.cases = {}
+        self.labels = {}
+        # Names given to the locals of the current function so far.
+        self.names = {}
+        self._dispatch = {}
+
+    def visit(self, n):
+        method = self._dispatch.get(type(n))
+        if method is None:
+            method = self._dispatch[type(n)] = getattr(self, 'gen_' + type(n).__name__)
+        return method(n)
+
+    def emit(self, op, a=0, b=0, c=0):
+        return self.code.emit(op, a, b, c, self.line)
+
+    # Operands
+
+    def temp(self, t):
+        f = self.function
+        f.ntemps += 1
+        return self.symbols.add(TEMP, t, f.ntemps)
+
+    def label(self):
+        f = self.function
+        f.nlabels += 1
+        return self.symbols.add(LABEL_ID, VOID, f.nlabels)
+
+    def const(self, t, value):
+        return self.symbols.const(t, value)
+
+    def declare(self, name, t, kind, lineno=None):
+        """Add a variable or function to the current scope; return its id."""
+        if kind == VAR:
+            # Locals that share a name within a function are told apart
+            # in the dump as name.1, name.2, ...
+            seen = self.names.get(name, 0)
+            self.names[name] = seen + 1
+            value = atoms.intern('%s.%d' % (name, seen)) if seen else name
+        else:
+            value = name
+        entry = symtab.SymTabEntry(name, t, lineno=lineno)
+        try:
+            self.symtab.insert(entry)
+        except symtab.DupDeclError:
+            # A function declared before its definition.
+            return self.sids[self.symtab.cur.table[name]]
+        sid = self.sids[entry] = self.symbols.add(kind, t, value)
+        return sid
+
+    def lookup(self, name):
+        return self.sids[self.symtab.get(name)]
+
+    # Expressions
+
+    def rvalue(self, e):
+        """Emit the code of expression e; return the operand of its value."""
+        return self.visit(e)
+
+    def address(self, e):
+        """Emit the code of the address of lvalue e; return its operand.
+
+        Returns 0 for a variable, which is assigned directly."""
+        if isinstance(e, node.ID):
+            return 0
+        if isinstance(e, node.ArrayRef):
+            base = self.rvalue(e.name)
+            index = self.rvalue(e.subscript)
+            t = self.temp(typetab.pointer(e.ctype))
+            self.emit(ADD, t, base, index)
+            return t
+        # *p
+        return self.rvalue(e.expr)
+
+    def store(self, e, addr, value):
+        if addr:
+            self.emit(STORE, addr, value)
+        else:
+            self.emit(COPY, self.lookup(e.name), value)
+
+    def load(self, e, addr):
+        if not addr:
+            return self.lookup(e.name)
+        t = self.temp(e.ctype)
+        self.emit(LOAD, t, addr)
+        return t
+
+    def convert(self, value, t):
+        if self.symbols.type[value] is t:
+            return value
+        dst = self.temp(t)
+        self.emit(CONV, dst, value)
+        return dst
+
+    def gen_Constant(self, e):
+        if e.type == 'string':
+            return self.symbols.add(STRING, e.ctype, e.value)
+        return self.const(e.ctype, typetab.constant_value(e))
+
+    def gen_ID(self, e):
+        sid = self.lookup(e.name)
+        t = e.ctype
+        if t.kind == 'array':
+            addr = self.temp(typetab.pointer(t.of))
+            self.emit(ADDR, addr, sid)
+            return addr
+        return sid
+
+    def gen_Cast(self, e):
+        value = self.rvalue(e.expr)
+        t = e.ctype
+        if t is VOID:
+            return value
+        if t.is_pointer() and self.symbols.type[value].is_pointer():
+            dst = self.temp(t)
+            self.emit(COPY, dst, value)
+            return dst
+        return self.convert(value, t)
+
+    def gen_BinOp(self, e):
+        op = e.op
+        if op in ('&&', '||'):
+            dst = self.temp(INT)
+            done = self.label()
+            self.emit(COPY, dst, self.const(INT, 0 if op == '&&' else 1))
+            left = self.rvalue(e.left)
+            self.emit(JZ if op == '&&' else JNZ, done, left)
+            right = self.rvalue(e.right)
+            self.emit(NE, dst, right, self.const(self.symbols.type[right], 0))
+            self.emit(LABEL, done)
+            return dst
+        left = self.rvalue(e.left)
+        right = self.rvalue(e.right)
+        dst = self.temp(e.ctype)
+        self.emit(BINARY[op], dst, left, right)
+        return dst
+
+    def gen_UnaryOp(self, e):
+        op = e.op
+        if op == 'sizeof':
+            operand = e.expr
+            t = typetab.from_decl(operand) if isinstance(operand, node.Typename) else operand.ctype
+            return self.const(INT, typetab.sizeof(t))
+        if op == '&':
+            if e.expr.ctype.kind == 'function':
+                return self.rvalue(e.expr)
+            if isinstance(e.expr, node.ID):
+                dst = self.temp(e.ctype)
+                self.emit(ADDR, dst, self.lookup(e.expr.name))
+                return dst
+            return self.address(e.expr)
+        if op == '*':
+            ptr = self.rvalue(e.expr)
+            if e.ctype.kind in ('array', 'function'):
+                return ptr
+            dst = self.temp(e.ctype)
+            self.emit(LOAD, dst, ptr)
+            return dst
+        if op == '+':
+            return self.rvalue(e.expr)
+        if op in UNARY:
+            value = self.rvalue(e.expr)
+            dst = self.temp(e.ctype)
+            self.emit(UNARY[op], dst, value)
+            return dst
+        # ++ and --
+        target = e.expr
+        addr = self.address(target)
+        old = self.load(target, addr)
+        result = old
+        if op[0] == 'p':
+            result = self.temp(target.ctype)
+            self.emit(COPY, result, old)
+        t = target.ctype
+        new = self.temp(t) if addr else old
+        if t.is_pointer():
+            one = self.const(INT, 1)
+        else:
+            one = self.const(t, 1.0 if t.rank > INT.rank else 1)
+        self.emit(ADD if '+' in op else SUB, new, old, one)
+        if addr:
+            self.emit(STORE, addr, new)
+        return result if op[0] == 'p' else new
+
+    def gen_Assignment(self, e):
+        target = e.lvalue
+        addr = self.address(target)
+        if e.op == '=':
+            value = self.rvalue(e.rvalue)
+            self.store(target, addr, value)
+            return value
+        # The analyzer converted the right side to the type the operation
+        # is done in.
+        right = self.rvalue(e.rvalue)
+        old = self.load(target, addr)
+        t = target.ctype
+        rt = self.symbols.type[right]
+        if t.is_pointer():
+            rt = t
+        dst = self.temp(rt)
+        self.emit(BINARY[e.op[:-1]], dst, self.convert(old, rt), right)
+        value = self.convert(dst, t)
+        self.store(target, addr, value)
+        return value
+
+    def gen_TernaryOp(self, e):
+        dst = self.temp(e.ctype)
+        other = self.label()
+        done = self.label()
+        self.emit(JZ, other, self.rvalue(e.cond))
+        self.emit(COPY, dst, self.rvalue(e.iftrue))
+        self.emit(JUMP, done)
+        self.emit(LABEL, other)
+        self.emit(COPY, dst, self.rvalue(e.iffalse))
+        self.emit(LABEL, done)
+        return dst
+
+    def gen_ArrayRef(self, e):
+        addr = self.address(e)
+        if e.ctype.kind == 'array':
+            return addr
+        return self.load(e, addr)
+
+    def gen_Call(self, e):
+        args = e.args.exprs if e.args is not None else []
+        values = [self.rvalue(arg) for arg in args]
+        for value in values:
+            self.emit(PARAM, 0, value)
+        func = self.rvalue(e.name)
+        dst = 0 if e.ctype is VOID else self.temp(e.ctype)
+        self.emit(CALL, dst, func, len(values))
+        return dst
+
+    def gen_ExprList(self, e):
+        value = 0
+        for expr in e.exprs:
+            value = self.rvalue(expr)
+        return value
+
+    # Declarations
+
+    def gen_Decl(self, n):
+        t = typetab.from_decl(n.type)
+        if n.name is None:
+            return
+        if t.kind == 'function':
+            self.declare(n.name, t, FUNC, n.lineno)
+            return
+        init = n.init
+        if t.kind == 'array' and t.length is None and init is not None:
+            length = len(init.exprs) if isinstance(init, node.InitList) else \
+                len(typetab.constant_value(init)) + 1
+            t = typetab.array(t.of, length)
+        kind = GLOBAL if self.function.name is INIT else VAR
+        sid = self.declare(n.name, t, kind, n.lineno)
+        if kind == GLOBAL:
+            self.program.globals.append(sid)
+        else:
+            self.function.locals.append(sid)
+        if init is not None:
+            self.line = n.lineno
+            self.initialize(sid, t, init)
+
+    def initialize(self, sid, t, init):
+        if t.kind != 'array':
+            if isinstance(init, node.InitList):
+                init = init.exprs[0]
+            self.emit(COPY, sid, self.rvalue(init))
+            return
+        base = self.temp(typetab.pointer(t.of))
+        self.emit(ADDR, base, sid)
+        self.initialize_array(base, t, init)
+
+    def initialize_array(self, base, t, init):
+        if isinstance(init, node.InitList):
+            items = init.exprs
+        else:
+            # A string literal: its characters and the terminating nul.
+            items = [ord(ch) for ch in typetab.constant_value(init)] + [0]
+        for i, item in enumerate(items):
+            addr = self.temp(typetab.pointer(t.of))
+            self.emit(ADD, addr, base, self.const(INT, i))
+            if t.of.kind == 'array':
+                self.initialize_array(addr, t.of, item)
+            elif isinstance(item, int):
+                self.emit(STORE, addr, self.const(CHAR, item))
+            else:
+                self.emit(STORE, addr, self.rvalue(item))
+
+    def gen_FunctionDef(self, n):
+        decl = n.decl
+        t = typetab.from_decl(decl.type)
+        sid = self.declare(decl.name, t, FUNC, decl.lineno)
+        f = self.begin(decl.name, sid, t, n.lineno)
+        func = decl.type
+        while not isinstance(func, node.FuncDecl):
+            func = func.type
+        self.symtab.insert_block_table(symtab.SymTabBlock())
+        if func.args is not None:
+            params = [p for p in func.args.params if not isinstance(p, node.EllipsisParam)]
+            for param, pt in zip(params, t.params):
+                f.params.append(self.declare(param.name, pt, VAR, param.lineno))
+        for item in n.body.items:
+            self.statement(item)
+        self.symtab.remove_block_table()
+        if not len(f.code) or f.code.op[-1] != RET:
+            self.emit(RET)
+        self.end()
+
+    def begin(self, name, sid, t, lineno=None):
+        f = self.function = Function(name, sid, t, lineno)
+        self.code = f.code
+        self.names = {}
+        self.labels = {}
+        self.program.functions[name] = f
+        return f
+
+    def end(self):
+        self.function = self.program.functions[INIT]
+        self.code = self.function.code
+
+    def gen_TranslationUnit(self, n):
+        self.begin(INIT, 0, typetab.function(VOID))
+        for builtin, t in semantic_analyzer.BUILTINS:
+            self.declare(atoms.intern(builtin), t, FUNC)
+        for ext in n.ext:
+            self.visit(ext)
+        self.emit(RET)
+
+    # Statements
+
+    def statement(self, n):
+        if n.lineno is not None:
+            self.line = n.lineno
+        if isinstance(n, node.Expression):
+            self.rvalue(n)
+        else:
+            self.visit(n)
+
+    def gen_Compound(self, n):
+        self.symtab.insert_block_table(symtab.SymTabBlock())
+        for item in n.items:
+            self.statement(item)
+        self.symtab.remove_block_table()
+
+    def gen_EmptyStatement(self, n):
+        pass
+
+    def gen_If(self, n):
+        other = self.label()
+        self.emit(JZ, other, self.rvalue(n.cond))
+        self.statement(n.iftrue)
+        if n.iffalse is None:
+            self.emit(LABEL, other)
+            return
+        done = self.label()
+        self.emit(JUMP, done)
+        self.emit(LABEL, other)
+        self.statement(n.iffalse)
+        self.emit(LABEL, done)
+
+    def loop(self, body, next_label, done):
+        self.breaks.append(done)
+        self.continues.append(next_label)
+        self.statement(body)
+        self.breaks.pop()
+        self.continues.pop()
+
+    def gen_While(self, n):
+        top = self.label()
+        done = self.label()
+        self.emit(LABEL, top)
+        self.emit(JZ, done, self.rvalue(n.cond))
+        self.loop(n.stmt, top, done)
+        self.emit(JUMP, top)
+        self.emit(LABEL, done)
+
+    def gen_DoWhile(self, n):
+        top = self.label()
+        test = self.label()
+        done = self.label()
+        self.emit(LABEL, top)
+        self.loop(n.stmt, test, done)
+        self.emit(LABEL, test)
+        self.line = n.cond.lineno
+        self.emit(JNZ, top, self.rvalue(n.cond))
+        self.emit(LABEL, done)
+
+    def gen_For(self, n):
+        top = self.label()
+        step = self.label()
+        done = self.label()
+        if n.init is not None:
+            self.rvalue(n.init)
+        self.emit(LABEL, top)
+        if n.cond is not None:
+            self.emit(JZ, done, self.rvalue(n.cond))
+        self.loop(n.stmt, step, done)
+        self.emit(LABEL, step)
+        if n.next is not None:
+            self.line = n.next.lineno
+            self.rvalue(n.next)
+        self.emit(JUMP, top)
+        self.emit(LABEL, done)
+
+    def gen_Switch(self, n):
+        value = self.rvalue(n.cond)
+        done = self.label()
+        default = done
+        for case in switch_labels(n.stmt):
+            label = self.cases[id(case)] = self.label()
+            if isinstance(case, node.Default):
+                default = label
+                continue
+            test = self.temp(INT)
+            self.emit(EQ, test, value, self.rvalue(case.expr))
+            self.emit(JNZ, label, test)
+        self.emit(JUMP, default)
+        self.breaks.append(done)
+        self.statement(n.stmt)
+        self.breaks.pop()
+        self.emit(LABEL, done)
+
+    def gen_Case(self, n):
+        self.emit(LABEL, self.cases.pop(id(n)))
+        self.statement(n.stmt)
+
+    gen_Default = gen_Case
+
+    def user_label(self, name):
+        label = self.labels.get(name)
+        if label is None:
+            label = self.labels[name] = self.label()
+        return label
+
+    def gen_Label(self, n):
+        self.emit(LABEL, self.user_label(n.name))
+        self.statement(n.stmt)
+
+    def gen_Goto(self, n):
+        self.emit(JUMP, self.user_label(n.name))
+
+    def gen_Break(self, n):
+        self.emit(JUMP, self.breaks[-1])
+
+    def gen_Continue(self, n):
+        self.emit(JUMP, self.continues[-1])
+
+    def gen_Return(self, n):
+        self.emit(RET, 0, self.rvalue(n.expr) if n.expr is not None else 0)
+
+
+def switch_labels(stmt):
+    """The Case and Default nodes of a switch body, not in nested switches."""
+    found = []
+    stack = [stmt]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, (node.Case, node.Default)):
+            found.append(n)
+        elif isinstance(n, (node.Switch, node.Expression)):
+            continue
+        stack.extend(reversed([child for _, child in n.children()]))
+    return found
+
+
+def generate(ast):
+    """Return the Program of a TranslationUnit checked by semantic_analyzer."""
+    gen = Generator()
+    gen.visit(ast)
+    return gen.program
+
+
+def main(argv):
+    import syntax_analyzer
+
+    for path in argv:
+        with open(path) as f:
+            ast = syntax_analyzer.parse(f.read())
+        if ast is None or semantic_analyzer.analyze(ast).errors:
+            return 1
+        dump(generate(ast))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
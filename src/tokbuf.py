@@ -0,0 +1,118 @@
+# ----------------------------------------------------------------------
+# tokbuf.py
+#
+# A compact, columnar token stream.  Instead of one LexToken object per
+# token, a TokenBuffer keeps the token type codes in an array('H') and the
+# start/end byte offsets in two array('I')s over the encoded source.  Line
+# numbers are computed on demand from a lineindex.LineIndex, and token
+# values are handed out as zero-copy memoryview slices of the source.
+# ----------------------------------------------------------------------
+
+from array import array
+
+import lexical_analyzer
+import lineindex
+
+
+# Token type codes are indices into this tuple.
+TOKEN_NAMES = tuple(lexical_analyzer.tokens)
+TOKEN_CODES = dict((name, code) for code, name in enumerate(TOKEN_NAMES))
+
+
+def as_text(value):
+    """Return a token value as str, materializing buffer slices."""
+    if isinstance(value, str):
+        return value
+    return bytes(value).decode('utf-8')
+
+
+class TokenBuffer:
+    def __init__(self, source):
+        self.source = source
+        self.types = array('H')
+        self.starts = array('I')
+        self.ends = array('I')
+        self._line_index = None
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        return BufferToken(self, index)
+
+    def append(self, code, start, end):
+        self.types.append(code)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    @property
+    def line_index(self):
+        if self._line_index is None:
+            self._line_index = lineindex.LineIndex(self.source)
+        return self._line_index
+
+    def type(self, index):
+        return TOKEN_NAMES[self.types[index]]
+
+    def value(self, index):
+        return memoryview(self.source)[self.starts[index]:self.ends[index]]
+
+    def text(self, index):
+        return as_text(self.value(index))
+
+    def lineno(self, index):
+        return self.line_index.lineno(self.starts[index])
+
+    def column(self, index):
+        return self.line_index.column(self.starts[index])
+
+    def position(self, index):
+        return self.line_index.position(self.starts[index])
+
+    def close(self):
+        """Release the source if it is a memory-mapped file.
+
+        A mapped source cannot be closed while memoryviews of its token
+        values are still alive.
+        """
+        close = getattr(self.source, 'close', None)
+        if close is not None:
+            close()
+
+    def nbytes(self):
+        size = sum(a.itemsize * len(a) for a in (self.types, self.starts, self.ends))
+        if self._line_index is not None:
+            size += self._line_index.nbytes()
+        return size
+
+
+class BufferToken:
+    """A lightweight view of one token of a TokenBuffer.
+
+    It has the type/value/lineno/lexpos attributes ply.yacc expects from a
+    token; value and lineno are only computed when a grammar action (or an
+    error handler) actually reads them.
+    """
+
+    __slots__ = ('buf', 'index', 'type', 'lexpos', 'lexer')
+
+    def __init__(self, buf, index, lexer=None):
+        self.buf = buf
+        self.index = index
+        self.type = TOKEN_NAMES[buf.types[index]]
+        self.lexpos = buf.starts[index]
+        self.lexer = lexer
+
+    @property
+    def value(self):
+        return self.buf.value(self.index)
+
+    @property
+    def lineno(self):
+        return self.buf.lineno(self.index)
+
+    def __str__(self):
+        return 'LexToken(%s,%r,%d,%d)' % (
+            self.type, self.buf.text(self.index), self.lineno, self.lexpos)
+
+    __repr__ = __str__
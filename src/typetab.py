@@ -0,0 +1,279 @@
+# ----------------------------------------------------------------------
+# typetab.py
+#
+# The mini-C types, hash-consed.  Every type is built through the
+# constructors below, which look it up in one table keyed by its
+# structure, so there is exactly one object per distinct type: all the
+# 'int *' locals of a program share one Type, and type equality is an
+# identity test (t1 is t2).
+#
+#   basic types   VOID, CHAR, INT, FLOAT, DOUBLE
+#   ERROR         the type of an expression already reported as wrong
+#   pointer(t)    pointer to t
+#   array(t, n)   array of n t's (n is None when the length is unknown)
+#   function(r, params, varargs)
+#
+# from_decl() converts the declarator chains of the AST (TypeDecl,
+# IdentifierType, PtrDecl, ArrayDecl, FuncDecl, Typename) to types, and
+# to_typename() builds the Typename of a type for the casts the semantic
+# analyzer inserts.
+# ----------------------------------------------------------------------
+
+import re
+
+import node
+
+
+class UnsupportedTypeError(ValueError):
+    """Exception raised for a type mini-C does not support (struct, ...)."""
+
+    def __init__(self, what, lineno=None):
+        ValueError.__init__(self, what)
+        self.lineno = lineno
+        self.msg = "%s is not supported in mini-C" % what
+
+
+class Type:
+    """A mini-C type.  Only the constructors of this module create them.
+
+    kind is 'void', 'char', 'int', 'float', 'double', 'pointer', 'array',
+    'function' or 'error'; of is the pointed-to, element or return type; length
+    is the array length; params and varargs describe a function.
+    """
+
+    __slots__ = ('kind', 'of', 'length', 'params', 'varargs', 'rank')
+
+    def __init__(self, kind, of=None, length=None, params=(), varargs=False, rank=0):
+        self.kind = kind
+        self.of = of
+        self.length = length
+        self.params = params
+        self.varargs = varargs
+        self.rank = rank
+
+    def __str__(self):
+        return self.spell('')
+
+    def __repr__(self):
+        return '<type %s>' % self
+
+    def spell(self, inner):
+        """Spell the type as in a declaration of inner (C declarator syntax)."""
+        if self.kind == 'pointer':
+            inner = '*' + inner
+            if self.of.kind in ('array', 'function'):
+                inner = '(%s)' % inner
+            return self.of.spell(inner)
+        if self.kind == 'array':
+            return self.of.spell('%s[%s]' % (inner, '' if self.length is None else self.length))
+        if self.kind == 'function':
+            params = [str(p) for p in self.params]
+            if self.varargs:
+                params.append('...')
+            return self.of.spell('%s(%s)' % (inner, ', '.join(params) or 'void'))
+        return self.kind + (' ' + inner if inner else '')
+
+    def is_arithmetic(self):
+        return self.rank > 0
+
+    def is_integer(self):
+        return self.kind in ('char', 'int')
+
+    def is_pointer(self):
+        return self.kind == 'pointer'
+
+    def is_scalar(self):
+        return self.rank > 0 or self.kind == 'pointer'
+
+
+# Structure key -> Type.
+_types = {}
+
+
+def _basic(kind, rank):
+    t = _types[kind] = Type(kind, rank=rank)
+    return t
+
+
+# rank orders the arithmetic types for the usual conversions.
+VOID = _basic('void', 0)
+CHAR = _basic('char', 1)
+INT = _basic('int', 2)
+FLOAT = _basic('float', 3)
+DOUBLE = _basic('double', 4)
+
+# The semantic analyzer types an undeclared name (and whatever is built
+# on it) as ERROR, which every check accepts without another diagnostic.
+ERROR = _basic('error', 0)
+
+BASIC = {'void': VOID, 'char': CHAR, 'int': INT, 'float': FLOAT, 'double': DOUBLE}
+
+
+def pointer(of):
+    key = ('pointer', of)
+    t = _types.get(key)
+    if t is None:
+        t = _types[key] = Type('pointer', of)
+    return t
+
+
+def array(of, length=None):
+    key = ('array', of, length)
+    t = _types.get(key)
+    if t is None:
+        t = _types[key] = Type('array', of, length)
+    return t
+
+
+def function(returns, params=(), varargs=False):
+    params = tuple(params)
+    key = ('function', returns, params, varargs)
+    t = _types.get(key)
+    if t is None:
+        t = _types[key] = Type('function', returns, params=params, varargs=varargs)
+    return t
+
+
+def count():
+    """Return the number of distinct types built so far."""
+    return len(_types)
+
+
+def common(a, b):
+    """The type of the usual arithmetic conversions of a and b."""
+    if a.rank < INT.rank and b.rank < INT.rank:
+        return INT
+    return a if a.rank >= b.rank else b
+
+
+def decay(t):
+    """The type of t as an rvalue: arrays become pointers to their element
+    and functions pointers to themselves."""
+    if t.kind == 'array':
+        return pointer(t.of)
+    if t.kind == 'function':
+        return pointer(t)
+    return t
+
+
+# Sizes in bytes, as on x86-64.
+SIZES = {'char': 1, 'int': 4, 'float': 4, 'double': 8, 'pointer': 8}
+
+
+def sizeof(t):
+    """The size of an object of type t in bytes (0 for unknown lengths)."""
+    if t.kind == 'array':
+        return 0 if t.length is None else t.length * sizeof(t.of)
+    return SIZES.get(t.kind, 1)
+
+
+def from_names(names, lineno=None):
+    """The type of the type specifiers of an IdentifierType."""
+    kind = 'int'
+    for name in names:
+        if name in BASIC:
+            kind = name
+        elif name not in ('long', 'short', 'signed', 'unsigned'):
+            raise UnsupportedTypeError("type '%s'" % name, lineno)
+    return BASIC[kind]
+
+
+def from_decl(decl):
+    """The type of an AST declarator chain (e.g. Decl.type)."""
+    if isinstance(decl, node.TypeDecl):
+        return from_decl(decl.type)
+    if isinstance(decl, node.Typename):
+        return from_decl(decl.type)
+    if isinstance(decl, node.IdentifierType):
+        return from_names(decl.names, decl.lineno)
+    if isinstance(decl, node.PtrDecl):
+        return pointer(from_decl(decl.type))
+    if isinstance(decl, node.ArrayDecl):
+        length = None
+        if isinstance(decl.dim, node.Constant) and decl.dim.type in ('int', 'char'):
+            length = constant_value(decl.dim)
+        return array(from_decl(decl.type), length)
+    if isinstance(decl, node.FuncDecl):
+        params = []
+        varargs = False
+        if decl.args is not None:
+            for param in decl.args.params:
+                if isinstance(param, node.EllipsisParam):
+                    varargs = True
+                    continue
+                if isinstance(param, node.ID):
+                    raise UnsupportedTypeError('old-style parameter list', param.lineno)
+                t = from_decl(param.type)
+                if t is VOID and not params:
+                    # f(void)
+                    continue
+                # Array and function parameters are adjusted to pointers.
+                params.append(decay(t))
+        return function(from_decl(decl.type), params, varargs)
+    if isinstance(decl, node.Struct):
+        raise UnsupportedTypeError(decl.kind, decl.lineno)
+    if isinstance(decl, node.Enum):
+        raise UnsupportedTypeError('enum', decl.lineno)
+    raise UnsupportedTypeError(type(decl).__name__, getattr(decl, 'lineno', None))
+
+
+def to_decl(t, lineno=None):
+    """An AST declarator chain without a name for t (the inverse of
+    from_decl for object types)."""
+    if t.kind == 'pointer':
+        return node.PtrDecl([], to_decl(t.of, lineno), lineno)
+    if t.kind == 'array':
+        dim = None if t.length is None else node.Constant('int', str(t.length), lineno)
+        return node.ArrayDecl(to_decl(t.of, lineno), dim, lineno)
+    if t.kind == 'function':
+        raise UnsupportedTypeError('function type name', lineno)
+    return node.TypeDecl(None, [], node.IdentifierType([t.kind], lineno), lineno)
+
+
+def to_typename(t, lineno=None):
+    """A node.Typename for t, as in a cast."""
+    return node.Typename([], to_decl(t, lineno), lineno)
+
+
+def constant_value(const):
+    """The Python value of a Constant node (a str for a string literal).
+
+    Raises ValueError for a character constant that is not exactly one
+    character, such as 'ab'.
+    """
+    text = str(const.value)
+    if const.type == 'string':
+        return string_value(text)
+    if const.type == 'char':
+        chars = string_value(text[text.index("'"):])
+        if len(chars) != 1:
+            raise ValueError('multi-character character constant')
+        return ord(chars)
+    if const.type == 'int':
+        text = text.rstrip('uUlL')
+        if text[:2] in ('0x', '0X'):
+            return int(text, 16)
+        if len(text) > 1 and text[0] == '0':
+            return int(text, 8)
+        return int(text)
+    return float(text.rstrip('fFlL'))
+
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+# An escape sequence: \x and all the hex digits after it, \ and up to
+# three octal digits, or \ and one character.
+_escape = re.compile(r'\\(?:x([0-9a-fA-F]+)|([0-7]{1,3})|(.))', re.S)
+
+
+def _unescape(m):
+    hexa, octal, ch = m.groups()
+    if ch is not None:
+        return ESCAPES.get(ch, ch)
+    return chr(int(hexa or octal, 16 if hexa else 8) & 0xff)
+
+
+def string_value(text):
+    """The characters of a string literal or character constant, given its
+    text with the quotes."""
+    return _escape.sub(_unescape, text[1:-1])
@@ -0,0 +1,377 @@
+# ----------------------------------------------------------------------
+# vm.py
+#
+# A virtual machine for the register bytecode of bytecode.py: the same
+# values, memory and results as the interpreter of interp.py, without
+# decoding an instruction twice.  The dispatch loop reads the opcode and
+# operands of an instruction straight out of the function's array('i'),
+# the most frequent opcodes tested first, and does not count what it
+# runs.  Loads and stores check for a negative index, as interp.py's
+# do.  A call pushes (chunk, code, registers, return offset, result
+# register) on a stack of its own, so deep recursion in the program is
+# not recursion in Python.  Integer arithmetic wraps around to 32 bits
+# as interp.py's does: an int result outside the range is reduced with
+# interp.wrap().
+#
+#   python src/vm.py [-O] FILE
+#
+# runs a mini-C file (-O: after src/opt.py optimizes it) and exits with
+# the value of main.
+# ----------------------------------------------------------------------
+
+import sys
+from bisect import bisect_right
+
+import bytecode
+import tac
+from bytecode import (MOV, ADD, ADDI, SUB, MUL, DIVI, DIVF, MOD, SHL, SHR, AND, OR, XOR,
+                      ADDF, SUBF, MULF, NEGF,
+                      LT, GT, LE, GE, EQ, NE, NEG, NOT, INV, TOCHAR, TOINT, TOFLOAT,
+                      PADD, PADDI, PSUB, PDIFF, PCMP, ADDR, LOAD, STORE, LOADX, LOADXI,
+                      STOREX, STOREXI, LOADV,
+                      JMP, JZ, JNZ, JLT, JGT, JLE, JGE, JEQ, JNE, JNLT, JNGT, JNLE, JNGE,
+                      CALL, ICALL, RET)
+from interp import Interpreter, InterpError, fold, printf, wrap
+from typetab import INT
+
+
+class VM:
+    """Runs a bytecode.Bytecode; printf output goes to out."""
+
+    def __init__(self, code, out=sys.stdout):
+        self.bytecode = code
+        self.out = out
+        self.calls = 0
+
+    def enter(self, chunk, args):
+        regs = chunk.template[:]
+        for reg, n in chunk.fresh:
+            regs[reg] = [0] * n
+        regs[1:len(args) + 1] = args
+        return regs
+
+    def callee(self, ptr):
+        """The index of the function ptr points to, None for printf."""
+        if type(ptr) is not str:
+            raise InterpError('call through an invalid function pointer')
+        index = self.bytecode.index.get(ptr)
+        if index is None:
+            if ptr in Interpreter.BUILTINS:
+                return None
+            raise InterpError("call of an undefined function '%s'" % ptr)
+        return index
+
+    def run(self, entry='main', args=()):
+        """Run the global initializers and then entry; return its value."""
+        code = self.bytecode
+        if code.init is not None:
+            self.call(code.init, [])
+        index = code.index.get(entry)
+        if index is None:
+            raise InterpError("no function '%s'" % entry)
+        value = self.call(index, list(args))
+        return 0 if value is None else value
+
+    def call(self, index, args):
+        functions = self.bytecode.functions
+        out = self.out
+        chunk = functions[index]
+        code = chunk.code
+        regs = self.enter(chunk, args)
+        pc = 0
+        stack = []
+        try:
+            while True:
+                op = code[pc]
+                if op < JLT:
+                    # Moves, arithmetic and memory.
+                    if op == MOV:
+                        regs[code[pc + 1]] = regs[code[pc + 2]]
+                        pc += 3
+                    elif op == ADDI:
+                        v = regs[code[pc + 2]] + code[pc + 3]
+                        regs[code[pc + 1]] = v if -0x80000000 <= v <= 0x7FFFFFFF else wrap(v)
+                        pc += 4
+                    elif op == ADD:
+                        v = regs[code[pc + 2]] + regs[code[pc + 3]]
+                        regs[code[pc + 1]] = v if -0x80000000 <= v <= 0x7FFFFFFF else wrap(v)
+                        pc += 4
+                    elif op == SUB:
+                        v = regs[code[pc + 2]] - regs[code[pc + 3]]
+                        regs[code[pc + 1]] = v if -0x80000000 <= v <= 0x7FFFFFFF else wrap(v)
+                        pc += 4
+                    elif op == MUL:
+                        v = regs[code[pc + 2]] * regs[code[pc + 3]]
+                        regs[code[pc + 1]] = v if -0x80000000 <= v <= 0x7FFFFFFF else wrap(v)
+                        pc += 4
+                    elif op == LOAD:
+                        p = regs[code[pc + 2]]
+                        i = p[1]
+                        if i < 0:
+                            raise IndexError(i)
+                        regs[code[pc + 1]] = p[0][i]
+                        pc += 3
+                    elif op == STORE:
+                        p = regs[code[pc + 1]]
+                        i = p[1]
+                        if i < 0:
+                            raise IndexError(i)
+                        p[0][i] = regs[code[pc + 2]]
+                        pc += 3
+                    elif op == LOADX:
+                        p = regs[code[pc + 2]]
+                        i = p[1] + regs[code[pc + 3]] * code[pc + 4]
+                        if i < 0:
+                            raise IndexError(i)
+                        regs[code[pc + 1]] = p[0][i]
+                        pc += 5
+                    elif op == LOADXI:
+                        p = regs[code[pc + 2]]
+                        i = p[1] + code[pc + 3]
+                        if i < 0:
+                            raise IndexError(i)
+                        regs[code[pc + 1]] = p[0][i]
+                        pc += 4
+                    elif op == STOREX:
+                        p = regs[code[pc + 1]]
+                        i = p[1] + regs[code[pc + 2]] * code[pc + 3]
+                        if i < 0:
+                            raise IndexError(i)
+                        p[0][i] = regs[code[pc + 4]]
+                        pc += 5
+                    elif op == STOREXI:
+                        p = regs[code[pc + 1]]
+                        i = p[1] + code[pc + 2]
+                        if i < 0:
+                            raise IndexError(i)
+                        p[0][i] = regs[code[pc + 3]]
+                        pc += 4
+                    elif op == PADD:
+                        p = regs[code[pc + 2]]
+                        regs[code[pc + 1]] = (p[0], p[1] + regs[code[pc + 3]] * code[pc + 4])
+                        pc += 5
+                    elif op == PADDI:
+                        p = regs[code[pc + 2]]
+                        regs[code[pc + 1]] = (p[0], p[1] + code[pc + 3])
+                        pc += 4
+                    elif op == LOADV:
+                        regs[code[pc + 1]] = regs[code[pc + 2]][0]
+                        pc += 3
+                    else:
+                        # STOREV
+                        regs[code[pc + 1]][0] = regs[code[pc + 2]]
+                        pc += 3
+                elif op < LT:
+                    # Jumps and calls.
+                    if op == JLT:
+                        pc = code[pc + 1] if regs[code[pc + 2]] < regs[code[pc + 3]] else pc + 4
+                    elif op == JNLT:
+                        pc = pc + 4 if regs[code[pc + 2]] < regs[code[pc + 3]] else code[pc + 1]
+                    elif op == JMP:
+                        pc = code[pc + 1]
+                    elif op == JLE:
+                        pc = code[pc + 1] if regs[code[pc + 2]] <= regs[code[pc + 3]] else pc + 4
+                    elif op == JNLE:
+                        pc = pc + 4 if regs[code[pc + 2]] <= regs[code[pc + 3]] else code[pc + 1]
+                    elif op == JGT:
+                        pc = code[pc + 1] if regs[code[pc + 2]] > regs[code[pc + 3]] else pc + 4
+                    elif op == JNGT:
+                        pc = pc + 4 if regs[code[pc + 2]] > regs[code[pc + 3]] else code[pc + 1]
+                    elif op == JGE:
+                        pc = code[pc + 1] if regs[code[pc + 2]] >= regs[code[pc + 3]] else pc + 4
+                    elif op == JNGE:
+                        pc = pc + 4 if regs[code[pc + 2]] >= regs[code[pc + 3]] else code[pc + 1]
+                    elif op == JEQ:
+                        pc = code[pc + 1] if regs[code[pc + 2]] == regs[code[pc + 3]] else pc + 4
+                    elif op == JNE:
+                        pc = code[pc + 1] if regs[code[pc + 2]] != regs[code[pc + 3]] else pc + 4
+                    elif op == JZ:
+                        pc = pc + 3 if regs[code[pc + 2]] else code[pc + 1]
+                    elif op == JNZ:
+                        pc = code[pc + 1] if regs[code[pc + 2]] else pc + 3
+                    elif op == CALL or op == ICALL:
+                        n = code[pc + 3]
+                        end = pc + 4 + n
+                        self.calls += 1
+                        index = code[pc + 2] if op == CALL else self.callee(regs[code[pc + 2]])
+                        if index is None:
+                            args = [regs[reg] for reg in code[pc + 4:end]]
+                            regs[code[pc + 1]] = printf(out, args)
+                            pc = end
+                            continue
+                        stack.append((chunk, code, regs, end, code[pc + 1]))
+                        chunk = functions[index]
+                        new = chunk.template[:]
+                        if chunk.fresh:
+                            for reg, cells in chunk.fresh:
+                                new[reg] = [0] * cells
+                        new[1:n + 1] = [regs[reg] for reg in code[pc + 4:end]]
+                        regs = new
+                        code = chunk.code
+                        pc = 0
+                    else:
+                        # RET and RETV
+                        v = regs[code[pc + 1]] if op == RET else None
+                        if not stack:
+                            return v
+                        chunk, code, regs, pc, dst = stack.pop()
+                        regs[dst] = v
+                elif op == LT:
+                    regs[code[pc + 1]] = 1 if regs[code[pc + 2]] < regs[code[pc + 3]] else 0
+                    pc += 4
+                elif op == GT:
+                    regs[code[pc + 1]] = 1 if regs[code[pc + 2]] > regs[code[pc + 3]] else 0
+                    pc += 4
+                elif op == LE:
+                    regs[code[pc + 1]] = 1 if regs[code[pc + 2]] <= regs[code[pc + 3]] else 0
+                    pc += 4
+                elif op == GE:
+                    regs[code[pc + 1]] = 1 if regs[code[pc + 2]] >= regs[code[pc + 3]] else 0
+                    pc += 4
+                elif op == EQ:
+                    regs[code[pc + 1]] = 1 if regs[code[pc + 2]] == regs[code[pc + 3]] else 0
+                    pc += 4
+                elif op == NE:
+                    regs[code[pc + 1]] = 1 if regs[code[pc + 2]] != regs[code[pc + 3]] else 0
+                    pc += 4
+                elif op == TOINT:
+                    v = int(regs[code[pc + 2]]) & 0xFFFFFFFF
+                    regs[code[pc + 1]] = v - 0x100000000 if v & 0x80000000 else v
+                    pc += 3
+                elif op == TOCHAR:
+                    v = int(regs[code[pc + 2]]) & 0xFF
+                    regs[code[pc + 1]] = v - 0x100 if v & 0x80 else v
+                    pc += 3
+                elif op == TOFLOAT:
+                    regs[code[pc + 1]] = float(regs[code[pc + 2]])
+                    pc += 3
+                elif op == ADDF:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] + regs[code[pc + 3]]
+                    pc += 4
+                elif op == SUBF:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] - regs[code[pc + 3]]
+                    pc += 4
+                elif op == MULF:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] * regs[code[pc + 3]]
+                    pc += 4
+                elif op == DIVI:
+                    # Truncating toward zero; only INT_MIN / -1 overflows.
+                    x = regs[code[pc + 2]]
+                    y = regs[code[pc + 3]]
+                    q = x // y
+                    regs[code[pc + 1]] = wrap(q + 1 if q < 0 and q * y != x else q)
+                    pc += 4
+                elif op == DIVF:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] / regs[code[pc + 3]]
+                    pc += 4
+                elif op == MOD:
+                    # The sign of x, not of y.
+                    x = regs[code[pc + 2]]
+                    y = regs[code[pc + 3]]
+                    v = x % y
+                    regs[code[pc + 1]] = v - y if v and (x < 0) != (y < 0) else v
+                    pc += 4
+                elif op == NEG:
+                    regs[code[pc + 1]] = wrap(-regs[code[pc + 2]])
+                    pc += 3
+                elif op == NEGF:
+                    regs[code[pc + 1]] = -regs[code[pc + 2]]
+                    pc += 3
+                elif op == NOT:
+                    regs[code[pc + 1]] = 0 if regs[code[pc + 2]] else 1
+                    pc += 3
+                elif op == INV:
+                    regs[code[pc + 1]] = ~regs[code[pc + 2]]
+                    pc += 3
+                elif op == AND:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] & regs[code[pc + 3]]
+                    pc += 4
+                elif op == OR:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] | regs[code[pc + 3]]
+                    pc += 4
+                elif op == XOR:
+                    regs[code[pc + 1]] = regs[code[pc + 2]] ^ regs[code[pc + 3]]
+                    pc += 4
+                elif op == SHL or op == SHR:
+                    y = regs[code[pc + 3]]
+                    if y < 0:
+                        raise ArithmeticError('negative shift count')
+                    x = regs[code[pc + 2]]
+                    regs[code[pc + 1]] = wrap(x << y) if op == SHL else x >> y
+                    pc += 4
+                elif op == PSUB:
+                    p = regs[code[pc + 2]]
+                    regs[code[pc + 1]] = (p[0], p[1] - regs[code[pc + 3]] * code[pc + 4])
+                    pc += 5
+                elif op == PDIFF:
+                    p = regs[code[pc + 2]]
+                    q = regs[code[pc + 3]]
+                    if p[0] is not q[0]:
+                        raise InterpError('subtraction of pointers to different objects')
+                    regs[code[pc + 1]] = (p[1] - q[1]) // code[pc + 4]
+                    pc += 5
+                elif op == PCMP:
+                    p = regs[code[pc + 2]]
+                    q = regs[code[pc + 3]]
+                    x = code[pc + 4]
+                    if x in (tac.EQ, tac.NE):
+                        same = p is q or p != 0 and q != 0 and p[0] is q[0] and p[1] == q[1]
+                        regs[code[pc + 1]] = int(same == (x == tac.EQ))
+                    else:
+                        regs[code[pc + 1]] = fold(x, INT, p[1], q[1])
+                    pc += 5
+                elif op == ADDR:
+                    regs[code[pc + 1]] = (regs[code[pc + 2]], 0)
+                    pc += 3
+                else:
+                    # PRINTF
+                    end = pc + 3 + code[pc + 2]
+                    self.calls += 1
+                    regs[code[pc + 1]] = printf(out, [regs[reg] for reg in code[pc + 3:end]])
+                    pc = end
+        except InterpError as e:
+            e.lineno = line(chunk, pc)
+            raise
+        except ZeroDivisionError:
+            raise InterpError('division by zero', line(chunk, pc))
+        except ArithmeticError as e:
+            raise InterpError(str(e), line(chunk, pc))
+        except (TypeError, IndexError, ValueError):
+            raise InterpError('invalid memory access', line(chunk, pc))
+
+
+def line(chunk, pc):
+    """The source line of the instruction of chunk at offset pc."""
+    return chunk.lines[bisect_right(chunk.starts, pc) - 1]
+
+
+def run(program, out=sys.stdout):
+    """Compile a tac.Program to bytecode and run it; return main's value."""
+    return VM(bytecode.compile(program), out).run()
+
+
+def main(argv):
+    import semantic_analyzer
+    import syntax_analyzer
+
+    optimize = '-O' in argv
+    argv = [arg for arg in argv if arg != '-O']
+    with open(argv[0]) as f:
+        ast = syntax_analyzer.parse(f.read())
+    if ast is None or semantic_analyzer.analyze(ast).errors:
+        return 1
+    program = tac.generate(ast)
+    if optimize:
+        import opt
+        opt.optimize(program)
+    try:
+        value = run(program)
+    except InterpError as e:
+        sys.stdout.flush()
+        sys.stderr.write('%s:%s: %s\n' % (argv[0], e.lineno, e.msg))
+        return 1
+    return value & 0xFF
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+# ----------------------------------------------------------------------
+# test_interp.py
+#
+# Integer overflow in src/interp.py and src/vm.py, without and with the
+# optimizer of src/opt.py: int arithmetic wraps around to 32 bits and
+# char arithmetic to 8, in two's complement, whether an instruction is
+# run or folded at compile time.  The expected output is what gcc
+# -fwrapv prints.
+#
+#   python test/test_interp.py
+# ----------------------------------------------------------------------
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import interp
+import lexical_analyzer
+import opt
+import semantic_analyzer
+import syntax_analyzer
+import tac
+import vm
+from typetab import CHAR, INT, DOUBLE
+
+OVERFLOW = r"""int mul(int a, int b) {
+  return a * b;
+}
+
+int main() {
+  int i;
+  int h;
+  int big;
+  char c;
+  double d;
+  big = 2147483647;
+  h = 0;
+  for (i = 0; i < 100; i++) {
+    h = h * 31 + i;
+    h = h ^ (h << 7);
+  }
+  printf("%d\n", h);
+  printf("%d %d %d\n", big + 1, -(big + 1), big * big);
+  printf("%d %d\n", mul(65536, 65536), mul(big, 3));
+  printf("%d %d\n", 1 << 31, 2147483647 + 2147483647);
+  c = 127;
+  c++;
+  printf("%d\n", c);
+  c = 100;
+  c = c * 3;
+  printf("%d\n", c);
+  d = 3000000000.0;
+  printf("%f %f\n", d + d, -(d * 2));
+  return h & 255;
+}
+"""
+
+EXPECTED = """78747698
+-2147483648 -2147483648 1
+0 2147483645
+-2147483648 -2
+-128
+44
+6000000000.000000 -6000000000.000000
+"""
+
+
+def program(source, optimize):
+    ast = syntax_analyzer.parse(source, lexer=lexical_analyzer.get_lexer())
+    assert semantic_analyzer.analyze(ast).errors == 0
+    p = tac.generate(ast)
+    if optimize:
+        opt.optimize(p)
+    return p
+
+
+class OverflowTest(unittest.TestCase):
+
+    def test_wrap(self):
+        for optimize in (False, True):
+            for name in ('interp', 'vm'):
+                with self.subTest(machine=name, optimize=optimize):
+                    out = io.StringIO()
+                    p = program(OVERFLOW, optimize)
+                    if name == 'interp':
+                        value = interp.run(p, out)[0]
+                    else:
+                        value = vm.run(p, out)
+                    self.assertEqual(out.getvalue(), EXPECTED)
+                    self.assertEqual(value, 50)
+
+    def test_fold(self):
+        self.assertEqual(interp.fold(tac.ADD, INT, 2147483647, 1), -2147483648)
+        self.assertEqual(interp.fold(tac.SUB, INT, -2147483648, 1), 2147483647)
+        self.assertEqual(interp.fold(tac.MUL, INT, 65536, 65536), 0)
+        self.assertEqual(interp.fold(tac.SHL, INT, 1, 31), -2147483648)
+        self.assertEqual(interp.fold(tac.NEG, INT, -2147483648), -2147483648)
+        self.assertEqual(interp.fold(tac.DIV, INT, -2147483648, -1), -2147483648)
+        self.assertEqual(interp.fold(tac.ADD, CHAR, 127, 1), -128)
+        self.assertEqual(interp.fold(tac.MUL, DOUBLE, 3e9, 2.0), 6e9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# ----------------------------------------------------------------------
+# test_minic.py
+#
+# Diagnostics of the compiler driver src/minic.py: every one carries
+# the file name and a line and column, and a file the compiler fails on
+# yields a diagnostic without stopping the files after it.
+#
+#   python test/test_minic.py
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import minic
+import semantic_analyzer
+
+GOOD = "int main() {\n  return 0;\n}\n"
+
+
+class MinicTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, source):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            f.write(source)
+        return path
+
+    def test_end_of_input(self):
+        path = self.write('e6.c', "int main() {\n  return 0;\n\n")
+        result = minic.compile_file(path)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.diagnostics, [path + ':2:11: Syntax error at end of input'])
+
+    def test_missing_file(self):
+        path = os.path.join(self.tmp.name, 'missing.c')
+        [result] = minic.compile_files([path], 1)
+        self.assertFalse(result.ok)
+        self.assertEqual(len(result.diagnostics), 1)
+        self.assertTrue(result.diagnostics[0].startswith(path + ': error: '))
+
+    def test_failure_is_per_file(self):
+        bad = self.write('bad.c', GOOD)
+        good = self.write('good.c', "int f() {\n  return 1;\n}\n")
+        analyze = semantic_analyzer.analyze
+
+        def fail(ast):
+            if str(ast.ext[0].decl.name) == 'main':
+                raise RuntimeError('boom')
+            return analyze(ast)
+
+        with mock.patch.object(semantic_analyzer, 'analyze', fail):
+            results = list(minic.compile_files([bad, good], 1))
+        self.assertEqual(results[0].diagnostics, [bad + ': internal error: RuntimeError: boom'])
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[1].diagnostics, [])
+        self.assertTrue(results[1].ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# ----------------------------------------------------------------------
+# test_parser.py
+#
+# Diagnostics of src/syntax_analyzer.py through the fast parse loop of
+# src/fastparse.py, with the PLY lexer and the scanner's two lexers: a
+# syntax error hands the input to ply's parser for recovery, and every
+# illegal character, before or after the error, must still be reported
+# exactly once.
+#
+#   python test/test_parser.py
+# ----------------------------------------------------------------------
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import lexical_analyzer
+import scanner
+import syntax_analyzer
+
+SOURCE = """int main() {
+  int a;
+  a = 1 @ 2;
+  a = $ 3;
+  return 0;
+}
+"""
+
+EXPECTED = [
+    "3:9: Illegal character '@'",
+    "3:11: Syntax error at '2'",
+    "4:7: Illegal character '$'",
+]
+
+LEXERS = {
+    'ply': lexical_analyzer.get_lexer,
+    'scanner': scanner.ScannerLexer,
+    'buffer': scanner.BufferLexer,
+}
+
+
+def diagnostics(source, lexer):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        syntax_analyzer.parse(source, lexer=lexer)
+    return out.getvalue().splitlines()
+
+
+class DiagnosticsTest(unittest.TestCase):
+
+    def test_each_reported_once(self):
+        for name, make in LEXERS.items():
+            with self.subTest(lexer=name):
+                # The scanners report illegal characters as they scan the
+                # whole input, before parsing, so only the order differs.
+                self.assertCountEqual(diagnostics(SOURCE, make()), EXPECTED)
+
+    def test_without_syntax_error(self):
+        source = SOURCE.replace('1 @ 2', '1 @ + 2')
+        for name, make in LEXERS.items():
+            with self.subTest(lexer=name):
+                self.assertEqual(diagnostics(source, make()),
+                                 ["3:9: Illegal character '@'", "4:7: Illegal character '$'"])
+
+    def test_parse_again(self):
+        # A lexer replays the tokens of its current input only.
+        lexer = scanner.BufferLexer()
+        diagnostics(SOURCE, lexer)
+        self.assertEqual(diagnostics("int main() { return 0 }\n", lexer),
+                         ["1:23: Syntax error at '}'"])
+
+
+if __name__ == "__main__":
+    unittest.main()
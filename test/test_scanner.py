@@ -0,0 +1,92 @@
+# ----------------------------------------------------------------------
+# test_scanner.py
+#
+# The scanners of src/scanner.py must produce the token stream of the
+# PLY lexer of src/lexical_analyzer.py: scan() without and with the
+# token profile, and scan_buffer() on bytes and on a memory-mapped file
+# (scan_file()).  The inputs are generated programs, every punctuator
+# next to every other, comments and preprocessor lines.
+#
+#   python test/test_scanner.py
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import gen
+import lexical_analyzer
+import scanner
+from bench_lexer import punctuators
+
+COMMENTS = """/* one line */ int x; /**/
+/* several
+   lines, with * and / and "quotes" inside */ x = 1 /* between */ + 2;
+/** stars **/ y/*glued*/=x;/* at the end */"""
+
+PREPROCESSOR = """#include <stdio.h>
+#define N 10
+int a[N];
+  # define SPACED
+#if 0 /* a comment on a directive */
+int b;
+#endif
+"""
+
+
+def buffer_tokens(buf):
+    return [(buf.type(i), buf.text(i), buf.starts[i]) for i in range(len(buf))]
+
+
+class ScannerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plain = scanner.Scanner()
+        cls.profiled = scanner.get_scanner()
+
+    def ply_tokens(self, data):
+        lexer = lexical_analyzer.get_lexer()
+        lexer.input(data)
+        return [(t.type, t.value, t.lexpos) for t in lexer]
+
+    def check(self, data):
+        expected = self.ply_tokens(data)
+        self.assertTrue(expected)
+        self.assertEqual(self.plain.scan(data), expected)
+        self.assertEqual(self.profiled.scan(data), expected)
+        self.assertEqual(buffer_tokens(self.plain.scan_buffer(data.encode('ascii'))), expected)
+        self.assertEqual(buffer_tokens(self.profiled.scan_buffer(data.encode('ascii'))), expected)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'input.c')
+            with open(path, 'w') as f:
+                f.write(data)
+            buf = self.profiled.scan_file(path)
+            try:
+                self.assertEqual(buffer_tokens(buf), expected)
+            finally:
+                buf.close()
+
+    def test_program(self):
+        self.check(gen.program(64 * 1024))
+
+    def test_example(self):
+        self.check(gen.example())
+
+    def test_punctuators(self):
+        self.check(punctuators())
+
+    def test_comments(self):
+        self.check(COMMENTS)
+
+    def test_preprocessor(self):
+        self.check(PREPROCESSOR)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# ----------------------------------------------------------------------
+# test_semantic.py
+#
+# Diagnostics of src/semantic_analyzer.py, and the values of checked
+# programs as run by src/interp.py and src/vm.py.
+#
+#   python test/test_semantic.py
+# ----------------------------------------------------------------------
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import interp
+import lexical_analyzer
+import semantic_analyzer
+import syntax_analyzer
+import tac
+import vm
+
+
+def analyze(source):
+    """Return the Analyzer of source and the diagnostics it reported."""
+    errors = []
+    ast = syntax_analyzer.parse(source, lexer=lexical_analyzer.get_lexer())
+    semantic_analyzer.analyze(ast, lambda lineno, msg: errors.append('%s: %s' % (lineno, msg)))
+    return ast, errors
+
+
+class SemanticTest(unittest.TestCase):
+
+    def check(self, source, expected):
+        self.assertEqual(analyze(source)[1], expected)
+
+    def run_both(self, source):
+        """The values main returns in the interpreter and in the VM."""
+        values = []
+        for run in (lambda p: interp.run(p, io.StringIO())[0],
+                    lambda p: vm.run(p, io.StringIO())):
+            ast, errors = analyze(source)
+            self.assertEqual(errors, [])
+            values.append(run(tac.generate(ast)))
+        return values
+
+    def test_undeclared(self):
+        # One diagnostic per undeclared name, not one more for every
+        # operator, call or assignment built on it.
+        self.check("""int main() {
+  int a;
+  a = h(1);
+  a = b + 1;
+  a = c[2] * -d;
+  e = a;
+  a = f(2) ? g : 3;
+  if (x) return y;
+  return a;
+}
+""", ["3: 'h' undeclared", "4: 'b' undeclared", "5: 'c' undeclared", "5: 'd' undeclared",
+      "6: 'e' undeclared", "7: 'f' undeclared", "7: 'g' undeclared", "8: 'x' undeclared",
+      "8: 'y' undeclared"])
+
+    def test_after_undeclared(self):
+        # Errors of their own are still reported.
+        self.check("int main() {\n  int a;\n  a = h(1);\n  a = 1 ();\n  return a & 1.5;\n}\n",
+                   ["3: 'h' undeclared", '4: called object is not a function',
+                    "5: invalid operands to binary & (have 'int' and 'double')"])
+
+    def test_multi_char(self):
+        self.check("int main() {\n  char c;\n  c = 'ab';\n  return c;\n}\n",
+                   ['3: multi-character character constant'])
+
+    def test_char_escapes(self):
+        source = r"""int main() {
+  char s[4] = "\101\x42z";
+  return ('\101' == 65) + ('\x41' == 65) * 2 + (s[1] == 'B') * 4 + ('\0' == 0) * 8;
+}
+"""
+        self.assertEqual(self.run_both(source), [15, 15])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# ----------------------------------------------------------------------
+# test_symtab.py
+#
+# The scoped symbol table of src/symtab.py: shadowing and leaving
+# blocks, duplicate and undeclared names, and the ScopeIndex of a
+# program by source line.
+#
+#   python test/test_symtab.py
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import atoms
+import symtab
+from symtab import SymTab, SymTabBlock, SymTabEntry
+from typetab import CHAR, INT
+
+
+class SymTabTest(unittest.TestCase):
+
+    def setUp(self):
+        self.x = atoms.intern('x')
+        self.y = atoms.intern('y')
+
+    def test_shadow(self):
+        table = SymTab()
+        outer = SymTabEntry(self.x, INT, lineno=1)
+        inner = SymTabEntry(self.x, CHAR, lineno=3)
+        table.insert(outer)
+        table.insert_block_table(SymTabBlock(start=2))
+        table.insert(inner)
+        self.assertIs(table.get(self.x), inner)
+        table.remove_block_table(end=4)
+        self.assertIs(table.get(self.x), outer)
+
+    def test_errors(self):
+        table = SymTab()
+        table.insert(SymTabEntry(self.x, INT))
+        with self.assertRaises(symtab.DupDeclError) as cm:
+            table.insert(SymTabEntry(self.x, CHAR))
+        self.assertEqual(cm.exception.msg, "redeclaration of 'x' with no linkage")
+        with self.assertRaises(symtab.UndefIdError) as cm:
+            table.get(self.y)
+        self.assertEqual(cm.exception.msg, "'y' undeclared")
+        # Out of scope after its block is left.
+        table.insert_block_table(SymTabBlock(start=2))
+        table.insert(SymTabEntry(self.y, INT))
+        table.remove_block_table(end=3)
+        with self.assertRaises(symtab.UndefIdError):
+            table.get(self.y)
+
+    def test_scope_index(self):
+        table = SymTab()
+        g = SymTabEntry(self.x, INT, lineno=1)
+        table.insert(g)
+        table.insert_block_table(SymTabBlock(start=2))
+        a = SymTabEntry(self.y, INT, lineno=3)
+        table.insert(a)
+        table.insert_block_table(SymTabBlock(start=4))
+        b = SymTabEntry(self.x, CHAR, lineno=5)
+        table.insert(b)
+        table.remove_block_table(end=6)
+        table.remove_block_table(end=8)
+        index = table.snapshot()
+        self.assertEqual(index.scope_at(1).number, 0)
+        self.assertEqual(index.scope_at(3).number, 1)
+        self.assertEqual(index.scope_at(5).number, 2)
+        self.assertEqual(index.scope_at(7).number, 1)
+        self.assertEqual(index.visible(2), {self.x: g})
+        self.assertEqual(index.visible(5), {self.x: b, self.y: a})
+        self.assertEqual(index.visible(7), {self.x: g, self.y: a})
+
+
+if __name__ == "__main__":
+    unittest.main()
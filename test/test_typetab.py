@@ -0,0 +1,99 @@
+# ----------------------------------------------------------------------
+# test_typetab.py
+#
+# The types of src/typetab.py: hash-consing (one object per distinct
+# type), the declarator chains of the AST, and the values of constants,
+# character escapes in particular.
+#
+#   python test/test_typetab.py
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import node
+import typetab
+from typetab import CHAR, INT, DOUBLE
+
+
+def value(kind, text):
+    return typetab.constant_value(node.Constant(kind, text, 1))
+
+
+class TypesTest(unittest.TestCase):
+
+    def test_hash_consed(self):
+        self.assertIs(typetab.pointer(INT), typetab.pointer(INT))
+        self.assertIs(typetab.array(CHAR, 4), typetab.array(CHAR, 4))
+        self.assertIsNot(typetab.array(CHAR, 4), typetab.array(CHAR))
+        self.assertIs(typetab.function(INT, [CHAR]), typetab.function(INT, (CHAR,)))
+        self.assertIsNot(typetab.function(INT, [CHAR]), typetab.function(INT, [CHAR], True))
+
+    def test_spell(self):
+        self.assertEqual(str(typetab.pointer(typetab.array(INT, 3))), 'int (*)[3]')
+        self.assertEqual(str(typetab.pointer(typetab.function(INT, [CHAR], True))),
+                         'int (*)(char, ...)')
+
+    def test_conversions(self):
+        self.assertIs(typetab.common(CHAR, CHAR), INT)
+        self.assertIs(typetab.common(INT, DOUBLE), DOUBLE)
+        self.assertIs(typetab.decay(typetab.array(CHAR, 4)), typetab.pointer(CHAR))
+        f = typetab.function(INT)
+        self.assertIs(typetab.decay(f), typetab.pointer(f))
+
+    def test_decl(self):
+        # int *a[3]
+        decl = node.ArrayDecl(node.PtrDecl([], node.TypeDecl('a', [], node.IdentifierType(['int']))),
+                              node.Constant('int', '3'))
+        t = typetab.from_decl(decl)
+        self.assertIs(t, typetab.array(typetab.pointer(INT), 3))
+        self.assertIs(typetab.from_decl(typetab.to_decl(t)), t)
+        with self.assertRaises(typetab.UnsupportedTypeError):
+            typetab.from_names(['struct'])
+
+
+class ConstantTest(unittest.TestCase):
+
+    def test_int(self):
+        self.assertEqual(value('int', '42'), 42)
+        self.assertEqual(value('int', '0x1F'), 31)
+        self.assertEqual(value('int', '017'), 15)
+        self.assertEqual(value('int', '10UL'), 10)
+        self.assertEqual(value('int', '0'), 0)
+
+    def test_float(self):
+        self.assertEqual(value('double', '1.5'), 1.5)
+        self.assertEqual(value('double', '2e3f'), 2000.0)
+
+    def test_char(self):
+        self.assertEqual(value('char', "'a'"), 97)
+        self.assertEqual(value('char', "L'a'"), 97)
+        self.assertEqual(value('char', r"'\n'"), 10)
+        self.assertEqual(value('char', r"'\0'"), 0)
+        self.assertEqual(value('char', r"'\\'"), 92)
+        self.assertEqual(value('char', r"'\''"), 39)
+        self.assertEqual(value('char', r"'\?'"), 63)
+
+    def test_char_octal_hex(self):
+        self.assertEqual(value('char', r"'\101'"), 65)
+        self.assertEqual(value('char', r"'\x41'"), 65)
+        self.assertEqual(value('char', r"'\x4'"), 4)
+        # A hex escape takes every hex digit after it.
+        self.assertEqual(value('char', r"'\x141'"), 0x41)
+        self.assertEqual(value('char', r"'\377'"), 255)
+
+    def test_multi_char(self):
+        for text in ("'ab'", r"'\1011'", r"'\n\n'"):
+            with self.assertRaises(ValueError):
+                value('char', text)
+
+    def test_string(self):
+        self.assertEqual(value('string', r'"a\101\x42\n\"\\"'), 'aAB\n"\\')
+        self.assertEqual(value('string', '""'), '')
+
+
+if __name__ == "__main__":
+    unittest.main()